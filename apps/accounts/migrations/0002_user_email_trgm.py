@@ -0,0 +1,25 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+from django.db.models.functions import Upper
+
+
+class Migration(migrations.Migration):
+    """
+    Trigram index on the user email for the builder customer search.
+    pg_trgm is created by customers 0010 (see the prerequisite there); built CONCURRENTLY, so not atomic.
+    """
+
+    atomic = False
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+        ("customers", "0010_customer_search_trgm"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="user",
+            index=GinIndex(OpClass(Upper("email"), name="gin_trgm_ops"), name="accounts_user_email_trgm"),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 from .managers import UserManager
 
 class User(AbstractUser):
@@ -13,5 +15,11 @@ class User(AbstractUser):
 
     objects = UserManager()
 
+    class Meta(AbstractUser.Meta):
+        # Builder customer search by email (pg_trgm, customers migration 0010).
+        indexes = [
+            GinIndex(OpClass(Upper("email"), name="gin_trgm_ops"), name="accounts_user_email_trgm"),
+        ]
+
     def __str__(self):
         return self.email
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# apps/api/v1/builder_views.py
+from decimal import Decimal
+
+from django.db import DataError, transaction
+from django.shortcuts import get_object_or_404
+from rest_framework import permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from apps.accounts.roles import is_manager
+from apps.orders.models import Order
+from apps.orders.services_builder_cache import store_builder_items_json_on_commit
+from apps.orders.services_builder_items import (
+    BUILDER_ITEM_SCHEMAS,
+    BUILDER_ITEMS_VERSION,
+    BuilderItemsError,
+    order_item_kinds,
+    parse_items_payload,
+    save_builder_items,
+)
+
+import logging
+logger = logging.getLogger("app")
+
+
+def _json_value(value):
+    return str(value) if isinstance(value, Decimal) else value
+
+
+@api_view(["GET", "PUT"])
+@permission_classes([permissions.IsAuthenticated])
+def order_builder_items(request, pk, kind):
+    """
+    GET /api/v1/orders/<pk>/items/<kind>
+    PUT /api/v1/orders/<pk>/items/<kind>   {"version": 1, "items": [{...}, ...]}
+
+    EN: Read or replace the positions of one builder (rollers, components, fabrics, mosquitoes,
+        mosquito_components) as a compact list of row objects. Field names match the model;
+        roller rows may carry "id" to update an existing position in place.
+    UA: Читання або заміна позицій білдера списком рядків. Назви полів — як у моделі;
+        рядки ролет можуть містити "id", щоб оновити наявну позицію.
+    """
+    if kind not in BUILDER_ITEM_SCHEMAS:
+        return Response({"detail": f"Unknown builder {kind}"}, status=status.HTTP_404_NOT_FOUND)
+    orders = Order.objects.filter(deleted=False)
+    if not is_manager(request.user):
+        orders = orders.filter(customer=request.user)
+    order = get_object_or_404(orders, pk=pk)
+    fields, _, related_name = BUILDER_ITEM_SCHEMAS[kind]
+
+    if request.method == "GET":
+        items = [
+            # Money and quantities go out as strings so integrations do not lose precision.
+            {field: _json_value(getattr(item, field)) for field, _, _ in fields}
+            for item in getattr(order, related_name).order_by("id")
+        ]
+        return Response({"version": BUILDER_ITEMS_VERSION, "order_id": order.pk, "kind": kind, "items": items})
+
+    if not is_manager(request.user) and order.status != Order.STATUS_QUOTE:
+        return Response({"detail": "Це замовлення можна лише переглядати."}, status=status.HTTP_403_FORBIDDEN)
+    other_kinds = [other for other in order_item_kinds(order) if other != kind]
+    if other_kinds:
+        return Response(
+            {"detail": f"Замовлення вже містить позиції іншого типу: {', '.join(other_kinds)}"},
+            status=status.HTTP_409_CONFLICT,
+        )
+    try:
+        rows = parse_items_payload(request.data)
+        with transaction.atomic():
+            total = save_builder_items(order, kind, rows, request.user)
+    except BuilderItemsError as exc:
+        return Response({"detail": str(exc), "errors": exc.errors}, status=status.HTTP_400_BAD_REQUEST)
+    except DataError:
+        logger.exception("Builder items API: numeric overflow for order %s (%s)", order.pk, kind)
+        return Response(
+            {"detail": "Не вдалося зберегти позиції: перевірте розміри та параметри."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    store_builder_items_json_on_commit(order, kind)
+    return Response(
+        {
+            "version": BUILDER_ITEMS_VERSION,
+            "order_id": order.pk,
+            "kind": kind,
+            "items": len(rows),
+            "total": str(total),
+        }
+    )
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# apps/api/v1/customer_views.py
+from rest_framework import permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from apps.accounts.roles import is_manager
+from apps.customers.selectors import customer_picker_entry, search_customer_profiles
+
+CUSTOMER_SEARCH_LIMIT = 20
+CUSTOMER_SEARCH_MAX_LIMIT = 50
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def customer_search(request):
+    """
+    GET /api/v1/customers/search?q=...&limit=20
+
+    EN: Typeahead for the manager customer picker in the builders. Returns the top matches
+        by company, name, phone or email in Select2 format: {"results": [{"id", "text", "discount"}]}.
+    UA: Пошук клієнта для вибору менеджером у білдерах. Повертає перші збіги за компанією,
+        ПІБ, телефоном або email у форматі Select2.
+    """
+    user = request.user
+    if not (is_manager(user) or user.is_staff or user.is_superuser):
+        return Response({"detail": "Недостатньо прав."}, status=status.HTTP_403_FORBIDDEN)
+    try:
+        limit = int(request.query_params.get("limit") or CUSTOMER_SEARCH_LIMIT)
+    except ValueError:
+        limit = CUSTOMER_SEARCH_LIMIT
+    limit = max(1, min(limit, CUSTOMER_SEARCH_MAX_LIMIT))
+    profiles = search_customer_profiles(request.query_params.get("q"), limit=limit)
+    return Response({"results": [customer_picker_entry(profile) for profile in profiles]})
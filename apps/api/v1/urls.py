@@ -2,6 +2,8 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
 from .views import MyOrdersViewSet
+from .builder_views import order_builder_items
+from .customer_views import customer_search
 from .pricing_views import (
     systems_list,
     system_fabrics,
@@ -39,5 +41,11 @@ urlpatterns = [
     path("pricing/mosquito-preview", mosquito_preview, name="pricing-mosquito-preview"),
     path("pricing/mosquito-components", mosquito_components_list, name="pricing-mosquito-components"),
 
+    # Builder positions as JSON rows (rollers, components, fabrics, mosquitoes, mosquito_components)
+    path("orders/<int:pk>/items/<str:kind>", order_builder_items, name="order-builder-items"),
+
+    # Manager customer picker typeahead (builders)
+    path("customers/search", customer_search, name="customers-search"),
+
 
 ]
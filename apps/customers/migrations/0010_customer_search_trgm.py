@@ -0,0 +1,41 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations
+from django.db.models.functions import Upper
+
+
+class Migration(migrations.Migration):
+    """
+    Trigram indexes for the builder customer search (/api/v1/customers/search).
+    The expressions match what icontains generates on PostgreSQL: UPPER(col::text) LIKE UPPER('%term%').
+
+    Prerequisite: CREATE EXTENSION pg_trgm needs a superuser or, on PostgreSQL 13+, a database
+    owner (pg_trgm is a trusted extension). Where the migration role has neither, have a DBA run
+    `CREATE EXTENSION IF NOT EXISTS pg_trgm;` in the portal database first; TrigramExtension
+    then skips the existing extension.
+
+    The indexes are built CONCURRENTLY (no write lock on the tables), which cannot run inside a
+    transaction, hence atomic = False. If a build is interrupted, drop the INVALID index and rerun.
+    """
+
+    atomic = False
+
+    dependencies = [
+        ("customers", "0009_customerprofile_delivery_address"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexConcurrently(
+            model_name="customerprofile",
+            index=GinIndex(OpClass(Upper("company_name"), name="gin_trgm_ops"), name="cust_profile_company_trgm"),
+        ),
+        AddIndexConcurrently(
+            model_name="customerprofile",
+            index=GinIndex(OpClass(Upper("full_name"), name="gin_trgm_ops"), name="cust_profile_full_name_trgm"),
+        ),
+        AddIndexConcurrently(
+            model_name="customerprofile",
+            index=GinIndex(OpClass(Upper("phone"), name="gin_trgm_ops"), name="cust_profile_phone_trgm"),
+        ),
+    ]
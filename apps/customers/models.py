@@ -1,4 +1,6 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 from django.conf import settings
 
 class Organization(models.Model):
@@ -36,6 +38,15 @@ class CustomerProfile(models.Model):
     avatar = models.ImageField(upload_to="avatars/", blank=True, null=True)
     credit_allowed = models.BooleanField(default=False)
     discount_percent = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+
+    class Meta:
+        # Builder customer search: icontains compiles to UPPER(col) LIKE UPPER('%term%') (pg_trgm, migration 0010).
+        indexes = [
+            GinIndex(OpClass(Upper("company_name"), name="gin_trgm_ops"), name="cust_profile_company_trgm"),
+            GinIndex(OpClass(Upper("full_name"), name="gin_trgm_ops"), name="cust_profile_full_name_trgm"),
+            GinIndex(OpClass(Upper("phone"), name="gin_trgm_ops"), name="cust_profile_phone_trgm"),
+        ]
+
     def __str__(self):
         return f"{self.user.email}"
 
@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef, Q
 
 from apps.customers.models import CustomerProfile
 
@@ -18,7 +19,8 @@ def customer_users_queryset(*, with_orders=False):
         .select_related("customerprofile")
     )
     if with_orders:
-        qs = qs.filter(orders__isnull=False).distinct()
+        Order = User._meta.get_field("orders").related_model
+        qs = qs.filter(Exists(Order.objects.filter(customer_id=OuterRef("pk"))))
     return qs.order_by(*customer_ordering_fields())
 
 
@@ -28,3 +30,42 @@ def customer_profiles_queryset():
         .filter(user__is_active=True, user__is_customer=True)
         .order_by(*customer_ordering_fields(prefix=""))
     )
+
+
+def customer_picker_label(profile):
+    organization = profile.organization
+    return profile.company_name or (organization.name if organization else "") or profile.full_name or profile.user.email
+
+
+def customer_picker_entry(profile):
+    """EN: Customer picker option {"id", "text", "discount"}. UA: Варіант у списку вибору клієнта."""
+    return {
+        "id": profile.user_id,
+        "text": customer_picker_label(profile),
+        "discount": f"{profile.discount_percent or 0:.2f}",
+    }
+
+
+def search_customer_profiles(term, limit=20):
+    """
+    EN: Top `limit` active customers whose company, name, phone or email contains `term`.
+        Profile columns and the user email are searched in separate queries, so each one can
+        use its own trigram index (customers 0010), and merged in picker order.
+    UA: Перші `limit` активних клієнтів, у яких компанія, ПІБ, телефон або email містять `term`.
+        Поля профілю та email шукаються окремими запитами (кожен за своїм trigram-індексом)
+        й об'єднуються в порядку списку вибору.
+    """
+    term = (term or "").strip()
+    base = customer_profiles_queryset().select_related("organization")
+    if not term:
+        return list(base[:limit])
+    by_profile = base.filter(
+        Q(company_name__icontains=term) | Q(full_name__icontains=term) | Q(phone__icontains=term)
+    )
+    by_email = base.filter(user__email__icontains=term)
+    found = {profile.pk: profile for profile in list(by_profile[:limit]) + list(by_email[:limit])}
+
+    def sort_key(profile):
+        return (profile.company_name, profile.full_name, profile.user.email)
+
+    return sorted(found.values(), key=sort_key)[:limit]
@@ -0,0 +1,164 @@
+from dataclasses import dataclass
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Optional
+
+from django.db import models
+
+
+@dataclass(frozen=True)
+class ItemOption:
+    """
+    EN: One optional accessory of a roller position. Only options in use are stored, packed in
+        OrderItem.options as {code: {"qty": ..., "price": "..."}}; `qty_attr`/`price_attr` are
+        the attribute names the rest of the code (and the builder form) uses.
+    UA: Одна опція позиції ролет. Зберігаються лише використані опції — в OrderItem.options
+        як {code: {"qty": ..., "price": "..."}}; `qty_attr`/`price_attr` — назви атрибутів,
+        якими користується решта коду та форма білдера.
+    """
+
+    code: str
+    qty_attr: str
+    price_attr: str
+    qty_places: Optional[int] = None  # None: whole pieces, otherwise running metres
+    price_places: int = 2
+    default_price: Decimal = Decimal("0")
+
+
+def _pieces(code, price_places=2, default_price="0", price_suffix="_price_eur"):
+    return ItemOption(code, f"{code}_qty", f"{code}{price_suffix}", None, price_places, Decimal(default_price))
+
+
+def _metres(code, qty_suffix="_qty", price_suffix="_price_eur_mp", price_places=2, default_price="0"):
+    return ItemOption(code, f"{code}{qty_suffix}", f"{code}{price_suffix}", 2, price_places, Decimal(default_price))
+
+
+# Catalog order is the order of option rows in proposals and workbooks.
+ITEM_OPTIONS = (
+    _pieces("magnets"),
+    _pieces("cord_pvc_tension"),
+    _pieces("cord_copper_barrel"),
+    _pieces("magnet_fix"),
+    _pieces("top_pvc_clip_pair"),
+    _metres("top_pvc_bar_tape"),
+    _metres("bottom_wide_bar"),
+    _pieces("metal_cord_fix"),
+    _metres("top_bar_scotch"),
+    _pieces("motor_no_remote"),
+    _pieces("motor_with_remote"),
+    _pieces("remote_5ch"),
+    _pieces("remote_15ch"),
+    _pieces("middle_bracket"),
+    _pieces("metal_kronsht"),
+    # Catalog accessories with list prices (not set by the builder yet).
+    _pieces("adapter_mosel_internal", 3, "3.461"),
+    _pieces("adapter_mosel_external", 3, "0.797"),
+    _metres("adapter_box_high_white", "_m", "_price_eur", 3, "2.199"),
+    _metres("adapter_box_high_brown", "_m", "_price_eur", 3, "2.249"),
+    _metres("adapter_box_high_graphite", "_m", "_price_eur", 3, "2.837"),
+    _metres("adapter_box_high_oak", "_m", "_price_eur", 3, "4.190"),
+    _metres("adapter_box_low_white", "_m", "_price_eur", 3, "2.161"),
+    _metres("adapter_box_low_brown", "_m", "_price_eur", 3, "2.161"),
+    _metres("adapter_box_low_graphite", "_m", "_price_eur", 3, "4.448"),
+    _metres("shaft_19", "_m", "_price_eur", 3, "1.048"),
+    _metres("shaft_25", "_m", "_price_eur", 3, "1.380"),
+    _metres("shaft_32", "_m", "_price_eur", 3, "2.749"),
+    _metres("shaft_47_white", "_m", "_price_eur", 3, "7.437"),
+    _metres("chain_weight", "_m", "_price_eur", 3, "0.084"),
+    _metres("top_profile_dn_al_white", "_m", "_price_eur", 3, "1.397"),
+    _metres("top_profile_dn_al_brown", "_m", "_price_eur", 3, "2.455"),
+    _metres("top_profile_dn_al_graphite", "_m", "_price_eur", 3, "2.455"),
+    _metres("top_profile_dn_std_pvc_white", "_m", "_price_eur", 3, "1.535"),
+    _metres("top_profile_dn_std_pvc_brown", "_m", "_price_eur", 3, "1.879"),
+    _pieces("insert_plus8_white", 3, "0.154"),
+    _pieces("insert_plus8_brown", 3, "0.154"),
+    _pieces("insert_plus8_graphite", 3, "0.182"),
+    _pieces("insert_plus8_oak", 3, "0.182"),
+)
+# Proposal/workbook labels by price attribute; options without one are shown by attribute name.
+OPTION_LABELS = {
+    "magnets_price_eur": "Фіксація магнітами",
+    "cord_pvc_tension_price_eur": "Фіксація Леска ПВХ з дотяжкою (шт)",
+    "cord_copper_barrel_price_eur": "Фіксація Леска з мідною діжкою (шт)",
+    "magnet_fix_price_eur": "Фіксація магнітами (доп.)",
+    "top_pvc_clip_pair_price_eur": "Кліпса кріплення для верхньої планки ПВХ, пара",
+    "top_pvc_bar_tape_price_eur_mp": "Доплата за верхню планку ПВХ зі скотчем (монтаж без свердління), за м.п.",
+    "bottom_wide_bar_price_eur_mp": "Доплата за широку нижню планку 10/28, за м.п.",
+    "top_bar_scotch_price_eur_mp": "Скотч на верхню планку для встановлення без свердління, за м.п.",
+    "metal_kronsht_price_eur": "Доплата за металеві кронштейни, шт",
+    "metal_cord_fix_price_eur": "Фіксація лески металева",
+    "motor_no_remote_price_eur": "Доплата за електродвигун без пульта (під вимикач, вимикач в вартість не входить), шт",
+    "motor_with_remote_price_eur": "Доплата за електродвигун з одноканальним пультом ДУ (входить до вартості), шт",
+    "middle_bracket_price_eur": "Доплата за проміжковий кронштейн, шт",
+    "remote_5ch_price_eur": "Доплата за 5-ти канальний пульт ДУ, шт",
+    "remote_15ch_price_eur": "Доплата за 15-ти канальний пульт ДУ, шт",
+    "adapter_mosel_internal_price_eur": "Адаптер внутрішній MOSel",
+    "adapter_mosel_external_price_eur": "Адаптер зовнішній MOSel",
+}
+
+ITEM_OPTIONS_BY_CODE = {option.code: option for option in ITEM_OPTIONS}
+ITEM_OPTION_POSITIONS = {option.code: idx for idx, option in enumerate(ITEM_OPTIONS)}
+# Attribute names backed by OrderItem.options rather than by their own columns.
+ITEM_OPTION_ATTRS = frozenset(
+    attr for option in ITEM_OPTIONS for attr in (option.qty_attr, option.price_attr)
+)
+
+
+def _quantize(value, places):
+    try:
+        number = Decimal(str(value or 0).replace(",", "."))
+    except InvalidOperation:
+        number = Decimal("0")
+    if places is None:
+        return int(number.quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+    return number.quantize(Decimal(1).scaleb(-places), rounding=ROUND_HALF_UP)
+
+
+def _option_property(option, key):
+    places = option.qty_places if key == "qty" else option.price_places
+    default = _quantize(0, places) if key == "qty" else option.default_price
+
+    def getter(item):
+        raw = (item.options or {}).get(option.code, {}).get(key)
+        return default if raw is None else _quantize(raw, places)
+
+    def setter(item, value):
+        value = _quantize(value, places)
+        if item.options is None:
+            item.options = {}
+        line = item.options.setdefault(option.code, {})
+        if value:
+            line[key] = value if places is None else str(value)
+        else:
+            line.pop(key, None)
+        if not line:
+            del item.options[option.code]
+
+    return property(getter, setter)
+
+
+def add_option_properties(model):
+    """EN: Attach qty/price attributes for every option. UA: Додає атрибути qty/price для кожної опції."""
+    for option in ITEM_OPTIONS:
+        setattr(model, option.qty_attr, _option_property(option, "qty"))
+        setattr(model, option.price_attr, _option_property(option, "price"))
+    return model
+
+
+def pack_option_lines(options):
+    """
+    EN: Drop option lines without a quantity: an unused option keeps no price either.
+    UA: Прибирає рядки опцій без кількості: невикористана опція не зберігає і ціну.
+    """
+    return {code: line for code, line in (options or {}).items() if line.get("qty")}
+
+
+class OptionLinesField(models.JSONField):
+    """
+    EN: JSON of option lines in use; lines without a quantity are dropped when written.
+    UA: JSON використаних опцій; рядки без кількості не записуються.
+    """
+
+    def get_prep_value(self, value):
+        if isinstance(value, dict):
+            value = pack_option_lines(value)
+        return super().get_prep_value(value)
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from apps.orders.models import Order, OrderStatusLog
+
+
+class Command(BaseCommand):
+    help = "Fill Order.last_status_at from the status log (orders without logs: created_at)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--order", type=int, action="append", help="Order id (repeatable)")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Orders per UPDATE")
+
+    def handle(self, *args, **options):
+        logs = OrderStatusLog.objects.filter(order_id=OuterRef("pk")).order_by("-created_at").values("created_at")
+        orders = Order.objects.all()
+        if options.get("order"):
+            orders = orders.filter(pk__in=options["order"])
+        batch_size = max(1, options["batch_size"])
+
+        updated = 0
+        last_pk = 0
+        while True:
+            ids = list(orders.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                break
+            # QuerySet.update: no save() signals, so workbook caches and ledgers are left alone.
+            updated += Order.objects.filter(pk__in=ids).update(
+                last_status_at=Coalesce(Subquery(logs[:1]), F("created_at")),
+            )
+            last_pk = ids[-1]
+        self.stdout.write(self.style.SUCCESS(f"Backfilled status times: {updated} orders"))
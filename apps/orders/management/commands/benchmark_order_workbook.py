@@ -0,0 +1,87 @@
+import subprocess
+import sys
+import time
+import types
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from apps.orders import views
+from apps.orders.models import Order
+
+VIEWS_PATH = "apps/orders/views.py"
+
+
+def load_views_at(ref):
+    """
+    EN: Import apps/orders/views.py as it was at git revision `ref` (a separate module object,
+        the running views module is untouched).
+    UA: Імпортує apps/orders/views.py з git-ревізії `ref` окремим модулем.
+    """
+    try:
+        source = subprocess.run(
+            ["git", "show", f"{ref}:{VIEWS_PATH}"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError) as exc:
+        raise CommandError(f"Cannot read {VIEWS_PATH} at {ref}: {getattr(exc, 'stderr', '') or exc}")
+    name = f"apps.orders._views_at_{ref.replace('~', '_').replace('^', '_')}"
+    module = types.ModuleType(name)
+    module.__package__ = "apps.orders"
+    module.__file__ = f"{ref}:{VIEWS_PATH}"
+    sys.modules[name] = module
+    exec(compile(source, module.__file__, "exec"), module.__dict__)
+    return module
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark _build_order_workbook against the same function at a baseline git revision "
+        "(views.py loaded from git). Nothing is saved."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--order", type=int, help="Order id (default: the order with the most positions)")
+        parser.add_argument("--runs", type=int, default=10, help="Renders per variant")
+        parser.add_argument("--proposal", action="store_true", help="Render the proposal variant")
+        parser.add_argument(
+            "--baseline",
+            required=True,
+            metavar="REF",
+            help="Git revision whose views.py is the baseline, e.g. the commit before the named-style renderer",
+        )
+
+    def _render(self, module, order, proposal):
+        if proposal:
+            return module._build_proposal_workbook(order)
+        return module._build_order_workbook(order, save_to_file=False)
+
+    def _time(self, module, order, runs, proposal):
+        self._render(module, order, proposal)  # warm-up: queries, imports
+        start = time.perf_counter()
+        for _ in range(runs):
+            self._render(module, order, proposal)
+        return (time.perf_counter() - start) / runs * 1000
+
+    def handle(self, *args, **options):
+        if options.get("order"):
+            order = Order.objects.filter(pk=options["order"]).first()
+        else:
+            order = Order.objects.annotate(positions=Count("items")).order_by("-positions").first()
+        if order is None:
+            raise CommandError("Order not found")
+        runs = max(1, options["runs"])
+        proposal = options["proposal"]
+        baseline = load_views_at(options["baseline"])
+
+        baseline_ms = self._time(baseline, order, runs, proposal)
+        current_ms = self._time(views, order, runs, proposal)
+
+        self.stdout.write(f"Order #{order.pk}: {order.items.count()} positions, {runs} runs")
+        self.stdout.write(f"  baseline ({options['baseline']}): {baseline_ms:8.1f} ms")
+        self.stdout.write(f"  current:  {current_ms:8.1f} ms")
+        self.stdout.write(self.style.SUCCESS(f"Speed-up: x{baseline_ms / current_ms:.2f}"))
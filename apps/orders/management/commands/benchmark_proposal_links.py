@@ -0,0 +1,50 @@
+import time
+
+from django.core import signing
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from apps.orders.services_proposal_links import PROPOSAL_SALT, order_id_from_token, proposal_link_maps
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark per-row cost of proposal links in list views: signing.dumps + two reverse() "
+        "calls per order (the previous behaviour) vs compact HMAC tokens on pre-resolved URLs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000, help="Orders per list")
+        parser.add_argument("--runs", type=int, default=20, help="Lists per variant")
+
+    @staticmethod
+    def _legacy(order_ids):
+        tokens = {oid: signing.dumps({"order": oid}, salt=PROPOSAL_SALT) for oid in order_ids}
+        page_urls = {oid: reverse("orders:proposal_page", args=[tok]) for oid, tok in tokens.items()}
+        excel_urls = {oid: reverse("orders:proposal_excel", args=[tok]) for oid, tok in tokens.items()}
+        return page_urls, excel_urls
+
+    @staticmethod
+    def _per_row_us(fn, order_ids, runs):
+        fn(order_ids)  # warm-up
+        start = time.perf_counter()
+        for _ in range(runs):
+            fn(order_ids)
+        return (time.perf_counter() - start) / (runs * len(order_ids)) * 1_000_000
+
+    def handle(self, *args, **options):
+        rows = max(1, options["rows"])
+        runs = max(1, options["runs"])
+        order_ids = list(range(100_000, 100_000 + rows))
+
+        legacy_us = self._per_row_us(self._legacy, order_ids, runs)
+        fast_us = self._per_row_us(proposal_link_maps, order_ids, runs)
+
+        legacy_token = signing.dumps({"order": order_ids[0]}, salt=PROPOSAL_SALT)
+        if order_id_from_token(legacy_token) != order_ids[0]:
+            self.stdout.write(self.style.ERROR("Legacy token was not accepted"))
+
+        self.stdout.write(f"{rows} orders per list, {runs} runs")
+        self.stdout.write(f"  signing.dumps + reverse(): {legacy_us:8.2f} us/row")
+        self.stdout.write(f"  HMAC + pre-resolved URL:   {fast_us:8.2f} us/row")
+        self.stdout.write(self.style.SUCCESS(f"Speed-up: x{legacy_us / fast_us:.1f}"))
@@ -0,0 +1,195 @@
+import random
+import re
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from apps.core.models import News
+from apps.orders.models import CurrencyRate, Order, OrderStatusLog, Transaction
+
+
+# PostgreSQL "Seq Scan on t", SQLite "SCAN t" without "USING INDEX".
+SEQ_SCAN_RE = re.compile(r"Seq Scan|\bSCAN \S+\s*$", re.MULTILINE)
+SEED_EMAIL_DOMAIN = "explain.invalid"
+SEED_ORDERS_PER_CUSTOMER = 200
+SEED_DAYS = 730
+SEED_BATCH_SIZE = 2000
+
+
+@contextmanager
+def _explicit_created_at(*models):
+    """EN: Let bulk inserts keep the given created_at (auto_now_add off). UA: Вимикає auto_now_add на час вставки."""
+    fields = [model._meta.get_field("created_at") for model in models]
+    saved = [field.auto_now_add for field in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in zip(fields, saved):
+            field.auto_now_add = value
+
+
+class Command(BaseCommand):
+    help = (
+        "Print query plans of the portal's hot queries (order/transaction lists, latest status log, "
+        "currency rate, unread news). Run before and after index migrations on a seeded database "
+        "and compare which plans use Seq Scan vs Index Scan. --seed fills a scratch database "
+        "with synthetic customers, orders, status logs and transactions first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--customer", type=int, help="Customer id (default: the one with most orders)")
+        parser.add_argument("--analyze", action="store_true", help="EXPLAIN ANALYZE (PostgreSQL)")
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            metavar="ORDERS",
+            help=f"Create ORDERS synthetic orders ({SEED_ORDERS_PER_CUSTOMER} per customer) before explaining",
+        )
+        parser.add_argument("--seed-random", type=int, default=1, help="Random seed for --seed (default: 1)")
+        parser.add_argument("--output", help="Also write the report to this file")
+
+    def _seed(self, orders_count, rng):
+        """
+        EN: Synthetic data shaped like production: orders spread over two years with a quarter
+            of quotes, ~5% soft-deleted rows, one status log per order and a transaction per ten orders.
+            Bulk inserts, so no signals (ledger, caches) fire.
+        UA: Синтетичні дані, схожі на робочі: замовлення за два роки, чверть прорахунків, ~5% у кошику,
+            по одному запису статусу на замовлення й транзакція на кожні десять. Без сигналів.
+        """
+        if not settings.DEBUG:
+            raise CommandError("--seed writes synthetic rows; run it only on a scratch database with DEBUG=True")
+        User = get_user_model()
+        now = timezone.now()
+        statuses = [s for s, _ in Order.STATUS_CHOICES]
+        weights = [25 if s == Order.STATUS_QUOTE else 75 / (len(statuses) - 1) for s in statuses]
+        start = User.objects.filter(email__endswith=f"@{SEED_EMAIL_DOMAIN}").count()
+        customers_count = max(1, orders_count // SEED_ORDERS_PER_CUSTOMER)
+        with transaction.atomic():
+            User.objects.bulk_create(
+                [
+                    User(
+                        username=f"customer{start + i}@{SEED_EMAIL_DOMAIN}",
+                        email=f"customer{start + i}@{SEED_EMAIL_DOMAIN}",
+                        is_customer=True,
+                    )
+                    for i in range(customers_count)
+                ],
+                batch_size=SEED_BATCH_SIZE,
+            )
+            customer_ids = list(
+                User.objects.filter(email__endswith=f"@{SEED_EMAIL_DOMAIN}").values_list("pk", flat=True)
+            )
+            with _explicit_created_at(Order, OrderStatusLog, Transaction):
+                for offset in range(0, orders_count, SEED_BATCH_SIZE):
+                    orders = []
+                    for _ in range(min(SEED_BATCH_SIZE, orders_count - offset)):
+                        created_at = now - timedelta(minutes=rng.randrange(SEED_DAYS * 24 * 60))
+                        status = rng.choices(statuses, weights)[0]
+                        orders.append(
+                            Order(
+                                customer_id=rng.choice(customer_ids),
+                                status=status,
+                                deleted=rng.random() < 0.05,
+                                total_eur=Decimal(rng.randrange(1000, 500000)) / 100,
+                                eur_rate=Decimal("45.00"),
+                                created_at=created_at,
+                                last_status_at=created_at,
+                            )
+                        )
+                    orders = Order.objects.bulk_create(orders)
+                    OrderStatusLog.objects.bulk_create(
+                        [OrderStatusLog(order=o, status=o.status, created_at=o.created_at) for o in orders]
+                    )
+                    Transaction.objects.bulk_create(
+                        [
+                            Transaction(
+                                customer_id=o.customer_id,
+                                type=rng.choice([Transaction.DEBIT, Transaction.CREDIT]),
+                                amount=o.total_eur,
+                                eur_rate=Decimal("45.00"),
+                                deleted=rng.random() < 0.05,
+                                created_at=o.created_at,
+                            )
+                            for o in orders[::10]
+                        ]
+                    )
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+        self.stdout.write(
+            self.style.SUCCESS(f"Seeded {orders_count} orders for {customers_count} customers")
+        )
+
+    def _customer(self, customer_id):
+        User = get_user_model()
+        if customer_id:
+            return User.objects.get(pk=customer_id)
+        top = (
+            Order.objects.filter(deleted=False)
+            .values("customer")
+            .annotate(n=Count("id"))
+            .order_by("-n")
+            .first()
+        )
+        return User.objects.get(pk=top["customer"]) if top else User.objects.filter(is_customer=True).first()
+
+    def _queries(self, customer):
+        now = timezone.now()
+        month_start = now - timedelta(days=31)
+        live_orders = Order.objects.filter(deleted=False)
+        live_transactions = Transaction.objects.filter(deleted=False)
+        page_ids = list(live_orders.order_by("-created_at").values_list("pk", flat=True)[:50])
+        return [
+            ("manager order list", live_orders.order_by("-created_at")[:50]),
+            ("manager order list, status", live_orders.filter(status=Order.STATUS_IN_WORK).order_by("-created_at")[:50]),
+            ("manager orders, last month", live_orders.filter(created_at__gte=month_start, created_at__lt=now)),
+            ("customer order list", live_orders.filter(customer=customer).order_by("-created_at")[:50]),
+            (
+                "customer orders, status",
+                live_orders.filter(customer=customer, status=Order.STATUS_QUOTE).order_by("-created_at"),
+            ),
+            ("customer transactions", live_transactions.filter(customer=customer).order_by("-created_at")[:50]),
+            ("customer transactions total", live_transactions.filter(customer=customer).order_by().values("type", "amount", "eur_rate")),
+            ("transactions, last month", live_transactions.filter(created_at__gte=month_start, created_at__lt=now)),
+            (
+                "latest status log per order",
+                OrderStatusLog.objects.filter(order_id__in=page_ids).order_by("order_id", "-created_at"),
+            ),
+            ("current EUR rate", CurrencyRate.objects.filter(currency="EUR").order_by("-updated_at")[:1]),
+            ("unread news", News.objects.filter(is_active=True).exclude(acknowledgements__user=customer)),
+        ]
+
+    def handle(self, *args, **options):
+        if options["seed"] > 0:
+            self._seed(options["seed"], random.Random(options["seed_random"]))
+        customer = self._customer(options.get("customer"))
+        if customer is None:
+            self.stdout.write(self.style.ERROR("No customers in the database"))
+            return
+        analyze = options["analyze"] and connection.vendor == "postgresql"
+        report = [
+            f"Database: {connection.vendor}, customer #{customer.pk}, "
+            f"{Order.objects.count()} orders, {Transaction.objects.count()} transactions"
+        ]
+        self.stdout.write(report[0])
+        for label, qs in self._queries(customer):
+            plan = qs.explain(analyze=True) if analyze else qs.explain()
+            scans = "seq scan" if SEQ_SCAN_RE.search(plan) else "index"
+            heading = f"\n== {label} [{scans}]"
+            self.stdout.write(self.style.MIGRATE_HEADING(heading))
+            self.stdout.write(plan)
+            report.extend([heading, plan])
+        if options.get("output"):
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                fh.write("\n".join(report) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
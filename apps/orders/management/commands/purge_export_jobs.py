@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.orders.services_export_jobs import purge_expired_export_jobs
+
+
+class Command(BaseCommand):
+    help = "Delete expired background export jobs and their files (also scheduled in celery beat)."
+
+    def handle(self, *args, **options):
+        count = purge_expired_export_jobs()
+        self.stdout.write(self.style.SUCCESS(f"Expired export jobs removed: {count}"))
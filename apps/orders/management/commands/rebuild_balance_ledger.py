@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from apps.orders.services_currency import get_current_eur_rate, get_current_usd_rate
+from apps.orders.services_ledger import backfill_missing_ledgers, rebuild_customer_ledger
+
+
+class Command(BaseCommand):
+    help = "Rebuild the balance ledger (orders + transactions with running balance) for customers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--customer", type=int, action="append", help="Customer user id (repeatable)")
+        parser.add_argument(
+            "--missing",
+            action="store_true",
+            help="Only customers with orders/transactions but no ledger yet (run once after deploy)",
+        )
+
+    def handle(self, *args, **options):
+        if options["missing"]:
+            count = backfill_missing_ledgers(options.get("customer"))
+            self.stdout.write(self.style.SUCCESS(f"Built missing balance ledgers: {count} customers"))
+            return
+        User = get_user_model()
+        customer_ids = options.get("customer") or list(
+            User.objects.filter(
+                Q(orders__isnull=False) | Q(transactions__isnull=False) | Q(ledger_entries__isnull=False)
+            )
+            .distinct()
+            .values_list("pk", flat=True)
+        )
+        current_rate = get_current_eur_rate()
+        usd_rate = get_current_usd_rate()
+        total = 0
+        for customer_id in customer_ids:
+            total += rebuild_customer_ledger(customer_id, current_rate=current_rate, usd_rate=usd_rate)
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt balance ledger: {len(customer_ids)} customers, {total} entries")
+        )
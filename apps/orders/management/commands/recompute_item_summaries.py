@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from apps.orders.models import Order
+from apps.orders.services_item_summary import refresh_item_summaries
+
+
+class Command(BaseCommand):
+    help = "Recompute precomputed option lines and totals of roller and mosquito positions"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--order", type=int, action="append", help="Order id (repeatable)")
+
+    def handle(self, *args, **options):
+        orders = Order.objects.filter(Q(items__isnull=False) | Q(mosquito_items__isnull=False)).distinct()
+        if options.get("order"):
+            orders = orders.filter(pk__in=options["order"])
+        order_count = updated = 0
+        for order in orders.order_by("pk").iterator(chunk_size=200):
+            updated += refresh_item_summaries(order)
+            order_count += 1
+        self.stdout.write(
+            self.style.SUCCESS(f"Recomputed item summaries: {order_count} orders, {updated} positions updated")
+        )
@@ -0,0 +1,30 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.orders.services_ledger import snapshot_balances
+
+
+class Command(BaseCommand):
+    help = "Store end-of-day customer balances (default: yesterday and today). Run nightly after midnight."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Day to snapshot, YYYY-MM-DD (default: yesterday and today)")
+        parser.add_argument("--days", type=int, default=0, help="Also backfill this many days before --date")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        if options.get("date"):
+            try:
+                end_day = datetime.date.fromisoformat(options["date"])
+            except ValueError:
+                raise CommandError("--date must be YYYY-MM-DD")
+            days = [end_day - datetime.timedelta(days=i) for i in range(options["days"], -1, -1)]
+        else:
+            start = today - datetime.timedelta(days=1 + options["days"])
+            days = [start + datetime.timedelta(days=i) for i in range((today - start).days + 1)]
+
+        for day in days:
+            count = snapshot_balances(day)
+            self.stdout.write(self.style.SUCCESS(f"Balance snapshots for {day.isoformat()}: {count}"))
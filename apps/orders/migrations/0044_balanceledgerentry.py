@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0043_ordermosquitoitem_options_total_usd_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceLedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('order', 'Замовлення'), ('transaction', 'Транзакція')], max_length=16)),
+                ('created_at', models.DateTimeField(help_text='Дата замовлення або транзакції')),
+                ('seq', models.PositiveIntegerField(help_text='Порядковий номер запису в історії клієнта')),
+                ('amount_uah', models.DecimalField(decimal_places=2, help_text='Сума операції, грн (замовлення з мінусом)', max_digits=14)),
+                ('running_balance_uah', models.DecimalField(decimal_places=2, help_text='Баланс клієнта після операції, грн', max_digits=14)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to=settings.AUTH_USER_MODEL)),
+                ('order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='orders.order')),
+                ('transaction', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='orders.transaction')),
+            ],
+            options={
+                'verbose_name': 'Запис журналу балансу',
+                'verbose_name_plural': 'Журнал балансу',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['customer', '-created_at', '-id'], name='ledger_customer_created_idx'), models.Index(fields=['-created_at', '-id'], name='ledger_created_idx')],
+                'constraints': [models.UniqueConstraint(fields=('customer', 'seq'), name='ledger_customer_seq_uniq')],
+            },
+        ),
+    ]
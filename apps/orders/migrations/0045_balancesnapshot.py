@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0044_balanceledgerentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='День, на кінець якого зафіксовано баланс')),
+                ('balance_uah', models.DecimalField(decimal_places=2, help_text='Баланс, грн', max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Знімок балансу',
+                'verbose_name_plural': 'Знімки балансу',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date', 'balance_uah'], name='balance_snapshot_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('customer', 'date'), name='balance_snapshot_customer_date_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0045_balancesnapshot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('balances', 'Баланс'), ('turnover', 'Оберт'), ('orders', 'Замовлення')], max_length=16)),
+                ('params', models.JSONField(blank=True, default=dict, help_text='GET-фільтри звіту')),
+                ('status', models.CharField(choices=[('pending', 'В черзі'), ('running', 'Формується'), ('done', 'Готово'), ('failed', 'Помилка')], default='pending', max_length=16)),
+                ('progress', models.PositiveSmallIntegerField(default=0, help_text='0–100 %')),
+                ('file', models.FileField(blank=True, null=True, upload_to='exports/')),
+                ('filename', models.CharField(blank=True, max_length=255)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('expires_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Фонове вивантаження',
+                'verbose_name_plural': 'Фонові вивантаження',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
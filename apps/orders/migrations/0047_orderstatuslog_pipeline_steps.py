@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0046_exportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderstatuslog',
+            name='notified_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='orderstatuslog',
+            name='workbook_built_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0047_orderstatuslog_pipeline_steps'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='exportjob',
+            name='kind',
+            field=models.CharField(choices=[('balances', 'Баланс'), ('turnover', 'Оберт'), ('orders', 'Замовлення'), ('production', 'Файли у виробництво')], max_length=16),
+        ),
+    ]
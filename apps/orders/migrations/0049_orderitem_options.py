@@ -0,0 +1,18 @@
+from django.db import migrations
+
+import apps.orders.item_options
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0048_exportjob_production_kind"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="orderitem",
+            name="options",
+            field=apps.orders.item_options.OptionLinesField(blank=True, default=dict),
+        ),
+    ]
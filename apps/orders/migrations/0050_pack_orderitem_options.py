@@ -0,0 +1,95 @@
+from django.db import migrations
+
+# (code, qty column, price column, whole pieces) as of the columns removed in 0051.
+OPTION_COLUMNS = (
+    ("magnets", "magnets_qty", "magnets_price_eur", True),
+    ("cord_pvc_tension", "cord_pvc_tension_qty", "cord_pvc_tension_price_eur", True),
+    ("cord_copper_barrel", "cord_copper_barrel_qty", "cord_copper_barrel_price_eur", True),
+    ("magnet_fix", "magnet_fix_qty", "magnet_fix_price_eur", True),
+    ("top_pvc_clip_pair", "top_pvc_clip_pair_qty", "top_pvc_clip_pair_price_eur", True),
+    ("top_pvc_bar_tape", "top_pvc_bar_tape_qty", "top_pvc_bar_tape_price_eur_mp", False),
+    ("bottom_wide_bar", "bottom_wide_bar_qty", "bottom_wide_bar_price_eur_mp", False),
+    ("metal_cord_fix", "metal_cord_fix_qty", "metal_cord_fix_price_eur", True),
+    ("top_bar_scotch", "top_bar_scotch_qty", "top_bar_scotch_price_eur_mp", False),
+    ("motor_no_remote", "motor_no_remote_qty", "motor_no_remote_price_eur", True),
+    ("motor_with_remote", "motor_with_remote_qty", "motor_with_remote_price_eur", True),
+    ("remote_5ch", "remote_5ch_qty", "remote_5ch_price_eur", True),
+    ("remote_15ch", "remote_15ch_qty", "remote_15ch_price_eur", True),
+    ("middle_bracket", "middle_bracket_qty", "middle_bracket_price_eur", True),
+    ("metal_kronsht", "metal_kronsht_qty", "metal_kronsht_price_eur", True),
+    ("adapter_mosel_internal", "adapter_mosel_internal_qty", "adapter_mosel_internal_price_eur", True),
+    ("adapter_mosel_external", "adapter_mosel_external_qty", "adapter_mosel_external_price_eur", True),
+    ("adapter_box_high_white", "adapter_box_high_white_m", "adapter_box_high_white_price_eur", False),
+    ("adapter_box_high_brown", "adapter_box_high_brown_m", "adapter_box_high_brown_price_eur", False),
+    ("adapter_box_high_graphite", "adapter_box_high_graphite_m", "adapter_box_high_graphite_price_eur", False),
+    ("adapter_box_high_oak", "adapter_box_high_oak_m", "adapter_box_high_oak_price_eur", False),
+    ("adapter_box_low_white", "adapter_box_low_white_m", "adapter_box_low_white_price_eur", False),
+    ("adapter_box_low_brown", "adapter_box_low_brown_m", "adapter_box_low_brown_price_eur", False),
+    ("adapter_box_low_graphite", "adapter_box_low_graphite_m", "adapter_box_low_graphite_price_eur", False),
+    ("shaft_19", "shaft_19_m", "shaft_19_price_eur", False),
+    ("shaft_25", "shaft_25_m", "shaft_25_price_eur", False),
+    ("shaft_32", "shaft_32_m", "shaft_32_price_eur", False),
+    ("shaft_47_white", "shaft_47_white_m", "shaft_47_white_price_eur", False),
+    ("chain_weight", "chain_weight_m", "chain_weight_price_eur", False),
+    ("top_profile_dn_al_white", "top_profile_dn_al_white_m", "top_profile_dn_al_white_price_eur", False),
+    ("top_profile_dn_al_brown", "top_profile_dn_al_brown_m", "top_profile_dn_al_brown_price_eur", False),
+    ("top_profile_dn_al_graphite", "top_profile_dn_al_graphite_m", "top_profile_dn_al_graphite_price_eur", False),
+    ("top_profile_dn_std_pvc_white", "top_profile_dn_std_pvc_white_m", "top_profile_dn_std_pvc_white_price_eur", False),
+    ("top_profile_dn_std_pvc_brown", "top_profile_dn_std_pvc_brown_m", "top_profile_dn_std_pvc_brown_price_eur", False),
+    ("insert_plus8_white", "insert_plus8_white_qty", "insert_plus8_white_price_eur", True),
+    ("insert_plus8_brown", "insert_plus8_brown_qty", "insert_plus8_brown_price_eur", True),
+    ("insert_plus8_graphite", "insert_plus8_graphite_qty", "insert_plus8_graphite_price_eur", True),
+    ("insert_plus8_oak", "insert_plus8_oak_qty", "insert_plus8_oak_price_eur", True),
+)
+BATCH_SIZE = 500
+
+
+def pack_options(apps, schema_editor):
+    OrderItem = apps.get_model("orders", "OrderItem")
+    columns = [column for _, qty, price, _ in OPTION_COLUMNS for column in (qty, price)]
+    batch = []
+    for item in OrderItem.objects.only("pk", *columns).iterator(chunk_size=BATCH_SIZE):
+        options = {}
+        for code, qty_column, price_column, pieces in OPTION_COLUMNS:
+            qty = getattr(item, qty_column) or 0
+            if qty <= 0:
+                continue
+            options[code] = {
+                "qty": int(qty) if pieces else str(qty),
+                "price": str(getattr(item, price_column) or 0),
+            }
+        if options:
+            item.options = options
+            batch.append(item)
+        if len(batch) >= BATCH_SIZE:
+            OrderItem.objects.bulk_update(batch, ["options"])
+            batch = []
+    if batch:
+        OrderItem.objects.bulk_update(batch, ["options"])
+
+
+def unpack_options(apps, schema_editor):
+    OrderItem = apps.get_model("orders", "OrderItem")
+    by_code = {code: (qty, price) for code, qty, price, _ in OPTION_COLUMNS}
+    for item in OrderItem.objects.exclude(options={}).iterator(chunk_size=BATCH_SIZE):
+        fields = []
+        for code, line in (item.options or {}).items():
+            if code not in by_code:
+                continue
+            qty_column, price_column = by_code[code]
+            setattr(item, qty_column, line.get("qty") or 0)
+            setattr(item, price_column, line.get("price") or 0)
+            fields.extend([qty_column, price_column])
+        if fields:
+            item.save(update_fields=fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0049_orderitem_options"),
+    ]
+
+    operations = [
+        migrations.RunPython(pack_options, unpack_options),
+    ]
@@ -0,0 +1,317 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:32
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0050_pack_orderitem_options'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='adapter_box_high_brown_m',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='adapter_box_high_brown_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='adapter_box_high_graphite_m',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='adapter_box_high_graphite_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='adapter_box_high_oak_m',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='adapter_box_high_oak_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='adapter_box_high_white_m',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='adapter_box_high_white_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='adapter_box_low_brown_m',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='adapter_box_low_brown_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='adapter_box_low_graphite_m',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='adapter_box_low_graphite_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='adapter_box_low_white_m',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='adapter_box_low_white_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='adapter_mosel_external_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='adapter_mosel_external_qty',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='adapter_mosel_internal_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='adapter_mosel_internal_qty',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='bottom_wide_bar_price_eur_mp',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='bottom_wide_bar_qty',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='chain_weight_m',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='chain_weight_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='cord_copper_barrel_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='cord_copper_barrel_qty',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='cord_pvc_tension_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='cord_pvc_tension_qty',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='insert_plus8_brown_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='insert_plus8_brown_qty',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='insert_plus8_graphite_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='insert_plus8_graphite_qty',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='insert_plus8_oak_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='insert_plus8_oak_qty',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='insert_plus8_white_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='insert_plus8_white_qty',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='magnet_fix_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='magnet_fix_qty',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='magnets_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='magnets_qty',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='metal_cord_fix_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='metal_cord_fix_qty',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='metal_kronsht_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='metal_kronsht_qty',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='middle_bracket_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='middle_bracket_qty',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='motor_no_remote_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='motor_no_remote_qty',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='motor_with_remote_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='motor_with_remote_qty',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='remote_15ch_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='remote_15ch_qty',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='remote_5ch_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='remote_5ch_qty',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='shaft_19_m',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='shaft_19_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='shaft_25_m',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='shaft_25_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='shaft_32_m',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='shaft_32_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='shaft_47_white_m',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='shaft_47_white_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='top_bar_scotch_price_eur_mp',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='top_bar_scotch_qty',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='top_profile_dn_al_brown_m',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='top_profile_dn_al_brown_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='top_profile_dn_al_graphite_m',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='top_profile_dn_al_graphite_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='top_profile_dn_al_white_m',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='top_profile_dn_al_white_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='top_profile_dn_std_pvc_brown_m',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='top_profile_dn_std_pvc_brown_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='top_profile_dn_std_pvc_white_m',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='top_profile_dn_std_pvc_white_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='top_pvc_bar_tape_price_eur_mp',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='top_pvc_bar_tape_qty',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='top_pvc_clip_pair_price_eur',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='top_pvc_clip_pair_qty',
+        ),
+    ]
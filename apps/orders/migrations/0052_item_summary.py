@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0051_remove_orderitem_option_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='summary',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ordermosquitoitem',
+            name='summary',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
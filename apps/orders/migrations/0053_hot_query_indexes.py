@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0052_item_summary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['customer', '-created_at'], name='order_live_customer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['status', '-created_at'], name='order_live_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['-created_at'], name='order_live_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderstatuslog',
+            index=models.Index(fields=['order', '-created_at'], name='status_log_order_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['customer', '-created_at'], name='transaction_live_customer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['-created_at'], name='transaction_live_created_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0053_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='in_work_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Коли замовлення востаннє передано в роботу', null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='last_status_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Час останньої зміни статусу', null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:14
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0054_order_status_times'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='order',
+            name='in_work_at',
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='last_status_at',
+            field=models.DateTimeField(blank=True, default=django.utils.timezone.now, editable=False, help_text='Час останньої зміни статусу', null=True),
+        ),
+    ]
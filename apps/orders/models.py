@@ -2,8 +2,16 @@
 from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from decimal import Decimal
 
+from .item_options import (
+    ITEM_OPTION_POSITIONS,
+    ITEM_OPTIONS_BY_CODE,
+    OptionLinesField,
+    add_option_properties,
+)
+
 class Order(models.Model):
     STATUS_QUOTE = "quote"  # Прорахунок / чернетка
     STATUS_IN_WORK = "in_work"  # В роботі
@@ -88,10 +96,41 @@ class Order(models.Model):
         related_name="soft_deleted_orders",
     )
     workbook_file = models.FileField(upload_to="order_exports/", blank=True, null=True)
+    # Creation time, then the newest OrderStatusLog time (_log_status_change; backfill: backfill_order_status_times).
+    last_status_at = models.DateTimeField(
+        default=timezone.now,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Час останньої зміни статусу",
+    )
+
+    class Meta:
+        # Lists and reports only read live orders (_orders_scope), filtered by customer/status and date.
+        indexes = [
+            models.Index(
+                fields=["customer", "-created_at"],
+                condition=models.Q(deleted=False),
+                name="order_live_customer_idx",
+            ),
+            models.Index(
+                fields=["status", "-created_at"],
+                condition=models.Q(deleted=False),
+                name="order_live_status_idx",
+            ),
+            models.Index(fields=["-created_at"], condition=models.Q(deleted=False), name="order_live_created_idx"),
+        ]
 
     def __str__(self):
         return f"#{self.pk} {self.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Customer as loaded: a reassignment must also rebuild the previous customer's ledger.
+        instance.loaded_customer_id = instance.__dict__.get("customer_id")
+        return instance
+
     def next_status(self):
         try:
             idx = self.STATUS_FLOW.index(self.status)
@@ -114,6 +153,7 @@ class Order(models.Model):
 from django.db import models
 
 
+@add_option_properties
 class OrderItem(models.Model):
     order = models.ForeignKey("orders.Order", on_delete=models.CASCADE, related_name="items")
     organization = models.ForeignKey(
@@ -164,18 +204,7 @@ class OrderItem(models.Model):
     # Base prices (EUR) for main product
     base_price_eur = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     surcharge_height_eur = models.DecimalField(max_digits=12, decimal_places=2, default=0)
-    
-    magnets_qty = models.PositiveIntegerField(
-        default=0,
-        help_text="Кількість магнітної фіксації",
-    )
-    
-    magnets_price_eur = models.DecimalField(  # можна залишити як 'total' або перепризначити під одиничну ціну
-        max_digits=12,
-        decimal_places=2,
-        default=0,
-        help_text="Ціна магнітної фіксації (може бути загальною або одиничною, залежно від логіки калькулятора)",
-    )
+
     subtotal_eur = models.DecimalField(
         max_digits=12,
         decimal_places=2,
@@ -189,262 +218,13 @@ class OrderItem(models.Model):
     )
 
     # ---------------------------------------------------------------------
-    # Extra options / accessories (per piece or per meter)
-    # ---------------------------------------------------------------------
-    # 1) Фіксація Леска ПВХ з дотяжкою (шт)
-    cord_pvc_tension_qty = models.PositiveIntegerField(
-        default=0,
-        help_text="Кількість фіксацій лески ПВХ з дотяжкою, шт",
-    )
-    cord_pvc_tension_price_eur = models.DecimalField(
-        max_digits=12,
-        decimal_places=2,
-        default=0,
-        help_text="Ціна за одну фіксацію лески ПВХ з дотяжкою, EUR/шт",
-    )
-
-    # 2) Фіксація Леска з мідною діжкою (шт)
-    cord_copper_barrel_qty = models.PositiveIntegerField(
-        default=0,
-        help_text="Кількість фіксацій лески з мідною діжкою, шт",
-    )
-    cord_copper_barrel_price_eur = models.DecimalField(
-        max_digits=12,
-        decimal_places=2,
-        default=0,
-        help_text="Ціна за одну фіксацію лески з мідною діжкою, EUR/шт",
-    )
-
-    # 3) Фіксація Магніт (шт)
-    magnet_fix_qty = models.PositiveIntegerField(
-        default=0,
-        help_text="Кількість магнітних фіксацій, шт",
-    )
-    magnet_fix_price_eur = models.DecimalField(
-        max_digits=12,
-        decimal_places=2,
-        default=0,
-        help_text="Ціна за одну магнітну фіксацію, EUR/шт",
-    )
-
-    # 4) Кліпса кріплення для верхньої планки ПВХ, пара (шт = пар)
-    top_pvc_clip_pair_qty = models.PositiveIntegerField(
-        default=0,
-        help_text="Кількість кліпс для верхньої планки ПВХ, пар",
-    )
-    top_pvc_clip_pair_price_eur = models.DecimalField(
-        max_digits=12,
-        decimal_places=2,
-        default=0,
-        help_text="Ціна за одну пару кліпс, EUR/пара",
-    )
-
-    # 5) Доплата за верхню планку ПВХ зі скотчем (монтаж без свердління), за м.п.
-    top_pvc_bar_tape_qty = models.DecimalField(
-        max_digits=8,
-        decimal_places=2,
-        default=0,
-        help_text="Довжина верхньої планки ПВХ зі скотчем, м.п.",
-    )
-    top_pvc_bar_tape_price_eur_mp = models.DecimalField(
-        max_digits=12,
-        decimal_places=2,
-        default=0,
-        help_text="Ціна доплати за верхню планку ПВХ зі скотчем, EUR/м.п.",
-    )
-
-    # 6) Доплата за широку нижню планку 10/28, за м.п.
-    bottom_wide_bar_qty = models.DecimalField(
-        max_digits=8,
-        decimal_places=2,
-        default=0,
-        help_text="Довжина широкої нижньої планки 10/28, м.п.",
-    )
-    bottom_wide_bar_price_eur_mp = models.DecimalField(
-        max_digits=12,
-        decimal_places=2,
-        default=0,
-        help_text="Ціна доплати за широку нижню планку 10/28, EUR/м.п.",
-    )
-
-    # 7) Фіксація лески металева (шт)
-    metal_cord_fix_qty = models.PositiveIntegerField(
-        default=0,
-        help_text="Кількість металевих фіксацій лески, шт",
-    )
-    metal_cord_fix_price_eur = models.DecimalField(
-        max_digits=12,
-        decimal_places=2,
-        default=0,
-        help_text="Ціна за одну металеву фіксацію лески, EUR/шт",
-    )
-
-    # 8) Скотч на верхню планку для встановлення без свердління, за м.п.
-    top_bar_scotch_qty = models.DecimalField(
-        max_digits=8,
-        decimal_places=2,
-        default=0,
-        help_text="Довжина скотчу на верхню планку (без свердління), м.п.",
-    )
-    top_bar_scotch_price_eur_mp = models.DecimalField(
-        max_digits=12,
-        decimal_places=2,
-        default=0,
-        help_text="Ціна скотчу на верхню планку, EUR/м.п.",
-    )
-
-    # 9) Доплата за електродвигун без пульта (під вимикач), шт
-    motor_no_remote_qty = models.PositiveIntegerField(
-        default=0,
-        help_text="Кількість електродвигунів без пульта (під вимикач), шт",
-    )
-    motor_no_remote_price_eur = models.DecimalField(
-        max_digits=12,
-        decimal_places=2,
-        default=0,
-        help_text="Ціна доплати за один електродвигун без пульта, EUR/шт",
-    )
-
-    # 10) Доплата за електродвигун з одноканальним пультом ДУ, шт
-    motor_with_remote_qty = models.PositiveIntegerField(
-        default=0,
-        help_text="Кількість електродвигунів з одноканальним пультом ДУ, шт",
-    )
-    motor_with_remote_price_eur = models.DecimalField(
-        max_digits=12,
-        decimal_places=2,
-        default=0,
-        help_text="Ціна доплати за електродвигун з одноканальним пультом, EUR/шт",
-    )
-
-    # 12) Доплата за 5-ти канальний пульт ДУ, шт
-    remote_5ch_qty = models.PositiveIntegerField(
-        default=0,
-        help_text="Кількість 5-ти канальних пультів ДУ, шт",
-    )
-    remote_5ch_price_eur = models.DecimalField(
-        max_digits=12,
-        decimal_places=2,
-        default=0,
-        help_text="Ціна доплати за 5-ти канальний пульт ДУ, EUR/шт",
-    )
-
-    # 13) Доплата за 15-ти канальний пульт ДУ, шт
-    remote_15ch_qty = models.PositiveIntegerField(
-        default=0,
-        help_text="Кількість 15-ти канальних пультів ДУ, шт",
-    )
-    remote_15ch_price_eur = models.DecimalField(
-        max_digits=12,
-        decimal_places=2,
-        default=0,
-        help_text="Ціна доплати за 15-ти канальний пульт ДУ, EUR/шт",
-    )
-
-    # 14) Доплата за проміжковий кронштейн, шт
-    middle_bracket_qty = models.PositiveIntegerField(
-        default=0,
-        help_text="Кількість проміжкових кронштейнів, шт",
-    )
-    middle_bracket_price_eur = models.DecimalField(
-        max_digits=12,
-        decimal_places=2,
-        default=0,
-        help_text="Ціна доплати за один проміжковий кронштейн, EUR/шт",
-    )
-    
-    # 15) Доплата за металеві кронштейни, шт								
-    metal_kronsht_qty = models.PositiveIntegerField(
-        default=0,
-        help_text="Кількість металеві кронштейни, шт",
-    )
-    metal_kronsht_price_eur = models.DecimalField(
-        max_digits=12,
-        decimal_places=2,
-        default=0,
-        help_text="Доплата за металеві кронштейни, EUR/шт",
-    )
-    
-    
-
+    # Extra options / accessories (per piece or per meter).
+    # Only options in use are stored: {code: {"qty": ..., "price": "..."}}, see item_options.ITEM_OPTIONS.
+    # Each option is still readable/writable as <code>_qty / <code>_price_eur(_mp) attributes.
     # ---------------------------------------------------------------------
-    
-    
-        # --- Адаптери двигуна Mosel ---
-    adapter_mosel_internal_qty = models.PositiveIntegerField(default=0)
-    adapter_mosel_internal_price_eur = models.DecimalField(max_digits=12, decimal_places=3, default=3.461)
-
-    adapter_mosel_external_qty = models.PositiveIntegerField(default=0)
-    adapter_mosel_external_price_eur = models.DecimalField(max_digits=12, decimal_places=3, default=0.797)
-
-    # --- Адаптер короба високий Uni-Besta (м.п.) ---
-    adapter_box_high_white_m = models.DecimalField(max_digits=8, decimal_places=2, default=0)
-    adapter_box_high_white_price_eur = models.DecimalField(max_digits=12, decimal_places=3, default=2.199)
-
-    adapter_box_high_brown_m = models.DecimalField(max_digits=8, decimal_places=2, default=0)
-    adapter_box_high_brown_price_eur = models.DecimalField(max_digits=12, decimal_places=3, default=2.249)
-
-    adapter_box_high_graphite_m = models.DecimalField(max_digits=8, decimal_places=2, default=0)
-    adapter_box_high_graphite_price_eur = models.DecimalField(max_digits=12, decimal_places=3, default=2.837)
-
-    adapter_box_high_oak_m = models.DecimalField(max_digits=8, decimal_places=2, default=0)
-    adapter_box_high_oak_price_eur = models.DecimalField(max_digits=12, decimal_places=3, default=4.190)
-
-    # --- Адаптер короба низький для плоскої (м.п.) ---
-    adapter_box_low_white_m = models.DecimalField(max_digits=8, decimal_places=2, default=0)
-    adapter_box_low_white_price_eur = models.DecimalField(max_digits=12, decimal_places=3, default=2.161)
-
-    adapter_box_low_brown_m = models.DecimalField(max_digits=8, decimal_places=2, default=0)
-    adapter_box_low_brown_price_eur = models.DecimalField(max_digits=12, decimal_places=3, default=2.161)
-
-    adapter_box_low_graphite_m = models.DecimalField(max_digits=8, decimal_places=2, default=0)
-    adapter_box_low_graphite_price_eur = models.DecimalField(max_digits=12, decimal_places=3, default=4.448)
-
-    # --- Вали ---
-    shaft_19_m = models.DecimalField(max_digits=8, decimal_places=2, default=0)
-    shaft_19_price_eur = models.DecimalField(max_digits=12, decimal_places=3, default=1.048)
-
-    shaft_25_m = models.DecimalField(max_digits=8, decimal_places=2, default=0)
-    shaft_25_price_eur = models.DecimalField(max_digits=12, decimal_places=3, default=1.380)
-
-    shaft_32_m = models.DecimalField(max_digits=8, decimal_places=2, default=0)
-    shaft_32_price_eur = models.DecimalField(max_digits=12, decimal_places=3, default=2.749)
-
-    shaft_47_white_m = models.DecimalField(max_digits=8, decimal_places=2, default=0)
-    shaft_47_white_price_eur = models.DecimalField(max_digits=12, decimal_places=3, default=7.437)
-
-    # --- Інші комплектуючі ---
-    chain_weight_m = models.DecimalField(max_digits=8, decimal_places=2, default=0)
-    chain_weight_price_eur = models.DecimalField(max_digits=12, decimal_places=3, default=0.084)
-
-    top_profile_dn_al_white_m = models.DecimalField(max_digits=8, decimal_places=2, default=0)
-    top_profile_dn_al_white_price_eur = models.DecimalField(max_digits=12, decimal_places=3, default=1.397)
-
-    top_profile_dn_al_brown_m = models.DecimalField(max_digits=8, decimal_places=2, default=0)
-    top_profile_dn_al_brown_price_eur = models.DecimalField(max_digits=12, decimal_places=3, default=2.455)
-
-    top_profile_dn_al_graphite_m = models.DecimalField(max_digits=8, decimal_places=2, default=0)
-    top_profile_dn_al_graphite_price_eur = models.DecimalField(max_digits=12, decimal_places=3, default=2.455)
-
-    top_profile_dn_std_pvc_white_m = models.DecimalField(max_digits=8, decimal_places=2, default=0)
-    top_profile_dn_std_pvc_white_price_eur = models.DecimalField(max_digits=12, decimal_places=3, default=1.535)
-
-    top_profile_dn_std_pvc_brown_m = models.DecimalField(max_digits=8, decimal_places=2, default=0)
-    top_profile_dn_std_pvc_brown_price_eur = models.DecimalField(max_digits=12, decimal_places=3, default=1.879)
-
-    insert_plus8_white_qty = models.PositiveIntegerField(default=0)
-    insert_plus8_white_price_eur = models.DecimalField(max_digits=12, decimal_places=3, default=0.154)
-
-    insert_plus8_brown_qty = models.PositiveIntegerField(default=0)
-    insert_plus8_brown_price_eur = models.DecimalField(max_digits=12, decimal_places=3, default=0.154)
-
-    insert_plus8_graphite_qty = models.PositiveIntegerField(default=0)
-    insert_plus8_graphite_price_eur = models.DecimalField(max_digits=12, decimal_places=3, default=0.182)
-
-    insert_plus8_oak_qty = models.PositiveIntegerField(default=0)
-    insert_plus8_oak_price_eur = models.DecimalField(max_digits=12, decimal_places=3, default=0.182)
-
- # ---------------------------------------------------------------------
+    options = OptionLinesField(default=dict, blank=True)
+    # Option lines and totals precomputed on save for proposals/workbooks, see services_item_summary.
+    summary = models.JSONField(default=dict, blank=True, editable=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -467,6 +247,21 @@ class OrderItem(models.Model):
     def total_eur(self):
         """Total price for item (subtotal_eur already includes quantity in current builder flow)."""
         return float(self.subtotal_eur or 0)
+
+    def option_lines(self):
+        """
+        EN: [(option, qty, unit price)] for options with a positive quantity and price, in catalog order.
+        UA: [(опція, кількість, ціна)] для опцій з додатною кількістю та ціною, у порядку каталогу.
+        """
+        lines = []
+        codes = [code for code in (self.options or {}) if code in ITEM_OPTIONS_BY_CODE]
+        for code in sorted(codes, key=ITEM_OPTION_POSITIONS.__getitem__):
+            option = ITEM_OPTIONS_BY_CODE[code]
+            qty = getattr(self, option.qty_attr)
+            price = getattr(self, option.price_attr)
+            if qty > 0 and price > 0:
+                lines.append((option, qty, price))
+        return lines
  
 
 class OrderComponentItem(models.Model):
@@ -571,6 +366,8 @@ class OrderMosquitoItem(models.Model):
     options_total_usd = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     subtotal_usd = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     options_data = models.JSONField(default=dict, blank=True)
+    # Option lines and totals precomputed on save for proposals/workbooks, see services_item_summary.
+    summary = models.JSONField(default=dict, blank=True, editable=False)
     sliding_side = models.CharField(max_length=16, blank=True, default="")
     warning_text = models.TextField(blank=True, default="")
     note = models.TextField(blank=True, default="")
@@ -625,9 +422,15 @@ class OrderStatusLog(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     note = models.TextField(blank=True)
+    # Background "in work" pipeline steps; the log row is the idempotency key.
+    workbook_built_at = models.DateTimeField(null=True, blank=True)
+    notified_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["order", "-created_at"], name="status_log_order_created_idx"),
+        ]
 
     def __str__(self):
         return f"Order #{self.order_id}: {self.status} @ {self.created_at}"
@@ -705,11 +508,26 @@ class Transaction(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["customer", "-created_at"],
+                condition=models.Q(deleted=False),
+                name="transaction_live_customer_idx",
+            ),
+            models.Index(fields=["-created_at"], condition=models.Q(deleted=False), name="transaction_live_created_idx"),
+        ]
 
     def __str__(self):
         sign = "+" if self.type == self.DEBIT else "-"
         return f"{sign}{self.amount} ({self.get_type_display()})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Customer as loaded: a reassignment must also rebuild the previous customer's ledger.
+        instance.loaded_customer_id = instance.__dict__.get("customer_id")
+        return instance
+
     @property
     def signed_amount(self):
         return self.amount if self.type == self.DEBIT else -self.amount
@@ -746,6 +564,176 @@ class TransactionDeletionHistory(models.Model):
         return f"Transaction #{self.transaction_id} deleted"
 
 
+class BalanceLedgerEntry(models.Model):
+    """
+    EN: Balance ledger: one row per balance-affecting order (in work and later) or transaction,
+        with the customer's running balance after it. Rebuilt per customer by services_ledger.
+    UA: Журнал балансу: один рядок на замовлення (у роботі й далі) або транзакцію
+        з поточним балансом клієнта після операції. Перебудовується services_ledger.
+    """
+
+    KIND_ORDER = "order"
+    KIND_TRANSACTION = "transaction"
+    KIND_CHOICES = [
+        (KIND_ORDER, "Замовлення"),
+        (KIND_TRANSACTION, "Транзакція"),
+    ]
+
+    customer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="ledger_entries",
+    )
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    order = models.ForeignKey(
+        "orders.Order",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="ledger_entries",
+    )
+    transaction = models.ForeignKey(
+        "orders.Transaction",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="ledger_entries",
+    )
+    created_at = models.DateTimeField(help_text="Дата замовлення або транзакції")
+    seq = models.PositiveIntegerField(help_text="Порядковий номер запису в історії клієнта")
+    amount_uah = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        help_text="Сума операції, грн (замовлення з мінусом)",
+    )
+    running_balance_uah = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        help_text="Баланс клієнта після операції, грн",
+    )
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        verbose_name = "Запис журналу балансу"
+        verbose_name_plural = "Журнал балансу"
+        indexes = [
+            models.Index(fields=["customer", "-created_at", "-id"], name="ledger_customer_created_idx"),
+            models.Index(fields=["-created_at", "-id"], name="ledger_created_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["customer", "seq"], name="ledger_customer_seq_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.amount_uah} → {self.running_balance_uah}"
+
+
+class BalanceSnapshot(models.Model):
+    """
+    EN: Customer balance at the end of a day (local time), taken from the balance ledger.
+        Today's row is refreshed on every ledger rebuild; past days by the snapshot_balances command.
+    UA: Баланс клієнта на кінець дня (за місцевим часом) з журналу балансу.
+        Рядок за сьогодні оновлюється при перебудові журналу, попередні дні — командою snapshot_balances.
+    """
+
+    customer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="balance_snapshots",
+    )
+    date = models.DateField(help_text="День, на кінець якого зафіксовано баланс")
+    balance_uah = models.DecimalField(max_digits=14, decimal_places=2, help_text="Баланс, грн")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-date"]
+        verbose_name = "Знімок балансу"
+        verbose_name_plural = "Знімки балансу"
+        indexes = [
+            models.Index(fields=["date", "balance_uah"], name="balance_snapshot_date_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["customer", "date"], name="balance_snapshot_customer_date_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.customer_id} @ {self.date}: {self.balance_uah}"
+
+
+class ExportJob(models.Model):
+    """
+    EN: Background XLSX export (balances/turnover/orders/production batch) with progress and an expiring result file.
+    UA: Фонове вивантаження XLSX (баланс/оберт/замовлення/файли у виробництво) з прогресом і файлом, що має термін дії.
+    """
+
+    KIND_BALANCES = "balances"
+    KIND_TURNOVER = "turnover"
+    KIND_ORDERS = "orders"
+    KIND_PRODUCTION = "production"
+    KIND_CHOICES = [
+        (KIND_BALANCES, "Баланс"),
+        (KIND_TURNOVER, "Оберт"),
+        (KIND_ORDERS, "Замовлення"),
+        (KIND_PRODUCTION, "Файли у виробництво"),
+    ]
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "В черзі"),
+        (STATUS_RUNNING, "Формується"),
+        (STATUS_DONE, "Готово"),
+        (STATUS_FAILED, "Помилка"),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="export_jobs",
+    )
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    params = models.JSONField(default=dict, blank=True, help_text="GET-фільтри звіту")
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    progress = models.PositiveSmallIntegerField(default=0, help_text="0–100 %")
+    file = models.FileField(upload_to="exports/", blank=True, null=True)
+    filename = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Фонове вивантаження"
+        verbose_name_plural = "Фонові вивантаження"
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+
+class DeferredTask(models.Model):
+    """
+    EN: Celery task call the broker did not accept (enqueue_on_commit); requeue_deferred_tasks sends it again.
+    UA: Виклик Celery-задачі, який брокер не прийняв; requeue_deferred_tasks надсилає його повторно.
+    """
+
+    task_name = models.CharField(max_length=255)
+    args = models.JSONField(default=list, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+        verbose_name = "Відкладена задача"
+        verbose_name_plural = "Відкладені задачі"
+
+    def __str__(self):
+        return f"{self.task_name}{tuple(self.args)}"
+
+
 class CurrencyRate(models.Model):
     """
     EN: Store current currency rates for the project.
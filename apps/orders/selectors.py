@@ -0,0 +1,206 @@
+import datetime
+from decimal import Decimal
+
+from django.db.models import (
+    Case,
+    Count,
+    DecimalField,
+    Exists,
+    F,
+    IntegerField,
+    OuterRef,
+    Prefetch,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Round
+from django.utils import timezone
+
+from .models import (
+    Order,
+    OrderComponentItem,
+    OrderFabricItem,
+    OrderItem,
+    OrderMosquitoComponentItem,
+    OrderMosquitoItem,
+    OrderStatusLog,
+)
+
+MONEY_FIELD = DecimalField(max_digits=18, decimal_places=4)
+
+
+def _items_sum(model, field):
+    """Correlated SUM(field) over an order relation."""
+    return Subquery(
+        model.objects.filter(order_id=OuterRef("pk"))
+        .order_by()
+        .values("order_id")
+        .annotate(total=Sum(field))
+        .values("total")[:1],
+        output_field=MONEY_FIELD,
+    )
+
+
+def annotate_order_category(qs, order_ref="pk"):
+    """
+    EN: has_* flags used by _order_product_category without per-order queries.
+        `order_ref` points at the order id (e.g. "order_id" for transactions).
+    UA: Прапорці has_* для визначення категорії без запитів на кожне замовлення.
+        `order_ref` — поле з id замовлення (напр. "order_id" для транзакцій).
+    """
+    if "has_components" in qs.query.annotations:
+        return qs
+    return qs.annotate(
+        has_components=Exists(OrderComponentItem.objects.filter(order_id=OuterRef(order_ref))),
+        has_fabrics=Exists(OrderFabricItem.objects.filter(order_id=OuterRef(order_ref))),
+        has_mosquitoes=Exists(OrderMosquitoItem.objects.filter(order_id=OuterRef(order_ref))),
+        has_mosquito_components=Exists(OrderMosquitoComponentItem.objects.filter(order_id=OuterRef(order_ref))),
+    )
+
+
+# Item relation that puts an order into a product category; "rollers" means none of them.
+ORDER_CATEGORY_ITEMS = {
+    "components": OrderComponentItem,
+    "fabrics": OrderFabricItem,
+    "mosquitoes": OrderMosquitoItem,
+    "mosquito_components": OrderMosquitoComponentItem,
+}
+
+
+def filter_order_category(qs, category, order_ref="pk"):
+    """
+    EN: Keep orders of a product category with EXISTS / NOT EXISTS on the item tables,
+        so the list needs no joins or DISTINCT. Unknown or empty category keeps qs as is.
+    UA: Залишає замовлення категорії через EXISTS / NOT EXISTS по таблицях позицій —
+        без JOIN та DISTINCT. Порожня або невідома категорія не фільтрує.
+    """
+    if category == "rollers":
+        for model in ORDER_CATEGORY_ITEMS.values():
+            qs = qs.filter(~Exists(model.objects.filter(order_id=OuterRef(order_ref))))
+        return qs
+    model = ORDER_CATEGORY_ITEMS.get(category)
+    if model is None:
+        return qs
+    return qs.filter(Exists(model.objects.filter(order_id=OuterRef(order_ref))))
+
+
+def prefetch_latest_status_log(to_attr="latest_status_logs"):
+    """
+    EN: Prefetch only the newest status log of each order (with its user) into `to_attr`
+        instead of every log row; the time alone is on Order.last_status_at.
+    UA: Префетч лише останнього запису журналу статусів кожного замовлення (з користувачем)
+        у `to_attr` замість усіх записів; сам час є в Order.last_status_at.
+    """
+    return Prefetch(
+        "status_logs",
+        queryset=OrderStatusLog.objects.select_related("user").order_by("-created_at")[:1],
+        to_attr=to_attr,
+    )
+
+
+def _items_count(model):
+    """Correlated COUNT(*) over an order relation."""
+    return Subquery(
+        model.objects.filter(order_id=OuterRef("pk"))
+        .order_by()
+        .values("order_id")
+        .annotate(total=Count("pk"))
+        .values("total")[:1],
+        output_field=IntegerField(),
+    )
+
+
+def annotate_order_positions(qs):
+    """
+    EN: positions_count — number of rows across all item relations of the order.
+    UA: positions_count — кількість позицій у всіх типах позицій замовлення.
+    """
+    counts = [
+        Coalesce(_items_count(model), Value(0))
+        for model in (OrderItem, OrderComponentItem, OrderFabricItem, OrderMosquitoItem, OrderMosquitoComponentItem)
+    ]
+    total = counts[0]
+    for expression in counts[1:]:
+        total = total + expression
+    return qs.annotate(positions_count=total)
+
+
+def annotate_order_totals_uah(qs, current_rate, usd_rate):
+    """
+    EN: Annotate base_total, display_rate, total_uah_display (base, for balances),
+        markup_total_uah (with markup) and retail_total_uah_display (markup + extra service).
+        Half-up rounding to whole UAH.
+    UA: Анотує base_total, display_rate, total_uah_display (база, для балансів),
+        markup_total_uah (з націнкою) та retail_total_uah_display (націнка + додаткова послуга).
+        Округлення до гривні 0.5 вгору.
+    """
+    if "total_uah_display" in qs.query.annotations:
+        return qs
+    zero = Value(Decimal("0"), output_field=MONEY_FIELD)
+    qs = annotate_order_category(qs).annotate(
+        base_mosquito_total=Coalesce(_items_sum(OrderMosquitoItem, "subtotal_usd"), zero),
+        base_mosquito_components_total=Coalesce(_items_sum(OrderMosquitoComponentItem, "subtotal_usd"), zero),
+        base_items_total=Coalesce(_items_sum(OrderItem, "subtotal_eur"), zero),
+    )
+    qs = qs.annotate(
+        base_total=Case(
+            When(total_eur__gt=0, then=F("total_eur")),
+            When(base_mosquito_total__gt=0, then=F("base_mosquito_total")),
+            When(base_mosquito_components_total__gt=0, then=F("base_mosquito_components_total")),
+            default=F("base_items_total"),
+            output_field=MONEY_FIELD,
+        ),
+        display_rate=Case(
+            When(~Q(status=Order.STATUS_QUOTE) & Q(eur_rate__isnull=False) & ~Q(eur_rate=0), then=F("eur_rate")),
+            When(
+                Q(has_components=False, has_fabrics=False)
+                & (Q(has_mosquitoes=True) | Q(has_mosquito_components=True)),
+                then=Value(Decimal(usd_rate or 0), output_field=MONEY_FIELD),
+            ),
+            default=Value(Decimal(current_rate or 0), output_field=MONEY_FIELD),
+            output_field=MONEY_FIELD,
+        ),
+    )
+    markup_multiplier = Value(Decimal("1"), output_field=MONEY_FIELD) + Coalesce(F("markup_percent"), zero) / Value(
+        Decimal("100"), output_field=MONEY_FIELD
+    )
+    return qs.annotate(
+        total_uah_display=Round(F("base_total") * F("display_rate"), output_field=MONEY_FIELD),
+        markup_total_uah=Round(F("base_total") * F("display_rate") * markup_multiplier, output_field=MONEY_FIELD),
+        retail_total_uah_display=Round(
+            F("base_total") * F("display_rate") * markup_multiplier + Coalesce(F("extra_service_amount_uah"), zero),
+            output_field=MONEY_FIELD,
+        ),
+    )
+
+
+def orders_total_uah_base(qs, current_rate, usd_rate):
+    """EN: Sum of rounded base UAH totals in one query. UA: Сума базових сум у грн одним запитом."""
+    if "total_uah_display" not in qs.query.annotations:
+        qs = annotate_order_totals_uah(qs, current_rate, usd_rate)
+    total = qs.aggregate(total=Sum("total_uah_display"))["total"]
+    return Decimal(total or 0).quantize(Decimal("1"))
+
+
+def local_day_start(day: datetime.date) -> datetime.datetime:
+    """Aware datetime of local midnight at the start of `day`."""
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def filter_created_between(qs, date_from=None, date_to=None, field="created_at"):
+    """
+    EN: Keep rows created on local days date_from..date_to (inclusive, either bound optional).
+        Uses the half-open range [date_from 00:00, date_to + 1 day 00:00) on the raw column
+        instead of a __date cast, so an index on `field` can serve it.
+    UA: Залишає рядки, створені в місцеві дні date_from..date_to (включно, межі необов'язкові).
+        Фільтрує напіввідкритим діапазоном по самій колонці замість приведення до дати,
+        тож працює індекс по `field`.
+    """
+    if date_from:
+        qs = qs.filter(**{f"{field}__gte": local_day_start(date_from)})
+    if date_to:
+        qs = qs.filter(**{f"{field}__lt": local_day_start(date_to + datetime.timedelta(days=1))})
+    return qs
@@ -0,0 +1,80 @@
+import hashlib
+import logging
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+logger = logging.getLogger("app")
+
+# 2x the largest display box (workbook: 220x110 px, proposal page: 180x84 px) for sharp print.
+LOGO_MAX_SIZE = (440, 220)
+LOGO_JPEG_QUALITY = 85
+# Bump when the rendition parameters change so new files are generated.
+LOGO_RENDITION_VERSION = "1"
+
+
+def avatar_logo_name(avatar) -> str:
+    """
+    EN: Storage name of the logo rendition. Uploads never overwrite files (storage adds a suffix),
+        so the avatar name identifies its content.
+    UA: Ім'я файлу зменшеного логотипа. Завантаження не перезаписують файли, тож ім'я аватара
+        однозначно визначає його вміст.
+    """
+    digest = hashlib.sha1(f"{LOGO_RENDITION_VERSION}:{avatar.name}".encode("utf-8")).hexdigest()[:20]
+    return f"avatars/logos/{digest}"
+
+
+def _render_logo(avatar):
+    with avatar.open("rb") as source:
+        image = Image.open(source)
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(LOGO_MAX_SIZE, Image.LANCZOS)
+        buffer = BytesIO()
+        if image.mode in ("RGBA", "LA", "P"):
+            # Keep transparency: logos are often PNG with alpha.
+            image.convert("RGBA").save(buffer, format="PNG", optimize=True)
+            extension = "png"
+        else:
+            image.convert("RGB").save(buffer, format="JPEG", quality=LOGO_JPEG_QUALITY, optimize=True)
+            extension = "jpg"
+    return buffer.getvalue(), extension
+
+
+def ensure_avatar_logo(avatar):
+    """
+    EN: Storage name of the downscaled logo for `avatar`, generated on first use.
+        None if there is no avatar or it cannot be decoded.
+    UA: Ім'я зменшеного логотипа для `avatar`; створюється при першому зверненні.
+        None, якщо аватара немає або його не вдалося прочитати.
+    """
+    if not avatar:
+        return None
+    storage = avatar.storage
+    base = avatar_logo_name(avatar)
+    for extension in ("png", "jpg"):
+        if storage.exists(f"{base}.{extension}"):
+            return f"{base}.{extension}"
+    try:
+        content, extension = _render_logo(avatar)
+    except Exception:
+        logger.exception("Avatar logo rendition failed for %s", avatar.name)
+        return None
+    return storage.save(f"{base}.{extension}", ContentFile(content))
+
+
+def avatar_logo_path(avatar):
+    """EN: Local path of the logo rendition or None. UA: Локальний шлях до логотипа або None."""
+    name = ensure_avatar_logo(avatar)
+    if not name:
+        return None
+    try:
+        return avatar.storage.path(name)
+    except NotImplementedError:
+        return None
+
+
+def avatar_logo_url(avatar):
+    """EN: URL of the logo rendition or None. UA: URL логотипа або None."""
+    name = ensure_avatar_logo(avatar)
+    return avatar.storage.url(name) if name else None
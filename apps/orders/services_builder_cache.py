@@ -0,0 +1,202 @@
+import json
+import logging
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .services_builder_items import (
+    KIND_COMPONENTS,
+    KIND_FABRICS,
+    KIND_MOSQUITO_COMPONENTS,
+    KIND_MOSQUITOES,
+    KIND_ROLLERS,
+)
+
+logger = logging.getLogger("app")
+
+# Bump when a builder row layout below changes so old cached JSON is not served.
+BUILDER_PAYLOAD_VERSION = "1"
+BUILDER_PAYLOAD_TIMEOUT = 7 * 24 * 60 * 60
+
+
+def _roller_row(it):
+    return {
+        "id": it.id,
+        "system_sheet": it.system_sheet,
+        "table_section": it.table_section,
+        "fabric_name": it.fabric_name,
+        "fabric_color_code": it.fabric_color_code,
+        "height_gabarit_mm": it.height_gabarit_mm,
+        "width_fabric_mm": it.width_fabric_mm,
+        "gabarit_width_flag": it.gabarit_width_flag,
+        "fabric_height_flag": it.fabric_height_flag,
+        "base_price_eur": float(it.base_price_eur),
+        "GbDiffWidthMm": float(it.GbDiffWidthMm),
+        "gb_width_mm": float(it.gb_width_mm),
+        "surcharge_height_eur": float(it.surcharge_height_eur),
+
+        "magnets_price_eur": float(it.magnets_price_eur),
+        "magnets_qty": float(it.magnets_qty),
+        "cord_pvc_tension_price_eur": float(it.cord_pvc_tension_price_eur),
+        "cord_pvc_tension_qty": float(it.cord_pvc_tension_qty),
+        "cord_copper_barrel_price_eur": float(it.cord_copper_barrel_price_eur),
+        "cord_copper_barrel_qty": float(it.cord_copper_barrel_qty),
+        "top_pvc_clip_pair_price_eur": float(it.top_pvc_clip_pair_price_eur),
+        "top_pvc_clip_pair_qty": float(it.top_pvc_clip_pair_qty),
+        "top_pvc_bar_tape_price_eur_mp": float(it.top_pvc_bar_tape_price_eur_mp),
+        "top_pvc_bar_tape_qty": float(it.top_pvc_bar_tape_qty),
+        "bottom_wide_bar_price_eur_mp": float(it.bottom_wide_bar_price_eur_mp),
+        "bottom_wide_bar_qty": float(it.bottom_wide_bar_qty),
+        "top_bar_scotch_price_eur_mp": float(it.top_bar_scotch_price_eur_mp),
+        "top_bar_scotch_qty": float(it.top_bar_scotch_qty),
+        "metal_cord_fix_price_eur": float(it.metal_cord_fix_price_eur),
+        "metal_cord_fix_qty": float(it.metal_cord_fix_qty),
+
+        "middle_bracket_price_eur": float(it.middle_bracket_price_eur),
+        "middle_bracket_qty": float(it.middle_bracket_qty),
+        "remote_15ch_price_eur": float(it.remote_15ch_price_eur),
+        "remote_15ch_qty": float(it.remote_15ch_qty),
+        "remote_5ch_price_eur": float(it.remote_5ch_price_eur),
+        "remote_5ch_qty": float(it.remote_5ch_qty),
+        "motor_with_remote_price_eur": float(it.motor_with_remote_price_eur),
+        "motor_with_remote_qty": float(it.motor_with_remote_qty),
+        "motor_no_remote_price_eur": float(it.motor_no_remote_price_eur),
+        "motor_no_remote_qty": float(it.motor_no_remote_qty),
+        "metal_kronsht_price_eur": float(it.metal_kronsht_price_eur),
+        "metal_kronsht_qty": float(it.metal_kronsht_qty),
+
+        "subtotal_eur": float(it.subtotal_eur),
+        "quantity": it.quantity,
+        "roll_height_info": it.roll_height_info,
+        "control_side": it.control_side,
+        "bottom_fixation": it.bottom_fixation,
+        "pvc_plank": it.pvc_plank,
+        "note": it.note,
+    }
+
+
+def _component_row(item):
+    return {
+        "name": item.name,
+        "color": item.color,
+        "unit": item.unit,
+        "price_eur": str(item.price_eur),
+        "quantity": str(item.quantity),
+    }
+
+
+def _fabric_row(item):
+    return {
+        "fabric_name": item.fabric_name,
+        "fabric_color_code": item.fabric_color_code,
+        "roll_width_mm": item.roll_width_mm,
+        "width_mm": item.width_mm,
+        "included_height_mm": item.included_height_mm,
+        "height_mm": item.height_mm,
+        "price_eur_mp": str(item.price_eur_mp),
+        "quantity": item.quantity,
+        "cut_enabled": item.cut_enabled,
+        "cut_price_eur": str(item.cut_price_eur),
+    }
+
+
+def _mosquito_row(item):
+    return {
+        "product_type": item.product_type,
+        "profile_color": item.profile_color,
+        "mesh_type": item.mesh_type,
+        "width_mm": item.width_mm,
+        "height_mm": item.height_mm,
+        "quantity": item.quantity,
+        "area_sqm": str(item.area_sqm),
+        "min_area_sqm": str(item.min_area_sqm),
+        "price_usd_sqm": str(item.price_usd_sqm),
+        "options_total_usd": str(item.options_total_usd),
+        "subtotal_usd": str(item.subtotal_usd),
+        "sliding_side": item.sliding_side,
+        "warning_text": item.warning_text,
+        "options_data": item.options_data or {},
+        "note": item.note,
+    }
+
+
+def _mosquito_component_row(item):
+    return {
+        "name": item.name,
+        "color": item.color,
+        "unit": item.unit,
+        "length_mm": item.length_mm,
+        "quantity": str(item.quantity),
+        "price_usd": str(item.price_usd),
+        "subtotal_usd": str(item.subtotal_usd),
+        "note": item.note,
+    }
+
+
+# kind -> (related name, row serializer, keep non-ASCII as is)
+BUILDER_PAYLOAD_ROWS = {
+    KIND_ROLLERS: ("items", _roller_row, False),
+    KIND_COMPONENTS: ("component_items", _component_row, True),
+    KIND_FABRICS: ("fabric_items", _fabric_row, True),
+    KIND_MOSQUITOES: ("mosquito_items", _mosquito_row, True),
+    KIND_MOSQUITO_COMPONENTS: ("mosquito_component_items", _mosquito_component_row, True),
+}
+
+
+def _items_key(order_id, kind):
+    return f"orders:builder_items:{BUILDER_PAYLOAD_VERSION}:{order_id}:{kind}"
+
+
+def _build_items_json(order, kind):
+    related_name, serialize, keep_unicode = BUILDER_PAYLOAD_ROWS[kind]
+    rows = [serialize(item) for item in getattr(order, related_name).all().order_by("id")]
+    return json.dumps(rows, ensure_ascii=not keep_unicode)
+
+
+def store_builder_items_json(order, kind):
+    """
+    EN: Serialize the builder rows of `order` and store them; called right after a builder save.
+    UA: Серіалізує рядки білдера замовлення й зберігає їх; викликається одразу після збереження.
+    """
+    payload = _build_items_json(order, kind)
+    try:
+        cache.set(_items_key(order.pk, kind), payload, timeout=BUILDER_PAYLOAD_TIMEOUT)
+    except Exception:
+        logger.exception("Builder items cache write failed for order %s", order.pk)
+    return payload
+
+
+def store_builder_items_json_on_commit(order, kind):
+    """
+    EN: Store the builder rows once the current DB transaction commits, so a rolled-back save
+        never leaves its rows in the cache.
+    UA: Зберігає рядки білдера після коміту транзакції, щоб відкочене збереження не потрапило в кеш.
+    """
+    transaction.on_commit(lambda: store_builder_items_json(order, kind))
+
+
+def builder_items_json(order, kind):
+    """
+    EN: JSON of the builder rows for the page, from cache; a miss serializes and stores it.
+    UA: JSON рядків білдера для сторінки з кешу; якщо немає — серіалізує й зберігає.
+    """
+    try:
+        hit = cache.get(_items_key(order.pk, kind))
+    except Exception:
+        logger.exception("Builder items cache read failed for order %s", order.pk)
+        hit = None
+    if hit is not None:
+        return hit
+    return store_builder_items_json(order, kind)
+
+
+def invalidate_builder_items(order_ids):
+    """EN: Drop cached builder rows of the orders. UA: Видаляє кешовані рядки білдерів замовлень."""
+    keys = [_items_key(pk, kind) for pk in order_ids for kind in BUILDER_PAYLOAD_ROWS]
+    if not keys:
+        return
+    try:
+        cache.delete_many(keys)
+    except Exception:
+        logger.exception("Builder items cache invalidation failed")
+
@@ -0,0 +1,564 @@
+import json
+from decimal import ROUND_HALF_UP, Decimal
+
+from .item_options import ITEM_OPTION_ATTRS, pack_option_lines
+from .models import (
+    OrderComponentItem,
+    OrderFabricItem,
+    OrderItem,
+    OrderMosquitoComponentItem,
+    OrderMosquitoItem,
+)
+from .services_item_summary import refresh_item_summaries
+from .services_pricing import (
+    customer_discount_multiplier,
+    recalculate_mosquito_component_items,
+    recalculate_mosquito_items,
+    validate_mosquito_item,
+)
+
+# Version of the row payload: {"version": 1, "items": [{...}, ...]}.
+BUILDER_ITEMS_VERSION = 1
+# Upper bound of rows in one payload; the largest real orders have a few hundred positions.
+BUILDER_ITEMS_MAX_ROWS = 1000
+# Rows per bulk_create/bulk_update statement when saving order positions.
+ORDER_ITEMS_BATCH_SIZE = 100
+
+KIND_ROLLERS = "rollers"
+KIND_COMPONENTS = "components"
+KIND_FABRICS = "fabrics"
+KIND_MOSQUITOES = "mosquitoes"
+KIND_MOSQUITO_COMPONENTS = "mosquito_components"
+
+_TRUE_VALUES = {"1", "true", "on", "yes"}
+_FALSE_VALUES = {"", "0", "false", "off", "no"}
+_ZERO = Decimal("0")
+
+
+class BuilderItemsError(ValueError):
+    """
+    EN: Payload rejected; `errors` is a list of {"row", "field", "message"}.
+    UA: Дані відхилено; `errors` — список {"row", "field", "message"}.
+    """
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("; ".join(error["message"] for error in errors[:5]))
+
+
+# Coercers accept JSON natives and the strings posted by the builder forms.
+def _text(value):
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return str(value)
+    raise ValueError("очікується рядок")
+
+
+def _decimal(value):
+    if isinstance(value, bool):
+        raise ValueError("очікується число")
+    if isinstance(value, str):
+        value = value.strip().replace(" ", "").replace(",", ".") or "0"
+    elif isinstance(value, float):
+        value = repr(value)
+    number = Decimal(value)
+    if not number.is_finite():
+        raise ValueError("очікується число")
+    return number
+
+
+def _integer(value):
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    number = _decimal(value)
+    if number != number.to_integral_value():
+        raise ValueError("очікується ціле число")
+    return int(number)
+
+
+def _non_negative_int(value):
+    number = _integer(value)
+    if number < 0:
+        raise ValueError("значення не може бути від'ємним")
+    return number
+
+
+def _quantity(value):
+    number = _integer(value)
+    if number < 1:
+        raise ValueError("кількість має бути не менше 1")
+    return number
+
+
+def _positive_decimal(value):
+    number = _decimal(value)
+    if number <= 0:
+        raise ValueError("кількість має бути більше нуля")
+    return number
+
+
+def _flag(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        value = value.strip().lower()
+        if value in _TRUE_VALUES:
+            return True
+        if value in _FALSE_VALUES:
+            return False
+    raise ValueError("очікується true/false")
+
+
+def _mapping(value):
+    if isinstance(value, dict):
+        return value
+    if isinstance(value, str):
+        value = json.loads(value or "{}")
+        if isinstance(value, dict):
+            return value
+    raise ValueError("очікується об'єкт")
+
+
+# Row schemas: (field, coercer, default). Missing or null keys take the default.
+ROLLER_ITEM_FIELDS = (
+    ("id", _integer, None),
+    ("system_sheet", _text, ""),
+    ("table_section", _text, ""),
+    ("fabric_name", _text, ""),
+    ("fabric_color_code", _text, ""),
+    ("height_gabarit_mm", _integer, 0),
+    ("width_fabric_mm", _integer, 0),
+    ("gabarit_width_flag", _flag, False),
+    ("fabric_height_flag", _flag, False),
+    ("base_price_eur", _decimal, _ZERO),
+    ("gb_width_mm", _decimal, _ZERO),
+    ("GbDiffWidthMm", _decimal, _ZERO),
+    ("surcharge_height_eur", _decimal, _ZERO),
+    ("magnets_price_eur", _decimal, _ZERO),
+    ("magnets_qty", _decimal, _ZERO),
+    ("cord_pvc_tension_price_eur", _decimal, _ZERO),
+    ("cord_pvc_tension_qty", _decimal, _ZERO),
+    ("cord_copper_barrel_price_eur", _decimal, _ZERO),
+    ("cord_copper_barrel_qty", _decimal, _ZERO),
+    ("top_pvc_clip_pair_price_eur", _decimal, _ZERO),
+    ("top_pvc_clip_pair_qty", _decimal, _ZERO),
+    ("top_pvc_bar_tape_price_eur_mp", _decimal, _ZERO),
+    ("top_pvc_bar_tape_qty", _decimal, _ZERO),
+    ("bottom_wide_bar_price_eur_mp", _decimal, _ZERO),
+    ("bottom_wide_bar_qty", _decimal, _ZERO),
+    ("top_bar_scotch_price_eur_mp", _decimal, _ZERO),
+    ("top_bar_scotch_qty", _decimal, _ZERO),
+    ("metal_cord_fix_price_eur", _decimal, _ZERO),
+    ("metal_cord_fix_qty", _decimal, _ZERO),
+    ("middle_bracket_price_eur", _decimal, _ZERO),
+    ("middle_bracket_qty", _decimal, _ZERO),
+    ("remote_15ch_price_eur", _decimal, _ZERO),
+    ("remote_15ch_qty", _decimal, _ZERO),
+    ("remote_5ch_price_eur", _decimal, _ZERO),
+    ("remote_5ch_qty", _decimal, _ZERO),
+    ("motor_with_remote_price_eur", _decimal, _ZERO),
+    ("motor_with_remote_qty", _decimal, _ZERO),
+    ("motor_no_remote_price_eur", _decimal, _ZERO),
+    ("motor_no_remote_qty", _decimal, _ZERO),
+    ("metal_kronsht_price_eur", _decimal, _ZERO),
+    ("metal_kronsht_qty", _decimal, _ZERO),
+    ("subtotal_eur", _decimal, _ZERO),
+    ("roll_height_info", _text, ""),
+    ("quantity", _quantity, 1),
+    ("control_side", _text, ""),
+    ("bottom_fixation", _flag, False),
+    ("pvc_plank", _flag, False),
+    ("note", _text, ""),
+)
+
+COMPONENT_ITEM_FIELDS = (
+    ("name", _text, ""),
+    ("color", _text, ""),
+    ("unit", _text, ""),
+    ("price_eur", _decimal, _ZERO),
+    ("quantity", _positive_decimal, Decimal("1")),
+)
+
+FABRIC_ITEM_FIELDS = (
+    ("fabric_name", _text, ""),
+    ("fabric_color_code", _text, ""),
+    ("roll_width_mm", _non_negative_int, 0),
+    ("width_mm", _non_negative_int, 0),
+    ("included_height_mm", _non_negative_int, 0),
+    ("height_mm", _non_negative_int, 0),
+    ("price_eur_mp", _decimal, _ZERO),
+    ("quantity", _quantity, 1),
+    ("cut_price_eur", _decimal, _ZERO),
+)
+
+MOSQUITO_ITEM_FIELDS = (
+    ("product_type", _text, ""),
+    ("profile_color", _text, ""),
+    ("mesh_type", _text, ""),
+    ("width_mm", _non_negative_int, 0),
+    ("height_mm", _non_negative_int, 0),
+    ("quantity", _quantity, 1),
+    ("sliding_side", _text, ""),
+    ("options_data", _mapping, None),
+    ("note", _text, ""),
+)
+
+MOSQUITO_COMPONENT_ITEM_FIELDS = (
+    ("name", _text, ""),
+    ("color", _text, ""),
+    ("unit", _text, ""),
+    ("length_mm", _non_negative_int, 0),
+    ("quantity", _positive_decimal, Decimal("1")),
+    ("note", _text, ""),
+)
+
+# Priced parts of a roller row: base and height surcharge (already multiplied by the row
+# quantity) and every option total (unit price x option qty), as the roller builder posts them.
+ROLLER_PRICE_FIELDS = tuple(
+    field for field, _, _ in ROLLER_ITEM_FIELDS if field.endswith(("_price_eur", "_price_eur_mp", "_height_eur"))
+)
+# Largest accepted difference between a posted roller subtotal and the server's one (rounding).
+ROLLER_SUBTOTAL_TOLERANCE = Decimal("0.01")
+
+# kind -> (row schema, required non-empty field, related name of the item rows)
+BUILDER_ITEM_SCHEMAS = {
+    KIND_ROLLERS: (ROLLER_ITEM_FIELDS, "system_sheet", "items"),
+    KIND_COMPONENTS: (COMPONENT_ITEM_FIELDS, "name", "component_items"),
+    KIND_FABRICS: (FABRIC_ITEM_FIELDS, "fabric_name", "fabric_items"),
+    KIND_MOSQUITOES: (MOSQUITO_ITEM_FIELDS, "product_type", "mosquito_items"),
+    KIND_MOSQUITO_COMPONENTS: (MOSQUITO_COMPONENT_ITEM_FIELDS, "name", "mosquito_component_items"),
+}
+
+
+def clean_item_rows(kind, rows):
+    """
+    EN: Validate and coerce a list of row objects for builder `kind` in one pass over a flat
+        field table. Unknown keys are ignored. Raises BuilderItemsError with every problem found.
+    UA: Перевіряє та нормалізує список рядків для білдера `kind` за один прохід по таблиці полів.
+        Невідомі ключі ігноруються. Кидає BuilderItemsError з усіма знайденими помилками.
+    """
+    fields, required, _ = BUILDER_ITEM_SCHEMAS[kind]
+    if not isinstance(rows, list):
+        raise BuilderItemsError([{"row": None, "field": "items", "message": "items має бути списком"}])
+    if not rows:
+        raise BuilderItemsError([{"row": None, "field": "items", "message": "Додайте хоча б одну позицію"}])
+    if len(rows) > BUILDER_ITEMS_MAX_ROWS:
+        raise BuilderItemsError(
+            [{"row": None, "field": "items", "message": f"Не більше {BUILDER_ITEMS_MAX_ROWS} позицій за раз"}]
+        )
+    cleaned, errors = [], []
+    for idx, row in enumerate(rows):
+        if not isinstance(row, dict):
+            errors.append({"row": idx, "field": None, "message": f"Рядок {idx + 1}: очікується об'єкт"})
+            continue
+        values = {}
+        for field, coerce, default in fields:
+            raw = row.get(field)
+            if raw is None:
+                values[field] = default
+                continue
+            try:
+                values[field] = coerce(raw)
+            except (ValueError, TypeError, ArithmeticError) as exc:
+                message = exc.args[0] if isinstance(exc, ValueError) and exc.args else "невірне значення"
+                errors.append({"row": idx, "field": field, "message": f"Рядок {idx + 1}, {field}: {message}"})
+        if not values.get(required):
+            errors.append({"row": idx, "field": required, "message": f"Рядок {idx + 1}, {required}: обов'язкове поле"})
+        cleaned.append(values)
+    if errors:
+        raise BuilderItemsError(errors)
+    return cleaned
+
+
+def roller_subtotal_eur(row, discount_multiplier) -> Decimal:
+    """
+    EN: Roller row subtotal the way the builder page prices it (recalcPrice in builder.html):
+        base + surcharge + option totals, times the customer discount, rounded to cents.
+    UA: Сума рядка ролет так само, як на сторінці білдера: база + доплата + опції,
+        зі знижкою клієнта, округлено до центів.
+    """
+    total = sum((row[field] for field in ROLLER_PRICE_FIELDS), _ZERO)
+    return (total * discount_multiplier).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def price_roller_rows(rows, raw_rows, discount_multiplier, existing_items=None):
+    """
+    EN: Set each cleaned roller row's subtotal_eur from its priced parts. A posted subtotal
+        that disagrees with the server's is rejected rather than stored. Rows that repeat an
+        existing item's prices and subtotal unchanged keep it, so older positions round-trip.
+    UA: Перераховує subtotal_eur рядків ролет на сервері. Надіслана сума, що не збігається
+        з розрахунком сервера, відхиляється. Рядки з незміненими цінами наявної позиції
+        зберігають її суму.
+    """
+    existing_items = existing_items or {}
+    errors = []
+    for idx, (row, raw) in enumerate(zip(rows, raw_rows)):
+        item = existing_items.get(row["id"])
+        if item is not None and all(
+            getattr(item, field) == row[field] for field in (*ROLLER_PRICE_FIELDS, "subtotal_eur")
+        ):
+            continue
+        subtotal = roller_subtotal_eur(row, discount_multiplier)
+        if raw.get("subtotal_eur") is not None and abs(row["subtotal_eur"] - subtotal) > ROLLER_SUBTOTAL_TOLERANCE:
+            errors.append(
+                {
+                    "row": idx,
+                    "field": "subtotal_eur",
+                    "message": f"Рядок {idx + 1}, subtotal_eur: сума не збігається з розрахунком ({subtotal})",
+                }
+            )
+        row["subtotal_eur"] = subtotal
+    if errors:
+        raise BuilderItemsError(errors)
+    return rows
+
+
+def parse_items_payload(raw):
+    """
+    EN: Rows from a JSON body/field: either a bare list or {"version": 1, "items": [...]}.
+    UA: Рядки з JSON: список або {"version": 1, "items": [...]}.
+    """
+    if isinstance(raw, (str, bytes)):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            raise BuilderItemsError([{"row": None, "field": "items", "message": "Некоректний JSON"}])
+    if isinstance(raw, dict):
+        version = raw.get("version", BUILDER_ITEMS_VERSION)
+        if version != BUILDER_ITEMS_VERSION:
+            raise BuilderItemsError(
+                [{"row": None, "field": "version", "message": f"Непідтримувана версія {version}"}]
+            )
+        raw = raw.get("items")
+    return raw
+
+
+def save_roller_items(order, rows, organization_id=None):
+    """
+    EN: Diff-save roller positions: rows with the id of an existing item update only the
+        changed fields, rows without one are inserted, items missing from `rows` are deleted.
+        Returns the items total (sum of subtotal_eur).
+    UA: Збереження позицій ролет через порівняння: рядки з id наявної позиції оновлюють лише
+        змінені поля, нові вставляються, відсутні у `rows` видаляються. Повертає суму позицій.
+    """
+    existing_items = {item.pk: item for item in order.items.all()}
+    to_create, to_update, changed_fields = [], [], set()
+    items_total = Decimal("0")
+    for row in rows:
+        values = dict(row)
+        item_id = values.pop("id", None)
+        values["organization_id"] = organization_id
+        values["subtotal_eur"] = values["subtotal_eur"].quantize(Decimal("0.01"))
+        items_total += values["subtotal_eur"]
+        item = existing_items.pop(item_id, None) if item_id else None
+        if item is None:
+            to_create.append(OrderItem(order=order, **values))
+            continue
+        changed = [field for field, value in values.items() if getattr(item, field) != value]
+        if changed:
+            options_before = pack_option_lines(item.options)
+            for field in changed:
+                setattr(item, field, values[field])
+            # Option attributes live in the packed options column; unused options are not stored.
+            changed = {field for field in changed if field not in ITEM_OPTION_ATTRS}
+            if pack_option_lines(item.options) != options_before:
+                changed.add("options")
+        if changed:
+            to_update.append(item)
+            changed_fields.update(changed)
+
+    # Removed rows go in one DELETE, only after the posted rows were validated.
+    if existing_items:
+        order.items.filter(pk__in=list(existing_items)).delete()
+    if to_update:
+        OrderItem.objects.bulk_update(to_update, sorted(changed_fields), batch_size=ORDER_ITEMS_BATCH_SIZE)
+    if to_create:
+        OrderItem.objects.bulk_create(to_create, batch_size=ORDER_ITEMS_BATCH_SIZE)
+    return items_total
+
+
+def save_component_items(order, rows, discount_multiplier):
+    """
+    EN: Replace component positions; prices get the customer discount. Returns total EUR.
+    UA: Замінює комплектуючі; до цін застосовується знижка клієнта. Повертає суму в EUR.
+    """
+    total_eur = Decimal("0")
+    bulk = []
+    for row in rows:
+        qty = Decimal(row["quantity"] or 0)
+        price_eur = (Decimal(row["price_eur"] or 0) * discount_multiplier).quantize(Decimal("0.01"))
+        total_eur += price_eur * qty
+        bulk.append(
+            OrderComponentItem(
+                order=order,
+                name=row["name"],
+                color=row["color"],
+                unit=row["unit"],
+                price_eur=price_eur,
+                quantity=qty,
+            )
+        )
+    OrderComponentItem.objects.filter(order=order).delete()
+    OrderComponentItem.objects.bulk_create(bulk, batch_size=ORDER_ITEMS_BATCH_SIZE)
+    return total_eur.quantize(Decimal("0.01"))
+
+
+def save_fabric_items(order, rows, discount_multiplier):
+    """
+    EN: Replace fabric positions with prices recalculated from the posted sheet values.
+        Returns total EUR.
+    UA: Замінює позиції тканин з перерахунком цін із переданих значень прайсу. Повертає суму в EUR.
+    """
+    total_eur = Decimal("0")
+    bulk = []
+    for row in rows:
+        width_mm = row["width_mm"]
+        height_mm = row["height_mm"]
+        included_height_mm = row["included_height_mm"]
+        quantity = row["quantity"]
+        base_price = (row["price_eur_mp"] * Decimal(width_mm)) / Decimal("1000")
+        steps = 0
+        if included_height_mm and height_mm > included_height_mm:
+            steps = (height_mm - included_height_mm + 99) // 100
+        multiplier = Decimal("1") + (Decimal("0.10") * Decimal(int(steps)))
+        unit_price = (base_price * multiplier).quantize(Decimal("0.01"))
+        unit_total = (unit_price + row["cut_price_eur"]) * discount_multiplier
+        item_total = (unit_total * Decimal(quantity)).quantize(Decimal("0.01"))
+        total_eur += item_total
+        bulk.append(
+            OrderFabricItem(
+                order=order,
+                fabric_name=row["fabric_name"],
+                fabric_color_code=row["fabric_color_code"],
+                roll_width_mm=row["roll_width_mm"],
+                width_mm=width_mm,
+                included_height_mm=included_height_mm,
+                height_mm=height_mm,
+                price_eur_mp=row["price_eur_mp"],
+                quantity=quantity,
+                cut_enabled=True,
+                cut_price_eur=row["cut_price_eur"],
+                total_eur=item_total,
+            )
+        )
+    OrderFabricItem.objects.filter(order=order).delete()
+    OrderFabricItem.objects.bulk_create(bulk, batch_size=ORDER_ITEMS_BATCH_SIZE)
+    return total_eur.quantize(Decimal("0.01"))
+
+
+def save_mosquito_items(order, items):
+    """EN: Replace mosquito positions with recalculated items. UA: Замінює позиції москітних сіток."""
+    OrderMosquitoItem.objects.filter(order=order).delete()
+    OrderMosquitoItem.objects.bulk_create(
+        [
+            OrderMosquitoItem(
+                order=order,
+                product_type=item["product_type"],
+                profile_color=item["profile_color"],
+                mesh_type=item["mesh_type"],
+                width_mm=item["width_mm"],
+                height_mm=item["height_mm"],
+                quantity=item["quantity"],
+                area_sqm=item["area_sqm"],
+                min_area_sqm=item["min_area_sqm"],
+                price_usd_sqm=item["price_usd_sqm"],
+                options_total_usd=item.get("options_total_usd", Decimal("0")),
+                subtotal_usd=item["subtotal_usd"],
+                options_data=item.get("options_data") or {},
+                sliding_side=item.get("sliding_side", ""),
+                warning_text=item.get("warning_text", ""),
+                note=item["note"],
+            )
+            for item in items
+        ],
+        batch_size=ORDER_ITEMS_BATCH_SIZE,
+    )
+
+
+def save_mosquito_component_items(order, items):
+    """EN: Replace mosquito component positions. UA: Замінює комплектуючі до москітних сіток."""
+    OrderMosquitoComponentItem.objects.filter(order=order).delete()
+    OrderMosquitoComponentItem.objects.bulk_create(
+        [
+            OrderMosquitoComponentItem(
+                order=order,
+                name=item["name"],
+                color=item["color"],
+                unit=item["unit"],
+                length_mm=item["length_mm"],
+                quantity=item["quantity"],
+                price_usd=item["price_usd"],
+                subtotal_usd=item["subtotal_usd"],
+                note=item["note"],
+            )
+            for item in items
+        ],
+        batch_size=ORDER_ITEMS_BATCH_SIZE,
+    )
+
+
+def order_item_kinds(order):
+    """EN: Builder kinds that already have positions in `order`. UA: Типи позицій, наявні в замовленні."""
+    return [
+        kind
+        for kind, (_, _, related_name) in BUILDER_ITEM_SCHEMAS.items()
+        if getattr(order, related_name).exists()
+    ]
+
+
+def save_builder_items(order, kind, rows, user):
+    """
+    EN: Validate `rows` for builder `kind`, replace the order positions with bulk writes and
+        update the order total, the same way the builder page does on save. Prices of
+        components, fabrics and mosquito nets are recalculated on the server; roller subtotals
+        are recomputed from the row's priced parts and the order discount (see price_roller_rows).
+        Returns the saved order total (EUR for rollers/components/fabrics, USD for mosquito kinds).
+    UA: Перевіряє `rows` для білдера `kind`, замінює позиції замовлення пакетними запитами
+        та оновлює суму так само, як сторінка білдера. Ціни комплектуючих, тканин і сіток
+        перераховуються на сервері; суми рядків ролет — з цін складових і знижки замовлення.
+        Повертає збережену суму замовлення.
+    """
+    from .services_currency import get_current_eur_rate, get_current_usd_rate
+    raw_rows, rows = rows, clean_item_rows(kind, rows)
+    update_fields = ["total_eur", "eur_rate"]
+    if kind == KIND_ROLLERS:
+        discount_multiplier, _ = customer_discount_multiplier(pct=order.discount_percent)
+        price_roller_rows(rows, raw_rows, discount_multiplier, {item.pk: item for item in order.items.all()})
+        # Same as the roller builder: positions are stamped with the saving user's organization.
+        profile = getattr(user, "customerprofile", None)
+        organization_id = getattr(profile, "organization_id", None)
+        order.total_eur = save_roller_items(order, rows, organization_id).quantize(Decimal("0.01"))
+        order.eur_rate = order.eur_rate or get_current_eur_rate()
+    elif kind in (KIND_COMPONENTS, KIND_FABRICS):
+        discount_multiplier, _ = customer_discount_multiplier(pct=order.discount_percent)
+        save_items = save_component_items if kind == KIND_COMPONENTS else save_fabric_items
+        order.total_eur = save_items(order, rows, discount_multiplier)
+        order.eur_rate = order.eur_rate or get_current_eur_rate()
+    else:
+        discount_multiplier, discount_pct = customer_discount_multiplier(order.customer)
+        try:
+            if kind == KIND_MOSQUITOES:
+                items, total_usd = recalculate_mosquito_items(rows, discount_multiplier)
+                for item in items:
+                    validate_mosquito_item(item)
+            else:
+                items, total_usd = recalculate_mosquito_component_items(rows, discount_multiplier)
+        except ValueError as exc:
+            raise BuilderItemsError([{"row": None, "field": None, "message": str(exc)}])
+        if kind == KIND_MOSQUITOES:
+            save_mosquito_items(order, items)
+        else:
+            save_mosquito_component_items(order, items)
+        order.total_eur = total_usd
+        order.eur_rate = get_current_usd_rate()
+        order.discount_percent = discount_pct
+        update_fields.append("discount_percent")
+    if not order.eur_rate_at_creation:
+        order.eur_rate_at_creation = order.eur_rate
+        update_fields.append("eur_rate_at_creation")
+    order.save(update_fields=update_fields)
+    refresh_item_summaries(order)
+    return order.total_eur
@@ -0,0 +1,184 @@
+import csv
+import json
+import tempfile
+from copy import copy
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse, StreamingHttpResponse
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, Side
+from openpyxl.styles.fonts import DEFAULT_FONT
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+TEXT_EXPORT_CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson; charset=utf-8",
+}
+# Rows joined into one chunk of the streamed response.
+TEXT_EXPORT_BATCH = 500
+
+# Keep small exports in memory, spill bigger ones to disk.
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+HEADER_STYLE = "export_header"
+TOTAL_STYLE = "export_total"
+
+
+class NamedStylePalette:
+    """
+    EN: Named styles of one workbook, one per (font, alignment, border) combination in use.
+        Each combination is registered once, on first use; `cell.style = name` then copies its
+        precomputed style array instead of hashing Font/Border/Alignment objects per cell.
+        The palette holds constructor kwargs (borders: tuples of sides), so every workbook
+        gets its own style objects.
+    UA: Іменовані стилі однієї книги — по одному на кожну комбінацію (шрифт, вирівнювання, рамка).
+        Комбінація реєструється один раз, при першому використанні; `cell.style = name` копіює
+        готовий масив стилю замість хешування Font/Border/Alignment для кожної клітинки.
+    """
+
+    def __init__(self, wb, prefix: str, fonts=None, alignments=None, borders=None, side=None):
+        self.wb = wb
+        self.prefix = prefix
+        self.fonts = fonts or {}
+        self.alignments = alignments or {}
+        self.borders = borders or {}
+        self.side_style = side or {"style": "thin", "color": "000000"}
+        self._names = {}
+
+    def name(self, font=None, alignment=None, border=None) -> str:
+        key = (font, alignment, border)
+        name = self._names.get(key)
+        if name is None:
+            name = f"{self.prefix} {font or 'regular'} {alignment or 'general'} {border or 'none'}"
+            sides = self.borders.get(border, ())
+            self.wb.add_named_style(
+                NamedStyle(
+                    name=name,
+                    font=Font(**self.fonts[font]) if font else copy(DEFAULT_FONT),
+                    alignment=Alignment(**self.alignments.get(alignment, {})),
+                    border=Border(**{edge: Side(**self.side_style) for edge in sides}),
+                )
+            )
+            self._names[key] = name
+        return name
+
+
+def _named_styles():
+    return [
+        NamedStyle(name=HEADER_STYLE, font=Font(bold=True)),
+        NamedStyle(name=TOTAL_STYLE, font=Font(bold=True)),
+    ]
+
+
+class StreamingXlsxExport:
+    """
+    EN: Single-sheet XLSX export on a write-only workbook: rows are serialized as they
+        are appended, so memory does not grow with the row count. The file is written
+        into a spooled temp file and returned as a FileResponse.
+    UA: Експорт XLSX з одним аркушем у режимі write-only: рядки записуються одразу,
+        тож пам'ять не росте з кількістю рядків. Файл пишеться у тимчасовий spooled-файл
+        і віддається через FileResponse.
+    """
+
+    def __init__(self, title: str, widths=None):
+        self.wb = Workbook(write_only=True)
+        for style in _named_styles():
+            self.wb.add_named_style(style)
+        self.ws = self.wb.create_sheet(title)
+        # Column widths must be set before the first row is written.
+        for col_letter, width in (widths or {}).items():
+            self.ws.column_dimensions[col_letter].width = width
+
+    def _styled_row(self, values, style):
+        row = []
+        for value in values:
+            if value in ("", None):
+                row.append(value)
+                continue
+            cell = WriteOnlyCell(self.ws, value=value)
+            cell.style = style
+            row.append(cell)
+        return row
+
+    def header(self, values):
+        self.ws.append(self._styled_row(values, HEADER_STYLE))
+
+    def row(self, values):
+        self.ws.append(values)
+
+    def total(self, values):
+        self.ws.append(self._styled_row(values, TOTAL_STYLE))
+
+    def spool(self):
+        """EN: Save into a rewound spooled temp file. UA: Зберігає у тимчасовий файл."""
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+        self.wb.save(spool)
+        spool.seek(0)
+        return spool
+
+    def response(self, filename: str) -> FileResponse:
+        spool = self.spool()
+        return FileResponse(spool, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
+
+
+def iter_with_progress(rows, total: int, progress=None, step: int = 500):
+    """
+    EN: Yield rows, calling progress(done, total) every `step` rows and at the end.
+    UA: Віддає рядки й кожні `step` рядків викликає progress(done, total).
+    """
+    done = 0
+    for row in rows:
+        yield row
+        done += 1
+        if progress and done % step == 0:
+            progress(done, total)
+    if progress:
+        progress(done, total)
+
+
+class _Echo:
+    """csv.writer target that returns the formatted line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(columns, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([label for _, label in columns])
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _ndjson_lines(columns, rows):
+    keys = [key for key, _ in columns]
+    for row in rows:
+        yield json.dumps(dict(zip(keys, row)), cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+def _batched(lines, size):
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= size:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+def stream_text_export(fmt: str, basename: str, columns, rows) -> StreamingHttpResponse:
+    """
+    EN: Unstyled CSV / NDJSON export streamed while `rows` are produced: the download starts
+        at once and memory stays flat. `columns` is [(json_key, csv_header), ...].
+    UA: Експорт CSV / NDJSON без стилів, що віддається потоком у міру формування `rows`:
+        завантаження починається одразу, пам'ять не росте. `columns` — [(ключ_json, заголовок_csv), ...].
+    """
+    lines = _csv_lines(columns, rows) if fmt == "csv" else _ndjson_lines(columns, rows)
+    response = StreamingHttpResponse(
+        _batched(lines, TEXT_EXPORT_BATCH),
+        content_type=TEXT_EXPORT_CONTENT_TYPES[fmt],
+    )
+    response["Content-Disposition"] = f'attachment; filename="{basename}.{fmt}"'
+    return response
@@ -0,0 +1,103 @@
+import datetime
+import logging
+
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.utils import timezone
+
+from .models import ExportJob
+
+logger = logging.getLogger("app")
+
+EXPORT_JOB_TTL = datetime.timedelta(hours=24)
+
+
+def _export_builders():
+    # Builders live in views next to the synchronous export endpoints.
+    from .views import _balances_export, _order_list_export, _production_workbook_export, _turnover_export
+
+    return {
+        ExportJob.KIND_BALANCES: _balances_export,
+        ExportJob.KIND_TURNOVER: _turnover_export,
+        ExportJob.KIND_ORDERS: _order_list_export,
+        ExportJob.KIND_PRODUCTION: _production_workbook_export,
+    }
+
+
+def start_export_job(user, kind: str, params: dict) -> ExportJob:
+    """
+    EN: Create a job and enqueue it after commit. If the broker is unreachable the job is
+        marked failed, so the page shows the error instead of waiting for a worker.
+    UA: Створює задачу й ставить у чергу після коміту. Якщо брокер недоступний — задача
+        позначається як помилкова, і сторінка показує помилку замість очікування.
+    """
+    from .tasks import enqueue_on_commit, run_export_job_task
+
+    job = ExportJob.objects.create(user=user, kind=kind, params=params)
+
+    def fail_unqueued(exc):
+        ExportJob.objects.filter(pk=job.pk, status=ExportJob.STATUS_PENDING).update(
+            status=ExportJob.STATUS_FAILED,
+            error="Черга фонових задач недоступна, спробуйте пізніше.",
+            finished_at=timezone.now(),
+        )
+
+    enqueue_on_commit(run_export_job_task, job.pk, on_broker_error=fail_unqueued)
+    return job
+
+
+def run_export_job(job_id) -> None:
+    """EN: Generate the export file for a job. UA: Формує файл вивантаження для задачі."""
+    # Claim the job atomically so a redelivered task does not run it twice.
+    claimed = ExportJob.objects.filter(pk=job_id, status=ExportJob.STATUS_PENDING).update(
+        status=ExportJob.STATUS_RUNNING
+    )
+    if not claimed:
+        return
+    job = ExportJob.objects.get(pk=job_id)
+    state = {"percent": 0}
+
+    def progress(done, total):
+        # Leave 100 % for the moment the file is stored.
+        percent = min(99, int(done * 100 / total)) if total else 99
+        if percent != state["percent"]:
+            state["percent"] = percent
+            ExportJob.objects.filter(pk=job.pk).update(progress=percent)
+
+    try:
+        builder = _export_builders()[job.kind]
+        user = get_user_model().objects.get(pk=job.user_id)
+        filename, export = builder(user, job.params, progress=progress)
+        with export.spool() as spool:
+            job.file.save(filename, File(spool), save=False)
+    except Exception as exc:
+        logger.exception("Export job %s failed", job.pk)
+        ExportJob.objects.filter(pk=job.pk).update(
+            status=ExportJob.STATUS_FAILED,
+            error=str(exc)[:1000],
+            finished_at=timezone.now(),
+        )
+        return
+
+    now = timezone.now()
+    job.filename = filename
+    job.status = ExportJob.STATUS_DONE
+    job.progress = 100
+    job.finished_at = now
+    job.expires_at = now + EXPORT_JOB_TTL
+    job.save(update_fields=["file", "filename", "status", "progress", "finished_at", "expires_at"])
+
+
+def purge_expired_export_jobs(now=None) -> int:
+    """EN: Delete expired jobs and their files. UA: Видаляє прострочені задачі та їхні файли."""
+    now = now or timezone.now()
+    stale = ExportJob.objects.filter(expires_at__lt=now)
+    # Failed/abandoned jobs never get expires_at; drop them after the same TTL.
+    stale = stale | ExportJob.objects.filter(expires_at__isnull=True, created_at__lt=now - EXPORT_JOB_TTL)
+    count = 0
+    for job in stale.iterator():
+        if job.file:
+            job.file.delete(save=False)
+        job.delete()
+        count += 1
+    return count
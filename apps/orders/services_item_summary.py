@@ -0,0 +1,148 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from .item_options import OPTION_LABELS
+from .models import OrderItem, OrderMosquitoItem
+from .services_pricing import normalize_discount_percent
+
+# Bump when the stored layout changes; older summaries are ignored until recomputed.
+ITEM_SUMMARY_VERSION = 1
+SUMMARY_BATCH_SIZE = 200
+
+
+def _number(value):
+    return str(Decimal(value or 0))
+
+
+def _whole_uah(value):
+    return Decimal(value or 0).quantize(Decimal("1"), rounding=ROUND_HALF_UP)
+
+
+def _current(item):
+    summary = item.summary or {}
+    return summary if summary.get("version") == ITEM_SUMMARY_VERSION else None
+
+
+def roller_item_summary(item, rate):
+    """
+    EN: Presentation data of a roller position computed at save time: option lines in EUR,
+        item total in EUR and in UAH at `rate` (the order rate).
+    UA: Дані позиції ролет для відображення, пораховані під час збереження: рядки опцій
+        в EUR, сума позиції в EUR та в грн за курсом `rate` (курс замовлення).
+    """
+    total_eur = Decimal(item.subtotal_eur or 0)
+    return {
+        "version": ITEM_SUMMARY_VERSION,
+        "rate": _number(rate),
+        "total_eur": _number(total_eur),
+        "total_uah": _number(_whole_uah(total_eur * Decimal(rate or 0))),
+        "options": [
+            {
+                "label": OPTION_LABELS.get(option.price_attr, option.price_attr),
+                "qty": _number(qty),
+                "price_eur": _number(price),
+            }
+            for option, qty, price in item.option_lines()
+        ],
+    }
+
+
+def mosquito_item_summary(item, rate, discount_pct):
+    """
+    EN: Presentation data of a mosquito position: priced option lines and extra lines in USD
+        (with the order discount), item total in USD and in UAH at `rate`.
+    UA: Дані позиції москітної сітки: рядки опцій і додаткові рядки в USD (зі знижкою
+        замовлення), сума позиції в USD та в грн за курсом `rate`.
+    """
+    from .views import _mosquito_option_summary
+
+    lines, extras = _mosquito_option_summary(item, discount_pct)
+    total_usd = Decimal(item.subtotal_usd or 0)
+    return {
+        "version": ITEM_SUMMARY_VERSION,
+        "rate": _number(rate),
+        "discount_percent": _number(normalize_discount_percent(discount_pct)),
+        "total_usd": _number(total_usd),
+        "total_uah": _number(_whole_uah(total_usd * Decimal(rate or 0))),
+        "options": [dict(line, qty=_number(line["qty"]), total_usd=_number(line["total_usd"])) for line in lines],
+        "extras": [
+            dict(extra, total_usd=None if extra["total_usd"] is None else _number(extra["total_usd"]))
+            for extra in extras
+        ],
+    }
+
+
+def roller_option_lines(item):
+    """
+    EN: [(label, qty, price EUR)] of a roller position, from the saved summary when present.
+    UA: [(назва, к-сть, ціна EUR)] позиції ролет, зі збереженого підсумку, якщо він є.
+    """
+    summary = _current(item)
+    if summary is None:
+        return [
+            (OPTION_LABELS.get(option.price_attr, option.price_attr), Decimal(qty), price)
+            for option, qty, price in item.option_lines()
+        ]
+    return [(line["label"], Decimal(line["qty"]), Decimal(line["price_eur"])) for line in summary["options"]]
+
+
+def mosquito_option_lines(item, discount_pct):
+    """
+    EN: (option lines, extra lines) of a mosquito position with totals in USD (None for extras
+        without a price). The saved summary is used when it was computed with `discount_pct`.
+    UA: (рядки опцій, додаткові рядки) позиції сітки з сумами в USD (None для рядків без ціни).
+        Збережений підсумок використовується, якщо він рахувався з тією ж знижкою.
+    """
+    from .views import _mosquito_option_summary
+
+    summary = _current(item)
+    if summary is None or summary.get("discount_percent") != _number(normalize_discount_percent(discount_pct)):
+        return _mosquito_option_summary(item, discount_pct)
+    lines = [dict(line, qty=Decimal(line["qty"]), total_usd=Decimal(line["total_usd"])) for line in summary["options"]]
+    extras = [
+        dict(extra, total_usd=None if extra["total_usd"] is None else Decimal(extra["total_usd"]))
+        for extra in summary["extras"]
+    ]
+    return lines, extras
+
+
+def item_total_uah(item, amount, rate, markup_multiplier=Decimal("1")):
+    """
+    EN: Whole-UAH value of `amount` (the item total) at `rate` with markup; the saved value is
+        reused when it was computed for the same total and rate and there is no markup.
+    UA: Сума позиції `amount` у цілих грн за курсом з націнкою; збережене значення
+        використовується, якщо курс той самий і націнки немає.
+    """
+    summary = _current(item)
+    if (
+        summary is not None
+        and markup_multiplier == 1
+        and Decimal(summary["rate"]) == Decimal(rate or 0)
+        and Decimal(summary.get("total_eur", summary.get("total_usd"))) == Decimal(amount or 0)
+    ):
+        return Decimal(summary["total_uah"])
+    return _whole_uah(Decimal(amount or 0) * Decimal(rate or 0) * Decimal(markup_multiplier or 1))
+
+
+def refresh_item_summaries(order):
+    """
+    EN: Recompute summaries of the order's roller and mosquito positions at the order rate;
+        only changed rows are written. Returns the number of updated positions.
+    UA: Перераховує підсумки позицій ролет і москітних сіток за курсом замовлення;
+        записуються лише змінені рядки. Повертає кількість оновлених позицій.
+    """
+    rate = Decimal(order.eur_rate or 0)
+    updated = 0
+    for model, related_name, build in (
+        (OrderItem, "items", lambda item: roller_item_summary(item, rate)),
+        (OrderMosquitoItem, "mosquito_items", lambda item: mosquito_item_summary(item, rate, order.discount_percent)),
+    ):
+        changed = []
+        for item in getattr(order, related_name).all():
+            summary = build(item)
+            if summary != item.summary:
+                item.summary = summary
+                changed.append(item)
+        if changed:
+            model.objects.bulk_update(changed, ["summary"], batch_size=SUMMARY_BATCH_SIZE)
+            updated += len(changed)
+    return updated
@@ -0,0 +1,258 @@
+import datetime
+import logging
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction as db_transaction
+from django.db.models import Exists, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from .models import BalanceLedgerEntry, BalanceSnapshot, Order, Transaction
+from .selectors import annotate_order_totals_uah
+from .services_currency import get_current_eur_rate, get_current_usd_rate
+
+logger = logging.getLogger("app")
+
+BALANCE_ORDER_STATUSES = [Order.STATUS_IN_WORK, Order.STATUS_READY, Order.STATUS_SHIPPED]
+
+
+def rebuild_customer_ledger(customer_id, *, current_rate=None, usd_rate=None) -> int:
+    """
+    EN: Recompute the customer's ledger: orders (in work+, minus base UAH total) and
+        transactions (debit +, credit -), ordered by date, with a running balance.
+    UA: Перераховує журнал клієнта: замовлення (у роботі й далі, з мінусом базової суми)
+        і транзакції (прихід +, видаток -) за датою, з поточним балансом.
+    """
+    current_rate = current_rate if current_rate is not None else get_current_eur_rate()
+    usd_rate = usd_rate if usd_rate is not None else get_current_usd_rate()
+
+    orders = annotate_order_totals_uah(
+        Order.objects.filter(customer_id=customer_id, deleted=False, status__in=BALANCE_ORDER_STATUSES),
+        current_rate,
+        usd_rate,
+    ).values_list("pk", "created_at", "total_uah_display")
+    txs = Transaction.objects.filter(customer_id=customer_id, deleted=False).values_list(
+        "pk", "created_at", "type", "amount", "eur_rate"
+    )
+
+    rows = []
+    for pk, created_at, total in orders:
+        rows.append((created_at, 0, pk, BalanceLedgerEntry.KIND_ORDER, -Decimal(total or 0)))
+    for pk, created_at, tx_type, amount, rate in txs:
+        amount_uah = (Decimal(amount or 0) * Decimal(rate or 0)).quantize(Decimal("0.01"))
+        if tx_type == Transaction.CREDIT:
+            amount_uah = -amount_uah
+        rows.append((created_at, 1, pk, BalanceLedgerEntry.KIND_TRANSACTION, amount_uah))
+    rows.sort(key=lambda r: (r[0], r[1], r[2]))
+
+    entries = []
+    running = Decimal("0")
+    for seq, (created_at, _, pk, kind, amount_uah) in enumerate(rows, start=1):
+        running += amount_uah
+        entries.append(
+            BalanceLedgerEntry(
+                customer_id=customer_id,
+                kind=kind,
+                order_id=pk if kind == BalanceLedgerEntry.KIND_ORDER else None,
+                transaction_id=pk if kind == BalanceLedgerEntry.KIND_TRANSACTION else None,
+                created_at=created_at,
+                seq=seq,
+                amount_uah=amount_uah,
+                running_balance_uah=running,
+            )
+        )
+
+    with db_transaction.atomic():
+        BalanceLedgerEntry.objects.filter(customer_id=customer_id).delete()
+        BalanceLedgerEntry.objects.bulk_create(entries, batch_size=1000)
+        # Today's snapshot always mirrors the current balance.
+        BalanceSnapshot.objects.update_or_create(
+            customer_id=customer_id,
+            date=timezone.localdate(),
+            defaults={"balance_uah": running},
+        )
+    return len(entries)
+
+
+def ledger_customers_affected_by(instance, deleted: bool = False) -> list:
+    """
+    EN: Customers whose ledger can change when an order or transaction is saved/deleted: its customer and,
+        after a reassignment, the customer it was loaded with if their ledger holds the row.
+        Quotes and other saves of orders that are neither in the ledger nor entering it are skipped.
+    UA: Клієнти, чий журнал може змінитися після збереження/видалення замовлення або транзакції:
+        поточний клієнт і, після перепризначення, попередній, якщо в його журналі є цей запис.
+        Прорахунки та інші збереження замовлень поза журналом пропускаються.
+    """
+    is_order = isinstance(instance, Order)
+    row_entries = BalanceLedgerEntry.objects.filter(
+        **({"order_id": instance.pk} if is_order else {"transaction_id": instance.pk})
+    )
+    customer_ids = []
+    previous_id = getattr(instance, "loaded_customer_id", None)
+    if previous_id and previous_id != instance.customer_id and row_entries.filter(customer_id=previous_id).exists():
+        customer_ids.append(previous_id)
+    if not instance.customer_id:
+        return customer_ids
+    if deleted:
+        affected = True
+    elif not instance.deleted and (not is_order or instance.status in BALANCE_ORDER_STATUSES):
+        affected = True
+    else:
+        affected = row_entries.filter(customer_id=instance.customer_id).exists()
+    if affected:
+        customer_ids.append(instance.customer_id)
+    return customer_ids
+
+
+def customers_missing_ledger(customer_ids=None):
+    """
+    EN: Customers with balance-affecting orders/transactions but no ledger rows yet (e.g. right after deploy).
+    UA: Клієнти з замовленнями/транзакціями, що впливають на баланс, але ще без записів журналу.
+    """
+    User = get_user_model()
+    users = User.objects.filter(
+        Exists(Order.objects.filter(customer_id=OuterRef("pk"), deleted=False, status__in=BALANCE_ORDER_STATUSES))
+        | Exists(Transaction.objects.filter(customer_id=OuterRef("pk"), deleted=False))
+    ).exclude(Exists(BalanceLedgerEntry.objects.filter(customer_id=OuterRef("pk"))))
+    if customer_ids is not None:
+        users = users.filter(pk__in=customer_ids)
+    return list(users.values_list("pk", flat=True))
+
+
+def backfill_missing_ledgers(customer_ids=None) -> int:
+    """
+    EN: Build the ledger for customers that have none (one-off after deploy: rebuild_balance_ledger --missing).
+        Returns the number of customers rebuilt.
+    UA: Будує журнал для клієнтів, у яких його ще немає (один раз після деплою: rebuild_balance_ledger --missing).
+    """
+    missing = customers_missing_ledger(customer_ids)
+    if not missing:
+        return 0
+    current_rate = get_current_eur_rate()
+    usd_rate = get_current_usd_rate()
+    for customer_id in missing:
+        rebuild_customer_ledger(customer_id, current_rate=current_rate, usd_rate=usd_rate)
+    logger.info("Balance ledger backfilled for %s customers", len(missing))
+    return len(missing)
+
+
+def ledger_keyset_page(entries, before: str = "", page_size: int = 50):
+    """
+    EN: Keyset page over (-created_at, -id). Cursor is "<epoch microseconds>.<entry id>".
+    UA: Keyset-сторінка за (-created_at, -id). Курсор — "<мікросекунди epoch>.<id запису>".
+    Returns (rows, next_cursor).
+    """
+    anchor = _parse_ledger_cursor(before)
+    if anchor:
+        anchor_at, anchor_id = anchor
+        entries = entries.filter(Q(created_at__lt=anchor_at) | Q(created_at=anchor_at, pk__lt=anchor_id))
+    rows = list(entries.order_by("-created_at", "-id")[: page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    next_cursor = ledger_cursor(rows[-1]) if has_more and rows else None
+    return rows, next_cursor
+
+
+def ledger_cursor(entry) -> str:
+    delta = entry.created_at - datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+    micros = (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+    return f"{micros}.{entry.pk}"
+
+
+def _parse_ledger_cursor(value: str):
+    try:
+        micros_str, pk_str = (value or "").split(".", 1)
+        micros, pk = int(micros_str), int(pk_str)
+    except (TypeError, ValueError):
+        return None
+    anchor_at = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc) + datetime.timedelta(microseconds=micros)
+    return anchor_at, pk
+
+
+def _end_of_day(day: datetime.date) -> datetime.datetime:
+    return timezone.make_aware(datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time.min))
+
+
+def snapshot_balances(day: datetime.date, customer_ids=None) -> int:
+    """
+    EN: Store end-of-day balances for `day` from the ledger (one query + one upsert).
+    UA: Зберігає баланси на кінець дня `day` з журналу (один запит + один upsert).
+    """
+    User = get_user_model()
+    last_running = (
+        BalanceLedgerEntry.objects.filter(customer_id=OuterRef("pk"), created_at__lt=_end_of_day(day))
+        .order_by("-seq")
+        .values("running_balance_uah")[:1]
+    )
+    users = User.objects.filter(ledger_entries__isnull=False)
+    if customer_ids is not None:
+        users = users.filter(pk__in=customer_ids)
+    rows = users.distinct().annotate(balance=Subquery(last_running)).values_list("pk", "balance")
+    snapshots = [
+        BalanceSnapshot(customer_id=pk, date=day, balance_uah=balance)
+        for pk, balance in rows
+        if balance is not None
+    ]
+    BalanceSnapshot.objects.bulk_create(
+        snapshots,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["customer", "date"],
+        update_fields=["balance_uah", "updated_at"],
+    )
+    return len(snapshots)
+
+
+def latest_snapshots(day: datetime.date = None):
+    """
+    EN: Per customer, the most recent snapshot on or before `day` (default: today).
+    UA: Для кожного клієнта — останній знімок на дату `day` або раніше (за замовчуванням сьогодні).
+    """
+    day = day or timezone.localdate()
+    latest_date = (
+        BalanceSnapshot.objects.filter(customer_id=OuterRef("customer_id"), date__lte=day)
+        .order_by("-date")
+        .values("date")[:1]
+    )
+    return BalanceSnapshot.objects.filter(date__lte=day, date=Subquery(latest_date))
+
+
+def negative_balance_customer_ids(day: datetime.date = None):
+    """
+    EN: Customers with a negative balance as of `day`: from their latest snapshot, or from the ledger
+        for customers that have no snapshot yet.
+    UA: Клієнти з від'ємним балансом на дату: з останнього знімка, а для клієнтів без знімків — з журналу.
+    """
+    day = day or timezone.localdate()
+    User = get_user_model()
+    from_snapshots = set(latest_snapshots(day).filter(balance_uah__lt=0).values_list("customer_id", flat=True))
+    last_running = (
+        BalanceLedgerEntry.objects.filter(customer_id=OuterRef("pk"), created_at__lt=_end_of_day(day))
+        .order_by("-seq")
+        .values("running_balance_uah")[:1]
+    )
+    from_ledger = (
+        User.objects.filter(Exists(BalanceLedgerEntry.objects.filter(customer_id=OuterRef("pk"))))
+        .exclude(Exists(BalanceSnapshot.objects.filter(customer_id=OuterRef("pk"), date__lte=day)))
+        .annotate(balance=Subquery(last_running))
+        .filter(balance__lt=0)
+        .values_list("pk", flat=True)
+    )
+    return from_snapshots | set(from_ledger)
+
+
+def balance_as_of(customer_id, day: datetime.date) -> Decimal:
+    """
+    EN: Balance at the end of `day`: snapshot if available, otherwise the ledger entry.
+    UA: Баланс на кінець дня `day`: зі знімка, інакше з журналу.
+    """
+    snapshot = BalanceSnapshot.objects.filter(customer_id=customer_id, date=day).values_list("balance_uah", flat=True).first()
+    if snapshot is not None:
+        return snapshot
+    running = (
+        BalanceLedgerEntry.objects.filter(customer_id=customer_id, created_at__lt=_end_of_day(day))
+        .order_by("-seq")
+        .values_list("running_balance_uah", flat=True)
+        .first()
+    )
+    return running if running is not None else Decimal("0")
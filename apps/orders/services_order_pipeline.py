@@ -0,0 +1,46 @@
+import logging
+
+from django.utils import timezone
+
+from .models import Order, OrderStatusLog
+
+logger = logging.getLogger("app")
+
+
+def process_order_in_work(status_log_id, order_url: str = "") -> None:
+    """
+    EN: Post-commit work for an order sent "in work": build and store the workbook, then
+        e-mail the notification. The status log row is the idempotency key — each step
+        is marked on it, so retries and duplicate deliveries skip finished steps.
+    UA: Фонові дії після переходу замовлення "в роботу": формування й збереження Excel,
+        потім e-mail. Ключ ідемпотентності — запис журналу статусів: кожен крок позначається
+        в ньому, тож повтори не виконують завершені кроки вдруге.
+    """
+    # Builders live in views next to the synchronous download endpoints.
+    from .views import _build_order_workbook, _send_order_in_work_email
+
+    status_log = OrderStatusLog.objects.select_related("order__customer").filter(pk=status_log_id).first()
+    if status_log is None:
+        return
+    order = status_log.order
+
+    workbook_payload = None
+    if status_log.workbook_built_at is None:
+        workbook_payload = _build_order_workbook(order)
+        # Plain UPDATE: the file name alone does not concern balance/ledger signals.
+        Order.objects.filter(pk=order.pk).update(workbook_file=order.workbook_file.name)
+        OrderStatusLog.objects.filter(pk=status_log.pk).update(workbook_built_at=timezone.now())
+
+    # Claim the notification before sending so parallel deliveries cannot both send it.
+    claimed = OrderStatusLog.objects.filter(pk=status_log.pk, notified_at__isnull=True).update(
+        notified_at=timezone.now()
+    )
+    if not claimed:
+        return
+    try:
+        _send_order_in_work_email(order, order_url, workbook_payload, fail_silently=False)
+    except Exception:
+        # Release the claim so the retry sends it.
+        OrderStatusLog.objects.filter(pk=status_log.pk).update(notified_at=None)
+        logger.warning("In-work e-mail for order %s failed, will retry", order.pk)
+        raise
@@ -0,0 +1,322 @@
+"""
+EN: Server-side pricing shared by the builder pages (views) and the builder items API
+    (services_builder_items): customer discount, mosquito nets and mosquito components.
+UA: Серверний розрахунок цін для сторінок білдерів і API позицій: знижка клієнта,
+    москітні сітки та комплектуючі до них.
+"""
+import re
+from decimal import Decimal, InvalidOperation
+
+from apps.integrations.google_sheets import (
+    build_mosquito_warnings,
+    parse_mosquito_components_sheet,
+    parse_mosquito_price_sheet,
+    select_mosquito_catalog_product,
+)
+
+from .utils_components import is_meter_unit
+
+MOSQUITO_PRICE_SHEET_URL = "https://docs.google.com/spreadsheets/d/1rte4e5hTae33bAB89GDMR3nZGnNCVHjlZXG2H9KSSyM/edit?gid=0#gid=0"
+MOSQUITO_COMPONENTS_PRICE_SHEET_URL = "https://docs.google.com/spreadsheets/d/1rte4e5hTae33bAB89GDMR3nZGnNCVHjlZXG2H9KSSyM/edit?gid=2116478350#gid=2116478350"
+
+
+def to_decimal(value, default="0"):
+    """EN: Convert string to Decimal with fallback. UA: Конвертація рядка в Decimal з запасним значенням."""
+    value = (str(value) or "").strip()
+    if not value:
+        value = default
+    try:
+        return Decimal(value.replace(",", "."))
+    except (InvalidOperation, AttributeError):
+        return Decimal(default)
+
+
+def to_int(value, default=0):
+    """EN: Safe int conversion with fallback. UA: Безпечне перетворення в int із запасним значенням."""
+    try:
+        return int((value or "").strip() or default)
+    except (ValueError, TypeError):
+        return int(default)
+
+
+def normalize_discount_percent(pct):
+    """EN: Discount percent clamped to [-100, 100], in cents. UA: Відсоток знижки в межах [-100, 100]."""
+    try:
+        pct = Decimal(pct or 0)
+    except Exception:
+        pct = Decimal("0")
+    if pct < Decimal("-100"):
+        pct = Decimal("-100")
+    if pct > Decimal("100"):
+        pct = Decimal("100")
+    return pct.quantize(Decimal("0.01"))
+
+
+def customer_discount_multiplier(user=None, pct=None):
+    """Return discount multiplier (1 - percent/100). If pct is provided, it takes precedence."""
+    if pct is None:
+        if not user:
+            pct = Decimal("0")
+        else:
+            profile = getattr(user, "customerprofile", None)
+            pct = getattr(profile, "discount_percent", Decimal("0")) if profile else Decimal("0")
+    pct = normalize_discount_percent(pct)
+    return (Decimal("100") - pct) / Decimal("100"), pct
+
+
+def _mosquito_has_selected_impost(product_type, options_data):
+    product_name = (product_type or "").lower()
+    options = options_data or {}
+    if "17*25" in product_name or "посилені" in product_name:
+        return (not bool(options.get("door_no_impost"))) and to_int(options.get("door_impost_height", 0), 0) > 0
+    if "10*30" in product_name or "10*20" in product_name:
+        return to_int(options.get("impost_qty", 0), 0) > 0
+    return False
+
+
+def _mosquito_note_with_auto_warning(product_type, base_note, warning_text, options_data):
+    product_name = (product_type or "").lower()
+    text = (warning_text or "").strip()
+    note = (base_note or "").strip()
+    impost_warning = "Негарантійний виріб, рекомендується встановлення імпоста"
+    note = re.sub(r"^\s*Негарантійний виріб, рекомендується встановлення імпоста\.?\s*", "", note).strip()
+    needs_impost = any(key in product_name for key in ("10*30", "10*20", "17*25", "посилені"))
+    has_selected_impost = _mosquito_has_selected_impost(product_type, options_data)
+
+    auto_warning = ""
+    if needs_impost and text and (not has_selected_impost) and "імпоста" in text.lower():
+        auto_warning = impost_warning
+    elif "оберіть двочасну сітку" in text.lower():
+        auto_warning = "Оберіть двочасну сітку"
+
+    if not auto_warning:
+        return note
+    if note.startswith(auto_warning):
+        return note
+    return f"{auto_warning}. {note}".strip()
+
+
+def _validate_mosquito_item_options(item):
+    product_name = (item.get("product_type") or "").lower()
+    options_data = item.get("options_data") or {}
+    def _heights_count(value):
+        parts = [part.strip() for part in re.split(r"[,\n;]+", str(value or "")) if part.strip()]
+        return len(parts)
+    if "10*30" in product_name or "10*20" in product_name:
+        impost_qty = to_int(options_data.get("impost_qty", 0), 0)
+        impost_heights = str(options_data.get("impost_heights") or "").strip()
+        if impost_qty > 0 and not impost_heights:
+            raise ValueError(f"Для {item['product_type']} потрібно вказати висоти імпостів.")
+        if impost_qty > 0 and _heights_count(impost_heights) != impost_qty:
+            raise ValueError(f"Для {item['product_type']} кількість висот імпостів має відповідати кількості імпостів.")
+    if "дверні 17*25" in product_name or "посилені" in product_name:
+        no_impost = bool(options_data.get("door_no_impost"))
+        door_impost_height = to_int(options_data.get("door_impost_height"), 0)
+        if not no_impost and door_impost_height <= 0:
+            raise ValueError(f"Для {item['product_type']} потрібно вказати висоту імпоста від низу або обрати 'без імпоста'.")
+        extra_impost_qty = to_int(options_data.get("door_extra_impost_qty", 0), 0)
+        extra_impost_heights = str(options_data.get("door_extra_impost_heights") or "").strip()
+        if extra_impost_qty > 0 and not extra_impost_heights:
+            raise ValueError(f"Для {item['product_type']} потрібно вказати висоти додаткових імпостів.")
+        if extra_impost_qty > 0 and _heights_count(extra_impost_heights) != extra_impost_qty:
+            raise ValueError(f"Для {item['product_type']} кількість висот додаткових імпостів має відповідати кількості додаткових імпостів.")
+
+
+def validate_mosquito_item(item):
+    """EN: Sliding side and option checks for a recalculated mosquito item. UA: Перевірка сторони зсуву та опцій сітки."""
+    if item.get("requires_sliding_side"):
+        allowed_sliding_sides = ("left", "right")
+        if "плісе двочаст" in (item.get("product_type") or "").lower():
+            allowed_sliding_sides = ("center",)
+        if item.get("sliding_side") not in allowed_sliding_sides:
+            raise ValueError(f"Для {item['product_type']} потрібно обрати сторону зсуву.")
+    _validate_mosquito_item_options(item)
+
+
+def _calculate_mosquito_options_total(product_type, quantity, options_data, option_prices, line_discount_multiplier=Decimal("1")):
+    name = (product_type or "").lower()
+    qty = Decimal(max(int(quantity or 1), 1))
+    data = options_data or {}
+    total = Decimal("0")
+
+    def count_value(key):
+        return Decimal(str(max(to_int(data.get(key), 0), 0)))
+
+    def add_named(option_name, count, *, multiply_by_order_qty=True):
+        nonlocal total
+        price = option_prices.get(option_name, Decimal("0")) * Decimal(line_discount_multiplier or 0)
+        multiplier = qty if multiply_by_order_qty else Decimal("1")
+        total += price * Decimal(str(count)) * multiplier
+
+    if "10*30" in name:
+        replacement = (data.get("replacement_mount") or "").strip()
+        if replacement == "15*32":
+            add_named("Заміна кріплення з 9*32 на 15*32", 1)
+        elif replacement == "21*32":
+            add_named("Заміна кріплення з 9*32 на 21*32", 1)
+        add_named("Додаткове кріплення 9*32 (стандарт)", count_value("extra_mount_9"))
+        add_named("Додаткове кріплення 15*32", count_value("extra_mount_15"))
+        add_named("Додаткове кріплення 21*32", count_value("extra_mount_21"))
+        add_named("Додатковий імпост для внутрішніх сіток 10*30", count_value("impost_qty"))
+    elif "10*20" in name:
+        add_named("Додаткове кріплення 9*32 (стандарт)", count_value("extra_mount_9"))
+        add_named("Додаткове кріплення 15*32", count_value("extra_mount_15"))
+        add_named("Додаткове кріплення 21*32", count_value("extra_mount_21"))
+        add_named("Кріплення для алюмінєвих рам", count_value("aluminum_mount_kit"))
+        add_named("Додотковий імпост для зовнішніх сіток 10*20", count_value("impost_qty"))
+    elif "17*25" in name:
+        add_named("Додатковий імпост для дверних сіток 17*25", count_value("door_extra_impost_qty"))
+        add_named("Петля ПВХ звичайна", count_value("hinge_regular_qty"))
+        add_named("Петля з пружиною", count_value("hinge_spring_qty"))
+        add_named("Ручка пластикова до дверних", count_value("door_handle_qty"))
+        add_named("Защіпка пластикова", count_value("latch_qty"))
+        add_named("Магніт", count_value("magnet_qty"))
+        add_named("Кріплення для алюмінєвих рам", count_value("aluminum_mount_kit"))
+    elif "посилені 14*40" in name or "посилені 17*40" in name:
+        add_named("Петля ПВХ звичайна", count_value("hinge_regular_qty"))
+        add_named("Петля з пружиною", count_value("hinge_spring_qty"))
+        add_named("Ручка пластикова до дверних", count_value("door_handle_qty"))
+        add_named("Защіпка пластикова", count_value("latch_qty"))
+        add_named("Магніт", count_value("magnet_qty"))
+    elif "ролетні" in name:
+        add_named("Механізм гальмування", count_value("brake_qty"))
+        if "внутр. кріпл" in name or "внутрішнього кріплення" in name:
+            replacement = (data.get("replacement_mount") or "").strip()
+            if replacement == "15*32":
+                add_named("Заміна кріплення з 9*32 на 15*32", 1)
+            elif replacement == "21*32":
+                add_named("Заміна кріплення з 9*32 на 21*32", 1)
+            add_named("Додаткове кріплення 9*32 (стандарт)", count_value("extra_mount_9"))
+            add_named("Додаткове кріплення 15*32", count_value("extra_mount_15"))
+            add_named("Додаткове кріплення 21*32", count_value("extra_mount_21"))
+
+    return total.quantize(Decimal("0.01"))
+
+
+def recalculate_mosquito_items(raw_items, discount_multiplier):
+    """
+    EN: Price mosquito rows from the price sheet: mesh area (at least the minimum area) times
+        the mesh price, plus options, with `discount_multiplier`. Returns (items, total USD);
+        raises ValueError for rows that cannot be priced.
+    UA: Розрахунок рядків москітних сіток за прайсом: площа (не менше мінімальної) на ціну
+        полотна плюс опції, зі знижкою. Повертає (позиції, сума USD); ValueError, якщо рядок
+        не можна порахувати.
+    """
+    catalog = parse_mosquito_price_sheet(MOSQUITO_PRICE_SHEET_URL)
+    products = catalog.get("products") or []
+    option_prices = {
+        (item.get("name") or "").strip(): to_decimal(item.get("price_usd"), default="0")
+        for item in (catalog.get("options") or [])
+    }
+    recalculated = []
+    total_usd = Decimal("0")
+    for item in raw_items:
+        product = select_mosquito_catalog_product(
+            products,
+            item["product_type"],
+            item["profile_color"],
+            item["height_mm"],
+        )
+        if not product:
+            raise ValueError(f"Не знайдено виріб у прайсі: {item['product_type']} / {item['profile_color']}")
+        mesh_prices = product.get("mesh_prices_usd_sqm") or {}
+        if not item["mesh_type"] or item["mesh_type"] not in mesh_prices:
+            raise ValueError(f"Для {item['product_type']} немає ціни по полотну {item['mesh_type']}")
+        price_usd_sqm = to_decimal(mesh_prices.get(item["mesh_type"]))
+        actual_area = (Decimal(item["width_mm"]) * Decimal(item["height_mm"])) / Decimal("1000000")
+        min_area = to_decimal(product.get("min_area_sqm"), default="0")
+        if actual_area >= Decimal("1000000") or min_area >= Decimal("1000000"):
+            raise ValueError(
+                f"Завелика площа для {item['product_type']} "
+                f"({item['width_mm']}x{item['height_mm']} мм). Перевірте введені розміри."
+            )
+        calc_area = actual_area if actual_area >= min_area else min_area
+        base_subtotal_usd = (calc_area * price_usd_sqm * Decimal(item["quantity"]) * discount_multiplier).quantize(Decimal("0.01"))
+        options_total_usd = _calculate_mosquito_options_total(
+            item["product_type"],
+            item["quantity"],
+            item.get("options_data") or {},
+            option_prices,
+            discount_multiplier,
+        )
+        subtotal_usd = (base_subtotal_usd + options_total_usd).quantize(Decimal("0.01"))
+        warnings = build_mosquito_warnings(
+            product_type=item["product_type"],
+            mesh_type=item["mesh_type"],
+            width_mm=item["width_mm"],
+            height_mm=item["height_mm"],
+            area_sqm=calc_area,
+            options_data=item.get("options_data") or {},
+        )
+        total_usd += subtotal_usd
+        recalculated.append(
+            {
+                **item,
+                "area_sqm": actual_area.quantize(Decimal("0.0001")),
+                "min_area_sqm": min_area.quantize(Decimal("0.0001")),
+                "price_usd_sqm": price_usd_sqm.quantize(Decimal("0.0001")),
+                "options_total_usd": options_total_usd,
+                "subtotal_usd": subtotal_usd,
+                "warning_text": "\n".join(warnings),
+                "note": _mosquito_note_with_auto_warning(
+                    item["product_type"],
+                    item.get("note", ""),
+                    "\n".join(warnings),
+                    item.get("options_data") or {},
+                ),
+                "dimension_labels": product.get("dimension_labels") or {},
+                "fiberglass_only": bool(product.get("fiberglass_only")),
+                "requires_sliding_side": bool(product.get("requires_sliding_side")),
+            }
+        )
+    return recalculated, total_usd.quantize(Decimal("0.01"))
+
+
+def recalculate_mosquito_component_items(raw_items, discount_multiplier):
+    """
+    EN: Price mosquito component rows from the components sheet (per m.p. or per piece),
+        with `discount_multiplier`. Returns (items, total USD); raises ValueError on bad rows.
+    UA: Розрахунок комплектуючих до сіток за прайсом (за м.п. або за шт.), зі знижкою.
+        Повертає (позиції, сума USD); ValueError для некоректних рядків.
+    """
+    catalog = parse_mosquito_components_sheet(MOSQUITO_COMPONENTS_PRICE_SHEET_URL)
+    price_rows = catalog.get("items") or []
+    recalculated = []
+    total_usd = Decimal("0")
+    for item in raw_items:
+        matched = next(
+            (
+                row for row in price_rows
+                if (row.get("name") or "").strip().lower() == item["name"].strip().lower()
+                and (row.get("color") or "").strip().lower() == item["color"].strip().lower()
+                and (row.get("unit") or "").strip().lower() == item["unit"].strip().lower()
+            ),
+            None,
+        )
+        if not matched:
+            raise ValueError(f"Не знайдено комплектуючу у прайсі: {item['name']} / {item['color']} / {item['unit']}")
+        quantity = to_decimal(item.get("quantity"), default="0")
+        if quantity <= 0:
+            raise ValueError(f"Для {item['name']} потрібно вказати кількість більше нуля.")
+        if is_meter_unit(item["unit"]) and quantity != quantity.to_integral_value():
+            raise ValueError(f"Для {item['name']} кількість у м.п. має бути цілим числом.")
+        base_price_usd = to_decimal(matched.get("price_usd"), default="0")
+        price_usd = (base_price_usd * discount_multiplier).quantize(Decimal("0.0001"))
+        unit_name = (item["unit"] or "").strip().lower()
+        if "м.п" in unit_name:
+            if int(item["length_mm"] or 0) <= 0:
+                raise ValueError(f"Для {item['name']} потрібно вказати довжину, мм.")
+            line_qty = (Decimal(int(item["length_mm"])) / Decimal("1000")) * quantity
+        else:
+            line_qty = quantity
+        subtotal_usd = (line_qty * price_usd).quantize(Decimal("0.01"))
+        total_usd += subtotal_usd
+        recalculated.append(
+            {
+                **item,
+                "quantity": quantity.quantize(Decimal("0.001")),
+                "price_usd": price_usd,
+                "subtotal_usd": subtotal_usd,
+            }
+        )
+    return recalculated, total_usd.quantize(Decimal("0.01"))
@@ -0,0 +1,145 @@
+import copy
+import tempfile
+from io import BytesIO
+
+from django.http import FileResponse
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import MergedCell
+from openpyxl.drawing.image import Image as XLImage
+from openpyxl.worksheet.hyperlink import Hyperlink
+
+from .services_export import HEADER_STYLE, SPOOL_MAX_MEMORY, TOTAL_STYLE, XLSX_CONTENT_TYPE, _named_styles
+
+SUMMARY_TITLE = "Зведення"
+SUMMARY_HEADERS = ["№", "Замовлення", "Назва", "Клієнт", "Позицій", "Сума, грн", "Аркуш"]
+SUMMARY_WIDTHS = {"A": 6, "B": 14, "C": 36, "D": 32, "E": 10, "F": 16, "G": 14}
+
+# Sheet-level print settings carried over from the per-order workbook.
+_SHEET_SETTINGS = ("page_setup", "print_options", "page_margins", "sheet_format")
+
+
+def _image_source(image):
+    """
+    EN: Fresh input for re-adding `image` to another workbook. Images read from a file keep the
+        original bytes in Image.ref (a BytesIO); a path or PIL image is passed through as is.
+    UA: Джерело для копії зображення: у прочитаних з файлу зображень Image.ref містить
+        початкові байти (BytesIO); шлях чи PIL-зображення передаються як є.
+    """
+    ref = image.ref
+    if isinstance(ref, BytesIO):
+        return BytesIO(ref.getvalue())
+    if hasattr(ref, "read"):
+        ref.seek(0)
+        return BytesIO(ref.read())
+    return ref
+
+
+class MergedOrdersWorkbook:
+    """
+    EN: One XLSX with a summary sheet plus a copy of each order workbook on its own sheet.
+        Output sheets are write-only and source workbooks are loaded one at a time, so
+        memory is bounded by the largest single order, not by the batch.
+    UA: Один XLSX: зведений аркуш і копія файлу кожного замовлення на окремому аркуші.
+        Аркуші пишуться в режимі write-only, вихідні файли відкриваються по одному,
+        тож пам'ять обмежена найбільшим замовленням, а не всією пачкою.
+    """
+
+    def __init__(self):
+        self.wb = Workbook(write_only=True)
+        for style in _named_styles():
+            self.wb.add_named_style(style)
+        # Created first so it stays the first tab; rows are written in spool().
+        self.summary = self.wb.create_sheet(SUMMARY_TITLE)
+        for col_letter, width in SUMMARY_WIDTHS.items():
+            self.summary.column_dimensions[col_letter].width = width
+        self.summary_rows = []
+        self.total_uah = 0
+
+    def add_order(self, order, workbook_bytes: bytes, *, positions: int, total_uah) -> None:
+        title = f"#{order.pk}"
+        self._copy_sheet(load_workbook(BytesIO(workbook_bytes)).active, title)
+        self.summary_rows.append(
+            [len(self.summary_rows) + 1, order.pk, order.title, str(order.customer), positions, total_uah, title]
+        )
+        self.total_uah += total_uah or 0
+
+    def _copy_sheet(self, src, title: str) -> None:
+        ws = self.wb.create_sheet(title)
+        # Dimensions, merges and print settings must be set before the first row is written.
+        for col_letter, dim in src.column_dimensions.items():
+            if dim.width:
+                ws.column_dimensions[col_letter].width = dim.width
+        for row_idx, dim in src.row_dimensions.items():
+            if dim.height:
+                ws.row_dimensions[row_idx].height = dim.height
+        for merged in src.merged_cells.ranges:
+            ws.merged_cells.add(merged.coord)
+        for attr in _SHEET_SETTINGS:
+            setattr(ws, attr, copy.copy(getattr(src, attr)))
+        ws.sheet_properties.pageSetUpPr = copy.copy(src.sheet_properties.pageSetUpPr)
+        if src.print_title_rows:
+            ws.print_title_rows = src.print_title_rows
+        if src.print_area:
+            ws.print_area = src.print_area
+        for image in src._images:
+            clone = XLImage(_image_source(image))
+            clone.width, clone.height = image.width, image.height
+            clone.anchor = image.anchor
+            ws.add_image(clone)
+
+        # Source style ids -> style ids in the merged workbook, resolved once per combination.
+        style_map = {}
+        for row in src.iter_rows():
+            out = []
+            for cell in row:
+                if not cell.has_style and (cell.value is None or isinstance(cell, MergedCell)):
+                    out.append(None)
+                    continue
+                target = WriteOnlyCell(ws, value=None if isinstance(cell, MergedCell) else cell.value)
+                if cell.has_style:
+                    key = tuple(cell._style)
+                    style = style_map.get(key)
+                    if style is None:
+                        target.font = copy.copy(cell.font)
+                        target.border = copy.copy(cell.border)
+                        target.fill = copy.copy(cell.fill)
+                        target.alignment = copy.copy(cell.alignment)
+                        target.protection = copy.copy(cell.protection)
+                        target.number_format = cell.number_format
+                        style = style_map[key] = copy.copy(target._style)
+                    else:
+                        target._style = copy.copy(style)
+                if cell.hyperlink is not None and cell.hyperlink.target:
+                    target.hyperlink = cell.hyperlink.target
+                out.append(target)
+            ws.append(out)
+
+    def _write_summary(self) -> None:
+        ws = self.summary
+        header = []
+        for value in SUMMARY_HEADERS:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.style = HEADER_STYLE
+            header.append(cell)
+        ws.append(header)
+        for values in self.summary_rows:
+            sheet = WriteOnlyCell(ws, value=values[-1])
+            sheet.hyperlink = Hyperlink(ref="", location=f"'{values[-1]}'!A1")
+            ws.append(values[:-1] + [sheet])
+        total = WriteOnlyCell(ws, value=self.total_uah)
+        total.style = TOTAL_STYLE
+        label = WriteOnlyCell(ws, value=f"Разом замовлень: {len(self.summary_rows)}")
+        label.style = TOTAL_STYLE
+        ws.append([None, label, None, None, None, total])
+
+    def spool(self):
+        """EN: Save into a rewound spooled temp file. UA: Зберігає у тимчасовий файл."""
+        self._write_summary()
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+        self.wb.save(spool)
+        spool.seek(0)
+        return spool
+
+    def response(self, filename: str) -> FileResponse:
+        return FileResponse(self.spool(), as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
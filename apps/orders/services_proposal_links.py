@@ -0,0 +1,73 @@
+import functools
+import hashlib
+import hmac
+
+from django.conf import settings
+from django.core import signing
+from django.urls import reverse
+
+# Legacy tokens (signing.dumps JSON + zlib + timestamp) use this salt and stay valid.
+PROPOSAL_SALT = "orders-proposal-link-v1"
+_LINK_SALT = b"orders-proposal-link-v2"
+# 96-bit truncated HMAC-SHA256, hex encoded.
+_MAC_LENGTH = 24
+_TOKEN_PLACEHOLDER = "__token__"
+
+
+@functools.lru_cache(maxsize=4)
+def _mac_prototype(secret_key: str):
+    key = hashlib.sha256(_LINK_SALT + secret_key.encode("utf-8")).digest()
+    return hmac.new(key, digestmod=hashlib.sha256)
+
+
+def _mac(order_id: int) -> str:
+    mac = _mac_prototype(settings.SECRET_KEY).copy()
+    mac.update(str(order_id).encode("ascii"))
+    return mac.hexdigest()[:_MAC_LENGTH]
+
+
+def _is_mac(value: str) -> bool:
+    return len(value) == _MAC_LENGTH and value.isascii() and all(c in "0123456789abcdef" for c in value)
+
+
+def proposal_token(order_id: int) -> str:
+    """EN: Compact signed token "<id>.<mac>" for public proposal links. UA: Короткий підписаний токен посилання."""
+    return f"{order_id}.{_mac(order_id)}"
+
+
+def order_id_from_token(token: str):
+    """
+    EN: Order id for a compact or legacy signing token, None if the signature is bad.
+    UA: Id замовлення з короткого або старого токена; None, якщо підпис невірний.
+    """
+    token = token or ""
+    order_part, sep, mac = token.partition(".")
+    if sep and ":" not in token:
+        # str.isdigit() also accepts "²" and other non-ASCII digits that int() rejects.
+        if not (order_part.isascii() and order_part.isdigit()) or not _is_mac(mac):
+            return None
+        if not hmac.compare_digest(mac, _mac(int(order_part))):
+            return None
+        return int(order_part)
+    try:
+        data = signing.loads(token, salt=PROPOSAL_SALT)
+    except signing.BadSignature:
+        return None
+    return (data or {}).get("order") if isinstance(data, dict) else None
+
+
+def proposal_link_maps(order_ids):
+    """
+    EN: ({id: page_url}, {id: excel_url}) for list views. Both URL patterns are reversed
+        once per call and filled per row, instead of two reverse() calls per order.
+    UA: ({id: сторінка}, {id: excel}) для списків. Шаблони URL резолвляться один раз
+        за виклик, а не двічі на кожне замовлення.
+    """
+    page_prefix, page_suffix = reverse("orders:proposal_page", args=[_TOKEN_PLACEHOLDER]).split(_TOKEN_PLACEHOLDER)
+    excel_prefix, excel_suffix = reverse("orders:proposal_excel", args=[_TOKEN_PLACEHOLDER]).split(_TOKEN_PLACEHOLDER)
+    page_urls, excel_urls = {}, {}
+    for order_id in order_ids:
+        token = proposal_token(order_id)
+        page_urls[order_id] = f"{page_prefix}{token}{page_suffix}"
+        excel_urls[order_id] = f"{excel_prefix}{token}{excel_suffix}"
+    return page_urls, excel_urls
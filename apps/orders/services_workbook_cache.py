@@ -0,0 +1,223 @@
+import hashlib
+import json
+import logging
+import os
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .models import Order
+
+logger = logging.getLogger("app")
+
+# Bump when the workbook layout/styling changes so old cached files are not served.
+WORKBOOK_TEMPLATE_VERSION = "1"
+WORKBOOK_CACHE_TIMEOUT = 7 * 24 * 60 * 60
+WORKBOOK_KINDS = ("order", "proposal")
+# Bump when proposal_public.html or its context changes.
+PROPOSAL_PAGE_VERSION = "1"
+PROPOSAL_PAGE_CACHE_TIMEOUT = 24 * 60 * 60
+
+_ORDER_RELATIONS = (
+    "items",
+    "component_items",
+    "fabric_items",
+    "mosquito_items",
+    "mosquito_component_items",
+)
+
+
+def _row_state(instance, exclude=()):
+    return [
+        (f.attname, getattr(instance, f.attname))
+        for f in instance._meta.concrete_fields
+        if f.attname not in exclude
+    ]
+
+
+def _avatar_version(profile):
+    avatar = getattr(profile, "avatar", None)
+    if not avatar:
+        return None
+    try:
+        return [avatar.name, os.path.getmtime(avatar.path)]
+    except (ValueError, OSError, NotImplementedError):
+        return [avatar.name, None]
+
+
+def order_workbook_fingerprint(order, kind: str, rate) -> str:
+    """
+    EN: Content hash of everything the workbook renders: order row, all item rows,
+        customer profile + avatar version, the applied rate and the template version.
+    UA: Хеш усього, що потрапляє у файл: замовлення, усі позиції, профіль клієнта
+        й версія аватара, застосований курс і версія шаблону.
+    """
+    profile = getattr(order.customer, "customerprofile", None)
+    state = {
+        "v": WORKBOOK_TEMPLATE_VERSION,
+        "kind": kind,
+        "rate": rate,
+        "order": _row_state(order, exclude=("workbook_file",)),
+        "items": {
+            relation: list(getattr(order, relation).order_by("pk").values_list())
+            for relation in _ORDER_RELATIONS
+        },
+        "customer": str(order.customer),
+        "profile": _row_state(profile) if profile else None,
+        "avatar": _avatar_version(profile),
+    }
+    raw = json.dumps(state, default=str, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _data_key(fingerprint: str) -> str:
+    return f"orders:workbook:{fingerprint}"
+
+
+def _latest_key(order_id, kind: str) -> str:
+    return f"orders:workbook:latest:{order_id}:{kind}"
+
+
+def cached_order_workbook(order, kind: str, rate, build):
+    """
+    EN: Return (filename, bytes) from cache by fingerprint; on a miss call `build()`
+        and store the result. Cache errors fall back to building.
+    UA: Повертає (ім'я, байти) з кешу за відбитком; якщо немає — викликає `build()`
+        і зберігає результат. Помилки кешу не блокують генерацію.
+    """
+    fingerprint = order_workbook_fingerprint(order, kind, rate)
+    key = _data_key(fingerprint)
+    try:
+        hit = cache.get(key)
+    except Exception:
+        logger.exception("Workbook cache read failed for order %s", order.pk)
+        hit = None
+    if hit is not None:
+        return hit
+
+    payload = build()
+    try:
+        cache.set_many(
+            {key: payload, _latest_key(order.pk, kind): key},
+            timeout=WORKBOOK_CACHE_TIMEOUT,
+        )
+    except Exception:
+        logger.exception("Workbook cache write failed for order %s", order.pk)
+    return payload
+
+
+def _version_key(order_id) -> str:
+    return f"orders:version:{order_id}"
+
+
+def order_version(order_id) -> str:
+    """
+    EN: Cheap content version of an order for the page caches; changes whenever the order,
+        its positions or its customer profile change (see bump_order_versions).
+    UA: Дешева версія вмісту замовлення для кешу сторінок; змінюється разом із замовленням,
+        його позиціями чи профілем клієнта.
+    """
+    key = _version_key(order_id)
+    try:
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, str(time.time_ns()), timeout=None)
+            version = cache.get(key)
+    except Exception:
+        logger.exception("Order version cache read failed for order %s", order_id)
+        version = None
+    return version or ""
+
+
+def bump_order_versions(order_ids):
+    """
+    EN: Give the orders a new content version once the current DB transaction commits,
+        so a page rendered mid-transaction is not cached under the new version.
+    UA: Нова версія вмісту замовлень після коміту транзакції.
+    """
+    order_ids = [pk for pk in order_ids if pk]
+    if not order_ids:
+        return
+
+    def _bump():
+        version = str(time.time_ns())
+        try:
+            cache.set_many({_version_key(pk): version for pk in order_ids}, timeout=None)
+        except Exception:
+            logger.exception("Order version bump failed")
+
+    transaction.on_commit(_bump)
+
+
+def invalidate_order_workbooks(order_ids):
+    """EN: Drop the latest cached workbooks of the orders. UA: Видаляє кешовані файли замовлень."""
+    bump_order_versions(order_ids)
+    latest_keys = [_latest_key(pk, kind) for pk in order_ids for kind in WORKBOOK_KINDS]
+    if not latest_keys:
+        return
+    try:
+        data_keys = list(cache.get_many(latest_keys).values())
+        cache.delete_many(latest_keys + data_keys)
+    except Exception:
+        logger.exception("Workbook cache invalidation failed")
+
+
+def invalidate_customer_workbooks(customer_id):
+    """EN: Profile/avatar changed — drop cached workbooks of all customer orders. UA: Змінився профіль клієнта."""
+    if not customer_id:
+        return
+    invalidate_order_workbooks(list(Order.objects.filter(customer_id=customer_id).values_list("pk", flat=True)))
+
+
+def cached_proposal_page(request, order, token: str, rate, render):
+    """
+    EN: Public proposal page cached by the order's content version, the floating quote rate
+        and the token; the full order fingerprint (ETag) is computed only on a miss.
+        Revalidation via ETag/Last-Modified returns 304 without rendering.
+    UA: Публічна сторінка пропозиції з кешу за версією замовлення, плаваючим курсом
+        прорахунку й токеном; повний відбиток (ETag) рахується лише при промаху.
+        Повторні запити з ETag/Last-Modified отримують 304.
+    """
+    variant = hashlib.sha256(f"{rate}:{token}".encode("utf-8")).hexdigest()[:32]
+    key = f"orders:proposal_page:{PROPOSAL_PAGE_VERSION}:{order.pk}:{order_version(order.pk)}:{variant}"
+    try:
+        hit = cache.get(key)
+    except Exception:
+        logger.exception("Proposal page cache read failed for order %s", order.pk)
+        hit = None
+
+    if hit is None:
+        # Version bumped (or evicted): the content may still be unchanged, so look it up by fingerprint.
+        fingerprint = order_workbook_fingerprint(order, f"proposal_page:{PROPOSAL_PAGE_VERSION}:{token}", rate)
+        content_key = f"orders:proposal_page:{fingerprint}"
+        try:
+            hit = cache.get(content_key)
+        except Exception:
+            logger.exception("Proposal page cache read failed for order %s", order.pk)
+            hit = None
+        if hit is None:
+            response = render()
+            if response.status_code != 200:
+                return response
+            hit = (quote_etag(fingerprint), response.content, int(time.time()))
+            try:
+                cache.set(content_key, hit, timeout=PROPOSAL_PAGE_CACHE_TIMEOUT)
+            except Exception:
+                logger.exception("Proposal page cache write failed for order %s", order.pk)
+        try:
+            cache.set(key, hit, timeout=PROPOSAL_PAGE_CACHE_TIMEOUT)
+        except Exception:
+            logger.exception("Proposal page cache write failed for order %s", order.pk)
+
+    etag, content, rendered_at = hit
+    response = HttpResponse(content)
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(rendered_at)
+    # Quote prices follow the current rate: let browsers keep the body but always revalidate.
+    patch_cache_control(response, no_cache=True)
+    # Given the response, a 304 keeps its ETag, Last-Modified and Cache-Control headers.
+    return get_conditional_response(request, etag=etag, last_modified=rendered_at, response=response)
@@ -0,0 +1,75 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.customers.models import CustomerProfile
+
+from .models import (
+    Order,
+    OrderComponentItem,
+    OrderFabricItem,
+    OrderItem,
+    OrderMosquitoComponentItem,
+    OrderMosquitoItem,
+    Transaction,
+)
+from .services_avatar_logo import ensure_avatar_logo
+from .services_builder_cache import invalidate_builder_items
+from .services_ledger import ledger_customers_affected_by
+from .services_workbook_cache import bump_order_versions, invalidate_customer_workbooks, invalidate_order_workbooks
+from .tasks import enqueue_on_commit, rebuild_customer_ledger_task
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+def rebuild_ledger_on_change(sender, instance, signal, **kwargs):
+    """
+    EN: Keep the balance ledger in sync with orders/transactions (both customers after a reassignment);
+        the rebuild runs on the worker after commit.
+    UA: Синхронізація журналу балансу (обох клієнтів після перепризначення); перебудова — у воркері після коміту.
+    """
+    for customer_id in ledger_customers_affected_by(instance, deleted=signal is post_delete):
+        enqueue_on_commit(rebuild_customer_ledger_task, customer_id)
+    instance.loaded_customer_id = instance.customer_id
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def drop_order_workbooks(sender, instance, **kwargs):
+    """EN: Order changed — drop its cached workbooks. UA: Замовлення змінено — скидаємо кеш файлів."""
+    invalidate_order_workbooks([instance.pk])
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+@receiver(post_save, sender=OrderComponentItem)
+@receiver(post_delete, sender=OrderComponentItem)
+@receiver(post_save, sender=OrderFabricItem)
+@receiver(post_delete, sender=OrderFabricItem)
+@receiver(post_save, sender=OrderMosquitoItem)
+@receiver(post_delete, sender=OrderMosquitoItem)
+@receiver(post_save, sender=OrderMosquitoComponentItem)
+@receiver(post_delete, sender=OrderMosquitoComponentItem)
+def drop_item_builder_items(sender, instance, **kwargs):
+    """
+    EN: A position saved or deleted outside a builder (admin, cascades). Builders write in bulk and
+        store fresh rows after commit, which runs after this invalidation.
+    UA: Позицію збережено або видалено поза білдером (адмінка, каскад). Білдери пишуть пакетно
+        й зберігають свіжі рядки після коміту — вже після цього скидання.
+    """
+    invalidate_builder_items([instance.order_id])
+    bump_order_versions([instance.order_id])
+
+
+@receiver(post_save, sender=CustomerProfile)
+def drop_customer_workbooks(sender, instance, **kwargs):
+    """EN: Profile/avatar changed. UA: Змінено профіль/аватар клієнта."""
+    invalidate_customer_workbooks(instance.user_id)
+
+
+@receiver(post_save, sender=CustomerProfile)
+def render_avatar_logo(sender, instance, **kwargs):
+    """EN: Pre-render the downscaled logo right after an avatar upload. UA: Зменшений логотип одразу після завантаження аватара."""
+    if instance.avatar:
+        ensure_avatar_logo(instance.avatar)
@@ -0,0 +1,108 @@
+import datetime
+import json
+import logging
+import smtplib
+
+from celery import current_app, shared_task
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from . import services_export_jobs, services_ledger, services_order_pipeline
+from .models import DeferredTask
+
+logger = logging.getLogger("app")
+
+# Failures worth retrying: network/SMTP connection problems and timeouts (smtplib errors are OSErrors).
+TRANSIENT_ERRORS = (OSError, smtplib.SMTPException)
+# SMTP answers that a retry will not change.
+PERMANENT_SMTP_ERRORS = (
+    smtplib.SMTPAuthenticationError,
+    smtplib.SMTPRecipientsRefused,
+    smtplib.SMTPSenderRefused,
+)
+DEFERRED_TASKS_BATCH = 500
+
+
+def enqueue_on_commit(task, *args, on_broker_error=None):
+    """
+    EN: Queue `task` after the current DB transaction commits. Nothing runs in-process: if the
+        broker is unreachable, `on_broker_error(exc)` handles it when given, otherwise the call
+        is stored as a DeferredTask and sent again by requeue_deferred_tasks.
+    UA: Ставить `task` у чергу після коміту. У процесі веб-запиту задача не виконується: якщо
+        брокер недоступний, спрацьовує `on_broker_error(exc)`, інакше виклик зберігається як
+        DeferredTask і надсилається повторно задачею requeue_deferred_tasks.
+    """
+
+    def _send():
+        try:
+            task.delay(*args)
+        except Exception as exc:
+            if on_broker_error is not None:
+                logger.error("Task %s%s: broker unavailable (%s)", task.name, args, exc)
+                on_broker_error(exc)
+                return
+            logger.error("Task %s%s: broker unavailable (%s), deferred", task.name, args, exc)
+            DeferredTask.objects.create(task_name=task.name, args=list(args), error=str(exc)[:1000])
+
+    db_transaction.on_commit(_send)
+
+
+@shared_task(ignore_result=True)
+def requeue_deferred_tasks():
+    """
+    EN: Send deferred task calls to the broker again (oldest first, duplicates once).
+    UA: Повторно надсилає відкладені виклики задач (від найстаріших, дублікати — один раз).
+    """
+    sent = set()
+    for deferred in DeferredTask.objects.all()[:DEFERRED_TASKS_BATCH]:
+        key = (deferred.task_name, json.dumps(deferred.args))
+        if key not in sent:
+            task = current_app.tasks.get(deferred.task_name)
+            if task is None:
+                logger.error("Deferred task %s is not registered, dropped", deferred.task_name)
+            else:
+                try:
+                    task.delay(*deferred.args)
+                except Exception as exc:
+                    DeferredTask.objects.filter(pk=deferred.pk).update(
+                        attempts=deferred.attempts + 1, error=str(exc)[:1000]
+                    )
+                    logger.warning("Deferred task %s: broker still unavailable (%s)", deferred.task_name, exc)
+                    return
+            sent.add(key)
+        deferred.delete()
+
+
+@shared_task(ignore_result=True)
+def run_export_job_task(job_id):
+    services_export_jobs.run_export_job(job_id)
+
+
+@shared_task(ignore_result=True)
+def rebuild_customer_ledger_task(customer_id):
+    services_ledger.rebuild_customer_ledger(customer_id)
+
+
+@shared_task(ignore_result=True)
+def snapshot_balances_task():
+    """EN: Nightly: close yesterday's balances and refresh today's. UA: Щоночі: баланси за вчора й сьогодні."""
+    today = timezone.localdate()
+    for day in (today - datetime.timedelta(days=1), today):
+        services_ledger.snapshot_balances(day)
+
+
+@shared_task(ignore_result=True)
+def purge_expired_export_jobs():
+    return services_export_jobs.purge_expired_export_jobs()
+
+
+@shared_task(
+    ignore_result=True,
+    autoretry_for=TRANSIENT_ERRORS,
+    dont_autoretry_for=PERMANENT_SMTP_ERRORS,
+    retry_backoff=30,
+    retry_backoff_max=30 * 60,
+    max_retries=6,
+)
+def process_order_in_work_task(status_log_id, order_url=""):
+    services_order_pipeline.process_order_in_work(status_log_id, order_url)
@@ -0,0 +1,288 @@
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.orders.models import Order, OrderItem
+from apps.orders.services_builder_items import (
+    BUILDER_ITEMS_MAX_ROWS,
+    BUILDER_ITEMS_VERSION,
+    KIND_COMPONENTS,
+    KIND_ROLLERS,
+    ROLLER_ITEM_FIELDS,
+    BuilderItemsError,
+    clean_item_rows,
+    parse_items_payload,
+    save_roller_items,
+)
+
+
+def roller_row(**values):
+    row = {
+        "system_sheet": "Фальш-ролети",
+        "table_section": "Біла система",
+        "fabric_name": "Льон",
+        "height_gabarit_mm": 1500,
+        "width_fabric_mm": 800,
+        "base_price_eur": "20.00",
+        "subtotal_eur": "20.00",
+        "quantity": 1,
+    }
+    row.update(values)
+    return row
+
+
+def create_roller_item(order, **values):
+    fields = {
+        "system_sheet": "Фальш-ролети",
+        "table_section": "Біла система",
+        "fabric_name": "Льон",
+        "fabric_color_code": "",
+        "height_gabarit_mm": 1500,
+        "width_fabric_mm": 800,
+        "base_price_eur": Decimal("20.00"),
+        "subtotal_eur": Decimal("20.00"),
+    }
+    fields.update(values)
+    return OrderItem.objects.create(order=order, **fields)
+
+
+class CleanItemRowsTests(SimpleTestCase):
+    def test_coerces_form_strings_and_applies_defaults(self):
+        [row] = clean_item_rows(
+            KIND_ROLLERS,
+            [roller_row(width_fabric_mm="800", base_price_eur="1 234,5", gabarit_width_flag="on", unknown="x")],
+        )
+        self.assertEqual(row["width_fabric_mm"], 800)
+        self.assertEqual(row["base_price_eur"], Decimal("1234.5"))
+        self.assertIs(row["gabarit_width_flag"], True)
+        self.assertIs(row["pvc_plank"], False)
+        self.assertEqual(row["magnets_qty"], Decimal("0"))
+        self.assertIsNone(row["id"])
+        self.assertNotIn("unknown", row)
+        self.assertEqual(set(row), {field for field, _, _ in ROLLER_ITEM_FIELDS})
+
+    def test_reports_every_bad_field(self):
+        with self.assertRaises(BuilderItemsError) as ctx:
+            clean_item_rows(
+                KIND_ROLLERS,
+                [
+                    roller_row(quantity=0, width_fabric_mm="12.5"),
+                    roller_row(system_sheet="", gabarit_width_flag="maybe"),
+                    "not a row",
+                ],
+            )
+        errors = {(error["row"], error["field"]) for error in ctx.exception.errors}
+        self.assertEqual(
+            errors,
+            {
+                (0, "quantity"),
+                (0, "width_fabric_mm"),
+                (1, "system_sheet"),
+                (1, "gabarit_width_flag"),
+                (2, None),
+            },
+        )
+
+    def test_rejects_non_list_empty_and_oversized_payloads(self):
+        for rows in ({"items": []}, [], [roller_row()] * (BUILDER_ITEMS_MAX_ROWS + 1)):
+            with self.subTest(rows=type(rows).__name__), self.assertRaises(BuilderItemsError) as ctx:
+                clean_item_rows(KIND_ROLLERS, rows)
+            self.assertEqual(ctx.exception.errors[0]["field"], "items")
+
+    def test_rejects_non_finite_and_boolean_numbers(self):
+        for value in ("NaN", "Infinity", True, "abc"):
+            with self.subTest(value=value), self.assertRaises(BuilderItemsError):
+                clean_item_rows(KIND_COMPONENTS, [{"name": "Кронштейн", "price_eur": value}])
+
+
+class ParseItemsPayloadTests(SimpleTestCase):
+    def test_bare_list_and_versioned_object(self):
+        rows = [roller_row()]
+        self.assertEqual(parse_items_payload(json.dumps(rows)), rows)
+        self.assertEqual(parse_items_payload({"version": BUILDER_ITEMS_VERSION, "items": rows}), rows)
+
+    def test_bad_json_and_unknown_version(self):
+        for raw in ("{not json", {"version": BUILDER_ITEMS_VERSION + 1, "items": []}):
+            with self.subTest(raw=raw), self.assertRaises(BuilderItemsError):
+                parse_items_payload(raw)
+
+
+class SaveRollerItemsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = get_user_model().objects.create_user(email="customer@example.com", password="x")
+
+    def setUp(self):
+        self.order = Order.objects.create(customer=self.customer)
+        self.kept, self.changed, self.dropped = [
+            create_roller_item(self.order, fabric_name=f"Тканина {idx}", width_fabric_mm=800 + idx)
+            for idx in range(3)
+        ]
+
+    def _row(self, item, **values):
+        row = {field: getattr(item, field) for field, _, _ in ROLLER_ITEM_FIELDS if field != "id"}
+        row.update(id=item.pk, **values)
+        return row
+
+    def test_diff_save_keeps_updates_deletes_and_inserts(self):
+        rows = clean_item_rows(
+            KIND_ROLLERS,
+            [
+                self._row(self.kept),
+                self._row(self.changed, note="Змінено", width_fabric_mm=950),
+                roller_row(fabric_name="Нова", subtotal_eur="15.555"),
+            ],
+        )
+        total = save_roller_items(self.order, rows)
+
+        self.assertEqual(total, Decimal("40.00") + Decimal("15.56"))
+        items = {item.pk: item for item in self.order.items.all()}
+        self.assertEqual(len(items), 3)
+        self.assertIn(self.kept.pk, items)
+        self.assertNotIn(self.dropped.pk, items)
+        self.assertEqual(items[self.changed.pk].note, "Змінено")
+        self.assertEqual(items[self.changed.pk].width_fabric_mm, 950)
+        [new_item] = [item for pk, item in items.items() if pk not in (self.kept.pk, self.changed.pk)]
+        self.assertEqual(new_item.fabric_name, "Нова")
+        self.assertEqual(new_item.subtotal_eur, Decimal("15.56"))
+
+    def test_unchanged_rows_issue_no_writes(self):
+        rows = clean_item_rows(KIND_ROLLERS, [self._row(item) for item in (self.kept, self.changed, self.dropped)])
+        with CaptureQueriesContext(connection) as queries:
+            save_roller_items(self.order, rows)
+        writes = [q["sql"] for q in queries if not q["sql"].lstrip().upper().startswith("SELECT")]
+        self.assertEqual(writes, [])
+        self.assertEqual(self.order.items.count(), 3)
+
+    def test_foreign_ids_are_inserted_not_updated(self):
+        other = Order.objects.create(customer=self.customer)
+        foreign = create_roller_item(other, fabric_name="Своя")
+        rows = clean_item_rows(KIND_ROLLERS, [roller_row(id=foreign.pk, fabric_name="Чужа")])
+        save_roller_items(self.order, rows)
+
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.order_id, other.pk)
+        self.assertEqual(foreign.fabric_name, "Своя")
+        self.assertEqual(list(self.order.items.values_list("fabric_name", flat=True)), ["Чужа"])
+
+
+class BuilderItemsApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = get_user_model().objects.create_user(email="customer@example.com", password="x")
+
+    def setUp(self):
+        self.client.force_login(self.customer)
+        self.order = Order.objects.create(customer=self.customer)
+        self.url = f"/api/v1/orders/{self.order.pk}/items/{KIND_ROLLERS}"
+
+    def _put(self, payload):
+        return self.client.put(self.url, json.dumps(payload), content_type="application/json")
+
+    def test_get_returns_every_schema_field(self):
+        create_roller_item(self.order)
+        data = self.client.get(self.url).json()
+
+        self.assertEqual(data["version"], BUILDER_ITEMS_VERSION)
+        self.assertEqual(data["kind"], KIND_ROLLERS)
+        self.assertEqual(set(data["items"][0]), {field for field, _, _ in ROLLER_ITEM_FIELDS})
+        self.assertEqual(data["items"][0]["subtotal_eur"], "20.00")
+
+    def test_put_round_trip_keeps_ids(self):
+        response = self._put({"version": BUILDER_ITEMS_VERSION, "items": [roller_row(), roller_row(fabric_name="Друга")]})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()["total"], "40.00")
+
+        items = self.client.get(self.url).json()["items"]
+        ids = [item["id"] for item in items]
+        items[1]["note"] = "Змінено"
+        response = self._put({"version": BUILDER_ITEMS_VERSION, "items": items})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(sorted(self.order.items.values_list("pk", flat=True)), sorted(ids))
+        self.assertEqual(self.order.items.get(pk=ids[1]).note, "Змінено")
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_eur, Decimal("40.00"))
+
+    def test_put_rejects_malformed_payloads(self):
+        create_roller_item(self.order)
+        for payload in (
+            {"version": BUILDER_ITEMS_VERSION + 1, "items": [roller_row()]},
+            [roller_row(quantity=0)],
+            [{"system_sheet": ""}],
+            {"items": "rows"},
+        ):
+            with self.subTest(payload=payload):
+                response = self._put(payload)
+                self.assertEqual(response.status_code, 400)
+                self.assertTrue(response.json()["errors"])
+        self.assertEqual(self.order.items.count(), 1)
+
+    def test_put_prices_roller_rows_on_the_server(self):
+        Order.objects.filter(pk=self.order.pk).update(discount_percent=Decimal("10"))
+        row = roller_row(
+            base_price_eur="40.00",
+            surcharge_height_eur="4.00",
+            magnets_price_eur="3.00",
+            magnets_qty=2,
+            quantity=2,
+        )
+        del row["subtotal_eur"]
+        response = self._put([row])
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()["total"], "42.30")
+        self.assertEqual(self.order.items.get().subtotal_eur, Decimal("42.30"))
+
+    def test_put_rejects_tampered_roller_subtotal(self):
+        response = self._put([roller_row(subtotal_eur="0.01")])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [(error["row"], error["field"]) for error in response.json()["errors"]],
+            [(0, "subtotal_eur")],
+        )
+        self.assertFalse(self.order.items.exists())
+
+    def test_put_keeps_unchanged_subtotal_of_existing_rows(self):
+        legacy = create_roller_item(self.order, base_price_eur=Decimal("0"), subtotal_eur=Decimal("15.55"))
+        items = self.client.get(self.url).json()["items"]
+        items[0]["note"] = "Змінено"
+        response = self._put(items)
+        self.assertEqual(response.status_code, 200, response.content)
+        legacy.refresh_from_db()
+        self.assertEqual((legacy.note, legacy.subtotal_eur), ("Змінено", Decimal("15.55")))
+
+        items[0]["base_price_eur"] = "30.00"
+        self.assertEqual(self._put(items).status_code, 400)
+        del items[0]["subtotal_eur"]
+        self.assertEqual(self._put(items).json()["total"], "30.00")
+
+
+class OrderBuilderPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = get_user_model().objects.create_user(email="page@example.com", password="x")
+
+    def setUp(self):
+        self.client.force_login(self.customer)
+        self.order = Order.objects.create(customer=self.customer, discount_percent=Decimal("10"))
+        self.url = reverse("orders:builder_edit", args=[self.order.pk])
+
+    def _post(self, rows):
+        return self.client.post(self.url, {"items_json": json.dumps(rows), "status_action": "save_stay"})
+
+    def test_post_prices_roller_rows_on_the_server(self):
+        row = roller_row(base_price_eur="40.00", surcharge_height_eur="4.00", magnets_price_eur="3.00", magnets_qty=2)
+        del row["subtotal_eur"]
+        self.assertEqual(self._post([row]).status_code, 302)
+        self.assertEqual(self.order.items.get().subtotal_eur, Decimal("42.30"))
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_eur, Decimal("42.30"))
+
+    def test_post_rejects_tampered_roller_subtotal(self):
+        response = self._post([roller_row(subtotal_eur="0.01")])
+        self.assertRedirects(response, self.url, fetch_redirect_response=False)
+        self.assertFalse(self.order.items.exists())
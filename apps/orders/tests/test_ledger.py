@@ -0,0 +1,183 @@
+import datetime
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.orders.models import BalanceLedgerEntry, BalanceSnapshot, Order, Transaction
+from apps.orders.services_ledger import balance_as_of, ledger_keyset_page, rebuild_customer_ledger
+from apps.orders.views import compute_balance
+
+RATE = Decimal("40")
+
+
+def create_order(customer, total_eur, status=Order.STATUS_IN_WORK, **values):
+    return Order.objects.create(customer=customer, status=status, total_eur=total_eur, eur_rate=RATE, **values)
+
+
+def create_transaction(customer, amount, tx_type=Transaction.DEBIT, **values):
+    return Transaction.objects.create(customer=customer, type=tx_type, amount=amount, eur_rate=RATE, **values)
+
+
+def set_created_at(obj, created_at):
+    type(obj).objects.filter(pk=obj.pk).update(created_at=created_at)
+
+
+def ledger(customer):
+    return list(
+        BalanceLedgerEntry.objects.filter(customer=customer)
+        .order_by("seq")
+        .values_list("kind", "order_id", "transaction_id", "amount_uah", "running_balance_uah")
+    )
+
+
+class RebuildCustomerLedgerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = get_user_model().objects.create_user(email="ledger@example.com", password="x")
+
+    def test_running_balance_skips_quotes_and_deleted_rows(self):
+        at = timezone.now() - datetime.timedelta(days=3)
+        order = create_order(self.customer, Decimal("10"))
+        quote = create_order(self.customer, Decimal("99"), status=Order.STATUS_QUOTE)
+        create_order(self.customer, Decimal("99"), deleted=True)
+        debit = create_transaction(self.customer, Decimal("25"))
+        create_transaction(self.customer, Decimal("99"), deleted=True)
+        credit = create_transaction(self.customer, Decimal("5"), Transaction.CREDIT)
+        for offset, obj in enumerate((order, quote, debit, credit)):
+            set_created_at(obj, at + datetime.timedelta(hours=offset))
+
+        self.assertEqual(rebuild_customer_ledger(self.customer.pk, current_rate=RATE, usd_rate=RATE), 3)
+        self.assertEqual(
+            ledger(self.customer),
+            [
+                (BalanceLedgerEntry.KIND_ORDER, order.pk, None, Decimal("-400.00"), Decimal("-400.00")),
+                (BalanceLedgerEntry.KIND_TRANSACTION, None, debit.pk, Decimal("1000.00"), Decimal("600.00")),
+                (BalanceLedgerEntry.KIND_TRANSACTION, None, credit.pk, Decimal("-200.00"), Decimal("400.00")),
+            ],
+        )
+        snapshot = BalanceSnapshot.objects.get(customer=self.customer, date=timezone.localdate())
+        self.assertEqual(snapshot.balance_uah, Decimal("400.00"))
+
+    def test_equal_timestamps_put_orders_first_then_ids(self):
+        at = timezone.now() - datetime.timedelta(days=1)
+        tx_first = create_transaction(self.customer, Decimal("1"))
+        order_late = create_order(self.customer, Decimal("2"))
+        order_early = create_order(self.customer, Decimal("3"))
+        tx_second = create_transaction(self.customer, Decimal("4"))
+        for obj in (tx_first, order_late, order_early, tx_second):
+            set_created_at(obj, at)
+
+        rebuild_customer_ledger(self.customer.pk, current_rate=RATE, usd_rate=RATE)
+        self.assertEqual(
+            [(kind, order_id or tx_id) for kind, order_id, tx_id, _, _ in ledger(self.customer)],
+            [
+                (BalanceLedgerEntry.KIND_ORDER, order_late.pk),
+                (BalanceLedgerEntry.KIND_ORDER, order_early.pk),
+                (BalanceLedgerEntry.KIND_TRANSACTION, tx_first.pk),
+                (BalanceLedgerEntry.KIND_TRANSACTION, tx_second.pk),
+            ],
+        )
+
+
+class LedgerKeysetPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = get_user_model().objects.create_user(email="pages@example.com", password="x")
+        now = timezone.now()
+        # Pairs of rows share a timestamp, so page boundaries fall between equal created_at values.
+        for idx in range(7):
+            tx = create_transaction(
+                cls.customer, Decimal(idx + 1), Transaction.CREDIT if idx % 3 == 2 else Transaction.DEBIT
+            )
+            set_created_at(tx, now - datetime.timedelta(days=10 - idx // 2))
+        rebuild_customer_ledger(cls.customer.pk, current_rate=RATE, usd_rate=RATE)
+
+    def _all_pages(self, page_size):
+        entries = BalanceLedgerEntry.objects.filter(customer=self.customer)
+        pages, cursor = [], ""
+        while True:
+            rows, cursor = ledger_keyset_page(entries, cursor, page_size=page_size)
+            pages.append(rows)
+            if not cursor:
+                return pages
+
+    def test_pages_cover_the_ledger_newest_first(self):
+        pages = self._all_pages(page_size=3)
+        self.assertEqual([len(rows) for rows in pages], [3, 3, 1])
+        seen = [entry.seq for rows in pages for entry in rows]
+        self.assertEqual(seen, list(range(7, 0, -1)))
+
+    def test_running_balance_continues_across_pages(self):
+        rows = [entry for page in self._all_pages(page_size=2) for entry in page]
+        for newer, older in zip(rows, rows[1:]):
+            self.assertEqual(newer.running_balance_uah - newer.amount_uah, older.running_balance_uah)
+        self.assertEqual(rows[0].running_balance_uah, compute_balance(self.customer, force_personal=True))
+        self.assertEqual(rows[-1].running_balance_uah, rows[-1].amount_uah)
+
+    def test_bad_cursor_starts_from_the_first_page(self):
+        entries = BalanceLedgerEntry.objects.filter(customer=self.customer)
+        first, _ = ledger_keyset_page(entries, "", page_size=3)
+        for cursor in ("garbage", "1.x", ".", "12"):
+            with self.subTest(cursor=cursor):
+                rows, _ = ledger_keyset_page(entries, cursor, page_size=3)
+                self.assertEqual(rows, first)
+
+
+class BalanceAsOfTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = get_user_model().objects.create_user(email="asof@example.com", password="x")
+
+    def test_ledger_fallback_and_snapshot(self):
+        today = timezone.localdate()
+        day = today - datetime.timedelta(days=5)
+        noon = timezone.make_aware(datetime.datetime.combine(day, datetime.time(12)))
+        set_created_at(create_transaction(self.customer, Decimal("10")), noon)
+        set_created_at(create_order(self.customer, Decimal("4")), noon + datetime.timedelta(days=1))
+        rebuild_customer_ledger(self.customer.pk, current_rate=RATE, usd_rate=RATE)
+
+        self.assertEqual(balance_as_of(self.customer.pk, day - datetime.timedelta(days=1)), Decimal("0"))
+        self.assertEqual(balance_as_of(self.customer.pk, day), Decimal("400.00"))
+        self.assertEqual(balance_as_of(self.customer.pk, day + datetime.timedelta(days=1)), Decimal("240.00"))
+
+        BalanceSnapshot.objects.create(customer=self.customer, date=day, balance_uah=Decimal("123.45"))
+        self.assertEqual(balance_as_of(self.customer.pk, day), Decimal("123.45"))
+
+
+class LedgerSignalTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.old_customer = User.objects.create_user(email="old@example.com", password="x")
+        cls.new_customer = User.objects.create_user(email="new@example.com", password="x")
+
+    def test_reassigned_in_work_order_moves_between_ledgers(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = create_order(self.old_customer, Decimal("10"))
+            create_transaction(self.old_customer, Decimal("30"))
+        self.assertEqual(len(ledger(self.old_customer)), 2)
+
+        order = Order.objects.get(pk=order.pk)
+        order.customer = self.new_customer
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()
+
+        self.assertEqual(
+            [(kind, order_id) for kind, order_id, _, _, _ in ledger(self.old_customer)],
+            [(BalanceLedgerEntry.KIND_TRANSACTION, None)],
+        )
+        self.assertEqual(
+            [(kind, order_id) for kind, order_id, _, _, _ in ledger(self.new_customer)],
+            [(BalanceLedgerEntry.KIND_ORDER, order.pk)],
+        )
+        for customer in (self.old_customer, self.new_customer):
+            with self.subTest(customer=customer.email):
+                self.assertEqual(ledger(customer)[-1][-1], compute_balance(customer, force_personal=True))
+
+    def test_quote_save_does_not_rebuild(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            create_order(self.old_customer, Decimal("10"), status=Order.STATUS_QUOTE)
+        self.assertEqual(ledger(self.old_customer), [])
+        self.assertFalse(BalanceSnapshot.objects.filter(customer=self.old_customer).exists())
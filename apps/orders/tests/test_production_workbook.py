@@ -0,0 +1,43 @@
+from io import BytesIO
+from types import SimpleNamespace
+from zipfile import ZipFile
+
+from django.test import SimpleTestCase
+from openpyxl import Workbook, load_workbook
+from openpyxl.drawing.image import Image as XLImage
+from openpyxl.utils.units import pixels_to_EMU
+from PIL import Image as PILImage
+
+from apps.orders.services_production_workbook import MergedOrdersWorkbook
+
+
+def png_bytes():
+    buffer = BytesIO()
+    PILImage.new("RGB", (40, 20), (200, 30, 30)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def media(xlsx_bytes):
+    with ZipFile(BytesIO(xlsx_bytes)) as archive:
+        return [archive.read(name) for name in archive.namelist() if name.startswith("xl/media/")]
+
+
+class MergedOrdersWorkbookTests(SimpleTestCase):
+    def test_copies_images_byte_for_byte(self):
+        wb = Workbook()
+        logo = XLImage(BytesIO(png_bytes()))
+        logo.width, logo.height = 120, 60
+        wb.active.add_image(logo, "B2")
+        wb.active["A1"] = "Замовлення"
+        source = BytesIO()
+        wb.save(source)
+
+        merged = MergedOrdersWorkbook()
+        order = SimpleNamespace(pk=5, title="Тест", customer="client@example.com")
+        merged.add_order(order, source.getvalue(), positions=1, total_uah=100)
+        output = merged.spool().read()
+
+        self.assertEqual(media(output), media(source.getvalue()))
+        anchor = load_workbook(BytesIO(output))["#5"]._images[0].anchor
+        self.assertEqual((anchor._from.col, anchor._from.row), (1, 1))
+        self.assertEqual((anchor.ext.width, anchor.ext.height), (pixels_to_EMU(120), pixels_to_EMU(60)))
@@ -0,0 +1,46 @@
+from django.core import signing
+from django.test import SimpleTestCase, override_settings
+
+from apps.orders.services_proposal_links import PROPOSAL_SALT, order_id_from_token, proposal_token
+
+
+@override_settings(SECRET_KEY="proposal-links-test-key")
+class OrderIdFromTokenTests(SimpleTestCase):
+    def test_compact_token_round_trip(self):
+        self.assertEqual(order_id_from_token(proposal_token(42)), 42)
+
+    def test_legacy_token_still_valid(self):
+        token = signing.dumps({"order": 7}, salt=PROPOSAL_SALT, compress=True)
+        self.assertEqual(order_id_from_token(token), 7)
+
+    def test_wrong_mac_rejected(self):
+        order_part, _, mac = proposal_token(42).partition(".")
+        self.assertIsNone(order_id_from_token(f"43.{mac}"))
+        self.assertIsNone(order_id_from_token(f"{order_part}.{'0' * len(mac)}"))
+
+    def test_malformed_tokens_return_none(self):
+        mac = proposal_token(42).partition(".")[2]
+        malformed = [
+            "",
+            ".",
+            "42.",
+            f".{mac}",
+            f"².{mac}",  # isdigit() but not int()-able
+            f"٤٢.{mac}",  # Arabic-Indic digits
+            "42.ж" + mac[1:],  # non-ASCII mac: hmac.compare_digest raises TypeError
+            "42.é",
+            f"42.{mac.upper()}",
+            f"42.{mac}00",
+            f"42.{mac[:-1]}",
+            f"-42.{mac}",
+            f" 42.{mac}",
+            "42:abc",
+            "not-a-token",
+            "ж:ж:ж",
+        ]
+        for token in malformed:
+            with self.subTest(token=token):
+                self.assertIsNone(order_id_from_token(token))
+
+    def test_none_token(self):
+        self.assertIsNone(order_id_from_token(None))
@@ -0,0 +1,51 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from kombu.exceptions import OperationalError
+
+from apps.orders.models import DeferredTask, ExportJob
+from apps.orders.services_export_jobs import start_export_job
+from apps.orders.tasks import enqueue_on_commit, rebuild_customer_ledger_task, requeue_deferred_tasks
+
+
+class EnqueueOnCommitTests(TestCase):
+    def test_broker_failure_defers_instead_of_running_in_process(self):
+        with mock.patch.object(rebuild_customer_ledger_task, "delay", side_effect=OperationalError("down")), \
+                mock.patch.object(rebuild_customer_ledger_task, "apply") as apply, \
+                mock.patch("apps.orders.services_ledger.rebuild_customer_ledger") as rebuild:
+            with self.captureOnCommitCallbacks(execute=True):
+                enqueue_on_commit(rebuild_customer_ledger_task, 7)
+        apply.assert_not_called()
+        rebuild.assert_not_called()
+        deferred = DeferredTask.objects.get()
+        self.assertEqual((deferred.task_name, deferred.args), (rebuild_customer_ledger_task.name, [7]))
+        self.assertIn("down", deferred.error)
+
+    def test_broker_failure_marks_export_job_failed(self):
+        user = get_user_model().objects.create_user(email="export@example.com", password="x")
+        with mock.patch("apps.orders.tasks.run_export_job_task.delay", side_effect=OperationalError("down")):
+            with self.captureOnCommitCallbacks(execute=True):
+                job = start_export_job(user, ExportJob.KIND_BALANCES, {})
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.STATUS_FAILED)
+        self.assertTrue(job.error)
+        self.assertFalse(DeferredTask.objects.exists())
+
+
+class RequeueDeferredTasksTests(TestCase):
+    def setUp(self):
+        for customer_id in (1, 2, 1):
+            DeferredTask.objects.create(task_name=rebuild_customer_ledger_task.name, args=[customer_id])
+
+    def test_sends_each_call_once_and_clears_the_queue(self):
+        with mock.patch.object(rebuild_customer_ledger_task, "delay") as delay:
+            requeue_deferred_tasks()
+        self.assertEqual(delay.call_args_list, [mock.call(1), mock.call(2)])
+        self.assertFalse(DeferredTask.objects.exists())
+
+    def test_keeps_the_queue_while_the_broker_is_down(self):
+        with mock.patch.object(rebuild_customer_ledger_task, "delay", side_effect=OperationalError("down")) as delay:
+            requeue_deferred_tasks()
+        self.assertEqual(delay.call_count, 1)
+        self.assertEqual(list(DeferredTask.objects.values_list("attempts", flat=True)), [1, 0, 0])
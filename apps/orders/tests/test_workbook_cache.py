@@ -0,0 +1,31 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+
+from apps.orders.models import Order
+from apps.orders.services_workbook_cache import cached_proposal_page
+
+
+class CachedProposalPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        customer = get_user_model().objects.create_user(email="proposal@example.com", password="x")
+        cls.order = Order.objects.create(customer=customer)
+
+    def _get(self, **headers):
+        request = RequestFactory().get("/proposal/", headers=headers)
+        return cached_proposal_page(request, self.order, "token", Decimal("41.5"), lambda: HttpResponse(b"page"))
+
+    def test_not_modified_keeps_validators_and_cache_control(self):
+        first = self._get()
+        self.assertEqual((first.status_code, first.content), (200, b"page"))
+
+        for headers in ({"if-none-match": first["ETag"]}, {"if-modified-since": first["Last-Modified"]}):
+            with self.subTest(headers=headers):
+                response = self._get(**headers)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b"")
+                for header in ("ETag", "Last-Modified", "Cache-Control"):
+                    self.assertEqual(response[header], first[header])
@@ -21,6 +21,10 @@ urlpatterns = [
     path("turnover/", views.turnover_report, name="turnover"),
     path("turnover/export/", views.turnover_excel, name="turnover_excel"),
     path("export/", views.order_list_excel, name="orders_excel"),
+    path("production/workbook/", views.production_workbook, name="production_workbook"),
+    path("exports/<str:kind>/start/", views.export_job_start, name="export_job_start"),
+    path("exports/<int:pk>/", views.export_job_status, name="export_job_status"),
+    path("exports/<int:pk>/download/", views.export_job_download, name="export_job_download"),
 
     # білдер ролетів
     path("builder/", views.order_builder, name="builder"),
@@ -4,8 +4,7 @@ from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect, get_object_or_404
 from django import forms
 from django.db import transaction, DataError
-from django.db.models import Case, DecimalField, ExpressionWrapper, F, Sum, When, Max, Q, Exists, OuterRef
-from django.db.models.functions import Coalesce
+from django.db.models import Case, Count, DecimalField, ExpressionWrapper, F, Sum, When, Q, Exists, OuterRef, Prefetch, QuerySet
 from django.contrib import messages
 from .models import (
     Order,
@@ -22,12 +21,73 @@ from .models import (
     CurrencyRateHistory,
     OrderDeletionHistory,
     CurrencyAutoUpdateSettings,
+    BalanceLedgerEntry,
+    ExportJob,
 )
 from apps.customers.models import CustomerProfile
-from apps.customers.selectors import customer_ordering_fields, customer_profiles_queryset, customer_users_queryset
+from .selectors import (
+    annotate_order_category,
+    annotate_order_positions,
+    annotate_order_totals_uah,
+    filter_created_between,
+    filter_order_category,
+    orders_total_uah_base,
+    prefetch_latest_status_log,
+)
+from .services_ledger import balance_as_of, ledger_keyset_page, negative_balance_customer_ids
+from .services_avatar_logo import avatar_logo_path, avatar_logo_url
+from .services_builder_cache import builder_items_json, store_builder_items_json_on_commit
+from .services_builder_items import (
+    KIND_COMPONENTS,
+    KIND_FABRICS,
+    KIND_MOSQUITO_COMPONENTS,
+    KIND_MOSQUITOES,
+    KIND_ROLLERS,
+    BuilderItemsError,
+    clean_item_rows,
+    parse_items_payload,
+    price_roller_rows,
+    save_component_items,
+    save_fabric_items,
+    save_mosquito_component_items,
+    save_mosquito_items,
+    save_roller_items,
+)
+from .services_export import (
+    TEXT_EXPORT_CONTENT_TYPES,
+    NamedStylePalette,
+    StreamingXlsxExport,
+    iter_with_progress,
+    stream_text_export,
+)
+from .services_export_jobs import start_export_job
+from .services_production_workbook import MergedOrdersWorkbook
+from .services_item_summary import item_total_uah, mosquito_option_lines, refresh_item_summaries, roller_option_lines
+from .services_pricing import (
+    MOSQUITO_COMPONENTS_PRICE_SHEET_URL,
+    MOSQUITO_PRICE_SHEET_URL,
+    customer_discount_multiplier,
+    normalize_discount_percent,
+    recalculate_mosquito_component_items,
+    recalculate_mosquito_items,
+    to_decimal,
+    to_int,
+    validate_mosquito_item,
+)
+from .services_proposal_links import order_id_from_token, proposal_link_maps, proposal_token
+from .services_workbook_cache import cached_order_workbook, cached_proposal_page
+from .tasks import enqueue_on_commit, process_order_in_work_task
+from apps.customers.selectors import (
+    customer_ordering_fields,
+    customer_picker_entry,
+    customer_profiles_queryset,
+    customer_users_queryset,
+)
 from apps.accounts.roles import is_manager
 import json
 import html
+import heapq
+from bisect import bisect_left
 import logging
 from urllib.parse import urlencode
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
@@ -43,10 +103,9 @@ from openpyxl.drawing.image import Image as XLImage
 from openpyxl.utils import get_column_letter
 
 logger = logging.getLogger("app")
-from openpyxl.styles import Alignment, Border, Side, Font, PatternFill
 from django.utils import timezone
 import datetime
-from .utils_components import parse_components_from_post, is_meter_unit
+from .utils_components import parse_components_from_post
 from django.urls import reverse
 from .services_currency import (
     get_current_currency_rate,
@@ -57,15 +116,13 @@ from .services_currency import (
     update_usd_rate_from_nbu,
 )
 from django.views.decorators.http import require_POST
-from django.http import JsonResponse, Http404, HttpResponse
+from django.http import FileResponse, JsonResponse, Http404, HttpResponse
+from django.template.loader import render_to_string
 from django.utils.http import url_has_allowed_host_and_scheme
 from django.utils.html import format_html, format_html_join, conditional_escape
 from django.middleware.csrf import get_token
 from django.utils.safestring import mark_safe
 from apps.integrations.google_sheets import parse_mosquito_price_sheet
-from apps.integrations.google_sheets import parse_mosquito_components_sheet
-from apps.integrations.google_sheets import build_mosquito_warnings
-from apps.integrations.google_sheets import select_mosquito_catalog_product
 
         
 def _get(lst, idx, default=""):
@@ -73,17 +130,6 @@ def _get(lst, idx, default=""):
     return lst[idx] if idx < len(lst) else default
 
 
-def _to_decimal(value, default="0"):
-    """EN: Convert string to Decimal with fallback. UA: Конвертація рядка в Decimal з запасним значенням."""
-    value = (str(value) or "").strip()
-    if not value:
-        value = default
-    try:
-        return Decimal(value.replace(",", "."))
-    except (InvalidOperation, AttributeError):
-        return Decimal(default)
-
-
 def _get_safe_return_url(request):
     return_url = (request.POST.get("next_url") or request.GET.get("next") or "").strip()
     if return_url and not url_has_allowed_host_and_scheme(
@@ -111,38 +157,6 @@ def _builder_save_stay_response(request, order, route_name, return_url=""):
     return redirect(builder_url)
 
 
-def _to_int(value, default=0):
-    """EN: Safe int conversion with fallback. UA: Безпечне перетворення в int із запасним значенням."""
-    try:
-        return int((value or "").strip() or default)
-    except (ValueError, TypeError):
-        return int(default)
-
-
-def _normalize_discount_percent(pct):
-    try:
-        pct = Decimal(pct or 0)
-    except Exception:
-        pct = Decimal("0")
-    if pct < Decimal("-100"):
-        pct = Decimal("-100")
-    if pct > Decimal("100"):
-        pct = Decimal("100")
-    return pct.quantize(Decimal("0.01"))
-
-
-def _customer_discount_multiplier(user=None, pct=None):
-    """Return discount multiplier (1 - percent/100). If pct is provided, it takes precedence."""
-    if pct is None:
-        if not user:
-            pct = Decimal("0")
-        else:
-            profile = getattr(user, "customerprofile", None)
-            pct = getattr(profile, "discount_percent", Decimal("0")) if profile else Decimal("0")
-    pct = _normalize_discount_percent(pct)
-    return (Decimal("100") - pct) / Decimal("100"), pct
-
-
 def _control_side_label(val):
     """EN: Human label for control side. UA: Людська назва сторони керування."""
     if val == "left":
@@ -189,41 +203,19 @@ def _normalize_website_url(value):
 
 
 _TIME_RE = re.compile(r"^(\d{1,2}):(\d{2})$")
-_PROPOSAL_SALT = "orders-proposal-link-v1"
 _BALANCE_SALT = "orders-balance-link-v1"
-OPTION_LABELS = {
-    "magnets_price_eur": "Фіксація магнітами",
-    "cord_pvc_tension_price_eur": "Фіксація Леска ПВХ з дотяжкою (шт)",
-    "cord_copper_barrel_price_eur": "Фіксація Леска з мідною діжкою (шт)",
-    "magnet_fix_price_eur": "Фіксація магнітами (доп.)",
-    "top_pvc_clip_pair_price_eur": "Кліпса кріплення для верхньої планки ПВХ, пара",
-    "top_pvc_bar_tape_price_eur_mp": "Доплата за верхню планку ПВХ зі скотчем (монтаж без свердління), за м.п.",
-    "bottom_wide_bar_price_eur_mp": "Доплата за широку нижню планку 10/28, за м.п.",
-    "top_bar_scotch_price_eur_mp": "Скотч на верхню планку для встановлення без свердління, за м.п.",
-    "metal_kronsht_price_eur": "Доплата за металеві кронштейни, шт",
-    "metal_cord_fix_price_eur": "Фіксація лески металева",
-    "motor_no_remote_price_eur": "Доплата за електродвигун без пульта (під вимикач, вимикач в вартість не входить), шт",
-    "motor_with_remote_price_eur": "Доплата за електродвигун з одноканальним пультом ДУ (входить до вартості), шт",
-    "middle_bracket_price_eur": "Доплата за проміжковий кронштейн, шт",
-    "remote_5ch_price_eur": "Доплата за 5-ти канальний пульт ДУ, шт",
-    "remote_15ch_price_eur": "Доплата за 15-ти канальний пульт ДУ, шт",
-    "adapter_mosel_internal_price_eur": "Адаптер внутрішній MOSel",
-    "adapter_mosel_external_price_eur": "Адаптер зовнішній MOSel",
-}
 
 
 def _proposal_token(order: Order) -> str:
     """Generate a signed token for public commercial proposal links."""
-    return signing.dumps({"order": order.pk}, salt=_PROPOSAL_SALT)
+    return proposal_token(order.pk)
 
 
 def _order_from_token(token: str) -> Order:
-    """Return order for a signed token or 404."""
-    try:
-        data = signing.loads(token, salt=_PROPOSAL_SALT)
-    except signing.BadSignature:
+    """Return order for a signed token (compact or legacy) or 404."""
+    order_id = order_id_from_token(token)
+    if order_id is None:
         raise Http404("Неправильне посилання.")
-    order_id = (data or {}).get("order")
     if not order_id:
         raise Http404("Замовлення не знайдено.")
     return get_object_or_404(Order, pk=order_id, deleted=False)
@@ -249,34 +241,16 @@ def _collect_item_options(item: OrderItem, rate: Decimal, markup_multiplier: Dec
     """
     Build list of option rows for public proposal with EUR/UAH.
     """
-    options = []
     rate_with_markup = Decimal(rate or 0) * Decimal(markup_multiplier or 1)
-    for field in [
-        f.name
-        for f in OrderItem._meta.fields
-        if f.name.endswith("_price_eur") or f.name.endswith("_price_eur_mp")
-    ]:
-        price = getattr(item, field, None)
-        if price in (None, ""):
-            continue
-        qty_field = field.replace("_price_eur_mp", "_qty").replace("_price_eur", "_qty")
-        qty_val = getattr(item, qty_field, 0) or 0
-        try:
-            price_val = Decimal(price)
-            qty_val_dec = Decimal(qty_val)
-        except Exception:
-            continue
-        if price_val <= 0 or qty_val_dec <= 0:
-            continue
-        options.append(
-            {
-                "label": OPTION_LABELS.get(field, field),
-                "qty": qty_val_dec,
-                "price_eur": price_val,
-                "price_uah": _round_uah_total(price_val * rate_with_markup),
-            }
-        )
-    return options
+    return [
+        {
+            "label": label,
+            "qty": qty,
+            "price_eur": price,
+            "price_uah": _round_uah_total(price * rate_with_markup),
+        }
+        for label, qty, price in roller_option_lines(item)
+    ]
 
 
 class CurrencyAutoUpdateForm(forms.Form):
@@ -346,6 +320,17 @@ def _can_view_financial_controls(user, customer):
     )
 
 
+def _customer_picker_selected(customer):
+    """
+    EN: Pre-selected option of the builder customer picker; the rest is searched via /api/v1/customers/search.
+    UA: Обраний клієнт для списку вибору в білдері; інших шукають через /api/v1/customers/search.
+    """
+    if customer is None:
+        return []
+    profile = customer_profiles_queryset().select_related("organization").filter(user=customer).first()
+    return [customer_picker_entry(profile)] if profile else []
+
+
 def _parse_date_range(params):
     """
     Read date_from/date_to from GET params, fallback to last 30 days ending today.
@@ -399,7 +384,33 @@ def _parse_optional_flexible_date(value: str):
     return None
 
 
+_PRODUCT_CATEGORY_LABELS = {
+    "components": "Компл-ючі до тк. рол.",
+    "fabrics": "Тканина",
+    "mosquitoes": "Москітні сітки",
+    "mosquito_components": "Комплектуючі до мос. сіток",
+    "rollers": "Ролети",
+}
+# has_* flags annotated by selectors.annotate_order_category, in precedence order.
+_PRODUCT_CATEGORY_FLAGS = ("has_components", "has_fabrics", "has_mosquitoes", "has_mosquito_components")
+
+
+def _product_category_from_flags(has_components, has_fabrics, has_mosquitoes, has_mosquito_components):
+    if has_components:
+        return "components"
+    if has_fabrics:
+        return "fabrics"
+    if has_mosquitoes:
+        return "mosquitoes"
+    if has_mosquito_components:
+        return "mosquito_components"
+    return "rollers"
+
+
 def _order_product_category(order):
+    if hasattr(order, "has_components"):
+        # Annotated by selectors.annotate_order_category — no extra queries.
+        return _product_category_from_flags(*(getattr(order, flag) for flag in _PRODUCT_CATEGORY_FLAGS))
     if getattr(order, "component_items", None) and order.component_items.exists():
         return "components"
     if getattr(order, "fabric_items", None) and order.fabric_items.exists():
@@ -412,57 +423,17 @@ def _order_product_category(order):
 
 
 def _order_product_category_label(order):
-    category = _order_product_category(order)
-    if category == "components":
-        return "Компл-ючі до тк. рол."
-    if category == "fabrics":
-        return "Тканина"
-    if category == "mosquitoes":
-        return "Москітні сітки"
-    if category == "mosquito_components":
-        return "Комплектуючі до мос. сіток"
-    return "Ролети"
+    return _PRODUCT_CATEGORY_LABELS[_order_product_category(order)]
 
 
 def _filter_orders_by_product_category(qs, category_filter):
-    if category_filter == "components":
-        return qs.filter(component_items__isnull=False)
-    if category_filter == "fabrics":
-        return qs.filter(fabric_items__isnull=False)
-    if category_filter == "mosquitoes":
-        return qs.filter(mosquito_items__isnull=False)
-    if category_filter == "mosquito_components":
-        return qs.filter(mosquito_component_items__isnull=False)
-    if category_filter == "rollers":
-        return (
-            qs.exclude(component_items__isnull=False)
-            .exclude(fabric_items__isnull=False)
-            .exclude(mosquito_items__isnull=False)
-            .exclude(mosquito_component_items__isnull=False)
-        )
-    return qs
+    return filter_order_category(qs, category_filter)
 
 
 def _filter_transactions_by_product_category(qs, category_filter):
     if not category_filter:
         return qs
-    qs = qs.filter(order__isnull=False)
-    if category_filter == "components":
-        return qs.filter(order__component_items__isnull=False)
-    if category_filter == "fabrics":
-        return qs.filter(order__fabric_items__isnull=False)
-    if category_filter == "mosquitoes":
-        return qs.filter(order__mosquito_items__isnull=False)
-    if category_filter == "mosquito_components":
-        return qs.filter(order__mosquito_component_items__isnull=False)
-    if category_filter == "rollers":
-        return (
-            qs.exclude(order__component_items__isnull=False)
-            .exclude(order__fabric_items__isnull=False)
-            .exclude(order__mosquito_items__isnull=False)
-            .exclude(order__mosquito_component_items__isnull=False)
-        )
-    return qs
+    return filter_order_category(qs.filter(order__isnull=False), category_filter, order_ref="order_id")
 
 
 def _status_action_payload(order):
@@ -591,6 +562,27 @@ def _excel_plain_text(value) -> str:
     return html.unescape(str(value))
 
 
+# Order/proposal workbook styles by palette key (services_export.NamedStylePalette):
+# each cell gets one named style for its (font, alignment, border) keys.
+_ORDER_XL_FONTS = {
+    "bold": {"bold": True},
+    "bold_14": {"bold": True, "size": 14},
+    "bold_16": {"bold": True, "size": 16},
+    "link": {"color": "0563C1", "underline": "single"},
+}
+_ORDER_XL_ALIGNMENTS = {
+    "center": {"horizontal": "center", "vertical": "center"},
+    "center_wrap": {"horizontal": "center", "vertical": "center", "wrap_text": True},
+    "vcenter": {"vertical": "center"},
+}
+_ORDER_XL_BORDERS = {
+    "all": ("left", "right", "top", "bottom"),
+    "horiz": ("top", "bottom"),
+    "sides": ("left", "right"),
+    "left": ("left",),
+}
+
+
 def _apply_excel_print_layout(ws, last_col=None):
     """Apply unified print settings to a worksheet."""
     last_col = max(int(last_col or ws.max_column or 1), 1)
@@ -689,12 +681,15 @@ def _mosquito_sliding_side_label(value):
     return ""
 
 
-def _collect_mosquito_option_lines(item, rate: Decimal, markup_multiplier: Decimal = Decimal("1"), discount_pct: Decimal = Decimal("0")):
+def _mosquito_option_summary(item, discount_pct: Decimal = Decimal("0")):
+    """
+    Priced option lines and extra lines of a mosquito item, totals in USD (None for extras without a price).
+    """
     option_prices = {
-        (opt.get("name") or "").strip(): _to_decimal(opt.get("price_usd"), default="0")
+        (opt.get("name") or "").strip(): to_decimal(opt.get("price_usd"), default="0")
         for opt in (parse_mosquito_price_sheet(MOSQUITO_PRICE_SHEET_URL).get("options") or [])
     }
-    discount_multiplier = (Decimal("100") - _normalize_discount_percent(discount_pct)) / Decimal("100")
+    discount_multiplier = (Decimal("100") - normalize_discount_percent(discount_pct)) / Decimal("100")
     data = item.options_data or {}
     product_name = (item.product_type or "").lower()
     quantity = Decimal(item.quantity or 1)
@@ -713,11 +708,11 @@ def _collect_mosquito_option_lines(item, rate: Decimal, markup_multiplier: Decim
             {
                 "label": label,
                 "qty": line_count,
-                "total_uah": _round_uah_total(total_usd * rate * markup_multiplier),
+                "total_usd": total_usd,
             }
         )
 
-    def calc_total_uah(option_name, count, *, multiply_by_order_qty=True):
+    def calc_total_usd(option_name, count, *, multiply_by_order_qty=True):
         if not count:
             return None
         base_price = option_prices.get(option_name, Decimal("0")) * discount_multiplier
@@ -726,7 +721,7 @@ def _collect_mosquito_option_lines(item, rate: Decimal, markup_multiplier: Decim
         total_usd = (base_price * line_count * charge_multiplier).quantize(Decimal("0.01"))
         if total_usd <= 0:
             return None
-        return _round_uah_total(total_usd * rate * markup_multiplier)
+        return total_usd
 
     replacement = (data.get("replacement_mount") or "").strip()
     if replacement == "15*32":
@@ -769,42 +764,42 @@ def _collect_mosquito_option_lines(item, rate: Decimal, markup_multiplier: Decim
         impost_option_name = "Додатковий імпост для внутрішніх сіток 10*30" if "10*30" in product_name else "Додотковий імпост для зовнішніх сіток 10*20"
         heights = [part.strip() for part in re.split(r"[,\n;]+", impost_heights) if part.strip()]
         if heights:
-            per_impost_total_uah = calc_total_uah(impost_option_name, 1)
+            per_impost_total_usd = calc_total_usd(impost_option_name, 1)
             for idx, height_value in enumerate(heights, start=1):
                 extras.append(
                     {
                         "label": f"Імпост {idx}",
                         "qty": 1,
                         "height_mm": height_value,
-                        "total_uah": per_impost_total_uah,
+                        "total_usd": per_impost_total_usd,
                     }
                 )
         else:
-            impost_total_uah = calc_total_uah(impost_option_name, _to_int(data.get("impost_qty", 0), 0))
+            impost_total_usd = calc_total_usd(impost_option_name, to_int(data.get("impost_qty", 0), 0))
             extras.append(
                 {
                     "label": "Імпост",
-                    "qty": _to_int(data.get("impost_qty", 0), 0) or "",
+                    "qty": to_int(data.get("impost_qty", 0), 0) or "",
                     "height_mm": impost_heights,
-                    "total_uah": impost_total_uah,
+                    "total_usd": impost_total_usd,
                 }
             )
 
-    door_main_impost_height = _to_int(data.get("door_impost_height", 0), 0)
+    door_main_impost_height = to_int(data.get("door_impost_height", 0), 0)
     if (not bool(data.get("door_no_impost"))) and door_main_impost_height > 0:
         extras.append(
             {
                 "label": "Імпост",
                 "qty": 1,
                 "height_mm": door_main_impost_height,
-                "total_uah": None,
+                "total_usd": None,
             }
         )
 
     door_extra_impost_heights = str(data.get("door_extra_impost_heights") or "").strip()
     if door_extra_impost_heights:
         heights = [part.strip() for part in re.split(r"[,\n;]+", door_extra_impost_heights) if part.strip()]
-        per_extra_total_uah = calc_total_uah("Додатковий імпост для дверних сіток 17*25", 1)
+        per_extra_total_usd = calc_total_usd("Додатковий імпост для дверних сіток 17*25", 1)
         if heights:
             for idx, height_value in enumerate(heights, start=1):
                 extras.append(
@@ -812,16 +807,16 @@ def _collect_mosquito_option_lines(item, rate: Decimal, markup_multiplier: Decim
                         "label": f"Додатковий імпост {idx}",
                         "qty": 1,
                         "height_mm": height_value,
-                        "total_uah": per_extra_total_uah,
+                        "total_usd": per_extra_total_usd,
                     }
                 )
         else:
             extras.append(
                 {
                     "label": "Додатковий імпост",
-                    "qty": _to_int(data.get("door_extra_impost_qty", 0), 0) or "",
+                    "qty": to_int(data.get("door_extra_impost_qty", 0), 0) or "",
                     "height_mm": door_extra_impost_heights,
-                    "total_uah": calc_total_uah("Додатковий імпост для дверних сіток 17*25", _to_int(data.get("door_extra_impost_qty", 0), 0)),
+                    "total_usd": calc_total_usd("Додатковий імпост для дверних сіток 17*25", to_int(data.get("door_extra_impost_qty", 0), 0)),
                 }
             )
 
@@ -848,10 +843,25 @@ def _collect_mosquito_option_lines(item, rate: Decimal, markup_multiplier: Decim
             continue
         if value in ("", None, False, 0, "0"):
             continue
-        extras.append({"label": MOSQUITO_OPTION_LABELS.get(key, key), "qty": value, "total_uah": None})
+        extras.append({"label": MOSQUITO_OPTION_LABELS.get(key, key), "qty": value, "total_usd": None})
 
     return rows, extras
 
+
+def _collect_mosquito_option_lines(item, rate: Decimal, markup_multiplier: Decimal = Decimal("1"), discount_pct: Decimal = Decimal("0")):
+    lines, extras = mosquito_option_lines(item, discount_pct)
+    rows = [
+        {"label": line["label"], "qty": line["qty"], "total_uah": _round_uah_total(line["total_usd"] * rate * markup_multiplier)}
+        for line in lines
+    ]
+    extra_rows = []
+    for extra in extras:
+        row = {key: value for key, value in extra.items() if key != "total_usd"}
+        total_usd = extra["total_usd"]
+        row["total_uah"] = None if total_usd is None else _round_uah_total(total_usd * rate * markup_multiplier)
+        extra_rows.append(row)
+    return rows, extra_rows
+
 STATUS_LABELS = dict(Order.STATUS_CHOICES)
 STATUS_BADGES = {
     Order.STATUS_QUOTE: "secondary",
@@ -862,7 +872,12 @@ STATUS_BADGES = {
 
 
 def _set_order_totals_uah(orders, current_rate: Decimal):
-    """Attach total_uah_display/display_rate to orders for templates."""
+    """
+    Attach total_uah_display/display_rate to orders for templates.
+    QuerySets get the same values as SQL annotations (see selectors.annotate_order_totals_uah).
+    """
+    if isinstance(orders, QuerySet):
+        return annotate_order_totals_uah(orders, current_rate, get_current_usd_rate())
     for o in orders:
         rate = _order_rate(o, current_rate)
         total_eur = _order_base_total(o)
@@ -877,6 +892,8 @@ def _set_order_totals_uah(orders, current_rate: Decimal):
 
 
 def _order_total_uah(order, current_rate: Decimal) -> Decimal:
+    if getattr(order, "markup_total_uah", None) is not None:
+        return Decimal(order.markup_total_uah)
     total = _order_base_total(order) * _order_rate(order, current_rate) * (Decimal("1") + Decimal(order.markup_percent or 0) / Decimal("100"))
     return _round_uah_total(total)
 
@@ -890,6 +907,8 @@ def _orders_total_uah(orders_qs, current_rate: Decimal) -> Decimal:
 
 def _orders_total_uah_base(orders_qs, current_rate: Decimal) -> Decimal:
     """Base total for balances: без націнок і без додаткових послуг."""
+    if isinstance(orders_qs, QuerySet):
+        return orders_total_uah_base(orders_qs, current_rate, get_current_usd_rate())
     return sum(
         _round_uah_total(_order_base_total(o) * _order_rate(o, current_rate))
         for o in orders_qs
@@ -921,10 +940,12 @@ def _transactions_total_uah(tx_qs) -> Decimal:
 
 def _tx_amount_uah(tx: Transaction) -> Decimal:
     """Return transaction amount in UAH with sign (debit +, credit -)."""
-    amount = Decimal(tx.amount or 0)
-    rate = Decimal(tx.eur_rate or 0)
-    total = amount * rate
-    if tx.type == Transaction.CREDIT:
+    return _tx_amount_uah_from_values(tx.type, tx.amount, tx.eur_rate)
+
+
+def _tx_amount_uah_from_values(tx_type, amount, eur_rate) -> Decimal:
+    total = Decimal(amount or 0) * Decimal(eur_rate or 0)
+    if tx_type == Transaction.CREDIT:
         total = -total
     return Decimal(total).quantize(Decimal("0.01"))
 
@@ -938,38 +959,84 @@ def _get_payment_message_text():
     )
 
 
-def _payment_shortage_context(order):
-    """Return dict with shortage and list of orders covering it (for prompt)."""
-    if not order:
-        return None
-    current_rate = get_current_eur_rate()
-    balance = compute_balance(order.customer)
-    shortage = Decimal(balance or 0)
-    if shortage >= 0:
-        return None
-    shortage = shortage * -1
-
-    cover_orders = []
-    cover_total = Decimal("0")
-    existing_orders = (
-        _orders_scope(order.customer)
-        .filter(status__in=[Order.STATUS_IN_WORK, Order.STATUS_READY, Order.STATUS_SHIPPED])
-        .exclude(pk=order.pk)
-        .order_by("-created_at")
-    )
-    if order.pk:
-        cover_orders.append(order.pk)
-        cover_total += _order_total_uah(order, current_rate)
-    for o in existing_orders:
-        cover_total += _order_total_uah(o, current_rate)
-        cover_orders.append(o.pk)
-        if cover_total >= shortage:
-            break
+class PaymentShortageCalculator:
+    """
+    EN: Per-request payment shortage helper. Balance and the cumulative totals of
+        in-work orders are loaded once per customer; coverage for each quote is a bisect
+        over the prefix sums instead of a full balance recomputation.
+    UA: Розрахунок нестачі оплати в межах одного запиту. Баланс і накопичені суми
+        замовлень у роботі завантажуються один раз на клієнта; покриття для кожного
+        прорахунку — bisect по префіксних сумах, без повного перерахунку балансу.
+    """
 
-    return {
-        "shortage": shortage.quantize(Decimal("0.01")),
-        "orders": ([order.pk] if order.pk else []) + cover_orders,
-    }
+    def __init__(self, current_rate: Decimal = None):
+        self.current_rate = current_rate if current_rate is not None else get_current_eur_rate()
+        self._balances = {}
+        self._covers = {}
+
+    def balance(self, customer) -> Decimal:
+        if customer.pk not in self._balances:
+            self._balances[customer.pk] = Decimal(compute_balance(customer) or 0)
+        return self._balances[customer.pk]
+
+    def _cover_orders(self, customer):
+        """(ids, prefix) of customer's in-work+ orders, newest first; prefix[k] = sum of the first k."""
+        if customer.pk not in self._covers:
+            rows = (
+                _set_order_totals_uah(
+                    _orders_scope(customer).filter(
+                        status__in=[Order.STATUS_IN_WORK, Order.STATUS_READY, Order.STATUS_SHIPPED]
+                    ),
+                    self.current_rate,
+                )
+                .order_by("-created_at")
+                .values_list("pk", "markup_total_uah")
+            )
+            ids = []
+            prefix = [Decimal("0")]
+            for pk, total in rows:
+                ids.append(pk)
+                prefix.append(prefix[-1] + Decimal(total or 0))
+            self._covers[customer.pk] = (ids, prefix)
+        return self._covers[customer.pk]
+
+    def context(self, order):
+        """Return dict with shortage and list of orders covering it (for prompt)."""
+        if not order:
+            return None
+        shortage = self.balance(order.customer)
+        if shortage >= 0:
+            return None
+        shortage = shortage * -1
+
+        ids, prefix = self._cover_orders(order.customer)
+        if order.pk in ids:
+            # Rare: the order itself is already in work — rebuild the walk without it.
+            idx = ids.index(order.pk)
+            own_total = prefix[idx + 1] - prefix[idx]
+            ids = ids[:idx] + ids[idx + 1:]
+            prefix = prefix[: idx + 1] + [p - own_total for p in prefix[idx + 2:]]
+
+        cover_orders = []
+        if order.pk:
+            cover_orders.append(order.pk)
+            remaining = shortage - _order_total_uah(order, self.current_rate)
+        else:
+            remaining = shortage
+        if ids:
+            # Smallest k >= 1 with prefix[k] >= remaining; all orders when never covered.
+            k = min(bisect_left(prefix, remaining, 1), len(ids))
+            cover_orders.extend(ids[:k])
+
+        return {
+            "shortage": shortage.quantize(Decimal("0.01")),
+            "orders": ([order.pk] if order.pk else []) + cover_orders,
+        }
+
+
+def _payment_shortage_context(order, calculator: PaymentShortageCalculator = None):
+    """Return dict with shortage and list of orders covering it (for prompt)."""
+    return (calculator or PaymentShortageCalculator()).context(order)
 
 
 def _build_order_workbook(
@@ -991,11 +1058,21 @@ def _build_order_workbook(
     if include_markup:
         markup = Decimal(order.markup_percent or 0)
         markup_multiplier = Decimal("1") + markup / Decimal("100")
-    thin = Side(style="thin", color="000000")
-    border_all = Border(left=thin, right=thin, top=thin, bottom=thin)
-    border_horiz = Border(top=thin, bottom=thin)
-    center_align = Alignment(horizontal="center", vertical="center")
-    center_wrap_align = Alignment(horizontal="center", vertical="center", wrap_text=True)
+    # (row, column) -> font / alignment key of _ORDER_XL_*, later keys win; borders are laid out
+    # at the end and each cell then gets one named style.
+    cell_fonts = {}
+    cell_alignments = {}
+    # Row of the last append and the last row with cells (what ws.max_row returns, without
+    # rescanning every cell on each read).
+    current_row = 0
+    last_row = 0
+
+    def append(values):
+        nonlocal current_row, last_row
+        ws.append(values)
+        current_row += 1
+        if values:
+            last_row = current_row
     mosquito_only_order = (
         client_info_mode == "order"
         and order.mosquito_items.exists()
@@ -1016,10 +1093,13 @@ def _build_order_workbook(
 
         image = None
         if avatar:
-            try:
-                avatar_path = avatar.path
-            except (ValueError, OSError):
-                avatar_path = ""
+            # Downscaled rendition (generated once per upload); the original is a fallback.
+            avatar_path = avatar_logo_path(avatar)
+            if not avatar_path:
+                try:
+                    avatar_path = avatar.path
+                except (ValueError, OSError):
+                    avatar_path = ""
             if avatar_path:
                 try:
                     image = XLImage(avatar_path)
@@ -1039,10 +1119,12 @@ def _build_order_workbook(
             return
 
         ws.row_dimensions[1].height = 72
+        nonlocal current_row, last_row
+        current_row = last_row = 1
         fallback_cell = ws.cell(row=1, column=2)
         fallback_cell.value = fallback_text
-        fallback_cell.alignment = center_align
-        fallback_cell.font = Font(bold=True, size=16)
+        cell_alignments[1, 2] = "center"
+        cell_fonts[1, 2] = "bold_16"
 
     def price_uah(eur, qty=1):
         value = Decimal(eur or 0) * Decimal(qty or 0)
@@ -1079,30 +1161,27 @@ def _build_order_workbook(
             ("Примітки до замовлення", _excel_plain_text(order.note or "")),
         ]
     for label, val in client_info:
-        ws.append(["", label, val])
+        append(["", label, val])
     client_info_rows = len(client_info)
     # widen column B and center
     ws.column_dimensions["B"].width = 24
     ws.column_dimensions["D"].width = 20
-    for r in range(1, ws.max_row + 1):
-        ws.cell(row=r, column=2).alignment = center_align
+    for r in range(1, last_row + 1):
+        cell_alignments[r, 2] = "center"
 
-    # merge client info value cells and add borders within active grid.
+    # merge client info value cells.
     for r in range(1, client_info_rows + 1):
         ws.merge_cells(start_row=r, start_column=3, end_row=r, end_column=grid_max_col)
-        for c in range(2, grid_max_col + 1):
-            cell = ws.cell(row=r, column=c)
-            cell.border = border_all
-        ws.cell(row=r, column=3).alignment = center_wrap_align
+        cell_alignments[r, 3] = "center_wrap"
     if client_info_mode == "proposal" and website:
         website_cell = ws.cell(row=1, column=3)
         website_cell.value = website
         website_cell.hyperlink = website_url
-        website_cell.font = Font(color="0563C1", underline="single")
+        cell_fonts[1, 3] = "link"
 
     # пустая строка после блоку приміток
-    ws.append([""] * grid_max_col)
-    header_aux_row = ws.max_row
+    append([""] * grid_max_col)
+    header_aux_row = last_row
     if client_info_mode == "proposal":
         extra_service_label = (getattr(order, "extra_service_label", "") or "").strip()
         extra_service_uah = Decimal(getattr(order, "extra_service_amount_uah", 0) or 0)
@@ -1113,16 +1192,14 @@ def _build_order_workbook(
     total_order_uah = Decimal("0")
     item_total_rows = []
     gap_rows = []
-    ws.append([""] * 10)
-    total_row = ws.max_row
+    append([""] * 10)
+    total_row = last_row
     ws.merge_cells(start_row=total_row, start_column=5, end_row=total_row, end_column=9)
     ws.cell(row=total_row, column=5).value = "Загальна вартість замовлення, грн"
-    ws.cell(row=total_row, column=5).alignment = center_wrap_align
-    ws.cell(row=total_row, column=5).font = Font(bold=True)
-    for c in range(5, 11):
-        ws.cell(row=total_row, column=c).border = border_all
+    cell_alignments[total_row, 5] = "center_wrap"
+    cell_fonts[total_row, 5] = "bold"
     total_cell = ws.cell(row=total_row, column=10)
-    row = ws.max_row + 1
+    row = last_row + 1
 
     created_str = (
         order.created_at.astimezone(timezone.get_current_timezone()).strftime("%d.%m.%y")
@@ -1132,11 +1209,11 @@ def _build_order_workbook(
     doc_label = "Пропозиція" if client_info_mode == "proposal" else "Замовлення"
 
     # Show "Замовлення/Пропозиція № ... від ..." once in the header instead of repeating it per position.
-    ws.append(["", f"{doc_label} № {order.pk} від {created_str}"] + [""] * (grid_max_col - 2))
-    doc_title_row = ws.max_row
+    append(["", f"{doc_label} № {order.pk} від {created_str}"] + [""] * (grid_max_col - 2))
+    doc_title_row = last_row
     ws.merge_cells(start_row=doc_title_row, start_column=2, end_row=doc_title_row, end_column=grid_max_col)
-    ws.cell(row=doc_title_row, column=2).alignment = center_wrap_align
-    ws.cell(row=doc_title_row, column=2).font = Font(bold=True, size=14)
+    cell_alignments[doc_title_row, 2] = "center_wrap"
+    cell_fonts[doc_title_row, 2] = "bold_14"
 
     def control_label(val):
         if val == "left":
@@ -1165,24 +1242,7 @@ def _build_order_workbook(
     def add_option_rows(item):
         rows = []
         total_opts = Decimal("0")
-        for field in [
-            f.name
-            for f in OrderItem._meta.fields
-            if f.name.endswith("_price_eur") or f.name.endswith("_price_eur_mp")
-        ]:
-            price = getattr(item, field, None)
-            qty_field = field.replace("_price_eur_mp", "_qty").replace("_price_eur", "_qty")
-            qty = getattr(item, qty_field, None)
-            if price in (None, "") or qty in (None, ""):
-                continue
-            try:
-                qty_val = Decimal(qty)
-                price_val = Decimal(price)
-            except Exception:
-                continue
-            if qty_val <= 0 or price_val <= 0:
-                continue
-            label = OPTION_LABELS.get(field, field)
+        for label, qty_val, price_val in roller_option_lines(item):
             # builder stores total price per option (already * qty), keep as is
             sum_uah = price_uah(price_val)
             rows.append(["", label, "", "", "", "", "", "", "", "", float(qty_val), sum_uah])
@@ -1192,26 +1252,25 @@ def _build_order_workbook(
     headers = ["", "Система", "Колір с-ми", "Тканина", "Колір тканини", "Ширина, мм", "Знач. Шир.", "Висота, мм", "Знач. Вис.", "Сторона управ.", "К-сть", "Вартість, грн"]
 
     for idx, it in enumerate(order.items.all(), start=1):
-        start_item_row = ws.max_row + 1
-        ws.append([f"Поз. {idx}", ""])
-        title_row = ws.max_row
-        ws.cell(row=title_row, column=1).font = Font(bold=True)
+        start_item_row = last_row + 1
+        append([f"Поз. {idx}", ""])
+        title_row = last_row
+        cell_fonts[title_row, 1] = "bold"
         ws.merge_cells(start_row=title_row, start_column=2, end_row=title_row, end_column=12)
-        ws.cell(row=title_row, column=2).alignment = center_wrap_align
-        ws.cell(row=title_row, column=2).font = Font(bold=True, size=14)
+        cell_alignments[title_row, 2] = "center_wrap"
+        cell_fonts[title_row, 2] = "bold_14"
 
-        ws.append(headers)
-        header_row = ws.max_row
+        append(headers)
+        header_row = last_row
         for c in range(2, 13):
-            cell = ws.cell(row=header_row, column=c)
-            cell.font = Font(bold=True)
-            cell.alignment = center_wrap_align
+            cell_fonts[header_row, c] = "bold"
+            cell_alignments[header_row, c] = "center_wrap"
 
         # subtotal_eur already includes quantity (див. _order_base_total)
         total_item_uah = Decimal(str(price_uah(it.subtotal_eur)))
         opt_rows, total_opts = add_option_rows(it)
 
-        ws.append([
+        append([
             "",
             _excel_plain_text(it.system_sheet),
             _excel_plain_text(system_color(it.table_section)),
@@ -1230,78 +1289,73 @@ def _build_order_workbook(
             float(max(total_item_uah - Decimal(total_opts), Decimal("0"))),
         ])
         # center align parameters row
-        param_row = ws.max_row
+        param_row = last_row
         for c in range(2, 13):
-            ws.cell(row=param_row, column=c).alignment = center_align
+            cell_alignments[param_row, c] = "center"
 
         if opt_rows:
-            start_opt_row = ws.max_row + 1
+            start_opt_row = last_row + 1
             for r in opt_rows:
                 label = r[1]
                 qty_val = r[10] if len(r) > 10 else ""
                 price_val = r[11] if len(r) > 11 else ""
-                ws.append([""] * 12)
-                cur_row = ws.max_row
+                append([""] * 12)
+                cur_row = last_row
                 # опция: название в C-K, цена в L
                 ws.merge_cells(start_row=cur_row, start_column=3, end_row=cur_row, end_column=11)
                 label_cell = ws.cell(row=cur_row, column=3)
                 label_cell.value = _excel_plain_text(f"{label} ({qty_val})" if qty_val not in ("", None) else label)
-                label_cell.alignment = Alignment(vertical="center")
-                for c in range(2, 13):
-                    ws.cell(row=cur_row, column=c).border = border_all
+                cell_alignments[cur_row, 3] = "vcenter"
                 ws.cell(row=cur_row, column=12).value = price_val
-            end_opt_row = ws.max_row
+            end_opt_row = last_row
             # Додатково по вертикалі в C
             ws.merge_cells(start_row=start_opt_row, start_column=2, end_row=end_opt_row, end_column=2)
             extra_cell = ws.cell(row=start_opt_row, column=2)
             extra_cell.value = "Додатково:"
-            extra_cell.alignment = center_align
-            for r in range(start_opt_row, end_opt_row + 1):
-                ws.cell(row=r, column=2).border = border_all
+            cell_alignments[start_opt_row, 2] = "center"
 
-            ws.append(["", "", "", "", "", "", "", "", "", "Всього:", it.quantity, float(total_item_uah)])
-            item_total_rows.append(ws.max_row)
+            append(["", "", "", "", "", "", "", "", "", "Всього:", it.quantity, float(total_item_uah)])
+            item_total_rows.append(last_row)
         else:
-            ws.append(["", "", "", "", "", "", "", "", "", "Всього:", it.quantity, float(total_item_uah)])
-            item_total_rows.append(ws.max_row)
+            append(["", "", "", "", "", "", "", "", "", "Всього:", it.quantity, float(total_item_uah)])
+            item_total_rows.append(last_row)
 
         if it.note:
-            ws.append(["", "Примітки до виробу", _excel_plain_text(it.note)] + [""] * 9)
-            note_row = ws.max_row
+            append(["", "Примітки до виробу", _excel_plain_text(it.note)] + [""] * 9)
+            note_row = last_row
             ws.merge_cells(start_row=note_row, start_column=3, end_row=note_row, end_column=12)
-            ws.cell(row=note_row, column=3).alignment = center_align
+            cell_alignments[note_row, 3] = "center"
         if it.gabarit_width_flag:
             gabarit_note = _excel_plain_text(it.roll_height_info or "Габаритна ширина")
-            ws.append(["", "Примітка габаритної ширини", gabarit_note] + [""] * 9)
-            gabarit_row = ws.max_row
+            append(["", "Примітка габаритної ширини", gabarit_note] + [""] * 9)
+            gabarit_row = last_row
             ws.merge_cells(start_row=gabarit_row, start_column=3, end_row=gabarit_row, end_column=12)
-            ws.cell(row=gabarit_row, column=3).alignment = center_align
+            cell_alignments[gabarit_row, 3] = "center"
         # пустая строка после блока позиции без боковых границ
-        ws.append([""] * 12)
-        gap_rows.append(ws.max_row)
+        append([""] * 12)
+        gap_rows.append(last_row)
 
-        end_item_row = ws.max_row
+        end_item_row = last_row
         ws.merge_cells(start_row=start_item_row, start_column=1, end_row=end_item_row, end_column=1)
-        ws.cell(row=start_item_row, column=1).alignment = center_align
-        ws.cell(row=start_item_row, column=1).border = Border(left=thin, right=thin)
+        cell_alignments[start_item_row, 1] = "center"
 
         total_order_uah += total_item_uah
 
     if order.component_items.exists():
-        ws.append(["", "Компл-ючі до тк. рол."])
-        ws.append(["", "Найменування", "Колір", "Од. вим", "К-сть", "Ціна, грн"])
+        append(["", "Компл-ючі до тк. рол."])
+        append(["", "Найменування", "Колір", "Од. вим", "К-сть", "Ціна, грн"])
         for comp in order.component_items.all():
             price_uah_val = price_uah(comp.price_eur, comp.quantity)
-            ws.append(["", _excel_plain_text(comp.name), _excel_plain_text(comp.color), _excel_plain_text(comp.unit), float(comp.quantity or 0), price_uah_val])
+            append(["", _excel_plain_text(comp.name), _excel_plain_text(comp.color), _excel_plain_text(comp.unit), float(comp.quantity or 0), price_uah_val])
             total_order_uah += Decimal(price_uah_val)
-        ws.append([])
+        append([])
 
     if order.fabric_items.exists():
-        ws.append(["", "Тканина"])
-        ws.append(["", "Найменування", "Номер тканини", "Ширина рулону, мм", "Ширина, мм", "Висота, мм", "К-сть", "Ціна, грн"])
+        append(["", "Тканина"])
+        append(["", "Найменування", "Номер тканини", "Ширина рулону, мм", "Ширина, мм", "Висота, мм", "К-сть", "Ціна, грн"])
         for fab in order.fabric_items.all():
             price_uah_val = price_uah(fab.total_eur, 1)
-            ws.append(
+            append(
                 [
                     "",
                     _excel_plain_text(fab.fabric_name),
@@ -1314,7 +1368,7 @@ def _build_order_workbook(
                 ]
             )
             total_order_uah += Decimal(price_uah_val)
-        ws.append([])
+        append([])
 
     if order.mosquito_items.exists():
         # widen column C for mosquito items
@@ -1322,15 +1376,14 @@ def _build_order_workbook(
 
         # Headers row (B-J) - 10 columns
         mos_headers = ["", "Виріб", "Колір профілю", "Полотно", "Ширина, мм", "Висота, мм", "Площа, м²", "Сторона зсуву", "К-сть", "Вартість, грн"]
-        ws.append(mos_headers)
-        mos_header_row = ws.max_row
+        append(mos_headers)
+        mos_header_row = last_row
         for c in range(2, 11):
-            cell = ws.cell(row=mos_header_row, column=c)
-            cell.font = Font(bold=True)
-            cell.alignment = center_wrap_align
+            cell_fonts[mos_header_row, c] = "bold"
+            cell_alignments[mos_header_row, c] = "center_wrap"
         
         for idx, mos in enumerate(order.mosquito_items.all(), start=1):
-            start_item_row = ws.max_row + 1
+            start_item_row = last_row + 1
             
             options_rows, extra_rows = _collect_mosquito_option_lines(
                 mos,
@@ -1339,10 +1392,10 @@ def _build_order_workbook(
                 Decimal(order.discount_percent or 0),
             )
             base_uah = _round_uah_total((Decimal(mos.subtotal_usd or 0) - Decimal(mos.options_total_usd or 0)) * rate * markup_multiplier)
-            total_uah = _round_uah_total(Decimal(mos.subtotal_usd or 0) * rate * markup_multiplier)
+            total_uah = item_total_uah(mos, mos.subtotal_usd, rate, markup_multiplier)
             
             # Data row - 8 columns with borders (columns I-J are empty, no borders)
-            ws.append([
+            append([
                 f"Поз. {idx}",
                 _excel_plain_text(mos.product_type),
                 _excel_plain_text(mos.profile_color),
@@ -1354,110 +1407,95 @@ def _build_order_workbook(
                 mos.quantity or "",
                 float(base_uah),
             ])
-            mos_data_row = ws.max_row
-            ws.cell(row=mos_data_row, column=1).font = Font(bold=True)
-            # Apply borders to columns 1-10 (A-J)
+            mos_data_row = last_row
+            cell_fonts[mos_data_row, 1] = "bold"
             for c in range(1, 11):
-                ws.cell(row=mos_data_row, column=c).border = border_all
-                ws.cell(row=mos_data_row, column=c).alignment = center_align
-            ws.cell(row=mos_data_row, column=2).alignment = center_wrap_align
-            ws.cell(row=mos_data_row, column=3).alignment = center_wrap_align
-            ws.cell(row=mos_data_row, column=4).alignment = center_wrap_align
+                cell_alignments[mos_data_row, c] = "center_wrap" if 2 <= c <= 4 else "center"
             
             # Додатково section - 8 columns with borders (I-J empty, no borders)
             # Quantity in column I (9), price in J (10)
-            start_opt_row = ws.max_row + 1
+            start_opt_row = last_row + 1
             for line in options_rows:
-                ws.append([""] * 10)
-                cur_row = ws.max_row
+                append([""] * 10)
+                cur_row = last_row
                 # Label merged C-H (3-8), qty in I (9), price in J (10)
                 ws.merge_cells(start_row=cur_row, start_column=3, end_row=cur_row, end_column=8)
                 label_cell = ws.cell(row=cur_row, column=3)
                 label_cell.value = _excel_plain_text(f"  {line['label']}")
-                label_cell.alignment = Alignment(vertical="center")
-                for c in range(2, 11):
-                    ws.cell(row=cur_row, column=c).border = border_all
+                cell_alignments[cur_row, 3] = "vcenter"
                 ws.cell(row=cur_row, column=9).value = _format_qty_for_display(line.get("qty"))
-                ws.cell(row=cur_row, column=9).alignment = center_align
+                cell_alignments[cur_row, 9] = "center"
                 ws.cell(row=cur_row, column=10).value = float(line["total_uah"])
-                ws.cell(row=cur_row, column=10).alignment = center_align
+                cell_alignments[cur_row, 10] = "center"
             
             for line in extra_rows:
-                ws.append([""] * 10)
-                cur_row = ws.max_row
+                append([""] * 10)
+                cur_row = last_row
                 height_val = line.get("height_mm")
                 if height_val not in ("", None):
                     # C-E: label, F: height (mm), I: qty
                     ws.merge_cells(start_row=cur_row, start_column=3, end_row=cur_row, end_column=5)
                     ws.cell(row=cur_row, column=6).value = _excel_plain_text(height_val)
-                    ws.cell(row=cur_row, column=6).alignment = center_align
+                    cell_alignments[cur_row, 6] = "center"
                 else:
                     ws.merge_cells(start_row=cur_row, start_column=3, end_row=cur_row, end_column=8)
                 label_cell = ws.cell(row=cur_row, column=3)
                 label_cell.value = _excel_plain_text(f"  {line['label']}")
-                label_cell.alignment = Alignment(vertical="center")
-                for c in range(2, 11):
-                    ws.cell(row=cur_row, column=c).border = border_all
+                cell_alignments[cur_row, 3] = "vcenter"
                 ws.cell(row=cur_row, column=9).value = _format_qty_for_display(line.get("qty"))
-                ws.cell(row=cur_row, column=9).alignment = center_align
+                cell_alignments[cur_row, 9] = "center"
                 if line.get("total_uah") is not None:
                     ws.cell(row=cur_row, column=10).value = float(line["total_uah"])
-                    ws.cell(row=cur_row, column=10).alignment = center_align
+                    cell_alignments[cur_row, 10] = "center"
             
-            end_opt_row = ws.max_row
+            end_opt_row = last_row
             
             if start_opt_row <= end_opt_row:
                 # "Додатково:" merged vertically in column B
                 ws.merge_cells(start_row=start_opt_row, start_column=2, end_row=end_opt_row, end_column=2)
                 extra_cell = ws.cell(row=start_opt_row, column=2)
                 extra_cell.value = "Додатково:"
-                extra_cell.alignment = center_align
-                for r in range(start_opt_row, end_opt_row + 1):
-                    ws.cell(row=r, column=2).border = border_all
+                cell_alignments[start_opt_row, 2] = "center"
             
             if mos.warning_text:
-                ws.append(["", "Попередження", _excel_plain_text(mos.warning_text)] + [""] * 8)
-                ws.merge_cells(start_row=ws.max_row, start_column=3, end_row=ws.max_row, end_column=10)
-                ws.cell(row=ws.max_row, column=3).alignment = center_align
+                append(["", "Попередження", _excel_plain_text(mos.warning_text)] + [""] * 8)
+                ws.merge_cells(start_row=last_row, start_column=3, end_row=last_row, end_column=10)
+                cell_alignments[last_row, 3] = "center"
             
             if mos.note:
-                ws.append(["", "Примітка", _excel_plain_text(mos.note)] + [""] * 8)
-                ws.merge_cells(start_row=ws.max_row, start_column=3, end_row=ws.max_row, end_column=10)
-                ws.cell(row=ws.max_row, column=3).alignment = center_align
+                append(["", "Примітка", _excel_plain_text(mos.note)] + [""] * 8)
+                ws.merge_cells(start_row=last_row, start_column=3, end_row=last_row, end_column=10)
+                cell_alignments[last_row, 3] = "center"
             
             # Total row - "Всього:" in H, qty in I, price in J (10 columns)
-            ws.append([""] * 7 + ["Всього:", "", ""])
-            tot_row = ws.max_row
+            append([""] * 7 + ["Всього:", "", ""])
+            tot_row = last_row
             ws.cell(row=tot_row, column=8).value = "Всього:"
             ws.cell(row=tot_row, column=10).value = float(total_uah)
-            item_total_rows.append(ws.max_row)
-            for c in range(1, 11):
-                ws.cell(row=ws.max_row, column=c).border = border_horiz
-            ws.cell(row=ws.max_row, column=1).border = Border(left=thin, right=thin)
+            item_total_rows.append(last_row)
             total_order_uah += total_uah
             
             # пустая строка после блока позиции без боковых границ (10 columns)
-            ws.append([""] * 10)
-            gap_rows.append(ws.max_row)
+            append([""] * 10)
+            gap_rows.append(last_row)
             
-            end_item_row = ws.max_row
+            end_item_row = last_row
             ws.merge_cells(start_row=start_item_row, start_column=1, end_row=end_item_row, end_column=1)
-            ws.cell(row=start_item_row, column=1).alignment = center_align
-            ws.cell(row=start_item_row, column=1).border = Border(left=thin, right=thin)
+            cell_alignments[start_item_row, 1] = "center"
         
-        ws.append([])
+        append([])
 
     if order.mosquito_component_items.exists():
         # Title row
-        ws.append(["", "Комплектуючі до мос. сіток"] + [""] * 10)
-        mos_comp_title_row = ws.max_row
+        append(["", "Комплектуючі до мос. сіток"] + [""] * 10)
+        mos_comp_title_row = last_row
         for c in range(2, 13):
-            ws.cell(row=mos_comp_title_row, column=c).font = Font(bold=True, size=14)
-            ws.cell(row=mos_comp_title_row, column=c).alignment = center_wrap_align
+            cell_fonts[mos_comp_title_row, c] = "bold_14"
+            cell_alignments[mos_comp_title_row, c] = "center_wrap"
         
         # Headers row (B-K) - 10 columns
-        ws.append(["", "Найменування", "Колір", "Од. вим.", "Довжина, мм", "К-сть", "", "", "Ціна, грн", ""])
-        mos_comp_header_row = ws.max_row
+        append(["", "Найменування", "Колір", "Од. вим.", "Довжина, мм", "К-сть", "", "", "Ціна, грн", ""])
+        mos_comp_header_row = last_row
         ws.cell(row=mos_comp_header_row, column=2).value = "Найменування"
         ws.cell(row=mos_comp_header_row, column=3).value = "Колір"
         ws.cell(row=mos_comp_header_row, column=4).value = "Од. вим."
@@ -1465,14 +1503,13 @@ def _build_order_workbook(
         ws.cell(row=mos_comp_header_row, column=6).value = "К-сть"
         ws.cell(row=mos_comp_header_row, column=10).value = "Ціна, грн"
         for c in range(2, 11):
-            ws.cell(row=mos_comp_header_row, column=c).font = Font(bold=True)
-            ws.cell(row=mos_comp_header_row, column=c).alignment = center_wrap_align
-            ws.cell(row=mos_comp_header_row, column=c).border = border_all
+            cell_fonts[mos_comp_header_row, c] = "bold"
+            cell_alignments[mos_comp_header_row, c] = "center_wrap"
         
         for comp in order.mosquito_component_items.all():
             price_uah_val = _round_uah_total(Decimal(comp.subtotal_usd or 0) * rate * markup_multiplier)
             # Data row with 10 columns (B-K)
-            ws.append([
+            append([
                 "",
                 _excel_plain_text(comp.name),
                 _excel_plain_text(comp.color),
@@ -1483,19 +1520,16 @@ def _build_order_workbook(
                 float(price_uah_val),
                 "",
             ])
-            mos_comp_data_row = ws.max_row
+            mos_comp_data_row = last_row
             for c in range(1, 11):
-                ws.cell(row=mos_comp_data_row, column=c).border = border_all
-                ws.cell(row=mos_comp_data_row, column=c).alignment = center_align
+                cell_alignments[mos_comp_data_row, c] = "center"
             if comp.note:
-                ws.append(["", "Примітка", _excel_plain_text(comp.note)] + [""] * 8)
-                note_row = ws.max_row
+                append(["", "Примітка", _excel_plain_text(comp.note)] + [""] * 8)
+                note_row = last_row
                 ws.merge_cells(start_row=note_row, start_column=3, end_row=note_row, end_column=10)
-                ws.cell(row=note_row, column=3).alignment = center_align
-                for c in range(2, 11):
-                    ws.cell(row=note_row, column=c).border = border_all
+                cell_alignments[note_row, 3] = "center"
             total_order_uah += price_uah_val
-        ws.append([])
+        append([])
 
     # Grand total must match order/balance math:
     # round once from the order-level total in EUR, not from a sum of already-rounded rows.
@@ -1507,41 +1541,41 @@ def _build_order_workbook(
     total_cell.value = float(_round_uah_total(canonical_total_uah)) if canonical_total_uah else 0
 
     # center all column B cells
-    for r in range(1, ws.max_row + 1):
-        ws.cell(row=r, column=2).alignment = center_wrap_align
+    for r in range(1, last_row + 1):
+        cell_alignments[r, 2] = "center_wrap"
 
-    # add borders to all populated grid cells (A-L)
-    for r in range(1, ws.max_row + 1):
+    # borders of all populated grid cells (A-L)
+    gap_row_set = set(gap_rows)
+    cell_borders = {}
+    for r in range(1, last_row + 1):
         for c in range(1, 13):
             if c > grid_max_col:
-                ws.cell(row=r, column=c).border = Border()
-                continue
-            if r in gap_rows:
-                if c == 1:
-                    ws.cell(row=r, column=c).border = Border(left=thin, right=thin, top=thin, bottom=thin)
-                else:
-                    ws.cell(row=r, column=c).border = border_horiz
+                cell_borders[r, c] = None
+            elif r in gap_row_set:
+                cell_borders[r, c] = "all" if c == 1 else "horiz"
             elif c == 1:
-                ws.cell(row=r, column=c).border = Border(left=thin, right=thin)
-            elif c == 12:
-                ws.cell(row=r, column=c).border = Border(right=thin, left=thin, top=thin, bottom=thin)
+                cell_borders[r, c] = "sides"
             else:
-                ws.cell(row=r, column=c).border = border_all
+                cell_borders[r, c] = "all"
 
     # override borders: auxiliary row after header horizontal-only, before total labels remove verticals
     for c in range(1, 7):
-        ws.cell(row=header_aux_row, column=c).border = Border()
+        cell_borders[header_aux_row, c] = None
     for c in range(7, grid_max_col + 1):
-        ws.cell(row=header_aux_row, column=c).border = border_horiz
-    ws.cell(row=header_aux_row, column=1).border = Border(left=thin)
+        cell_borders[header_aux_row, c] = "horiz"
+    cell_borders[header_aux_row, 1] = "left"
     # overall total row: remove verticals before text (cols 1-6)
     for c in range(1, 7):
-        ws.cell(row=total_row, column=c).border = border_horiz
+        cell_borders[total_row, c] = "horiz"
     # item totals: remove verticals before "Всього:"
     for r in item_total_rows:
         for c in range(1, 10):
-            ws.cell(row=r, column=c).border = border_horiz
-        ws.cell(row=r, column=1).border = Border(left=thin, right=thin)
+            cell_borders[r, c] = "horiz"
+        cell_borders[r, 1] = "sides"
+
+    palette = NamedStylePalette(wb, ws.title, _ORDER_XL_FONTS, _ORDER_XL_ALIGNMENTS, _ORDER_XL_BORDERS)
+    for (r, c), border in cell_borders.items():
+        ws.cell(row=r, column=c).style = palette.name(cell_fonts.get((r, c)), cell_alignments.get((r, c)), border)
 
     _apply_excel_print_layout(ws, last_col=grid_max_col)
 
@@ -1556,11 +1590,16 @@ def _build_order_workbook(
 
 @login_required
 def order_workbook_download(request, pk):
-    """Managers: always regenerate and download the Excel workbook for an order."""
+    """Managers: download the Excel workbook for an order (cached by content fingerprint)."""
     if not is_manager(request.user):
         raise Http404
     order = get_object_or_404(Order, pk=pk)
-    filename, data = _build_order_workbook(order, save_to_file=False)
+    filename, data = cached_order_workbook(
+        order,
+        "order",
+        _order_rate(order, get_current_eur_rate()),
+        lambda: _build_order_workbook(order, save_to_file=False),
+    )
     response = HttpResponse(
         data,
         content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
@@ -1581,7 +1620,7 @@ def _build_proposal_workbook(order):
     )
 
 
-def _send_order_in_work_email(order, request, workbook_payload=None):
+def _send_order_in_work_email(order, order_url="", workbook_payload=None, fail_silently=True):
     """Send notification to configured recipients when an order enters 'in work'."""
     recipients = list(
         NotificationEmail.objects.filter(is_active=True).values_list("email", flat=True)
@@ -1593,11 +1632,6 @@ def _send_order_in_work_email(order, request, workbook_payload=None):
     full_name = getattr(profile, "full_name", "") or ""
     phone = getattr(profile, "phone", "") or ""
 
-    try:
-        order_url = request.build_absolute_uri(reverse("orders:builder_edit", args=[order.pk]))
-    except Exception:
-        order_url = ""
-
     subject = f"Замовлення #{order.pk} відправлено в роботу"
     body_lines = [
         f"Замовлення #{order.pk} відправлено в роботу.",
@@ -1639,7 +1673,7 @@ def _send_order_in_work_email(order, request, workbook_payload=None):
     if filename and data:
         email.attach(filename, data, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
 
-    email.send(fail_silently=True)
+    email.send(fail_silently=fail_silently)
 
 
 def _prepare_to_work(order, request):
@@ -1655,6 +1689,7 @@ def _prepare_to_work(order, request):
     order.eur_rate = current_rate
     order.eur_rate_at_creation = current_rate
     order.save(update_fields=["eur_rate", "eur_rate_at_creation"])
+    refresh_item_summaries(order)
 
     balance_before = compute_balance(order.customer)
     order_total_uah = _round_uah_total(_order_base_total(order) * Decimal(current_rate or 0))
@@ -1674,33 +1709,36 @@ def _prepare_to_work(order, request):
     return True
 
 
+def _log_status_change(order, new_status, user):
+    """
+    EN: Save the new status together with its log row and the denormalized status time.
+    UA: Зберігає новий статус разом із записом журналу та часом зміни статусу.
+    """
+    status_log = OrderStatusLog.objects.create(order=order, status=new_status, user=user)
+    order.status = new_status
+    order.last_status_at = status_log.created_at
+    order.save(update_fields=["status", "last_status_at"])
+    return status_log
+
+
 def _apply_status_change(order, new_status, request):
     """Shared status transition logic for rollers & components."""
     if not new_status or new_status == order.status:
         return True
 
-    workbook_payload = None
     if new_status == Order.STATUS_IN_WORK:
         if not _prepare_to_work(order, request):
             return False
-        workbook_payload = _build_order_workbook(order)
-        order.status = new_status
-        order.save(update_fields=["status", "workbook_file"])
-        OrderStatusLog.objects.create(
-            order=order,
-            status=new_status,
-            user=request.user,
-        )
-        _send_order_in_work_email(order, request, workbook_payload)
+        status_log = _log_status_change(order, new_status, request.user)
+        try:
+            order_url = request.build_absolute_uri(reverse("orders:builder_edit", args=[order.pk]))
+        except Exception:
+            order_url = ""
+        # Workbook + e-mail run after commit in the worker (see services_order_pipeline).
+        enqueue_on_commit(process_order_in_work_task, status_log.pk, order_url)
         return True
 
-    order.status = new_status
-    order.save(update_fields=["status"])
-    OrderStatusLog.objects.create(
-        order=order,
-        status=new_status,
-        user=request.user,
-    )
+    _log_status_change(order, new_status, request.user)
     return True
 
 
@@ -1869,100 +1907,131 @@ class TransactionForm(forms.ModelForm):
         self._selected_orders = orders
         return obj
 
-@login_required
-def order_list(request):
+ORDER_LIST_PAGE_SIZE = 50
+EXPORT_CHUNK_SIZE = 500
+
+
+def _keyset_page(qs, params, page_size: int = ORDER_LIST_PAGE_SIZE):
     """
-    EN: List of roller orders (with positions).
-    UA: Список замовлень з тканинними ролетами.
+    EN: Keyset (cursor) pagination on -id. `before=<id>` continues below that id;
+        one extra row is fetched to know whether another page exists.
+    UA: Keyset-пагінація по -id. `before=<id>` продовжує список нижче цього id;
+        додатковий рядок вибирається, щоб знати, чи є наступна сторінка.
     """
-    User = get_user_model()
-    status_filter = request.GET.get("status") or ""
-    customer_filter = request.GET.get("customer") or ""
-    q = (request.GET.get("q") or "").strip()
-    customer_id = (request.GET.get("customer") or "").strip()
-    customer_id = (request.GET.get("customer") or "").strip()
-    date_from, date_to, date_from_str, date_to_str, date_mode = _parse_date_range(request.GET)
-    balance_user = request.user
-    orders_qs = (
-        _orders_scope(request.user)
-        .select_related("customer", "customer__customerprofile")
-        .annotate(last_status_at=Coalesce(Max("status_logs__created_at"), "created_at"))
-        .prefetch_related("status_logs")
-        .exclude(component_items__isnull=False)  # exclude component orders from rollers list
-        .exclude(fabric_items__isnull=False)
-        .exclude(mosquito_items__isnull=False)
-        .exclude(mosquito_component_items__isnull=False)
-        .order_by("-id")
-        .distinct()
+    before = to_int(params.get("before"), 0)
+    if before > 0:
+        qs = qs.filter(pk__lt=before)
+    rows = list(qs.order_by("-id")[: page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    next_cursor = rows[-1].pk if has_more and rows else None
+    return rows, next_cursor
+
+
+def _order_kind_and_url(order):
+    """EN: Order type and builder URL for the unified list. UA: Тип замовлення та URL конструктора для спільного списку."""
+    if getattr(order, "has_components", False):
+        return "components", reverse("orders:order_components_builder", args=[order.id])
+    if getattr(order, "has_fabrics", False):
+        return "fabrics", reverse("orders:order_fabric_builder", args=[order.id])
+    if getattr(order, "has_mosquitoes", False):
+        return "mosquitoes", reverse("orders:order_mosquito_builder", args=[order.id])
+    if getattr(order, "has_mosquito_components", False):
+        return "mosquito_components", reverse("orders:order_mosquito_components_builder", args=[order.id])
+    return "rollers", reverse("orders:builder_edit", args=[order.id])
+
+
+def _render_order_list(request, qs, *, list_mode, balance_user, filters, with_payment_shortage=True):
+    """
+    EN: Render one keyset page of an order list. Header figures come from a single SQL aggregate;
+        totals, proposal links and payment shortage are computed only for the visible rows.
+        XHR requests get the rows as JSON for infinite scroll.
+    UA: Рендер однієї сторінки списку замовлень. Лічильники в шапці — одним SQL-агрегатом;
+        суми, посилання на пропозиції та нестача оплати рахуються лише для видимих рядків.
+        Для XHR-запитів рядки повертаються у JSON (нескінченна прокрутка).
+    """
+    header = qs.order_by().aggregate(
+        orders_count=Count("pk"),
+        quote_orders_count=Count("pk", filter=Q(status=Order.STATUS_QUOTE)),
     )
+    quote_orders_count = header["quote_orders_count"] or 0
 
-    if status_filter:
-        orders_qs = orders_qs.filter(status=status_filter)
-    if date_from:
-        orders_qs = orders_qs.filter(created_at__date__gte=date_from)
-    if date_to:
-        orders_qs = orders_qs.filter(created_at__date__lte=date_to)
+    current_rate = get_current_eur_rate()
+    orders, next_cursor = _keyset_page(_set_order_totals_uah(qs, current_rate), request.GET)
 
-    if customer_filter and is_manager(request.user):
-        balance_user = get_object_or_404(User, pk=customer_filter)
-        orders_qs = orders_qs.filter(customer=balance_user)
-    if q:
-        orders_qs = orders_qs.filter(pk__icontains=q)
+    proposal_page_urls, proposal_excel_urls = proposal_link_maps([o.id for o in orders])
 
-    customers_filter_list = (
-        customer_users_queryset(with_orders=True)
-        if is_manager(request.user) else []
-    )
-    current_rate = get_current_eur_rate()
-    orders_qs = _set_order_totals_uah(orders_qs, current_rate)
-    quote_orders_count = orders_qs.filter(status=Order.STATUS_QUOTE).count()
-    show_bulk_select = quote_orders_count > 1
-    payment_message_text = _get_payment_message_text() or ""
+    shortage_calculator = PaymentShortageCalculator(current_rate)
     payment_shortage_map = {}
-    proposal_tokens = {o.id: _proposal_token(o) for o in orders_qs}
-    proposal_page_urls = {oid: reverse("orders:proposal_page", args=[tok]) for oid, tok in proposal_tokens.items()}
-    proposal_excel_urls = {oid: reverse("orders:proposal_excel", args=[tok]) for oid, tok in proposal_tokens.items()}
-    if quote_orders_count:
-        for o in orders_qs:
+    if with_payment_shortage and quote_orders_count:
+        for o in orders:
             if o.status != Order.STATUS_QUOTE or o.customer_id != request.user.id:
                 continue
-            shortage_ctx = _payment_shortage_context(o)
+            shortage_ctx = _payment_shortage_context(o, shortage_calculator)
             if shortage_ctx:
                 payment_shortage_map[o.id] = {
                     "shortage": str(shortage_ctx.get("shortage") or ""),
                     "orders": shortage_ctx.get("orders") or [],
                 }
 
+    order_kind_map = {}
+    order_view_urls = {}
+    if list_mode == "all":
+        for o in orders:
+            order_kind_map[o.id], order_view_urls[o.id] = _order_kind_and_url(o)
+
+    list_params = request.GET.copy()
+    list_params.pop("before", None)
+    list_return_url = f"{request.path}?{list_params.urlencode()}" if list_params else request.path
+    next_page_url = None
+    if next_cursor:
+        list_params["before"] = next_cursor
+        next_page_url = f"{request.path}?{list_params.urlencode()}"
+
     context = {
-        "orders": orders_qs,
-        "statuses": Order.STATUS_CHOICES,
-        "status_filter": status_filter,
-        "customer_filter": customer_filter,
-        "date_from": date_from_str,
-        "date_to": date_to_str,
-        "date_mode": date_mode,
-        "customer_options": customers_filter_list,
-        "list_mode": "rollers",
+        "orders": orders,
+        "list_mode": list_mode,
+        "order_kind_map": order_kind_map,
+        "order_view_urls": order_view_urls,
         "status_badges": STATUS_BADGES,
         "status_labels": STATUS_LABELS,
-        "quote_orders_count": quote_orders_count,
-        "show_bulk_select": show_bulk_select,
-        "q": q,
-        "payment_message_text": payment_message_text,
-        "payment_shortage_map": payment_shortage_map,
-        "payment_shortage_json": json.dumps(payment_shortage_map),
-        "user_balance": compute_balance(balance_user),
+        "show_bulk_select": quote_orders_count > 1,
         "proposal_page_urls": proposal_page_urls,
         "proposal_excel_urls": proposal_excel_urls,
+        "list_return_url": list_return_url,
+        "next_page_url": next_page_url,
     }
+    if request.headers.get("X-Requested-With") == "XMLHttpRequest":
+        return JsonResponse(
+            {
+                "ok": True,
+                "html": render_to_string("orders/partials/order_list_rows.html", context, request=request),
+                "next_page_url": next_page_url,
+                "payment_shortage": payment_shortage_map,
+            }
+        )
+
+    context.update(filters)
+    context.update(
+        {
+            "statuses": Order.STATUS_CHOICES,
+            "customer_options": customer_users_queryset(with_orders=True) if is_manager(request.user) else [],
+            "orders_count": header["orders_count"] or 0,
+            "quote_orders_count": quote_orders_count,
+            "payment_message_text": _get_payment_message_text() or "",
+            "payment_shortage_map": payment_shortage_map,
+            "payment_shortage_json": json.dumps(payment_shortage_map),
+            "user_balance": shortage_calculator.balance(balance_user),
+        }
+    )
     return render(request, "orders/order_list.html", context)
 
 
-@login_required
-def order_components_list(request):
+def _order_list_filters(request, qs):
     """
-    EN: List of orders that have components.
-    UA: Список замовлень, у яких є комплектуючі.
+    EN: Apply the common list filters (status, dates, customer, number).
+    UA: Застосовує спільні фільтри списків (статус, дати, клієнт, номер).
+    Returns (qs, balance_user, filters_context).
     """
     User = get_user_model()
     status_filter = request.GET.get("status") or ""
@@ -1971,289 +2040,96 @@ def order_components_list(request):
     date_from, date_to, date_from_str, date_to_str, date_mode = _parse_date_range(request.GET)
     balance_user = request.user
 
-    qs = (
-        _orders_scope(request.user)
-        .select_related("customer", "customer__customerprofile")
-        .annotate(last_status_at=Coalesce(Max("status_logs__created_at"), "created_at"))
-        .prefetch_related("status_logs")
-        .filter(component_items__isnull=False)
-        .distinct()
-        .order_by("-id")
-    )
-
     if status_filter:
         qs = qs.filter(status=status_filter)
-    if date_from:
-        qs = qs.filter(created_at__date__gte=date_from)
-    if date_to:
-        qs = qs.filter(created_at__date__lte=date_to)
+    qs = filter_created_between(qs, date_from, date_to)
     if customer_filter and is_manager(request.user):
         balance_user = get_object_or_404(User, pk=customer_filter)
         qs = qs.filter(customer=balance_user)
     if q:
         qs = qs.filter(pk__icontains=q)
 
-    customers_filter_list = (
-        customer_users_queryset(with_orders=True)
-        if is_manager(request.user) else []
-    )
-    current_rate = get_current_eur_rate()
-    qs = _set_order_totals_uah(qs, current_rate)
-    quote_orders_count = qs.filter(status=Order.STATUS_QUOTE).count()
-    show_bulk_select = quote_orders_count > 1
-    payment_message_text = _get_payment_message_text() or ""
-    payment_shortage_map = {}
-    proposal_tokens = {o.id: _proposal_token(o) for o in qs}
-    proposal_page_urls = {oid: reverse("orders:proposal_page", args=[tok]) for oid, tok in proposal_tokens.items()}
-    proposal_excel_urls = {oid: reverse("orders:proposal_excel", args=[tok]) for oid, tok in proposal_tokens.items()}
-    if quote_orders_count:
-        for o in qs:
-            if o.status != Order.STATUS_QUOTE or o.customer_id != request.user.id:
-                continue
-            shortage_ctx = _payment_shortage_context(o)
-            if shortage_ctx:
-                payment_shortage_map[o.id] = {
-                    "shortage": str(shortage_ctx.get("shortage") or ""),
-                    "orders": shortage_ctx.get("orders") or [],
-                }
-
-    context = {
-        "orders": qs,
-        "list_mode": "components",
-        "statuses": Order.STATUS_CHOICES,
+    filters = {
         "status_filter": status_filter,
         "customer_filter": customer_filter,
         "date_from": date_from_str,
         "date_to": date_to_str,
         "date_mode": date_mode,
-        "customer_options": customers_filter_list,
-        "status_badges": STATUS_BADGES,
-        "status_labels": STATUS_LABELS,
-        "quote_orders_count": quote_orders_count,
-        "show_bulk_select": show_bulk_select,
         "q": q,
-        "payment_message_text": payment_message_text,
-        "payment_shortage_map": payment_shortage_map,
-        "payment_shortage_json": json.dumps(payment_shortage_map),
-        "user_balance": compute_balance(balance_user),
-        "proposal_page_urls": proposal_page_urls,
-        "proposal_excel_urls": proposal_excel_urls,
     }
-    return render(request, "orders/order_list.html", context)
+    return qs, balance_user, filters
 
 
 @login_required
-def order_fabrics_list(request):
-    User = get_user_model()
-    status_filter = request.GET.get("status") or ""
-    customer_filter = request.GET.get("customer") or ""
-    q = (request.GET.get("q") or "").strip()
-    date_from, date_to, date_from_str, date_to_str, date_mode = _parse_date_range(request.GET)
-    balance_user = request.user
+def order_list(request):
+    """
+    EN: List of roller orders (with positions).
+    UA: Список замовлень з тканинними ролетами.
+    """
+    orders_qs = (
+        _orders_scope(request.user)
+        .select_related("customer", "customer__customerprofile")
+        .order_by("-id")
+    )
+    orders_qs = filter_order_category(orders_qs, "rollers")
+    orders_qs, balance_user, filters = _order_list_filters(request, orders_qs)
+    return _render_order_list(request, orders_qs, list_mode="rollers", balance_user=balance_user, filters=filters)
+
 
+@login_required
+def order_components_list(request):
+    """
+    EN: List of orders that have components.
+    UA: Список замовлень, у яких є комплектуючі.
+    """
     qs = (
         _orders_scope(request.user)
         .select_related("customer", "customer__customerprofile")
-        .annotate(last_status_at=Coalesce(Max("status_logs__created_at"), "created_at"))
-        .prefetch_related("status_logs")
-        .filter(fabric_items__isnull=False)
-        .distinct()
         .order_by("-id")
     )
+    qs = filter_order_category(qs, "components")
+    qs, balance_user, filters = _order_list_filters(request, qs)
+    return _render_order_list(request, qs, list_mode="components", balance_user=balance_user, filters=filters)
 
-    if status_filter:
-        qs = qs.filter(status=status_filter)
-    if date_from:
-        qs = qs.filter(created_at__date__gte=date_from)
-    if date_to:
-        qs = qs.filter(created_at__date__lte=date_to)
-    if customer_filter and is_manager(request.user):
-        balance_user = get_object_or_404(User, pk=customer_filter)
-        qs = qs.filter(customer=balance_user)
-    if q:
-        qs = qs.filter(pk__icontains=q)
 
-    customers_filter_list = (
-        customer_users_queryset(with_orders=True)
-        if is_manager(request.user) else []
+@login_required
+def order_fabrics_list(request):
+    qs = (
+        _orders_scope(request.user)
+        .select_related("customer", "customer__customerprofile")
+        .order_by("-id")
     )
-    current_rate = get_current_eur_rate()
-    qs = _set_order_totals_uah(qs, current_rate)
-    quote_orders_count = qs.filter(status=Order.STATUS_QUOTE).count()
-    show_bulk_select = quote_orders_count > 1
-    payment_message_text = _get_payment_message_text() or ""
-    payment_shortage_map = {}
-    proposal_tokens = {o.id: _proposal_token(o) for o in qs}
-    proposal_page_urls = {oid: reverse("orders:proposal_page", args=[tok]) for oid, tok in proposal_tokens.items()}
-    proposal_excel_urls = {oid: reverse("orders:proposal_excel", args=[tok]) for oid, tok in proposal_tokens.items()}
-    if quote_orders_count:
-        for o in qs:
-            if o.status != Order.STATUS_QUOTE or o.customer_id != request.user.id:
-                continue
-            shortage_ctx = _payment_shortage_context(o)
-            if shortage_ctx:
-                payment_shortage_map[o.id] = {
-                    "shortage": str(shortage_ctx.get("shortage") or ""),
-                    "orders": shortage_ctx.get("orders") or [],
-                }
-
-    context = {
-        "orders": qs,
-        "list_mode": "fabrics",
-        "statuses": Order.STATUS_CHOICES,
-        "status_filter": status_filter,
-        "customer_filter": customer_filter,
-        "date_from": date_from_str,
-        "date_to": date_to_str,
-        "date_mode": date_mode,
-        "customer_options": customers_filter_list,
-        "status_badges": STATUS_BADGES,
-        "status_labels": STATUS_LABELS,
-        "quote_orders_count": quote_orders_count,
-        "show_bulk_select": show_bulk_select,
-        "q": q,
-        "payment_message_text": payment_message_text,
-        "payment_shortage_map": payment_shortage_map,
-        "payment_shortage_json": json.dumps(payment_shortage_map),
-        "user_balance": compute_balance(balance_user),
-        "proposal_page_urls": proposal_page_urls,
-        "proposal_excel_urls": proposal_excel_urls,
-    }
-    return render(request, "orders/order_list.html", context)
+    qs = filter_order_category(qs, "fabrics")
+    qs, balance_user, filters = _order_list_filters(request, qs)
+    return _render_order_list(request, qs, list_mode="fabrics", balance_user=balance_user, filters=filters)
 
 
 @login_required
 def order_mosquito_list(request):
-    User = get_user_model()
-    status_filter = request.GET.get("status") or ""
-    customer_filter = request.GET.get("customer") or ""
-    q = (request.GET.get("q") or "").strip()
-    date_from, date_to, date_from_str, date_to_str, date_mode = _parse_date_range(request.GET)
-    balance_user = request.user
-
     qs = (
         _orders_scope(request.user)
         .select_related("customer", "customer__customerprofile")
-        .annotate(last_status_at=Coalesce(Max("status_logs__created_at"), "created_at"))
-        .prefetch_related("status_logs")
-        .filter(mosquito_items__isnull=False)
-        .distinct()
         .order_by("-id")
     )
-
-    if status_filter:
-        qs = qs.filter(status=status_filter)
-    if date_from:
-        qs = qs.filter(created_at__date__gte=date_from)
-    if date_to:
-        qs = qs.filter(created_at__date__lte=date_to)
-    if customer_filter and is_manager(request.user):
-        balance_user = get_object_or_404(User, pk=customer_filter)
-        qs = qs.filter(customer=balance_user)
-    if q:
-        qs = qs.filter(pk__icontains=q)
-
-    customers_filter_list = customer_users_queryset(with_orders=True) if is_manager(request.user) else []
-    current_rate = get_current_eur_rate()
-    qs = _set_order_totals_uah(qs, current_rate)
-    quote_orders_count = qs.filter(status=Order.STATUS_QUOTE).count()
-    show_bulk_select = quote_orders_count > 1
-    payment_message_text = _get_payment_message_text() or ""
-    payment_shortage_map = {}
-    proposal_tokens = {o.id: _proposal_token(o) for o in qs}
-    proposal_page_urls = {oid: reverse("orders:proposal_page", args=[tok]) for oid, tok in proposal_tokens.items()}
-    proposal_excel_urls = {oid: reverse("orders:proposal_excel", args=[tok]) for oid, tok in proposal_tokens.items()}
-
-    context = {
-        "orders": qs,
-        "list_mode": "mosquitoes",
-        "statuses": Order.STATUS_CHOICES,
-        "status_filter": status_filter,
-        "customer_filter": customer_filter,
-        "date_from": date_from_str,
-        "date_to": date_to_str,
-        "date_mode": date_mode,
-        "customer_options": customers_filter_list,
-        "status_badges": STATUS_BADGES,
-        "status_labels": STATUS_LABELS,
-        "quote_orders_count": quote_orders_count,
-        "show_bulk_select": show_bulk_select,
-        "q": q,
-        "payment_message_text": payment_message_text,
-        "payment_shortage_map": payment_shortage_map,
-        "payment_shortage_json": json.dumps(payment_shortage_map),
-        "user_balance": compute_balance(balance_user),
-        "proposal_page_urls": proposal_page_urls,
-        "proposal_excel_urls": proposal_excel_urls,
-    }
-    return render(request, "orders/order_list.html", context)
+    qs = filter_order_category(qs, "mosquitoes")
+    qs, balance_user, filters = _order_list_filters(request, qs)
+    return _render_order_list(
+        request, qs, list_mode="mosquitoes", balance_user=balance_user, filters=filters, with_payment_shortage=False
+    )
 
 
 @login_required
 def order_mosquito_components_list(request):
-    User = get_user_model()
-    status_filter = request.GET.get("status") or ""
-    customer_filter = request.GET.get("customer") or ""
-    q = (request.GET.get("q") or "").strip()
-    date_from, date_to, date_from_str, date_to_str, date_mode = _parse_date_range(request.GET)
-    balance_user = request.user
-
     qs = (
         _orders_scope(request.user)
         .select_related("customer", "customer__customerprofile")
-        .annotate(last_status_at=Coalesce(Max("status_logs__created_at"), "created_at"))
-        .prefetch_related("status_logs")
-        .filter(mosquito_component_items__isnull=False)
-        .distinct()
         .order_by("-id")
     )
-
-    if status_filter:
-        qs = qs.filter(status=status_filter)
-    if date_from:
-        qs = qs.filter(created_at__date__gte=date_from)
-    if date_to:
-        qs = qs.filter(created_at__date__lte=date_to)
-    if customer_filter and is_manager(request.user):
-        balance_user = get_object_or_404(User, pk=customer_filter)
-        qs = qs.filter(customer=balance_user)
-    if q:
-        qs = qs.filter(pk__icontains=q)
-
-    customers_filter_list = customer_users_queryset(with_orders=True) if is_manager(request.user) else []
-    current_rate = get_current_eur_rate()
-    qs = _set_order_totals_uah(qs, current_rate)
-    quote_orders_count = qs.filter(status=Order.STATUS_QUOTE).count()
-    show_bulk_select = quote_orders_count > 1
-    payment_message_text = _get_payment_message_text() or ""
-    payment_shortage_map = {}
-    proposal_tokens = {o.id: _proposal_token(o) for o in qs}
-    proposal_page_urls = {oid: reverse("orders:proposal_page", args=[tok]) for oid, tok in proposal_tokens.items()}
-    proposal_excel_urls = {oid: reverse("orders:proposal_excel", args=[tok]) for oid, tok in proposal_tokens.items()}
-
-    context = {
-        "orders": qs,
-        "list_mode": "mosquito_components",
-        "statuses": Order.STATUS_CHOICES,
-        "status_filter": status_filter,
-        "customer_filter": customer_filter,
-        "date_from": date_from_str,
-        "date_to": date_to_str,
-        "date_mode": date_mode,
-        "customer_options": customers_filter_list,
-        "status_badges": STATUS_BADGES,
-        "status_labels": STATUS_LABELS,
-        "quote_orders_count": quote_orders_count,
-        "show_bulk_select": show_bulk_select,
-        "q": q,
-        "payment_message_text": payment_message_text,
-        "payment_shortage_map": payment_shortage_map,
-        "payment_shortage_json": json.dumps(payment_shortage_map),
-        "user_balance": compute_balance(balance_user),
-        "proposal_page_urls": proposal_page_urls,
-        "proposal_excel_urls": proposal_excel_urls,
-    }
-    return render(request, "orders/order_list.html", context)
+    qs = filter_order_category(qs, "mosquito_components")
+    qs, balance_user, filters = _order_list_filters(request, qs)
+    return _render_order_list(
+        request, qs, list_mode="mosquito_components", balance_user=balance_user, filters=filters, with_payment_shortage=False
+    )
 
 
 @login_required
@@ -2262,109 +2138,13 @@ def order_all_list(request):
     EN: Unified list of all order types.
     UA: Єдиний список усіх типів замовлень.
     """
-    User = get_user_model()
-    status_filter = request.GET.get("status") or ""
-    customer_filter = request.GET.get("customer") or ""
-    q = (request.GET.get("q") or "").strip()
-    date_from, date_to, date_from_str, date_to_str, date_mode = _parse_date_range(request.GET)
-    balance_user = request.user
-
     qs = (
-        _orders_scope(request.user)
+        annotate_order_category(_orders_scope(request.user))
         .select_related("customer", "customer__customerprofile")
-        .annotate(
-            last_status_at=Coalesce(Max("status_logs__created_at"), "created_at"),
-            has_components=Exists(OrderComponentItem.objects.filter(order_id=OuterRef("pk"))),
-            has_fabrics=Exists(OrderFabricItem.objects.filter(order_id=OuterRef("pk"))),
-            has_mosquitoes=Exists(OrderMosquitoItem.objects.filter(order_id=OuterRef("pk"))),
-            has_mosquito_components=Exists(OrderMosquitoComponentItem.objects.filter(order_id=OuterRef("pk"))),
-        )
-        .prefetch_related("status_logs")
-        .distinct()
         .order_by("-id")
     )
-
-    if status_filter:
-        qs = qs.filter(status=status_filter)
-    if date_from:
-        qs = qs.filter(created_at__date__gte=date_from)
-    if date_to:
-        qs = qs.filter(created_at__date__lte=date_to)
-    if customer_filter and is_manager(request.user):
-        balance_user = get_object_or_404(User, pk=customer_filter)
-        qs = qs.filter(customer=balance_user)
-    if q:
-        qs = qs.filter(pk__icontains=q)
-
-    customers_filter_list = (
-        customer_users_queryset(with_orders=True)
-        if is_manager(request.user) else []
-    )
-    current_rate = get_current_eur_rate()
-    qs = _set_order_totals_uah(qs, current_rate)
-    quote_orders_count = qs.filter(status=Order.STATUS_QUOTE).count()
-    show_bulk_select = quote_orders_count > 1
-    payment_message_text = _get_payment_message_text() or ""
-    payment_shortage_map = {}
-    proposal_tokens = {o.id: _proposal_token(o) for o in qs}
-    proposal_page_urls = {oid: reverse("orders:proposal_page", args=[tok]) for oid, tok in proposal_tokens.items()}
-    proposal_excel_urls = {oid: reverse("orders:proposal_excel", args=[tok]) for oid, tok in proposal_tokens.items()}
-    if quote_orders_count:
-        for o in qs:
-            if o.status != Order.STATUS_QUOTE or o.customer_id != request.user.id:
-                continue
-            shortage_ctx = _payment_shortage_context(o)
-            if shortage_ctx:
-                payment_shortage_map[o.id] = {
-                    "shortage": str(shortage_ctx.get("shortage") or ""),
-                    "orders": shortage_ctx.get("orders") or [],
-                }
-
-    order_kind_map = {}
-    order_view_urls = {}
-    for o in qs:
-        if getattr(o, "has_components", False):
-            order_kind = "components"
-            order_view_urls[o.id] = reverse("orders:order_components_builder", args=[o.id])
-        elif getattr(o, "has_fabrics", False):
-            order_kind = "fabrics"
-            order_view_urls[o.id] = reverse("orders:order_fabric_builder", args=[o.id])
-        elif getattr(o, "has_mosquitoes", False):
-            order_kind = "mosquitoes"
-            order_view_urls[o.id] = reverse("orders:order_mosquito_builder", args=[o.id])
-        elif getattr(o, "has_mosquito_components", False):
-            order_kind = "mosquito_components"
-            order_view_urls[o.id] = reverse("orders:order_mosquito_components_builder", args=[o.id])
-        else:
-            order_kind = "rollers"
-            order_view_urls[o.id] = reverse("orders:builder_edit", args=[o.id])
-        order_kind_map[o.id] = order_kind
-
-    context = {
-        "orders": qs,
-        "list_mode": "all",
-        "order_kind_map": order_kind_map,
-        "order_view_urls": order_view_urls,
-        "statuses": Order.STATUS_CHOICES,
-        "status_filter": status_filter,
-        "customer_filter": customer_filter,
-        "date_from": date_from_str,
-        "date_to": date_to_str,
-        "date_mode": date_mode,
-        "customer_options": customers_filter_list,
-        "status_badges": STATUS_BADGES,
-        "status_labels": STATUS_LABELS,
-        "quote_orders_count": quote_orders_count,
-        "show_bulk_select": show_bulk_select,
-        "q": q,
-        "payment_message_text": payment_message_text,
-        "payment_shortage_map": payment_shortage_map,
-        "payment_shortage_json": json.dumps(payment_shortage_map),
-        "user_balance": compute_balance(balance_user),
-        "proposal_page_urls": proposal_page_urls,
-        "proposal_excel_urls": proposal_excel_urls,
-    }
-    return render(request, "orders/order_list.html", context)
+    qs, balance_user, filters = _order_list_filters(request, qs)
+    return _render_order_list(request, qs, list_mode="all", balance_user=balance_user, filters=filters)
 
 
 @login_required
@@ -2463,8 +2243,140 @@ def order_update(request, pk: int):
 
 
 PRICE_SHEET_URL = "https://docs.google.com/spreadsheets/d/1vjwqhZ0-9SWcN-u8Oa-T6ciNmHfMeHU-c2RTv6axqHs/edit?gid=0#gid=0"
-MOSQUITO_PRICE_SHEET_URL = "https://docs.google.com/spreadsheets/d/1rte4e5hTae33bAB89GDMR3nZGnNCVHjlZXG2H9KSSyM/edit?gid=0#gid=0"
-MOSQUITO_COMPONENTS_PRICE_SHEET_URL = "https://docs.google.com/spreadsheets/d/1rte4e5hTae33bAB89GDMR3nZGnNCVHjlZXG2H9KSSyM/edit?gid=2116478350#gid=2116478350"
+
+
+def _roller_rows_from_post(post):
+    """
+    EN: Roller rows from the per-field form arrays posted by builder pages without items_json.
+    UA: Рядки ролет із паралельних масивів полів форми (сторінки без items_json).
+    """
+    systems = post.getlist("system_sheet")
+    sections = post.getlist("table_section")
+    fabrics = post.getlist("fabric_name")
+    fabric_colors = post.getlist("fabric_color_code")
+
+    h_list = post.getlist("height_gabarit_mm")
+    w_list = post.getlist("width_fabric_mm")
+
+    gw_states = post.getlist("gabarit_width_flag_state")
+    if gw_states and len(gw_states) < len(systems):
+        gw_states += [""] * (len(systems) - len(gw_states))
+    gw_flags = post.getlist("gabarit_width_flag")
+    gh_flags = post.getlist("fabric_height_flag")
+    fh_states = post.getlist("fabric_height_flag_state")
+    GbDiffWidthMm = post.getlist("GbDiffWidthMm")
+    gb_width_mm = post.getlist("gb_width_mm")
+
+    base_prices = post.getlist("base_price_eur")
+    sur_prices = post.getlist("surcharge_height_eur")
+    magnets_price_eur = post.getlist("magnets_price_eur")
+    magnets_qty = post.getlist("magnets_qty")
+    cord_pvc_tension_price_eur = post.getlist("cord_pvc_tension_price_eur")
+    cord_pvc_tension_qty = post.getlist("cord_pvc_tension_qty")
+    cord_copper_barrel_price_eur = post.getlist("cord_copper_barrel_price_eur")
+    cord_copper_barrel_qty = post.getlist("cord_copper_barrel_qty")
+    top_pvc_clip_pair_price_eur = post.getlist("top_pvc_clip_pair_price_eur")
+    top_pvc_clip_pair_qty = post.getlist("top_pvc_clip_pair_qty")
+    top_pvc_bar_tape_price_eur_mp = post.getlist("top_pvc_bar_tape_price_eur_mp")
+    top_pvc_bar_tape_qty = post.getlist("top_pvc_bar_tape_qty")
+    bottom_wide_bar_price_eur_mp = post.getlist("bottom_wide_bar_price_eur_mp")
+    bottom_wide_bar_qty = post.getlist("bottom_wide_bar_qty")
+    top_bar_scotch_price_eur_mp = post.getlist("top_bar_scotch_price_eur_mp")
+    top_bar_scotch_qty = post.getlist("top_bar_scotch_qty")
+    metal_cord_fix_price_eur = post.getlist("metal_cord_fix_price_eur")
+    metal_cord_fix_qty = post.getlist("metal_cord_fix_qty")
+    middle_bracket_price_eur = post.getlist("middle_bracket_price_eur")
+    middle_bracket_qty = post.getlist("middle_bracket_qty")
+    remote_15ch_price_eur = post.getlist("remote_15ch_price_eur")
+    remote_15ch_qty = post.getlist("remote_15ch_qty")
+    remote_5ch_price_eur = post.getlist("remote_5ch_price_eur")
+    remote_5ch_qty = post.getlist("remote_5ch_qty")
+    motor_with_remote_price_eur = post.getlist("motor_with_remote_price_eur")
+    motor_with_remote_qty = post.getlist("motor_with_remote_qty")
+    motor_no_remote_price_eur = post.getlist("motor_no_remote_price_eur")
+    motor_no_remote_qty = post.getlist("motor_no_remote_qty")
+    metal_kronsht_price_eur = post.getlist("metal_kronsht_price_eur")
+    metal_kronsht_qty = post.getlist("metal_kronsht_qty")
+    
+    subtotals = post.getlist("subtotal_eur")
+
+    roll_infos = post.getlist("roll_height_info")
+    qty_list = post.getlist("quantity")
+    control_sides = post.getlist("control_side")
+    bottom_fixations = post.getlist("bottom_fixation")
+    pvc_planks = post.getlist("pvc_plank")
+    item_notes = post.getlist("item_note")
+
+    if not any((system or "").strip() for system in systems):
+        return []
+    # Rows carry the id of the item they edit (item_id, empty for new rows).
+    item_ids = post.getlist("item_id")
+    if len(item_ids) != len(systems):
+        # Page rendered before row ids existed: treat every row as new.
+        item_ids = [""] * len(systems)
+    rows = []
+    for idx, system_sheet in enumerate(systems):
+        rows.append(dict(
+            id=to_int(item_ids[idx], 0) or None,
+            system_sheet=system_sheet or "",
+            table_section=_get(sections, idx, ""),
+            fabric_name=_get(fabrics, idx, ""),
+            fabric_color_code=_get(fabric_colors, idx, ""),
+            height_gabarit_mm=to_int(_get(h_list, idx, "0"), 0),
+            width_fabric_mm=to_int(_get(w_list, idx, "0"), 0),
+            gabarit_width_flag=(
+                _get(gw_states, idx) in ("1", "true", "on")
+                if gw_states
+                else _get(gw_flags, idx) in ("on", "true", "1")
+            ),
+            fabric_height_flag=(
+                _get(fh_states, idx) in ("1", "true", "on")
+                if fh_states
+                else _get(gh_flags, idx) in ("on", "true", "1")
+            ),
+            base_price_eur=to_decimal(_get(base_prices, idx)),
+            gb_width_mm=to_decimal(_get(gb_width_mm, idx)),
+            GbDiffWidthMm=to_decimal(_get(GbDiffWidthMm, idx)),
+            surcharge_height_eur=to_decimal(_get(sur_prices, idx)),
+            magnets_price_eur=to_decimal(_get(magnets_price_eur, idx)),
+            magnets_qty=to_decimal(_get(magnets_qty, idx)),
+            cord_pvc_tension_price_eur=to_decimal(_get(cord_pvc_tension_price_eur, idx)),
+            cord_pvc_tension_qty=to_decimal(_get(cord_pvc_tension_qty, idx)),
+            cord_copper_barrel_price_eur=to_decimal(_get(cord_copper_barrel_price_eur, idx)),
+            cord_copper_barrel_qty=to_decimal(_get(cord_copper_barrel_qty, idx)),
+            top_pvc_clip_pair_price_eur=to_decimal(_get(top_pvc_clip_pair_price_eur, idx)),
+            top_pvc_clip_pair_qty=to_decimal(_get(top_pvc_clip_pair_qty, idx)),
+            top_pvc_bar_tape_price_eur_mp=to_decimal(_get(top_pvc_bar_tape_price_eur_mp, idx)),
+            top_pvc_bar_tape_qty=to_decimal(_get(top_pvc_bar_tape_qty, idx)),
+            bottom_wide_bar_price_eur_mp=to_decimal(_get(bottom_wide_bar_price_eur_mp, idx)),
+            bottom_wide_bar_qty=to_decimal(_get(bottom_wide_bar_qty, idx)),
+            top_bar_scotch_price_eur_mp=to_decimal(_get(top_bar_scotch_price_eur_mp, idx)),
+            top_bar_scotch_qty=to_decimal(_get(top_bar_scotch_qty, idx)),
+            metal_cord_fix_price_eur=to_decimal(_get(metal_cord_fix_price_eur, idx)),
+            metal_cord_fix_qty=to_decimal(_get(metal_cord_fix_qty, idx)),
+            
+            middle_bracket_price_eur=to_decimal(_get(middle_bracket_price_eur, idx)),
+            middle_bracket_qty=to_decimal(_get(middle_bracket_qty, idx)),
+            remote_15ch_price_eur=to_decimal(_get(remote_15ch_price_eur, idx)),
+            remote_15ch_qty=to_decimal(_get(remote_15ch_qty, idx)),
+            remote_5ch_price_eur=to_decimal(_get(remote_5ch_price_eur, idx)),
+            remote_5ch_qty=to_decimal(_get(remote_5ch_qty, idx)),
+            motor_with_remote_price_eur=to_decimal(_get(motor_with_remote_price_eur, idx)),
+            motor_with_remote_qty=to_decimal(_get(motor_with_remote_qty, idx)),
+            motor_no_remote_price_eur=to_decimal(_get(motor_no_remote_price_eur, idx)),
+            motor_no_remote_qty=to_decimal(_get(motor_no_remote_qty, idx)),
+            metal_kronsht_price_eur=to_decimal(_get(metal_kronsht_price_eur, idx)),
+            metal_kronsht_qty=to_decimal(_get(metal_kronsht_qty, idx)),
+    
+            subtotal_eur=to_decimal(_get(subtotals, idx)),
+            roll_height_info=_get(roll_infos, idx, ""),
+            quantity=to_int(_get(qty_list, idx, "1"), 1),
+            control_side=_get(control_sides, idx, "").strip(),
+            bottom_fixation=_get(bottom_fixations, idx) in ("on", "true", "1"),
+            pvc_plank=_get(pvc_planks, idx) in ("on", "true", "1"),
+            note=_get(item_notes, idx, "").strip(),
+        ))
+    return rows
 
 
 @login_required
@@ -2520,14 +2432,14 @@ def order_builder(request, pk=None):
         target_customer = chosen_customer or (order.customer if order else request.user)
         can_edit_financial = _can_view_financial_controls(request.user, target_customer)
         if order and not chosen_customer:
-            discount_pct_val = _normalize_discount_percent(order.discount_percent)
+            discount_pct_val = normalize_discount_percent(order.discount_percent)
         else:
-            _, discount_pct_val = _customer_discount_multiplier(target_customer)
-        discount_multiplier, _ = _customer_discount_multiplier(pct=discount_pct_val)
+            _, discount_pct_val = customer_discount_multiplier(target_customer)
+        discount_multiplier, _ = customer_discount_multiplier(pct=discount_pct_val)
         # Если ордера нет — создаём
         if order is None:
             markup_percent = (
-                _to_decimal(request.POST.get("markup_percent"), default="0")
+                to_decimal(request.POST.get("markup_percent"), default="0")
                 if can_edit_financial
                 else Decimal("0")
             )
@@ -2553,7 +2465,7 @@ def order_builder(request, pk=None):
         order.note = base_note
         if can_edit_financial:
             order.extra_service_label = (request.POST.get("extra_service_label") or "").strip()
-            extra_service_amount_uah = _to_decimal(request.POST.get("extra_service_amount_uah"), default="0")
+            extra_service_amount_uah = to_decimal(request.POST.get("extra_service_amount_uah"), default="0")
         else:
             extra_service_amount_uah = Decimal(getattr(order, "extra_service_amount_uah", 0) or 0)
 
@@ -2562,151 +2474,37 @@ def order_builder(request, pk=None):
         org = getattr(profile, "organization", None)
         update_fields = ["eur_rate", "total_eur", "eur_rate_at_creation", "note", "discount_percent"]
 
-        # Чтение всех списков (как раньше)
-        systems = request.POST.getlist("system_sheet")
-        sections = request.POST.getlist("table_section")
-        fabrics = request.POST.getlist("fabric_name")
-        fabric_colors = request.POST.getlist("fabric_color_code")
-
-        h_list = request.POST.getlist("height_gabarit_mm")
-        w_list = request.POST.getlist("width_fabric_mm")
-
-        gw_states = request.POST.getlist("gabarit_width_flag_state")
-        if gw_states and len(gw_states) < len(systems):
-            gw_states += [""] * (len(systems) - len(gw_states))
-        gw_flags = request.POST.getlist("gabarit_width_flag")
-        gh_flags = request.POST.getlist("fabric_height_flag")
-        fh_states = request.POST.getlist("fabric_height_flag_state")
-        GbDiffWidthMm = request.POST.getlist("GbDiffWidthMm")
-        gb_width_mm = request.POST.getlist("gb_width_mm")
-
-        base_prices = request.POST.getlist("base_price_eur")
-        sur_prices = request.POST.getlist("surcharge_height_eur")
-        magnets_price_eur = request.POST.getlist("magnets_price_eur")
-        magnets_qty = request.POST.getlist("magnets_qty")
-        cord_pvc_tension_price_eur = request.POST.getlist("cord_pvc_tension_price_eur")
-        cord_pvc_tension_qty = request.POST.getlist("cord_pvc_tension_qty")
-        cord_copper_barrel_price_eur = request.POST.getlist("cord_copper_barrel_price_eur")
-        cord_copper_barrel_qty = request.POST.getlist("cord_copper_barrel_qty")
-        top_pvc_clip_pair_price_eur = request.POST.getlist("top_pvc_clip_pair_price_eur")
-        top_pvc_clip_pair_qty = request.POST.getlist("top_pvc_clip_pair_qty")
-        top_pvc_bar_tape_price_eur_mp = request.POST.getlist("top_pvc_bar_tape_price_eur_mp")
-        top_pvc_bar_tape_qty = request.POST.getlist("top_pvc_bar_tape_qty")
-        bottom_wide_bar_price_eur_mp = request.POST.getlist("bottom_wide_bar_price_eur_mp")
-        bottom_wide_bar_qty = request.POST.getlist("bottom_wide_bar_qty")
-        top_bar_scotch_price_eur_mp = request.POST.getlist("top_bar_scotch_price_eur_mp")
-        top_bar_scotch_qty = request.POST.getlist("top_bar_scotch_qty")
-        metal_cord_fix_price_eur = request.POST.getlist("metal_cord_fix_price_eur")
-        metal_cord_fix_qty = request.POST.getlist("metal_cord_fix_qty")
-        middle_bracket_price_eur = request.POST.getlist("middle_bracket_price_eur")
-        middle_bracket_qty = request.POST.getlist("middle_bracket_qty")
-        remote_15ch_price_eur = request.POST.getlist("remote_15ch_price_eur")
-        remote_15ch_qty = request.POST.getlist("remote_15ch_qty")
-        remote_5ch_price_eur = request.POST.getlist("remote_5ch_price_eur")
-        remote_5ch_qty = request.POST.getlist("remote_5ch_qty")
-        motor_with_remote_price_eur = request.POST.getlist("motor_with_remote_price_eur")
-        motor_with_remote_qty = request.POST.getlist("motor_with_remote_qty")
-        motor_no_remote_price_eur = request.POST.getlist("motor_no_remote_price_eur")
-        motor_no_remote_qty = request.POST.getlist("motor_no_remote_qty")
-        metal_kronsht_price_eur = request.POST.getlist("metal_kronsht_price_eur")
-        metal_kronsht_qty = request.POST.getlist("metal_kronsht_qty")
-        
-        subtotals = request.POST.getlist("subtotal_eur")
-
-        roll_infos = request.POST.getlist("roll_height_info")
-        qty_list = request.POST.getlist("quantity")
-        control_sides = request.POST.getlist("control_side")
-        bottom_fixations = request.POST.getlist("bottom_fixation")
-        pvc_planks = request.POST.getlist("pvc_plank")
-        item_notes = request.POST.getlist("item_note")
+        # The builder page posts all rows as one JSON field (items_json); per-field arrays
+        # are still accepted from pages rendered before it.
+        items_json = request.POST.get("items_json")
+        try:
+            if items_json is not None:
+                raw_rows = parse_items_payload(items_json)
+                rows = clean_item_rows(KIND_ROLLERS, raw_rows)
+            else:
+                rows = raw_rows = _roller_rows_from_post(request.POST)
+            # Subtotals are recomputed on the server, as in the builder items API.
+            price_roller_rows(rows, raw_rows, discount_multiplier, {item.pk: item for item in order.items.all()})
+        except BuilderItemsError as exc:
+            messages.error(request, str(exc))
+            return redirect("orders:builder_edit", pk=order.pk)
 
         # Если нет ни одной позиции — не трогаем существующие items и возвращаем с ошибкой
-        if not any((system or "").strip() for system in systems):
+        if not rows:
             messages.error(request, "Додайте хоча б одну позицію перед відправкою.")
             return redirect("orders:builder_edit", pk=order.pk)
 
-        # Удаляем старые Items только после валидации наличия новых
-        order.items.all().delete()
-
-        # -----------------------------------------
-        # Создание всех OrderItem (ГОРАЗДО ЧИЩЕ)
-        # -----------------------------------------
-        for idx, system_sheet in enumerate(systems):
-            OrderItem.objects.create(
-                order=order,
-                organization=org,
-                system_sheet=system_sheet or "",
-                table_section=_get(sections, idx, ""),
-                fabric_name=_get(fabrics, idx, ""),
-                fabric_color_code=_get(fabric_colors, idx, ""),
-                height_gabarit_mm=_to_int(_get(h_list, idx, "0"), 0),
-                width_fabric_mm=_to_int(_get(w_list, idx, "0"), 0),
-                gabarit_width_flag=(
-                    _get(gw_states, idx) in ("1", "true", "on")
-                    if gw_states
-                    else _get(gw_flags, idx) in ("on", "true", "1")
-                ),
-                fabric_height_flag=(
-                    _get(fh_states, idx) in ("1", "true", "on")
-                    if fh_states
-                    else _get(gh_flags, idx) in ("on", "true", "1")
-                ),
-                base_price_eur=_to_decimal(_get(base_prices, idx)),
-                gb_width_mm=_to_decimal(_get(gb_width_mm, idx)),
-                GbDiffWidthMm=_to_decimal(_get(GbDiffWidthMm, idx)),
-                surcharge_height_eur=_to_decimal(_get(sur_prices, idx)),
-                magnets_price_eur=_to_decimal(_get(magnets_price_eur, idx)),
-                magnets_qty=_to_decimal(_get(magnets_qty, idx)),
-                cord_pvc_tension_price_eur=_to_decimal(_get(cord_pvc_tension_price_eur, idx)),
-                cord_pvc_tension_qty=_to_decimal(_get(cord_pvc_tension_qty, idx)),
-                cord_copper_barrel_price_eur=_to_decimal(_get(cord_copper_barrel_price_eur, idx)),
-                cord_copper_barrel_qty=_to_decimal(_get(cord_copper_barrel_qty, idx)),
-                top_pvc_clip_pair_price_eur=_to_decimal(_get(top_pvc_clip_pair_price_eur, idx)),
-                top_pvc_clip_pair_qty=_to_decimal(_get(top_pvc_clip_pair_qty, idx)),
-                top_pvc_bar_tape_price_eur_mp=_to_decimal(_get(top_pvc_bar_tape_price_eur_mp, idx)),
-                top_pvc_bar_tape_qty=_to_decimal(_get(top_pvc_bar_tape_qty, idx)),
-                bottom_wide_bar_price_eur_mp=_to_decimal(_get(bottom_wide_bar_price_eur_mp, idx)),
-                bottom_wide_bar_qty=_to_decimal(_get(bottom_wide_bar_qty, idx)),
-                top_bar_scotch_price_eur_mp=_to_decimal(_get(top_bar_scotch_price_eur_mp, idx)),
-                top_bar_scotch_qty=_to_decimal(_get(top_bar_scotch_qty, idx)),
-                metal_cord_fix_price_eur=_to_decimal(_get(metal_cord_fix_price_eur, idx)),
-                metal_cord_fix_qty=_to_decimal(_get(metal_cord_fix_qty, idx)),
-                
-                middle_bracket_price_eur = _to_decimal(_get(middle_bracket_price_eur, idx)),
-                middle_bracket_qty = _to_decimal(_get(middle_bracket_qty, idx)),
-                remote_15ch_price_eur=_to_decimal(_get(remote_15ch_price_eur, idx)),
-                remote_15ch_qty=_to_decimal(_get(remote_15ch_qty, idx)),
-                remote_5ch_price_eur=_to_decimal(_get(remote_5ch_price_eur, idx)),
-                remote_5ch_qty=_to_decimal(_get(remote_5ch_qty, idx)),
-                motor_with_remote_price_eur=_to_decimal(_get(motor_with_remote_price_eur, idx)),
-                motor_with_remote_qty=_to_decimal(_get(motor_with_remote_qty, idx)),
-                motor_no_remote_price_eur=_to_decimal(_get(motor_no_remote_price_eur, idx)),
-                motor_no_remote_qty=_to_decimal(_get(motor_no_remote_qty, idx)),
-                metal_kronsht_price_eur=_to_decimal(_get(metal_kronsht_price_eur, idx)),
-                metal_kronsht_qty=_to_decimal(_get(metal_kronsht_qty, idx)),
-        
-                subtotal_eur=_to_decimal(_get(subtotals, idx)).quantize(Decimal("0.01")),
-                roll_height_info=_get(roll_infos, idx, ""),
-                quantity=_to_int(_get(qty_list, idx, "1"), 1),
-                control_side=_get(control_sides, idx, "").strip(),
-                bottom_fixation=_get(bottom_fixations, idx) in ("on", "true", "1"),
-                pvc_plank=_get(pvc_planks, idx) in ("on", "true", "1"),
-                note=_get(item_notes, idx, "").strip(),
-            )
+        items_total = save_roller_items(order, rows, org.pk if org else None)
 
         if can_edit_financial:
-            markup_percent = _to_decimal(request.POST.get("markup_percent"), default=str(order.markup_percent or "0"))
+            markup_percent = to_decimal(request.POST.get("markup_percent"), default=str(order.markup_percent or "0"))
         else:
             markup_percent = Decimal(order.markup_percent or 0)
-        eur_rate_value = _to_decimal(
+        eur_rate_value = to_decimal(
             request.POST.get("eur_rate"),
             default=str(order.eur_rate or get_current_eur_rate()),
         )
 
-        items_total = order.items.aggregate(
-            total=Sum("subtotal_eur")
-        ).get("total") or Decimal("0")
-
         total_with_markup = items_total * (Decimal("1") + markup_percent / Decimal("100"))
 
         order.extra_service_amount_uah = extra_service_amount_uah.quantize(Decimal("0.01"))
@@ -2722,6 +2520,8 @@ def order_builder(request, pk=None):
             order.customer = chosen_customer
             update_fields.append("customer")
         order.save(update_fields=update_fields)
+        refresh_item_summaries(order)
+        store_builder_items_json_on_commit(order, KIND_ROLLERS)
 
         new_status = order.status
         if action == "to_work":
@@ -2763,71 +2563,15 @@ def order_builder(request, pk=None):
 
     customers_filter_list = []
     if is_manager(request.user) or request.user.is_staff or request.user.is_superuser:
-        customers_filter_list = list(
-            customer_profiles_queryset()
-        )
+        customers_filter_list = _customer_picker_selected(order.customer if order else request.user)
 
     # Если новый заказ
     if order is None:
         items_json = "[]"
         next_status_label = STATUS_LABELS.get(Order.STATUS_IN_WORK)
     else:
-        # экспорт Items для JS
-        items = []
-        for it in order.items.all().order_by("id"):
-            items.append({
-                "system_sheet": it.system_sheet,
-                "table_section": it.table_section,
-                "fabric_name": it.fabric_name,
-                "fabric_color_code": it.fabric_color_code,
-                "height_gabarit_mm": it.height_gabarit_mm,
-                "width_fabric_mm": it.width_fabric_mm,
-                "gabarit_width_flag": it.gabarit_width_flag,
-                "fabric_height_flag": it.fabric_height_flag,
-                "base_price_eur": float(it.base_price_eur),
-                "GbDiffWidthMm": float(it.GbDiffWidthMm),
-                "gb_width_mm": float(it.gb_width_mm),
-                "surcharge_height_eur": float(it.surcharge_height_eur),
-                
-                "magnets_price_eur": float(it.magnets_price_eur),
-                "magnets_qty": float(it.magnets_qty),
-                "cord_pvc_tension_price_eur": float(it.cord_pvc_tension_price_eur),
-                "cord_pvc_tension_qty": float(it.cord_pvc_tension_qty),
-                "cord_copper_barrel_price_eur": float(it.cord_copper_barrel_price_eur),
-                "cord_copper_barrel_qty": float(it.cord_copper_barrel_qty),
-                "top_pvc_clip_pair_price_eur": float(it.top_pvc_clip_pair_price_eur),
-                "top_pvc_clip_pair_qty": float(it.top_pvc_clip_pair_qty),
-                "top_pvc_bar_tape_price_eur_mp": float(it.top_pvc_bar_tape_price_eur_mp),
-                "top_pvc_bar_tape_qty": float(it.top_pvc_bar_tape_qty),
-                "bottom_wide_bar_price_eur_mp": float(it.bottom_wide_bar_price_eur_mp),
-                "bottom_wide_bar_qty": float(it.bottom_wide_bar_qty),
-                "top_bar_scotch_price_eur_mp": float(it.top_bar_scotch_price_eur_mp),
-                "top_bar_scotch_qty": float(it.top_bar_scotch_qty),
-                "metal_cord_fix_price_eur": float(it.metal_cord_fix_price_eur),
-                "metal_cord_fix_qty": float(it.metal_cord_fix_qty),
-                
-                "middle_bracket_price_eur": float(it.middle_bracket_price_eur),
-                "middle_bracket_qty": float(it.middle_bracket_qty),
-                "remote_15ch_price_eur": float(it.remote_15ch_price_eur),
-                "remote_15ch_qty": float(it.remote_15ch_qty),
-                "remote_5ch_price_eur": float(it.remote_5ch_price_eur),
-                "remote_5ch_qty": float(it.remote_5ch_qty),
-                "motor_with_remote_price_eur": float(it.motor_with_remote_price_eur),
-                "motor_with_remote_qty": float(it.motor_with_remote_qty),
-                "motor_no_remote_price_eur": float(it.motor_no_remote_price_eur),
-                "motor_no_remote_qty": float(it.motor_no_remote_qty),
-                "metal_kronsht_price_eur": float(it.metal_kronsht_price_eur),
-                "metal_kronsht_qty": float(it.metal_kronsht_qty),
-                
-                "subtotal_eur": float(it.subtotal_eur),
-                "quantity": it.quantity,
-                "roll_height_info": it.roll_height_info,
-                "control_side": it.control_side,
-                "bottom_fixation": it.bottom_fixation,
-                "pvc_plank": it.pvc_plank,
-                "note": it.note,
-            })
-        items_json = json.dumps(items)
+        # экспорт Items для JS (serialized on save, see services_builder_cache)
+        items_json = builder_items_json(order, KIND_ROLLERS)
         next_code = order.next_status()
         next_status_label = STATUS_LABELS.get(next_code) if next_code else None
 
@@ -2838,11 +2582,11 @@ def order_builder(request, pk=None):
         builder_rate = order.eur_rate
 
     if order:
-        discount_percent = _normalize_discount_percent(getattr(order, "discount_percent", Decimal("0")))
+        discount_percent = normalize_discount_percent(getattr(order, "discount_percent", Decimal("0")))
     else:
         # In a new order, the UI preselects current user as customer, so initialize discount from current user.
         discount_user = request.user
-        discount_percent = _normalize_discount_percent(
+        discount_percent = normalize_discount_percent(
             getattr(getattr(discount_user, "customerprofile", None), "discount_percent", Decimal("0"))
         )
 
@@ -3063,7 +2807,9 @@ def transaction_restore(request, pk: int):
 def balances_history(request):
     """
     EN: Orders + transactions timeline with balance and filters.
+        Served from the balance ledger with keyset pagination and running balances.
     UA: Історія замовлень і транзакцій з фільтрами.
+        Дані з журналу балансу, keyset-пагінація та баланс після кожної операції.
     """
     User = get_user_model()
     status_filter = request.GET.get("status") or ""
@@ -3077,34 +2823,27 @@ def balances_history(request):
     date_to = _parse_optional_flexible_date(date_to_str)
     balance_user = request.user
 
-    orders_qs = (
-        _orders_scope(request.user)
-        .select_related("customer", "customer__customerprofile")
-        .prefetch_related("status_logs", "component_items")
-        .exclude(status=Order.STATUS_QUOTE)  # Прорахунок не впливає на баланс
-        .order_by("-created_at")
-    )
-    tx_qs = _transactions_scope(request.user).order_by("-created_at")
+    entries = BalanceLedgerEntry.objects.all()
+    if not is_manager(request.user):
+        entries = entries.filter(customer=request.user)
 
     if status_filter:
-        orders_qs = orders_qs.filter(status=status_filter)
-    if date_from:
-        orders_qs = orders_qs.filter(created_at__date__gte=date_from)
-        tx_qs = tx_qs.filter(created_at__date__gte=date_from)
-    if date_to:
-        orders_qs = orders_qs.filter(created_at__date__lte=date_to)
-        tx_qs = tx_qs.filter(created_at__date__lte=date_to)
-    orders_qs = _filter_orders_by_product_category(orders_qs, category_filter)
-    tx_qs = _filter_transactions_by_product_category(tx_qs, category_filter)
+        # Статус фільтрує лише замовлення, транзакції лишаються.
+        entries = entries.filter(Q(kind=BalanceLedgerEntry.KIND_TRANSACTION) | Q(order__status=status_filter))
+    entries = filter_created_between(entries, date_from, date_to)
+    if category_filter:
+        entries = entries.filter(
+            Q(order_id__in=_filter_orders_by_product_category(Order.objects.all(), category_filter).values("pk"))
+            | Q(transaction_id__in=_filter_transactions_by_product_category(Transaction.objects.all(), category_filter).values("pk"))
+        )
     if type_filter == "orders":
-        tx_qs = tx_qs.none()
+        entries = entries.filter(kind=BalanceLedgerEntry.KIND_ORDER)
     elif type_filter == "transactions":
-        orders_qs = orders_qs.none()
+        entries = entries.filter(kind=BalanceLedgerEntry.KIND_TRANSACTION)
 
     if customer_filter and is_manager(request.user):
         balance_user = get_object_or_404(User, pk=customer_filter)
-        orders_qs = orders_qs.filter(customer=balance_user)
-        tx_qs = tx_qs.filter(customer=balance_user)
+        entries = entries.filter(customer=balance_user)
 
     customers_filter_list = (
         customer_users_queryset(with_orders=True)
@@ -3112,41 +2851,60 @@ def balances_history(request):
     )
 
     if negative_only and is_manager(request.user):
-        negative_customer_ids = []
-        for u in customers_filter_list:
-            if compute_balance(u) < 0:
-                negative_customer_ids.append(u.id)
-        if negative_customer_ids:
-            orders_qs = orders_qs.filter(customer_id__in=negative_customer_ids)
-            tx_qs = tx_qs.filter(customer_id__in=negative_customer_ids)
-        else:
-            orders_qs = orders_qs.none()
-            tx_qs = tx_qs.none()
+        entries = entries.filter(customer_id__in=negative_balance_customer_ids())
+
+    balance_on_date = None
+    if date_to and (customer_filter or not is_manager(request.user)):
+        balance_on_date = balance_as_of(balance_user.pk, date_to)
 
     current_rate = get_current_eur_rate()
-    orders_qs = _set_order_totals_uah(orders_qs, current_rate)
-    filtered_balance = _transactions_total_uah(tx_qs) - _orders_total_uah_base(orders_qs, current_rate)
-    proposal_tokens = {o.id: _proposal_token(o) for o in orders_qs}
-    proposal_page_urls = {oid: reverse("orders:proposal_page", args=[tok]) for oid, tok in proposal_tokens.items()}
-    proposal_excel_urls = {oid: reverse("orders:proposal_excel", args=[tok]) for oid, tok in proposal_tokens.items()}
-    payment_message_text = _get_payment_message_text() or ""
-    payment_shortage_map = {}
-    for o in orders_qs:
-        if o.status != Order.STATUS_QUOTE or o.customer_id != request.user.id:
-            continue
-        shortage_ctx = _payment_shortage_context(o)
-        if shortage_ctx:
-            payment_shortage_map[o.id] = {
-                "shortage": str(shortage_ctx.get("shortage") or ""),
-                "orders": shortage_ctx.get("orders") or [],
-            }
+    filtered_balance = entries.aggregate(total=Sum("amount_uah"))["total"] or Decimal("0")
+    page_entries, next_cursor = ledger_keyset_page(entries, request.GET.get("before") or "")
+
+    order_ids = [e.order_id for e in page_entries if e.order_id]
+    tx_ids = [e.transaction_id for e in page_entries if e.transaction_id]
+    orders_by_id = {
+        o.pk: o
+        for o in _set_order_totals_uah(
+            Order.objects.filter(pk__in=order_ids)
+            .select_related("customer", "customer__customerprofile")
+            .prefetch_related(prefetch_latest_status_log(), "component_items"),
+            current_rate,
+        )
+    }
+    tx_by_id = {
+        tx.pk: tx
+        for tx in Transaction.objects.filter(pk__in=tx_ids).select_related(
+            "customer", "customer__customerprofile", "created_by", "order"
+        )
+    }
 
     events = []
-    for o in orders_qs:
-        events.append({"type": "order", "created_at": o.created_at, "object": o})
-    for tx in tx_qs:
-        events.append({"type": "transaction", "created_at": tx.created_at, "object": tx})
-    events.sort(key=lambda x: x["created_at"], reverse=True)
+    for e in page_entries:
+        obj = orders_by_id.get(e.order_id) if e.order_id else tx_by_id.get(e.transaction_id)
+        if obj is None:
+            continue
+        events.append({
+            "type": e.kind,
+            "created_at": e.created_at,
+            "object": obj,
+            "amount_uah": e.amount_uah,
+            "running_balance": e.running_balance_uah,
+        })
+
+    proposal_page_urls, proposal_excel_urls = proposal_link_maps(list(orders_by_id))
+    payment_message_text = _get_payment_message_text() or ""
+    # The ledger holds no quotes, so this page has no payment shortages to prompt for.
+    shortage_calculator = PaymentShortageCalculator(current_rate)
+
+    params = request.GET.copy()
+    first_page_url = None
+    if params.pop("before", None):
+        first_page_url = f"{request.path}?{params.urlencode()}" if params else request.path
+    next_page_url = None
+    if next_cursor:
+        params["before"] = next_cursor
+        next_page_url = f"{request.path}?{params.urlencode()}"
 
     balance_page_url = None
     if is_manager(request.user) and customer_filter:
@@ -3158,6 +2916,8 @@ def balances_history(request):
 
     context = {
         "events": events,
+        "next_page_url": next_page_url,
+        "first_page_url": first_page_url,
         "statuses": Order.STATUS_CHOICES,
         "status_filter": status_filter,
         "customer_filter": customer_filter,
@@ -3167,56 +2927,67 @@ def balances_history(request):
         "date_from": date_from_str,
         "date_to": date_to_str,
         "customer_options": customers_filter_list,
-        "balance": compute_balance(balance_user),
+        "balance": shortage_calculator.balance(balance_user),
         "balance_user": balance_user,
         # Ensure header balance reflects filtered customer (for managers)
-        "user_balance": compute_balance(balance_user),
+        "user_balance": shortage_calculator.balance(balance_user),
         "filtered_balance": filtered_balance,
+        "balance_on_date": balance_on_date,
         "status_badges": STATUS_BADGES,
         "status_labels": STATUS_LABELS,
         "proposal_page_urls": proposal_page_urls,
         "proposal_excel_urls": proposal_excel_urls,
         "balance_page_url": balance_page_url,
         "payment_message_text": payment_message_text,
-        "payment_shortage_json": json.dumps(payment_shortage_map),
     }
     return render(request, "orders/balances_history.html", context)
 
 
-@login_required
-def balances_excel(request):
+_BALANCES_EXPORT_COLUMNS = [
+    ("date", "Дата"),
+    ("type", "Тип"),
+    ("category", "Категорія"),
+    ("description", "Опис"),
+    ("amount_uah", "Сума, грн"),
+]
+
+
+def _export_local_datetime(value):
+    """Naive local datetime for export cells."""
+    if value is not None and getattr(value, "tzinfo", None):
+        return timezone.localtime(value).replace(tzinfo=None)
+    return value
+
+
+def _balances_export_querysets(user, params):
     """
-    Export balances view (orders + transactions) to XLSX with current filters.
+    EN: Filtered orders/transactions of the balances export (shared by XLSX/CSV/NDJSON).
+    UA: Відфільтровані замовлення/транзакції для вивантаження балансу (спільні для XLSX/CSV/NDJSON).
+    Returns (orders_qs, tx_qs, current_rate, filename base).
     """
     User = get_user_model()
-    status_filter = request.GET.get("status") or ""
-    customer_filter = request.GET.get("customer") or ""
-    type_filter = request.GET.get("type") or ""
-    category_filter = request.GET.get("category") or ""
-    negative_only = request.GET.get("negative") in ("1", "true", "on")
-    date_from_str = (request.GET.get("date_from") or "").strip()
-    date_to_str = (request.GET.get("date_to") or "").strip()
+    status_filter = params.get("status") or ""
+    customer_filter = params.get("customer") or ""
+    type_filter = params.get("type") or ""
+    category_filter = params.get("category") or ""
+    negative_only = params.get("negative") in ("1", "true", "on")
+    date_from_str = (params.get("date_from") or "").strip()
+    date_to_str = (params.get("date_to") or "").strip()
     date_from = _parse_optional_flexible_date(date_from_str)
     date_to = _parse_optional_flexible_date(date_to_str)
-    balance_user = request.user
+    balance_user = user
 
     orders_qs = (
-        _orders_scope(request.user)
-        .select_related("customer", "customer__customerprofile")
-        .prefetch_related("status_logs", "component_items")
+        _orders_scope(user)
         .exclude(status=Order.STATUS_QUOTE)
         .order_by("-created_at")
     )
-    tx_qs = _transactions_scope(request.user).order_by("-created_at")
+    tx_qs = annotate_order_category(_transactions_scope(user), order_ref="order_id").order_by("-created_at")
 
     if status_filter:
         orders_qs = orders_qs.filter(status=status_filter)
-    if date_from:
-        orders_qs = orders_qs.filter(created_at__date__gte=date_from)
-        tx_qs = tx_qs.filter(created_at__date__gte=date_from)
-    if date_to:
-        orders_qs = orders_qs.filter(created_at__date__lte=date_to)
-        tx_qs = tx_qs.filter(created_at__date__lte=date_to)
+    orders_qs = filter_created_between(orders_qs, date_from, date_to)
+    tx_qs = filter_created_between(tx_qs, date_from, date_to)
     orders_qs = _filter_orders_by_product_category(orders_qs, category_filter)
     tx_qs = _filter_transactions_by_product_category(tx_qs, category_filter)
     if type_filter == "orders":
@@ -3224,79 +2995,18 @@ def balances_excel(request):
     elif type_filter == "transactions":
         orders_qs = orders_qs.none()
 
-    if customer_filter and is_manager(request.user):
+    if customer_filter and is_manager(user):
         balance_user = get_object_or_404(User, pk=customer_filter)
         orders_qs = orders_qs.filter(customer=balance_user)
         tx_qs = tx_qs.filter(customer=balance_user)
 
-    customers_filter_list = (
-        customer_users_queryset(with_orders=True)
-        if is_manager(request.user) else []
-    )
-
-    if negative_only and is_manager(request.user):
-        negative_customer_ids = []
-        for u in customers_filter_list:
-            if compute_balance(u) < 0:
-                negative_customer_ids.append(u.id)
-        if negative_customer_ids:
-            orders_qs = orders_qs.filter(customer_id__in=negative_customer_ids)
-            tx_qs = tx_qs.filter(customer_id__in=negative_customer_ids)
-        else:
-            orders_qs = orders_qs.none()
-            tx_qs = tx_qs.none()
+    if negative_only and is_manager(user):
+        negative_customer_ids = negative_balance_customer_ids()
+        orders_qs = orders_qs.filter(customer_id__in=negative_customer_ids)
+        tx_qs = tx_qs.filter(customer_id__in=negative_customer_ids)
 
     current_rate = get_current_eur_rate()
     orders_qs = _set_order_totals_uah(orders_qs, current_rate)
-    filtered_balance = _transactions_total_uah(tx_qs) - _orders_total_uah_base(orders_qs, current_rate)
-
-    events = []
-    for o in orders_qs:
-        events.append({"type": "order", "created_at": o.created_at, "object": o})
-    for tx in tx_qs:
-        events.append({"type": "transaction", "created_at": tx.created_at, "object": tx})
-    events.sort(key=lambda x: x["created_at"], reverse=True)
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Баланс"
-
-    headers = ["Дата", "Тип", "Категорія", "Опис", "Сума, грн"]
-    ws.append(headers)
-    bold = Font(bold=True)
-    for col in range(1, len(headers) + 1):
-        ws.cell(row=1, column=col).font = bold
-
-    for e in events:
-        if e["type"] == "order":
-            o = e["object"]
-            amount = -_round_uah_total(_order_base_total(o) * _order_rate(o, current_rate))
-            desc = f"Замовлення №{o.id} ({o.get_status_display()})"
-            type_label = "Замовлення"
-            category_label = _order_product_category_label(o)
-        else:
-            tx = e["object"]
-            amount = _tx_amount_uah(tx)
-            desc = f"Транзакція №{tx.id} ({tx.get_type_display()})"
-            type_label = "Транзакція"
-            category_label = _order_product_category_label(tx.order) if tx.order_id else ""
-        created_at = e["created_at"]
-        if hasattr(created_at, "tzinfo") and created_at.tzinfo:
-            created_at = timezone.localtime(created_at).replace(tzinfo=None)
-        ws.append([created_at, type_label, category_label, desc, float(amount)])
-
-    total_row = ws.max_row + 1
-    ws.cell(row=total_row, column=1, value="Разом").font = bold
-    ws.cell(row=total_row, column=5, value=float(filtered_balance)).font = bold
-
-    for col_letter in ["A", "B", "C", "D", "E"]:
-        ws.column_dimensions[col_letter].width = 25
-
-    _apply_excel_print_layout(ws)
-
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
 
     # Build filename with date and filters
     stamp = timezone.localtime(timezone.now()).strftime("%Y-%m-%d")
@@ -3315,14 +3025,196 @@ def balances_excel(request):
         name_parts.append(f"from-{date_from_str}")
     if date_to_str:
         name_parts.append(f"to-{date_to_str}")
-    filename = "_".join(name_parts) + ".xlsx"
+    return orders_qs, tx_qs, current_rate, "_".join(name_parts)
 
-    response = HttpResponse(
-        output.getvalue(),
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+
+def _balances_export_rows(orders_qs, tx_qs):
+    """
+    EN: Balance events, newest first, as plain value rows (no model instances).
+    UA: Події балансу (нові зверху) як рядки значень, без створення об'єктів моделей.
+    """
+    tx_type_labels = dict(Transaction.TYPE_CHOICES)
+    orders = orders_qs.values_list(
+        "created_at", "id", "status", "total_uah_display", *_PRODUCT_CATEGORY_FLAGS
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    transactions = tx_qs.values_list(
+        "created_at", "id", "type", "amount", "eur_rate", "order_id", *_PRODUCT_CATEGORY_FLAGS
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    # Both querysets are already ordered by -created_at: merge them lazily
+    # instead of materializing and sorting all events.
+    events = heapq.merge(
+        (("order", row) for row in orders),
+        (("transaction", row) for row in transactions),
+        key=lambda e: e[1][0],
+        reverse=True,
     )
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-    return response
+    for event_type, row in events:
+        if event_type == "order":
+            created_at, pk, status, total_uah, *flags = row
+            yield [
+                _export_local_datetime(created_at),
+                "Замовлення",
+                _PRODUCT_CATEGORY_LABELS[_product_category_from_flags(*flags)],
+                f"Замовлення №{pk} ({STATUS_LABELS.get(status, status)})",
+                -Decimal(total_uah or 0),
+            ]
+        else:
+            created_at, pk, tx_type, amount, eur_rate, order_id, *flags = row
+            yield [
+                _export_local_datetime(created_at),
+                "Транзакція",
+                _PRODUCT_CATEGORY_LABELS[_product_category_from_flags(*flags)] if order_id else "",
+                f"Транзакція №{pk} ({tx_type_labels.get(tx_type, tx_type)})",
+                _tx_amount_uah_from_values(tx_type, amount, eur_rate),
+            ]
+
+
+def _balances_export(user, params, progress=None):
+    """
+    EN: Build the balances XLSX (orders + transactions) for `params` filters.
+    UA: Формує XLSX балансу (замовлення + транзакції) за фільтрами `params`.
+    Returns (filename, StreamingXlsxExport).
+    """
+    orders_qs, tx_qs, current_rate, basename = _balances_export_querysets(user, params)
+    filtered_balance = _transactions_total_uah(tx_qs) - _orders_total_uah_base(orders_qs, current_rate)
+
+    rows = _balances_export_rows(orders_qs, tx_qs)
+    if progress:
+        rows = iter_with_progress(rows, orders_qs.count() + tx_qs.count(), progress)
+
+    export = StreamingXlsxExport("Баланс", widths={col_letter: 25 for col_letter in "ABCDE"})
+    _apply_excel_print_layout(export.ws, last_col=5)
+    export.header([label for _, label in _BALANCES_EXPORT_COLUMNS])
+    for row in rows:
+        export.row(row[:-1] + [float(row[-1])])
+    export.total(["Разом", "", "", "", float(filtered_balance)])
+    return f"{basename}.xlsx", export
+
+
+PRODUCTION_WORKBOOK_MAX_ORDERS = 200
+
+
+def _production_orders(user, params):
+    """
+    EN: In-work orders for the production batch: explicit `ids` (comma separated) or the list filters.
+    UA: Замовлення «В роботі» для виробництва: явні `ids` (через кому) або фільтри списку.
+    """
+    qs = annotate_order_positions(
+        _orders_scope(user)
+        .filter(status=Order.STATUS_IN_WORK)
+        .select_related("customer", "customer__customerprofile")
+    )
+    ids = [part.strip() for part in str(params.get("ids") or "").split(",") if part.strip().isdigit()]
+    if ids:
+        qs = qs.filter(pk__in=[int(part) for part in ids])
+    else:
+        if params.get("date_from") or params.get("date_to"):
+            date_from, date_to, *_ = _parse_date_range(params)
+            qs = filter_created_between(qs, date_from, date_to)
+        if params.get("customer"):
+            qs = qs.filter(customer_id=params.get("customer"))
+        q = (params.get("q") or "").strip()
+        if q:
+            qs = qs.filter(pk__icontains=q)
+    return qs.order_by("id")[:PRODUCTION_WORKBOOK_MAX_ORDERS]
+
+
+def _production_workbook_export(user, params, progress=None):
+    """
+    EN: One workbook with all selected in-work orders (sheet per order + summary).
+        Per-order files come from the workbook cache, so only changed orders are re-rendered.
+    UA: Один файл з усіма обраними замовленнями «В роботі» (аркуш на замовлення + зведення).
+        Файли замовлень беруться з кешу, тож перегенеровуються лише змінені.
+    Returns (filename, MergedOrdersWorkbook).
+    """
+    if not is_manager(user):
+        raise PermissionError("Production workbook is available to managers only")
+    orders = list(_production_orders(user, params))
+    current_rate = get_current_eur_rate()
+    export = MergedOrdersWorkbook()
+    for done, order in enumerate(orders, start=1):
+        rate = _order_rate(order, current_rate)
+        _, data = cached_order_workbook(
+            order,
+            "order",
+            rate,
+            lambda order=order: _build_order_workbook(order, save_to_file=False),
+        )
+        export.add_order(order, data, positions=order.positions_count, total_uah=_order_total_uah(order, current_rate))
+        if progress:
+            progress(done, len(orders))
+    filename = f"production_{timezone.localdate().strftime('%Y%m%d')}.xlsx"
+    return filename, export
+
+
+@login_required
+def production_workbook(request):
+    """Managers: download the selected in-work orders as one workbook (synchronous fallback of the export job)."""
+    if not is_manager(request.user):
+        raise Http404
+    filename, export = _production_workbook_export(request.user, request.GET)
+    return export.response(filename)
+
+
+@login_required
+def balances_excel(request):
+    """
+    Export balances view (orders + transactions) to XLSX with current filters.
+    ?format=csv|ndjson streams unstyled rows instead.
+    """
+    fmt = request.GET.get("format")
+    if fmt in TEXT_EXPORT_CONTENT_TYPES:
+        orders_qs, tx_qs, _, basename = _balances_export_querysets(request.user, request.GET)
+        return stream_text_export(fmt, basename, _BALANCES_EXPORT_COLUMNS, _balances_export_rows(orders_qs, tx_qs))
+    filename, export = _balances_export(request.user, request.GET)
+    return export.response(filename)
+
+
+def _export_job_payload(job):
+    payload = {
+        "ok": True,
+        "job_id": job.pk,
+        "status": job.status,
+        "progress": job.progress,
+        "status_url": reverse("orders:export_job_status", args=[job.pk]),
+    }
+    if job.status == ExportJob.STATUS_DONE:
+        payload["download_url"] = reverse("orders:export_job_download", args=[job.pk])
+    elif job.status == ExportJob.STATUS_FAILED:
+        payload["ok"] = False
+        payload["error"] = "Не вдалося сформувати файл."
+    return payload
+
+
+@login_required
+@require_POST
+def export_job_start(request, kind):
+    """
+    EN: Enqueue a background XLSX export with the current GET filters; returns job id + status URL.
+    UA: Ставить у чергу фонове вивантаження XLSX з поточними фільтрами; повертає id задачі та URL статусу.
+    """
+    if kind not in dict(ExportJob.KIND_CHOICES):
+        raise Http404
+    if kind == ExportJob.KIND_PRODUCTION and not is_manager(request.user):
+        raise Http404
+    job = start_export_job(request.user, kind, request.GET.dict())
+    return JsonResponse(_export_job_payload(job), status=202)
+
+
+@login_required
+def export_job_status(request, pk):
+    """EN: Poll export job progress. UA: Прогрес фонового вивантаження."""
+    job = get_object_or_404(ExportJob, pk=pk, user=request.user)
+    return JsonResponse(_export_job_payload(job))
+
+
+@login_required
+def export_job_download(request, pk):
+    """EN: Download a finished, not expired export. UA: Завантаження готового файлу."""
+    job = get_object_or_404(ExportJob, pk=pk, user=request.user, status=ExportJob.STATUS_DONE)
+    if not job.file or (job.expires_at and job.expires_at < timezone.now()):
+        raise Http404("Файл більше недоступний.")
+    return FileResponse(job.file.open("rb"), as_attachment=True, filename=job.filename)
 
 
 @login_required
@@ -3339,16 +3231,12 @@ def turnover_report(request):
     orders_qs = (
         _orders_scope(request.user)
         .select_related("customer", "customer__customerprofile")
-        .annotate(last_status_at=Coalesce(Max("status_logs__created_at"), "created_at"))
-        .prefetch_related("status_logs", "component_items", "fabric_items")
+        .prefetch_related(prefetch_latest_status_log(), "component_items", "fabric_items")
         .exclude(status=Order.STATUS_QUOTE)
         .order_by("-created_at", "-id")
     )
 
-    if date_from:
-        orders_qs = orders_qs.filter(created_at__date__gte=date_from)
-    if date_to:
-        orders_qs = orders_qs.filter(created_at__date__lte=date_to)
+    orders_qs = filter_created_between(orders_qs, date_from, date_to)
     orders_qs = _filter_orders_by_product_category(orders_qs, category_filter)
 
     if customer_filter and is_manager(request.user):
@@ -3362,13 +3250,13 @@ def turnover_report(request):
 
     current_rate = get_current_eur_rate()
     orders_qs = _set_order_totals_uah(orders_qs, current_rate)
+    # One SUM() for the total, one fetch for the rows.
     turnover_total = _orders_total_uah_base(orders_qs, current_rate)
-    proposal_tokens = {o.id: _proposal_token(o) for o in orders_qs}
-    proposal_page_urls = {oid: reverse("orders:proposal_page", args=[tok]) for oid, tok in proposal_tokens.items()}
-    proposal_excel_urls = {oid: reverse("orders:proposal_excel", args=[tok]) for oid, tok in proposal_tokens.items()}
+    orders = list(orders_qs)
+    proposal_page_urls, proposal_excel_urls = proposal_link_maps([o.id for o in orders])
 
     context = {
-        "orders": orders_qs,
+        "orders": orders,
         "customer_filter": customer_filter,
         "category_filter": category_filter,
         "date_from": date_from_str,
@@ -3384,79 +3272,46 @@ def turnover_report(request):
     return render(request, "orders/turnover_report.html", context)
 
 
-@login_required
-def turnover_excel(request):
+_TURNOVER_EXPORT_COLUMNS = [
+    ("date", "Дата"),
+    ("order_id", "№ замовлення"),
+    ("customer", "Клієнт"),
+    ("category", "Категорія"),
+    ("status", "Статус"),
+    ("amount_uah", "Сума, грн"),
+]
+
+
+def _turnover_export_queryset(user, params):
+    """
+    EN: Filtered orders of the turnover export (shared by XLSX/CSV/NDJSON).
+    UA: Відфільтровані замовлення для вивантаження оберту (спільні для XLSX/CSV/NDJSON).
+    Returns (orders_qs, current_rate, filename base).
+    """
     User = get_user_model()
-    customer_filter = request.GET.get("customer") or ""
-    category_filter = request.GET.get("category") or ""
-    date_from_str = (request.GET.get("date_from") or "").strip()
-    date_to_str = (request.GET.get("date_to") or "").strip()
+    customer_filter = params.get("customer") or ""
+    category_filter = params.get("category") or ""
+    date_from_str = (params.get("date_from") or "").strip()
+    date_to_str = (params.get("date_to") or "").strip()
     date_from = _parse_optional_flexible_date(date_from_str)
     date_to = _parse_optional_flexible_date(date_to_str)
-    turnover_user = request.user
+    turnover_user = user
 
     orders_qs = (
-        _orders_scope(request.user)
-        .select_related("customer", "customer__customerprofile")
+        _orders_scope(user)
         .exclude(status=Order.STATUS_QUOTE)
         .order_by("-created_at", "-id")
     )
 
-    if date_from:
-        orders_qs = orders_qs.filter(created_at__date__gte=date_from)
-    if date_to:
-        orders_qs = orders_qs.filter(created_at__date__lte=date_to)
+    orders_qs = filter_created_between(orders_qs, date_from, date_to)
     orders_qs = _filter_orders_by_product_category(orders_qs, category_filter)
 
-    if customer_filter and is_manager(request.user):
+    if customer_filter and is_manager(user):
         turnover_user = get_object_or_404(User, pk=customer_filter)
         orders_qs = orders_qs.filter(customer=turnover_user)
 
     current_rate = get_current_eur_rate()
     orders_qs = _set_order_totals_uah(orders_qs, current_rate)
-    turnover_total = _orders_total_uah_base(orders_qs, current_rate)
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Оберт"
-
-    headers = ["Дата", "№ замовлення", "Клієнт", "Категорія", "Статус", "Сума, грн"]
-    ws.append(headers)
-    bold = Font(bold=True)
-    for col in range(1, len(headers) + 1):
-        ws.cell(row=1, column=col).font = bold
-
-    for o in orders_qs:
-        profile = getattr(o.customer, "customerprofile", None)
-        customer_name = (
-            getattr(profile, "company_name", "")
-            or getattr(profile, "full_name", "")
-            or getattr(o.customer, "email", "")
-        )
-        created_at = o.created_at
-        if hasattr(created_at, "tzinfo") and created_at.tzinfo:
-            created_at = timezone.localtime(created_at).replace(tzinfo=None)
-        ws.append([
-            created_at,
-            o.id,
-            customer_name,
-            _order_product_category_label(o),
-            o.get_status_display(),
-            float(o.total_uah_display or 0),
-        ])
-
-    total_row = ws.max_row + 1
-    ws.cell(row=total_row, column=1, value="Разом").font = bold
-    ws.cell(row=total_row, column=6, value=float(turnover_total)).font = bold
-
-    for col_letter, width in {"A": 20, "B": 14, "C": 30, "D": 22, "E": 18, "F": 16}.items():
-        ws.column_dimensions[col_letter].width = width
-
-    _apply_excel_print_layout(ws)
-
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
 
     stamp = timezone.localtime(timezone.now()).strftime("%Y-%m-%d")
     name_parts = ["turnover", stamp]
@@ -3468,30 +3323,91 @@ def turnover_excel(request):
         name_parts.append(f"from-{date_from_str}")
     if date_to_str:
         name_parts.append(f"to-{date_to_str}")
-    filename = "_".join(name_parts) + ".xlsx"
+    return orders_qs, current_rate, "_".join(name_parts)
+
+
+def _turnover_export_rows(orders_qs):
+    """EN: Turnover rows as plain values (no model instances). UA: Рядки оберту як значення, без об'єктів моделей."""
+    rows = orders_qs.values_list(
+        "created_at",
+        "id",
+        "customer__customerprofile__company_name",
+        "customer__customerprofile__full_name",
+        "customer__email",
+        "status",
+        "total_uah_display",
+        *_PRODUCT_CATEGORY_FLAGS,
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    for created_at, pk, company_name, full_name, email, status, total_uah, *flags in rows:
+        yield [
+            _export_local_datetime(created_at),
+            pk,
+            company_name or full_name or email or "",
+            _PRODUCT_CATEGORY_LABELS[_product_category_from_flags(*flags)],
+            STATUS_LABELS.get(status, status),
+            Decimal(total_uah or 0),
+        ]
 
-    response = HttpResponse(
-        output.getvalue(),
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    )
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-    return response
+
+def _turnover_export(user, params, progress=None):
+    """
+    EN: Build the turnover XLSX for `params` filters.
+    UA: Формує XLSX оберту за фільтрами `params`.
+    Returns (filename, StreamingXlsxExport).
+    """
+    orders_qs, current_rate, basename = _turnover_export_queryset(user, params)
+    turnover_total = _orders_total_uah_base(orders_qs, current_rate)
+
+    export = StreamingXlsxExport("Оберт", widths={"A": 20, "B": 14, "C": 30, "D": 22, "E": 18, "F": 16})
+    _apply_excel_print_layout(export.ws, last_col=6)
+    export.header([label for _, label in _TURNOVER_EXPORT_COLUMNS])
+
+    rows = _turnover_export_rows(orders_qs)
+    if progress:
+        rows = iter_with_progress(rows, orders_qs.count(), progress)
+    for row in rows:
+        export.row(row[:-1] + [float(row[-1])])
+
+    export.total(["Разом", "", "", "", "", float(turnover_total)])
+    return f"{basename}.xlsx", export
 
 
 @login_required
-def order_list_excel(request):
+def turnover_excel(request):
+    fmt = request.GET.get("format")
+    if fmt in TEXT_EXPORT_CONTENT_TYPES:
+        orders_qs, _, basename = _turnover_export_queryset(request.user, request.GET)
+        return stream_text_export(fmt, basename, _TURNOVER_EXPORT_COLUMNS, _turnover_export_rows(orders_qs))
+    filename, export = _turnover_export(request.user, request.GET)
+    return export.response(filename)
+
+
+_ORDER_LIST_EXPORT_COLUMNS = [
+    ("order_id", "№"),
+    ("category", "Тип"),
+    ("customer", "Клієнт"),
+    ("phone", "Телефон"),
+    ("status", "Статус"),
+    ("amount_uah", "Сума, грн"),
+    ("date", "Дата"),
+    ("note", "Примітка"),
+]
+
+
+def _order_list_export_queryset(user, params):
     """
-    Export orders list to XLSX with current filters.
-    Default period: last 365 days if no date filters provided.
+    EN: Filtered orders of the list export (default period: last 365 days), shared by XLSX/CSV/NDJSON.
+    UA: Відфільтровані замовлення для вивантаження списку (за замовчуванням — останні 365 днів).
+    Returns (orders_qs, filename base).
     """
     User = get_user_model()
-    list_mode = (request.GET.get("list_mode") or "rollers").strip()
-    status_filter = request.GET.get("status") or ""
-    customer_filter = request.GET.get("customer") or ""
-    q = (request.GET.get("q") or "").strip()
+    list_mode = (params.get("list_mode") or "rollers").strip()
+    status_filter = params.get("status") or ""
+    customer_filter = params.get("customer") or ""
+    q = (params.get("q") or "").strip()
 
-    date_from_str = (request.GET.get("date_from") or "").strip()
-    date_to_str = (request.GET.get("date_to") or "").strip()
+    date_from_str = (params.get("date_from") or "").strip()
+    date_to_str = (params.get("date_to") or "").strip()
     if not date_from_str and not date_to_str:
         today = timezone.localdate()
         date_to = today
@@ -3499,110 +3415,21 @@ def order_list_excel(request):
         date_from_str = date_from.isoformat()
         date_to_str = date_to.isoformat()
     else:
-        date_from, date_to, date_from_str, date_to_str, _ = _parse_date_range(request.GET)
+        date_from, date_to, date_from_str, date_to_str, _ = _parse_date_range(params)
 
-    qs = (
-        _orders_scope(request.user)
-        .select_related("customer", "customer__customerprofile")
-        .annotate(last_status_at=Coalesce(Max("status_logs__created_at"), "created_at"))
-        .prefetch_related("status_logs")
-        .order_by("-id")
-        .distinct()
-    )
-
-    if list_mode == "components":
-        qs = qs.filter(component_items__isnull=False)
-    elif list_mode == "fabrics":
-        qs = qs.filter(fabric_items__isnull=False)
-    elif list_mode == "mosquitoes":
-        qs = qs.filter(mosquito_items__isnull=False)
-    elif list_mode == "mosquito_components":
-        qs = qs.filter(mosquito_component_items__isnull=False)
-    elif list_mode == "rollers":
-        qs = (
-            qs.exclude(component_items__isnull=False)
-            .exclude(fabric_items__isnull=False)
-            .exclude(mosquito_items__isnull=False)
-            .exclude(mosquito_component_items__isnull=False)
-        )
+    qs = filter_order_category(_orders_scope(user).order_by("-id"), list_mode)
 
     if status_filter:
         qs = qs.filter(status=status_filter)
-    if date_from:
-        qs = qs.filter(created_at__date__gte=date_from)
-    if date_to:
-        qs = qs.filter(created_at__date__lte=date_to)
+    qs = filter_created_between(qs, date_from, date_to)
 
-    if customer_filter and is_manager(request.user):
+    if customer_filter and is_manager(user):
         balance_user = get_object_or_404(User, pk=customer_filter)
         qs = qs.filter(customer=balance_user)
     if q:
         qs = qs.filter(pk__icontains=q)
 
-    current_rate = get_current_eur_rate()
-    qs = _set_order_totals_uah(qs, current_rate)
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Замовлення"
-
-    headers = [
-        "№",
-        "Тип",
-        "Клієнт",
-        "Телефон",
-        "Статус",
-        "Сума, грн",
-        "Дата",
-        "Примітка",
-    ]
-    ws.append(headers)
-    bold = Font(bold=True)
-    for col in range(1, len(headers) + 1):
-        ws.cell(row=1, column=col).font = bold
-
-    for o in qs:
-        profile = getattr(o.customer, "customerprofile", None) if o.customer else None
-        customer_name = (
-            getattr(profile, "company_name", "")
-            or getattr(profile, "full_name", "")
-            or (str(o.customer) if o.customer else "")
-        )
-        phone = getattr(profile, "phone", "") if profile else ""
-        if o.component_items.exists():
-            order_type = "Компл-ючі до тк. рол."
-        elif o.fabric_items.exists():
-            order_type = "Тканина"
-        elif o.mosquito_items.exists():
-            order_type = "Москітні сітки"
-        elif o.mosquito_component_items.exists():
-            order_type = "Комплектуючі до мос. сіток"
-        else:
-            order_type = "Ролети"
-        created_at = o.created_at
-        if hasattr(created_at, "tzinfo") and created_at.tzinfo:
-            created_at = timezone.localtime(created_at).replace(tzinfo=None)
-        ws.append(
-            [
-                o.id,
-                order_type,
-                customer_name,
-                phone,
-                o.get_status_display(),
-                float(o.total_uah_display or 0),
-                created_at,
-                (o.note or "").strip(),
-            ]
-        )
-
-    for col_letter in ["A", "B", "C", "D", "E", "F", "G", "H"]:
-        ws.column_dimensions[col_letter].width = 22
-
-    _apply_excel_print_layout(ws)
-
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
+    qs = _set_order_totals_uah(qs, get_current_eur_rate())
 
     stamp = timezone.localdate().isoformat()
     name_parts = ["orders", list_mode, stamp, f"from-{date_from_str}", f"to-{date_to_str}"]
@@ -3612,64 +3439,115 @@ def order_list_excel(request):
         name_parts.append(f"status-{status_filter}")
     if q:
         name_parts.append(f"q-{q}")
-    filename = "_".join(name_parts) + ".xlsx"
+    return qs, "_".join(name_parts)
+
+
+def _order_list_export_rows(qs):
+    """EN: Order list rows as plain values (no model instances). UA: Рядки списку замовлень як значення."""
+    rows = qs.values_list(
+        "id",
+        "customer__customerprofile__company_name",
+        "customer__customerprofile__full_name",
+        "customer__customerprofile__phone",
+        "customer__email",
+        "status",
+        "total_uah_display",
+        "created_at",
+        "note",
+        *_PRODUCT_CATEGORY_FLAGS,
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    for pk, company_name, full_name, phone, email, status, total_uah, created_at, note, *flags in rows:
+        yield [
+            pk,
+            _PRODUCT_CATEGORY_LABELS[_product_category_from_flags(*flags)],
+            company_name or full_name or email or "",
+            phone or "",
+            STATUS_LABELS.get(status, status),
+            Decimal(total_uah or 0),
+            _export_local_datetime(created_at),
+            (note or "").strip(),
+        ]
 
-    response = HttpResponse(
-        output.getvalue(),
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    )
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-    return response
+
+def _order_list_export(user, params, progress=None):
+    """
+    EN: Build the orders list XLSX for `params` filters (default period: last 365 days).
+    UA: Формує XLSX списку замовлень за фільтрами `params` (за замовчуванням — останні 365 днів).
+    Returns (filename, StreamingXlsxExport).
+    """
+    qs, basename = _order_list_export_queryset(user, params)
+
+    export = StreamingXlsxExport("Замовлення", widths={col_letter: 22 for col_letter in "ABCDEFGH"})
+    _apply_excel_print_layout(export.ws, last_col=8)
+    export.header([label for _, label in _ORDER_LIST_EXPORT_COLUMNS])
+
+    rows = _order_list_export_rows(qs)
+    if progress:
+        rows = iter_with_progress(rows, qs.count(), progress)
+    for row in rows:
+        row[5] = float(row[5])
+        export.row(row)
+    return f"{basename}.xlsx", export
+
+
+@login_required
+def order_list_excel(request):
+    """
+    Export orders list to XLSX with current filters.
+    Default period: last 365 days if no date filters provided.
+    ?format=csv|ndjson streams unstyled rows instead.
+    """
+    fmt = request.GET.get("format")
+    if fmt in TEXT_EXPORT_CONTENT_TYPES:
+        qs, basename = _order_list_export_queryset(request.user, request.GET)
+        return stream_text_export(fmt, basename, _ORDER_LIST_EXPORT_COLUMNS, _order_list_export_rows(qs))
+    filename, export = _order_list_export(request.user, request.GET)
+    return export.response(filename)
 
 
 def _balance_events_for_customer(customer, include_orders=True, include_transactions=True):
-    orders_qs = (
-        _orders_scope(customer)
-        .filter(customer=customer)
-        .select_related("customer", "customer__customerprofile")
-        .prefetch_related("status_logs", "component_items")
-        .exclude(status=Order.STATUS_QUOTE)
-        .order_by("-created_at")
+    """
+    EN: Customer's balance events from the ledger (newest first) with running balance.
+    UA: Події балансу клієнта з журналу (нові зверху) з балансом після кожної операції.
+    """
+    entries = (
+        BalanceLedgerEntry.objects.filter(customer=customer)
+        .select_related("order", "transaction")
+        .order_by("-created_at", "-id")
     )
-    tx_qs = _transactions_scope(customer).filter(customer=customer).order_by("-created_at")
     if not include_orders:
-        orders_qs = orders_qs.none()
+        entries = entries.exclude(kind=BalanceLedgerEntry.KIND_ORDER)
     if not include_transactions:
-        tx_qs = tx_qs.none()
+        entries = entries.exclude(kind=BalanceLedgerEntry.KIND_TRANSACTION)
 
     current_rate = get_current_eur_rate()
-    orders_qs = _set_order_totals_uah(orders_qs, current_rate)
     events = []
-    for o in orders_qs:
-        created = o.created_at
-        if hasattr(created, "tzinfo") and created.tzinfo:
-            created = timezone.localtime(created).replace(tzinfo=None)
-        amount = -_round_uah_total(_order_base_total(o) * _order_rate(o, current_rate))
-        events.append({
-            "type": "order",
-            "created_at": created,
-            "object": o,
-            "description": f"Замовлення №{o.id} ({o.get_status_display()})",
-            "amount_uah": amount,
-            "amount_abs": abs(amount),
-        })
-    for tx in tx_qs:
-        created = tx.created_at
+    balance_total = None
+    for e in entries:
+        if balance_total is None:
+            balance_total = e.running_balance_uah
+        created = e.created_at
         if hasattr(created, "tzinfo") and created.tzinfo:
             created = timezone.localtime(created).replace(tzinfo=None)
-        amount = _tx_amount_uah(tx)
+        if e.kind == BalanceLedgerEntry.KIND_ORDER:
+            obj = e.order
+            description = f"Замовлення №{obj.id} ({obj.get_status_display()})"
+        else:
+            obj = e.transaction
+            description = f"Транзакція №{obj.id} ({obj.get_type_display()})"
         events.append({
-            "type": "transaction",
+            "type": e.kind,
             "created_at": created,
-            "object": tx,
-            "description": f"Транзакція №{tx.id} ({tx.get_type_display()})",
-            "amount_uah": amount,
-            "amount_abs": abs(amount),
+            "object": obj,
+            "description": description,
+            "amount_uah": e.amount_uah,
+            "amount_abs": abs(e.amount_uah),
+            "running_balance": e.running_balance_uah,
         })
-    events.sort(key=lambda x: x["created_at"] or timezone.now(), reverse=True)
 
-    balance_total = _transactions_total_uah(tx_qs) - _orders_total_uah_base(orders_qs, current_rate)
-    return events, balance_total, current_rate
+    if not (include_orders and include_transactions):
+        balance_total = sum((ev["amount_uah"] for ev in events), Decimal("0"))
+    return events, balance_total or Decimal("0"), current_rate
 
 
 def balance_public_page(request, token: str):
@@ -3750,7 +3628,7 @@ def balances_users(request):
     return render(request, "orders/balances_users.html", context)
 
 def _create_blank_order_for_builder(user, title, *, rate=None):
-    _, discount_pct_val = _customer_discount_multiplier(user)
+    _, discount_pct_val = customer_discount_multiplier(user)
     current_rate = Decimal(rate if rate is not None else get_current_eur_rate())
     return Order.objects.create(
         customer=user,
@@ -3784,15 +3662,15 @@ def _save_order_header_only(request, order):
     order.note = (request.POST.get("note") or "").strip()
     if can_edit_financial:
         order.extra_service_label = (request.POST.get("extra_service_label") or "").strip()
-        order.extra_service_amount_uah = _to_decimal(
+        order.extra_service_amount_uah = to_decimal(
             request.POST.get("extra_service_amount_uah"),
             default="0",
         ).quantize(Decimal("0.01"))
-        order.markup_percent = _to_decimal(
+        order.markup_percent = to_decimal(
             request.POST.get("markup_percent"),
             default=str(order.markup_percent or "0"),
         ).quantize(Decimal("0.01"))
-    order.discount_percent = _customer_discount_multiplier(target_customer)[1]
+    order.discount_percent = customer_discount_multiplier(target_customer)[1]
     update_fields = ["customer", "note", "discount_percent"]
     if can_edit_financial:
         update_fields.extend(["extra_service_label", "extra_service_amount_uah", "markup_percent"])
@@ -3827,9 +3705,9 @@ def _parse_mosquito_items_from_post(post):
                 "product_type": product_type,
                 "profile_color": _get(profile_colors, idx, "").strip(),
                 "mesh_type": _get(mesh_types, idx, "").strip(),
-                "width_mm": _to_int(_get(width_values, idx, "0"), 0),
-                "height_mm": _to_int(_get(height_values, idx, "0"), 0),
-                "quantity": max(_to_int(_get(quantity_values, idx, "1"), 1), 1),
+                "width_mm": to_int(_get(width_values, idx, "0"), 0),
+                "height_mm": to_int(_get(height_values, idx, "0"), 0),
+                "quantity": max(to_int(_get(quantity_values, idx, "1"), 1), 1),
                 "sliding_side": _get(sliding_sides, idx, "").strip(),
                 "options_data": options_data,
                 "note": _get(notes, idx, "").strip(),
@@ -3841,200 +3719,11 @@ def _parse_mosquito_items_from_post(post):
 def _mosquito_option_price_map():
     catalog = parse_mosquito_price_sheet(MOSQUITO_PRICE_SHEET_URL)
     return {
-        (item.get("name") or "").strip(): _to_decimal(item.get("price_usd"), default="0")
+        (item.get("name") or "").strip(): to_decimal(item.get("price_usd"), default="0")
         for item in (catalog.get("options") or [])
     }
 
 
-def _mosquito_has_selected_impost(product_type, options_data):
-    product_name = (product_type or "").lower()
-    options = options_data or {}
-    if "17*25" in product_name or "посилені" in product_name:
-        return (not bool(options.get("door_no_impost"))) and _to_int(options.get("door_impost_height", 0), 0) > 0
-    if "10*30" in product_name or "10*20" in product_name:
-        return _to_int(options.get("impost_qty", 0), 0) > 0
-    return False
-
-
-def _mosquito_note_with_auto_warning(product_type, base_note, warning_text, options_data):
-    product_name = (product_type or "").lower()
-    text = (warning_text or "").strip()
-    note = (base_note or "").strip()
-    impost_warning = "Негарантійний виріб, рекомендується встановлення імпоста"
-    note = re.sub(r"^\s*Негарантійний виріб, рекомендується встановлення імпоста\.?\s*", "", note).strip()
-    needs_impost = any(key in product_name for key in ("10*30", "10*20", "17*25", "посилені"))
-    has_selected_impost = _mosquito_has_selected_impost(product_type, options_data)
-
-    auto_warning = ""
-    if needs_impost and text and (not has_selected_impost) and "імпоста" in text.lower():
-        auto_warning = impost_warning
-    elif "оберіть двочасну сітку" in text.lower():
-        auto_warning = "Оберіть двочасну сітку"
-
-    if not auto_warning:
-        return note
-    if note.startswith(auto_warning):
-        return note
-    return f"{auto_warning}. {note}".strip()
-
-
-def _validate_mosquito_item_options(item):
-    product_name = (item.get("product_type") or "").lower()
-    options_data = item.get("options_data") or {}
-    def _heights_count(value):
-        parts = [part.strip() for part in re.split(r"[,\n;]+", str(value or "")) if part.strip()]
-        return len(parts)
-    if "10*30" in product_name or "10*20" in product_name:
-        impost_qty = _to_int(options_data.get("impost_qty", 0), 0)
-        impost_heights = str(options_data.get("impost_heights") or "").strip()
-        if impost_qty > 0 and not impost_heights:
-            raise ValueError(f"Для {item['product_type']} потрібно вказати висоти імпостів.")
-        if impost_qty > 0 and _heights_count(impost_heights) != impost_qty:
-            raise ValueError(f"Для {item['product_type']} кількість висот імпостів має відповідати кількості імпостів.")
-    if "дверні 17*25" in product_name or "посилені" in product_name:
-        no_impost = bool(options_data.get("door_no_impost"))
-        door_impost_height = _to_int(options_data.get("door_impost_height"), 0)
-        if not no_impost and door_impost_height <= 0:
-            raise ValueError(f"Для {item['product_type']} потрібно вказати висоту імпоста від низу або обрати 'без імпоста'.")
-        extra_impost_qty = _to_int(options_data.get("door_extra_impost_qty", 0), 0)
-        extra_impost_heights = str(options_data.get("door_extra_impost_heights") or "").strip()
-        if extra_impost_qty > 0 and not extra_impost_heights:
-            raise ValueError(f"Для {item['product_type']} потрібно вказати висоти додаткових імпостів.")
-        if extra_impost_qty > 0 and _heights_count(extra_impost_heights) != extra_impost_qty:
-            raise ValueError(f"Для {item['product_type']} кількість висот додаткових імпостів має відповідати кількості додаткових імпостів.")
-
-
-def _calculate_mosquito_options_total(product_type, quantity, options_data, option_prices, line_discount_multiplier=Decimal("1")):
-    name = (product_type or "").lower()
-    qty = Decimal(max(int(quantity or 1), 1))
-    data = options_data or {}
-    total = Decimal("0")
-
-    def count_value(key):
-        return Decimal(str(max(_to_int(data.get(key), 0), 0)))
-
-    def add_named(option_name, count, *, multiply_by_order_qty=True):
-        nonlocal total
-        price = option_prices.get(option_name, Decimal("0")) * Decimal(line_discount_multiplier or 0)
-        multiplier = qty if multiply_by_order_qty else Decimal("1")
-        total += price * Decimal(str(count)) * multiplier
-
-    if "10*30" in name:
-        replacement = (data.get("replacement_mount") or "").strip()
-        if replacement == "15*32":
-            add_named("Заміна кріплення з 9*32 на 15*32", 1)
-        elif replacement == "21*32":
-            add_named("Заміна кріплення з 9*32 на 21*32", 1)
-        add_named("Додаткове кріплення 9*32 (стандарт)", count_value("extra_mount_9"))
-        add_named("Додаткове кріплення 15*32", count_value("extra_mount_15"))
-        add_named("Додаткове кріплення 21*32", count_value("extra_mount_21"))
-        add_named("Додатковий імпост для внутрішніх сіток 10*30", count_value("impost_qty"))
-    elif "10*20" in name:
-        add_named("Додаткове кріплення 9*32 (стандарт)", count_value("extra_mount_9"))
-        add_named("Додаткове кріплення 15*32", count_value("extra_mount_15"))
-        add_named("Додаткове кріплення 21*32", count_value("extra_mount_21"))
-        add_named("Кріплення для алюмінєвих рам", count_value("aluminum_mount_kit"))
-        add_named("Додотковий імпост для зовнішніх сіток 10*20", count_value("impost_qty"))
-    elif "17*25" in name:
-        add_named("Додатковий імпост для дверних сіток 17*25", count_value("door_extra_impost_qty"))
-        add_named("Петля ПВХ звичайна", count_value("hinge_regular_qty"))
-        add_named("Петля з пружиною", count_value("hinge_spring_qty"))
-        add_named("Ручка пластикова до дверних", count_value("door_handle_qty"))
-        add_named("Защіпка пластикова", count_value("latch_qty"))
-        add_named("Магніт", count_value("magnet_qty"))
-        add_named("Кріплення для алюмінєвих рам", count_value("aluminum_mount_kit"))
-    elif "посилені 14*40" in name or "посилені 17*40" in name:
-        add_named("Петля ПВХ звичайна", count_value("hinge_regular_qty"))
-        add_named("Петля з пружиною", count_value("hinge_spring_qty"))
-        add_named("Ручка пластикова до дверних", count_value("door_handle_qty"))
-        add_named("Защіпка пластикова", count_value("latch_qty"))
-        add_named("Магніт", count_value("magnet_qty"))
-    elif "ролетні" in name:
-        add_named("Механізм гальмування", count_value("brake_qty"))
-        if "внутр. кріпл" in name or "внутрішнього кріплення" in name:
-            replacement = (data.get("replacement_mount") or "").strip()
-            if replacement == "15*32":
-                add_named("Заміна кріплення з 9*32 на 15*32", 1)
-            elif replacement == "21*32":
-                add_named("Заміна кріплення з 9*32 на 21*32", 1)
-            add_named("Додаткове кріплення 9*32 (стандарт)", count_value("extra_mount_9"))
-            add_named("Додаткове кріплення 15*32", count_value("extra_mount_15"))
-            add_named("Додаткове кріплення 21*32", count_value("extra_mount_21"))
-
-    return total.quantize(Decimal("0.01"))
-
-
-def _recalculate_mosquito_items(raw_items, discount_multiplier):
-    catalog = parse_mosquito_price_sheet(MOSQUITO_PRICE_SHEET_URL)
-    products = catalog.get("products") or []
-    option_prices = {
-        (item.get("name") or "").strip(): _to_decimal(item.get("price_usd"), default="0")
-        for item in (catalog.get("options") or [])
-    }
-    recalculated = []
-    total_usd = Decimal("0")
-    for item in raw_items:
-        product = select_mosquito_catalog_product(
-            products,
-            item["product_type"],
-            item["profile_color"],
-            item["height_mm"],
-        )
-        if not product:
-            raise ValueError(f"Не знайдено виріб у прайсі: {item['product_type']} / {item['profile_color']}")
-        mesh_prices = product.get("mesh_prices_usd_sqm") or {}
-        if not item["mesh_type"] or item["mesh_type"] not in mesh_prices:
-            raise ValueError(f"Для {item['product_type']} немає ціни по полотну {item['mesh_type']}")
-        price_usd_sqm = _to_decimal(mesh_prices.get(item["mesh_type"]))
-        actual_area = (Decimal(item["width_mm"]) * Decimal(item["height_mm"])) / Decimal("1000000")
-        min_area = _to_decimal(product.get("min_area_sqm"), default="0")
-        if actual_area >= Decimal("1000000") or min_area >= Decimal("1000000"):
-            raise ValueError(
-                f"Завелика площа для {item['product_type']} "
-                f"({item['width_mm']}x{item['height_mm']} мм). Перевірте введені розміри."
-            )
-        calc_area = actual_area if actual_area >= min_area else min_area
-        base_subtotal_usd = (calc_area * price_usd_sqm * Decimal(item["quantity"]) * discount_multiplier).quantize(Decimal("0.01"))
-        options_total_usd = _calculate_mosquito_options_total(
-            item["product_type"],
-            item["quantity"],
-            item.get("options_data") or {},
-            option_prices,
-            discount_multiplier,
-        )
-        subtotal_usd = (base_subtotal_usd + options_total_usd).quantize(Decimal("0.01"))
-        warnings = build_mosquito_warnings(
-            product_type=item["product_type"],
-            mesh_type=item["mesh_type"],
-            width_mm=item["width_mm"],
-            height_mm=item["height_mm"],
-            area_sqm=calc_area,
-            options_data=item.get("options_data") or {},
-        )
-        total_usd += subtotal_usd
-        recalculated.append(
-            {
-                **item,
-                "area_sqm": actual_area.quantize(Decimal("0.0001")),
-                "min_area_sqm": min_area.quantize(Decimal("0.0001")),
-                "price_usd_sqm": price_usd_sqm.quantize(Decimal("0.0001")),
-                "options_total_usd": options_total_usd,
-                "subtotal_usd": subtotal_usd,
-                "warning_text": "\n".join(warnings),
-                "note": _mosquito_note_with_auto_warning(
-                    item["product_type"],
-                    item.get("note", ""),
-                    "\n".join(warnings),
-                    item.get("options_data") or {},
-                ),
-                "dimension_labels": product.get("dimension_labels") or {},
-                "fiberglass_only": bool(product.get("fiberglass_only")),
-                "requires_sliding_side": bool(product.get("requires_sliding_side")),
-            }
-        )
-    return recalculated, total_usd.quantize(Decimal("0.01"))
-
-
 def _render_mosquito_builder_page(
     request,
     order,
@@ -4050,29 +3739,6 @@ def _render_mosquito_builder_page(
     proposal_token = _proposal_token(order) if order else None
     proposal_page_url = reverse("orders:proposal_page", args=[proposal_token]) if proposal_token else None
     proposal_excel_url = reverse("orders:proposal_excel", args=[proposal_token]) if proposal_token else None
-    if order:
-        items_payload = [
-            {
-                "product_type": item.product_type,
-                "profile_color": item.profile_color,
-                "mesh_type": item.mesh_type,
-                "width_mm": item.width_mm,
-                "height_mm": item.height_mm,
-                "quantity": item.quantity,
-                "area_sqm": str(item.area_sqm),
-                "min_area_sqm": str(item.min_area_sqm),
-                "price_usd_sqm": str(item.price_usd_sqm),
-                "options_total_usd": str(item.options_total_usd),
-                "subtotal_usd": str(item.subtotal_usd),
-                "sliding_side": item.sliding_side,
-                "warning_text": item.warning_text,
-                "options_data": item.options_data or {},
-                "note": item.note,
-            }
-            for item in order.mosquito_items.all().order_by("id")
-        ]
-    else:
-        items_payload = []
     context = {
         "order": order,
         "PRICE_SHEET_URL": price_sheet_url,
@@ -4083,15 +3749,17 @@ def _render_mosquito_builder_page(
         "builder_rate": (order.eur_rate if order and order.status != Order.STATUS_QUOTE and order.eur_rate else get_current_usd_rate()),
         "proposal_page_url": proposal_page_url,
         "proposal_excel_url": proposal_excel_url,
-        "customers_filter_list": list(customer_profiles_queryset()) if is_manager(request.user) else [],
+        "customers_filter_list": (
+            _customer_picker_selected(order.customer if order else request.user) if is_manager(request.user) else []
+        ),
         "can_view_financial_controls": _can_view_financial_controls(
             request.user,
             order.customer if order else request.user,
         ),
         "stage_message": stage_message,
         "mosquito_builder_title": title,
-        "mosquito_items_json": json.dumps(items_payload, ensure_ascii=False),
-        "customer_discount_percent_js": format(_normalize_discount_percent(getattr(order, "discount_percent", Decimal("0")) if order else getattr(getattr(request.user, "customerprofile", None), "discount_percent", Decimal("0"))), "f"),
+        "mosquito_items_json": builder_items_json(order, KIND_MOSQUITOES) if order else "[]",
+        "customer_discount_percent_js": format(normalize_discount_percent(getattr(order, "discount_percent", Decimal("0")) if order else getattr(getattr(request.user, "customerprofile", None), "discount_percent", Decimal("0"))), "f"),
         "return_url": return_url,
     }
     return render(request, template_name, context)
@@ -4114,59 +3782,30 @@ def order_mosquito_builder(request, pk):
             messages.error(request, "Додайте хоча б одну позицію перед збереженням.")
             return redirect("orders:order_mosquito_builder", pk=order.pk)
         try:
-            discount_multiplier, discount_pct = _customer_discount_multiplier(order.customer)
-            recalculated_items, total_usd = _recalculate_mosquito_items(raw_items, discount_multiplier)
+            discount_multiplier, discount_pct = customer_discount_multiplier(order.customer)
+            recalculated_items, total_usd = recalculate_mosquito_items(raw_items, discount_multiplier)
         except Exception as exc:
             logger.exception("Failed to save mosquito order %s", order.pk)
             messages.error(request, str(exc))
             return redirect("orders:order_mosquito_builder", pk=order.pk)
 
         for item in recalculated_items:
-            if item.get("requires_sliding_side"):
-                allowed_sliding_sides = ("left", "right")
-                if "плісе двочаст" in (item.get("product_type") or "").lower():
-                    allowed_sliding_sides = ("center",)
-                if item.get("sliding_side") not in allowed_sliding_sides:
-                    messages.error(request, f"Для {item['product_type']} потрібно обрати сторону зсуву.")
-                    return redirect("orders:order_mosquito_builder", pk=order.pk)
             try:
-                _validate_mosquito_item_options(item)
+                validate_mosquito_item(item)
             except ValueError as exc:
                 messages.error(request, str(exc))
                 return redirect("orders:order_mosquito_builder", pk=order.pk)
 
         try:
             with transaction.atomic():
-                OrderMosquitoItem.objects.filter(order=order).delete()
-                OrderMosquitoItem.objects.bulk_create(
-                    [
-                        OrderMosquitoItem(
-                            order=order,
-                            product_type=item["product_type"],
-                            profile_color=item["profile_color"],
-                            mesh_type=item["mesh_type"],
-                            width_mm=item["width_mm"],
-                            height_mm=item["height_mm"],
-                            quantity=item["quantity"],
-                            area_sqm=item["area_sqm"],
-                            min_area_sqm=item["min_area_sqm"],
-                            price_usd_sqm=item["price_usd_sqm"],
-                            options_total_usd=item.get("options_total_usd", Decimal("0")),
-                            subtotal_usd=item["subtotal_usd"],
-                            options_data=item.get("options_data") or {},
-                            sliding_side=item.get("sliding_side", ""),
-                            warning_text=item.get("warning_text", ""),
-                            note=item["note"],
-                        )
-                        for item in recalculated_items
-                    ]
-                )
+                save_mosquito_items(order, recalculated_items)
                 order.total_eur = total_usd
                 order.eur_rate = get_current_usd_rate()
                 if not order.eur_rate_at_creation:
                     order.eur_rate_at_creation = order.eur_rate
                 order.discount_percent = discount_pct
                 order.save(update_fields=["total_eur", "eur_rate", "eur_rate_at_creation", "discount_percent"])
+                refresh_item_summaries(order)
         except DataError:
             logger.exception(
                 "Failed to persist mosquito order %s due to numeric overflow. Items=%s",
@@ -4175,6 +3814,7 @@ def order_mosquito_builder(request, pk):
             )
             messages.error(request, "Не вдалося зберегти замовлення: перевірте розміри та параметри позицій.")
             return redirect("orders:order_mosquito_builder", pk=order.pk)
+        store_builder_items_json_on_commit(order, KIND_MOSQUITOES)
 
         new_status = None
         if action == "to_work":
@@ -4245,84 +3885,20 @@ def _parse_mosquito_component_items_from_post(post):
                 "name": name,
                 "color": str(_get(colors, idx, "") or "").strip(),
                 "unit": str(_get(units, idx, "") or "").strip(),
-                "length_mm": max(_to_int(_get(lengths, idx, "0"), 0), 0),
-                "quantity": _to_decimal(_get(quantities, idx, "0"), default="0"),
+                "length_mm": max(to_int(_get(lengths, idx, "0"), 0), 0),
+                "quantity": to_decimal(_get(quantities, idx, "0"), default="0"),
                 "note": str(_get(notes, idx, "") or "").strip(),
             }
         )
     return payload
 
 
-def _recalculate_mosquito_component_items(raw_items, discount_multiplier):
-    catalog = parse_mosquito_components_sheet(MOSQUITO_COMPONENTS_PRICE_SHEET_URL)
-    price_rows = catalog.get("items") or []
-    recalculated = []
-    total_usd = Decimal("0")
-    for item in raw_items:
-        #logger.info("item[name] = %s",  item["name"])
-        #logger.info("item[color] = %s",  item["color"])
-        #logger.info("item[unit] = %s",  item["unit"])
-        #logger.info("------------------------------------------------------------------")
-        matched = next(
-            (
-                row for row in price_rows
-                if (row.get("name") or "").strip().lower() == item["name"].strip().lower()
-                and (row.get("color") or "").strip().lower() == item["color"].strip().lower()
-                and (row.get("unit") or "").strip().lower() == item["unit"].strip().lower()
-            ),
-            None,
-        )
-        if not matched:
-            raise ValueError(f"Не знайдено комплектуючу у прайсі: {item['name']} / {item['color']} / {item['unit']}")
-        quantity = _to_decimal(item.get("quantity"), default="0")
-        if quantity <= 0:
-            raise ValueError(f"Для {item['name']} потрібно вказати кількість більше нуля.")
-        if is_meter_unit(item["unit"]) and quantity != quantity.to_integral_value():
-            raise ValueError(f"Для {item['name']} кількість у м.п. має бути цілим числом.")
-        base_price_usd = _to_decimal(matched.get("price_usd"), default="0")
-        price_usd = (base_price_usd * discount_multiplier).quantize(Decimal("0.0001"))
-        unit_name = (item["unit"] or "").strip().lower()
-        if "м.п" in unit_name:
-            if int(item["length_mm"] or 0) <= 0:
-                raise ValueError(f"Для {item['name']} потрібно вказати довжину, мм.")
-            line_qty = (Decimal(int(item["length_mm"])) / Decimal("1000")) * quantity
-        else:
-            line_qty = quantity
-        subtotal_usd = (line_qty * price_usd).quantize(Decimal("0.01"))
-        total_usd += subtotal_usd
-        recalculated.append(
-            {
-                **item,
-                "quantity": quantity.quantize(Decimal("0.001")),
-                "price_usd": price_usd,
-                "subtotal_usd": subtotal_usd,
-            }
-        )
-    return recalculated, total_usd.quantize(Decimal("0.01"))
-
-
 def _render_mosquito_components_builder_page(request, order):
     return_url = _get_safe_return_url(request)
     readonly = bool(order and (not is_manager(request.user) and order.status != Order.STATUS_QUOTE))
     proposal_token = _proposal_token(order) if order else None
     proposal_page_url = reverse("orders:proposal_page", args=[proposal_token]) if proposal_token else None
     proposal_excel_url = reverse("orders:proposal_excel", args=[proposal_token]) if proposal_token else None
-    if order:
-        items_payload = [
-            {
-                "name": item.name,
-                "color": item.color,
-                "unit": item.unit,
-                "length_mm": item.length_mm,
-                "quantity": str(item.quantity),
-                "price_usd": str(item.price_usd),
-                "subtotal_usd": str(item.subtotal_usd),
-                "note": item.note,
-            }
-            for item in order.mosquito_component_items.all().order_by("id")
-        ]
-    else:
-        items_payload = []
     context = {
         "order": order,
         "PRICE_SHEET_URL": MOSQUITO_COMPONENTS_PRICE_SHEET_URL,
@@ -4333,14 +3909,16 @@ def _render_mosquito_components_builder_page(request, order):
         "builder_rate": (order.eur_rate if order and order.status != Order.STATUS_QUOTE and order.eur_rate else get_current_usd_rate()),
         "proposal_page_url": proposal_page_url,
         "proposal_excel_url": proposal_excel_url,
-        "customers_filter_list": list(customer_profiles_queryset()) if is_manager(request.user) else [],
+        "customers_filter_list": (
+            _customer_picker_selected(order.customer if order else request.user) if is_manager(request.user) else []
+        ),
         "can_view_financial_controls": _can_view_financial_controls(
             request.user,
             order.customer if order else request.user,
         ),
         "stage_message": "Комплектуючі до москітних сіток рахуються по другій вкладці прайсу одним довідковим запитом. Розрахунок іде по м.п. або по шт./компл. залежно від одиниці виміру.",
-        "mosquito_component_items_json": json.dumps(items_payload, ensure_ascii=False),
-        "customer_discount_percent_js": format(_normalize_discount_percent(getattr(order, "discount_percent", Decimal("0")) if order else getattr(getattr(request.user, "customerprofile", None), "discount_percent", Decimal("0"))), "f"),
+        "mosquito_component_items_json": builder_items_json(order, KIND_MOSQUITO_COMPONENTS) if order else "[]",
+        "customer_discount_percent_js": format(normalize_discount_percent(getattr(order, "discount_percent", Decimal("0")) if order else getattr(getattr(request.user, "customerprofile", None), "discount_percent", Decimal("0"))), "f"),
         "return_url": return_url,
     }
     return render(request, "orders/mosquito_components_builder.html", context)
@@ -4364,36 +3942,21 @@ def order_mosquito_components_builder(request, pk):
             if not raw_items:
                 messages.error(request, "Додайте хоча б одну комплектуючу перед збереженням.")
                 return redirect("orders:order_mosquito_components_builder", pk=order.pk)
-            discount_multiplier, discount_pct = _customer_discount_multiplier(order.customer)
-            recalculated_items, total_usd = _recalculate_mosquito_component_items(raw_items, discount_multiplier)
+            discount_multiplier, discount_pct = customer_discount_multiplier(order.customer)
+            recalculated_items, total_usd = recalculate_mosquito_component_items(raw_items, discount_multiplier)
         except Exception as exc:
             logger.exception("Failed to save mosquito components order %s", order.pk)
             messages.error(request, str(exc))
             return redirect("orders:order_mosquito_components_builder", pk=order.pk)
 
-        OrderMosquitoComponentItem.objects.filter(order=order).delete()
-        OrderMosquitoComponentItem.objects.bulk_create(
-            [
-                OrderMosquitoComponentItem(
-                    order=order,
-                    name=item["name"],
-                    color=item["color"],
-                    unit=item["unit"],
-                    length_mm=item["length_mm"],
-                    quantity=item["quantity"],
-                    price_usd=item["price_usd"],
-                    subtotal_usd=item["subtotal_usd"],
-                    note=item["note"],
-                )
-                for item in recalculated_items
-            ]
-        )
+        save_mosquito_component_items(order, recalculated_items)
         order.total_eur = total_usd
         order.eur_rate = get_current_usd_rate()
         if not order.eur_rate_at_creation:
             order.eur_rate_at_creation = order.eur_rate
         order.discount_percent = discount_pct
         order.save(update_fields=["total_eur", "eur_rate", "eur_rate_at_creation", "discount_percent"])
+        store_builder_items_json_on_commit(order, KIND_MOSQUITO_COMPONENTS)
 
         new_status = None
         if action == "to_work":
@@ -4478,45 +4041,24 @@ def order_components_builder(request, pk):
         order.note = base_note
         if can_edit_financial:
             order.extra_service_label = (request.POST.get("extra_service_label") or "").strip()
-            order.extra_service_amount_uah = _to_decimal(request.POST.get("extra_service_amount_uah"), default="0").quantize(Decimal("0.01"))
-            markup_percent = _to_decimal(request.POST.get("markup_percent"), default=str(order.markup_percent or "0"))
+            order.extra_service_amount_uah = to_decimal(request.POST.get("extra_service_amount_uah"), default="0").quantize(Decimal("0.01"))
+            markup_percent = to_decimal(request.POST.get("markup_percent"), default=str(order.markup_percent or "0"))
         else:
             markup_percent = Decimal(order.markup_percent or 0)
         if chosen_customer and can_pick_customer:
             order.customer = chosen_customer
         target_customer = chosen_customer or order.customer
         if not chosen_customer:
-            discount_pct_val = _normalize_discount_percent(getattr(order, "discount_percent", Decimal("0")))
+            discount_pct_val = normalize_discount_percent(getattr(order, "discount_percent", Decimal("0")))
         else:
-            _, discount_pct_val = _customer_discount_multiplier(target_customer)
-        discount_multiplier, _ = _customer_discount_multiplier(pct=discount_pct_val)
+            _, discount_pct_val = customer_discount_multiplier(target_customer)
+        discount_multiplier, _ = customer_discount_multiplier(pct=discount_pct_val)
 
         # EN: Replace all existing components with new list
         # UA: Повністю замінюємо поточний список комплектуючих новим
-        OrderComponentItem.objects.filter(order=order).delete()
-
-        total_eur = Decimal("0")
-        bulk = []
-        for row in components:
-            price_raw = Decimal(row["price_eur"] or 0)
-            qty = Decimal(row["quantity"] or 0)
-            price_eur = (price_raw * discount_multiplier).quantize(Decimal("0.01"))
-            total_eur += price_eur * qty
-            bulk.append(
-                OrderComponentItem(
-                    order=order,
-                    name=row["name"],
-                    color=row["color"],
-                    unit=row["unit"],
-                    price_eur=price_eur,
-                    quantity=qty,
-                )
-            )
-
-        if bulk:
-            OrderComponentItem.objects.bulk_create(bulk)
+        total_eur = save_component_items(order, components, discount_multiplier)
         # Save total for order (used in listings/balance)
-        order.total_eur = total_eur.quantize(Decimal("0.01"))
+        order.total_eur = total_eur
         order.eur_rate = order.eur_rate or get_current_eur_rate()
         order.markup_percent = markup_percent.quantize(Decimal("0.01"))
 
@@ -4537,6 +4079,7 @@ def order_components_builder(request, pk):
             update_fields.append("customer")
         order.discount_percent = discount_pct_val
         order.save(update_fields=update_fields)
+        store_builder_items_json_on_commit(order, KIND_COMPONENTS)
 
         if new_status and not _apply_status_change(order, new_status, request):
             return redirect(reverse("orders:order_components_builder", kwargs={"pk": order.pk}))
@@ -4555,26 +4098,7 @@ def order_components_builder(request, pk):
             return redirect(next_url)
         return redirect(reverse("orders:order_components_builder", kwargs={"pk": order.pk}))
 
-    # ---------- GET: формируем components_json для фронта ----------
-
-    # EN: Load existing components for edit mode
-    # UA: Завантажуємо існуючі комплектуючі (режим редагування)
-    items = (
-      order.component_items.all()
-      .order_by("id")
-    )
-
-    components_payload = []
-    for item in items:
-        components_payload.append(
-            {
-                "name": item.name,
-                "color": item.color,
-                "unit": item.unit,
-                "price_eur": str(item.price_eur),
-                "quantity": str(item.quantity),
-            }
-        )
+    # ---------- GET: components_json для фронта (serialized on save) ----------
 
     payment_prompt = request.session.pop("payment_prompt", None)
     shortage_ctx = _payment_shortage_context(order)
@@ -4584,7 +4108,7 @@ def order_components_builder(request, pk):
     context = {
         "order": order,
         "PRICE_SHEET_URL": PRICE_SHEET_URL,
-        "components_json": json.dumps(components_payload, ensure_ascii=False),
+        "components_json": builder_items_json(order, KIND_COMPONENTS),
         "status_logs": order.status_logs.all(),
         "readonly": readonly,
         "next_status_label": STATUS_LABELS.get(order.next_status()) if order else None,
@@ -4593,9 +4117,7 @@ def order_components_builder(request, pk):
         "payment_shortage": payment_prompt or shortage_ctx,
         "proposal_page_url": proposal_page_url,
         "proposal_excel_url": proposal_excel_url,
-        "customers_filter_list": list(
-            customer_profiles_queryset()
-        ) if is_manager(request.user) else [],
+        "customers_filter_list": _customer_picker_selected(order.customer) if is_manager(request.user) else [],
         "can_view_financial_controls": _can_view_financial_controls(request.user, order.customer),
         "return_url": return_url,
     }
@@ -4638,18 +4160,18 @@ def order_fabric_builder(request, pk):
         order.note = base_note
         if can_edit_financial:
             order.extra_service_label = (request.POST.get("extra_service_label") or "").strip()
-            order.extra_service_amount_uah = _to_decimal(request.POST.get("extra_service_amount_uah"), default="0").quantize(Decimal("0.01"))
-            markup_percent = _to_decimal(request.POST.get("markup_percent"), default=str(order.markup_percent or "0"))
+            order.extra_service_amount_uah = to_decimal(request.POST.get("extra_service_amount_uah"), default="0").quantize(Decimal("0.01"))
+            markup_percent = to_decimal(request.POST.get("markup_percent"), default=str(order.markup_percent or "0"))
         else:
             markup_percent = Decimal(order.markup_percent or 0)
         if chosen_customer and can_pick_customer:
             order.customer = chosen_customer
         target_customer = chosen_customer or order.customer
         if not chosen_customer:
-            discount_pct_val = _normalize_discount_percent(getattr(order, "discount_percent", Decimal("0")))
+            discount_pct_val = normalize_discount_percent(getattr(order, "discount_percent", Decimal("0")))
         else:
-            _, discount_pct_val = _customer_discount_multiplier(target_customer)
-        discount_multiplier, _ = _customer_discount_multiplier(pct=discount_pct_val)
+            _, discount_pct_val = customer_discount_multiplier(target_customer)
+        discount_multiplier, _ = customer_discount_multiplier(pct=discount_pct_val)
 
         names = request.POST.getlist("fabric_name")
         colors = request.POST.getlist("fabric_color_code")
@@ -4665,54 +4187,25 @@ def order_fabric_builder(request, pk):
             messages.error(request, "Додайте хоча б одну позицію перед відправкою.")
             return redirect("orders:order_fabric_builder", pk=order.pk)
 
-        OrderFabricItem.objects.filter(order=order).delete()
-
-        total_eur = Decimal("0")
-        bulk = []
+        rows = []
         for idx, name in enumerate(names):
             name = (name or "").strip()
             if not name:
                 continue
-            roll_width_mm = _to_int(_get(roll_widths, idx, "0"), 0)
-            width_mm = _to_int(_get(widths, idx, "0"), 0)
-            included_height_mm = _to_int(_get(included_heights, idx, "0"), 0)
-            height_mm = _to_int(_get(heights, idx, "0"), 0)
-            price_eur_mp = _to_decimal(_get(prices, idx, "0"))
-            quantity = max(_to_int(_get(quantities, idx, "1"), 1), 1)
-            cut_price_eur = _to_decimal(_get(cut_prices, idx, "0"))
-
-            base_price = (price_eur_mp * Decimal(width_mm)) / Decimal("1000")
-            steps = 0
-            if included_height_mm and height_mm > included_height_mm:
-                steps = (height_mm - included_height_mm + 99) // 100
-            multiplier = Decimal("1") + (Decimal("0.10") * Decimal(int(steps)))
-            unit_price = (base_price * multiplier).quantize(Decimal("0.01"))
-            cut_unit = cut_price_eur
-            unit_total = (unit_price + cut_unit) * discount_multiplier
-            item_total = (unit_total * Decimal(quantity)).quantize(Decimal("0.01"))
-            total_eur += item_total
-
-            bulk.append(
-                OrderFabricItem(
-                    order=order,
-                    fabric_name=name,
-                    fabric_color_code=_get(colors, idx, ""),
-                    roll_width_mm=roll_width_mm,
-                    width_mm=width_mm,
-                    included_height_mm=included_height_mm,
-                    height_mm=height_mm,
-                    price_eur_mp=price_eur_mp,
-                    quantity=quantity,
-                    cut_enabled=True,
-                    cut_price_eur=cut_price_eur,
-                    total_eur=item_total,
-                )
+            rows.append(
+                {
+                    "fabric_name": name,
+                    "fabric_color_code": _get(colors, idx, ""),
+                    "roll_width_mm": to_int(_get(roll_widths, idx, "0"), 0),
+                    "width_mm": to_int(_get(widths, idx, "0"), 0),
+                    "included_height_mm": to_int(_get(included_heights, idx, "0"), 0),
+                    "height_mm": to_int(_get(heights, idx, "0"), 0),
+                    "price_eur_mp": to_decimal(_get(prices, idx, "0")),
+                    "quantity": max(to_int(_get(quantities, idx, "1"), 1), 1),
+                    "cut_price_eur": to_decimal(_get(cut_prices, idx, "0")),
+                }
             )
-
-        if bulk:
-            OrderFabricItem.objects.bulk_create(bulk)
-
-        order.total_eur = total_eur.quantize(Decimal("0.01"))
+        order.total_eur = save_fabric_items(order, rows, discount_multiplier)
         order.eur_rate = order.eur_rate or get_current_eur_rate()
         order.markup_percent = markup_percent.quantize(Decimal("0.01"))
 
@@ -4731,6 +4224,7 @@ def order_fabric_builder(request, pk):
             update_fields.append("customer")
         order.discount_percent = discount_pct_val
         order.save(update_fields=update_fields)
+        store_builder_items_json_on_commit(order, KIND_FABRICS)
 
         if new_status and not _apply_status_change(order, new_status, request):
             return redirect(reverse("orders:order_fabric_builder", kwargs={"pk": order.pk}))
@@ -4746,35 +4240,17 @@ def order_fabric_builder(request, pk):
             return redirect(next_url)
         return redirect("orders:fabrics_list")
 
-    items = order.fabric_items.all().order_by("id")
-    fabrics_payload = []
-    for item in items:
-        fabrics_payload.append(
-            {
-                "fabric_name": item.fabric_name,
-                "fabric_color_code": item.fabric_color_code,
-                "roll_width_mm": item.roll_width_mm,
-                "width_mm": item.width_mm,
-                "included_height_mm": item.included_height_mm,
-                "height_mm": item.height_mm,
-                "price_eur_mp": str(item.price_eur_mp),
-                "quantity": item.quantity,
-                "cut_enabled": item.cut_enabled,
-                "cut_price_eur": str(item.cut_price_eur),
-            }
-        )
-
     payment_prompt = request.session.pop("payment_prompt", None)
     shortage_ctx = _payment_shortage_context(order)
     proposal_token = _proposal_token(order)
     proposal_page_url = reverse("orders:proposal_page", args=[proposal_token])
     proposal_excel_url = reverse("orders:proposal_excel", args=[proposal_token])
-    discount_percent = _normalize_discount_percent(getattr(order, "discount_percent", Decimal("0")))
+    discount_percent = normalize_discount_percent(getattr(order, "discount_percent", Decimal("0")))
     customer_discount_percent_js = format(discount_percent, "f")
     context = {
         "order": order,
         "PRICE_SHEET_URL": PRICE_SHEET_URL,
-        "fabrics_json": json.dumps(fabrics_payload, ensure_ascii=False),
+        "fabrics_json": builder_items_json(order, KIND_FABRICS),
         "status_logs": order.status_logs.all(),
         "readonly": readonly,
         "next_status_label": STATUS_LABELS.get(order.next_status()) if order else None,
@@ -4784,9 +4260,7 @@ def order_fabric_builder(request, pk):
         "proposal_page_url": proposal_page_url,
         "proposal_excel_url": proposal_excel_url,
         "customer_discount_percent_js": customer_discount_percent_js,
-        "customers_filter_list": list(
-            customer_profiles_queryset()
-        ) if is_manager(request.user) else [],
+        "customers_filter_list": _customer_picker_selected(order.customer) if is_manager(request.user) else [],
         "can_view_financial_controls": _can_view_financial_controls(request.user, order.customer),
         "return_url": return_url,
     }
@@ -4806,7 +4280,7 @@ def order_fabric_builder_new(request):
             except get_user_model().DoesNotExist:
                 chosen_customer = request.user
 
-    _, discount_pct_val = _customer_discount_multiplier(chosen_customer)
+    _, discount_pct_val = customer_discount_multiplier(chosen_customer)
 
     order = Order.objects.create(
         customer=chosen_customer,
@@ -4994,8 +4468,20 @@ def update_status_bulk(request):
 def order_proposal_page(request, token: str):
     """
     Public read-only commercial proposal page (no auth required).
+    Served from cache by order fingerprint + token, with ETag/Last-Modified revalidation.
     """
     order = _order_from_token(token)
+    rate = _order_rate(order, get_current_eur_rate())
+    return cached_proposal_page(
+        request,
+        order,
+        token,
+        rate,
+        lambda: _render_proposal_page(request, order, token, rate),
+    )
+
+
+def _render_proposal_page(request, order, token: str, rate):
     profile = getattr(order.customer, "customerprofile", None)
     customer_name = getattr(profile, "company_name", "") or getattr(profile, "full_name", "") or str(order.customer)
     customer_phone = getattr(profile, "phone", "") or ""
@@ -5003,7 +4489,6 @@ def order_proposal_page(request, token: str):
     customer_address = _customer_delivery_text(profile)
     customer_website = getattr(profile, "website", "") or ""
     customer_website_url = _normalize_website_url(customer_website)
-    rate = _order_rate(order, get_current_eur_rate())
     base_total_eur = _order_base_total(order)
     markup = Decimal(order.markup_percent or 0)
     markup_multiplier = Decimal("1") + (markup / Decimal("100"))
@@ -5015,7 +4500,6 @@ def order_proposal_page(request, token: str):
 
     items_payload = []
     for idx, it in enumerate(order.items.all(), start=1):
-        options = _collect_item_options(it, rate)
         subtotal_eur = Decimal(it.subtotal_eur or 0)
         sys_lower = (it.system_sheet or "").lower()
         is_flat_system = "плоска" in sys_lower
@@ -5045,7 +4529,7 @@ def order_proposal_page(request, token: str):
                 "control_side_label": _control_side_label(it.control_side),
                 "quantity": it.quantity,
                 "subtotal_eur": subtotal_eur,
-                "subtotal_uah": _round_uah_total(subtotal_eur * rate_with_markup),
+                "subtotal_uah": item_total_uah(it, subtotal_eur, rate, markup_multiplier),
                 "note": it.note,
                 "options": _collect_item_options(it, rate, markup_multiplier),
             }
@@ -5108,7 +4592,7 @@ def order_proposal_page(request, token: str):
                 "warning_text": mos.warning_text,
                 "note": mos.note,
                 "base_total_uah": _round_uah_total((Decimal(mos.subtotal_usd or 0) - Decimal(mos.options_total_usd or 0)) * rate_with_markup),
-                "total_uah": _round_uah_total(Decimal(mos.subtotal_usd or 0) * rate_with_markup),
+                "total_uah": item_total_uah(mos, mos.subtotal_usd, rate, markup_multiplier),
                 "options": option_lines,
                 "option_meta": extra_lines,
             }
@@ -5133,7 +4617,7 @@ def order_proposal_page(request, token: str):
     avatar = getattr(profile, "avatar", None)
     if avatar:
         try:
-            proposal_logo_url = avatar.url
+            proposal_logo_url = avatar_logo_url(avatar) or avatar.url
         except (ValueError, OSError):
             proposal_logo_url = ""
     context = {
@@ -5168,7 +4652,12 @@ def order_proposal_page(request, token: str):
 def order_proposal_excel(request, token: str):
     """Public XLSX download for commercial proposal."""
     order = _order_from_token(token)
-    filename, data = _build_proposal_workbook(order)
+    filename, data = cached_order_workbook(
+        order,
+        "proposal",
+        _order_rate(order, get_current_eur_rate()),
+        lambda: _build_proposal_workbook(order),
+    )
     response = HttpResponse(
         data,
         content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
@@ -5193,7 +4682,7 @@ def order_components_builder_new(request):
             except get_user_model().DoesNotExist:
                 chosen_customer = request.user
 
-    _, discount_pct_val = _customer_discount_multiplier(chosen_customer)
+    _, discount_pct_val = customer_discount_multiplier(chosen_customer)
 
     order = Order.objects.create(
         customer=chosen_customer,        # ✔ обязателен, иначе IntegrityError по customer_id
@@ -1,5 +1,7 @@
+import sys
 from pathlib import Path
 import environ
+from celery.schedules import crontab
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 env = environ.Env(DJANGO_DEBUG=(bool, False))
@@ -131,6 +133,34 @@ CACHES = {
 
 SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
 
+# --- Celery (worker/beat in compose) ---
+CELERY_BROKER_URL = env("CELERY_BROKER_URL", default=env("REDIS_URL", default=""))
+# Tasks execute in-process only under `manage.py test` and in local development (DEBUG without
+# a broker). Elsewhere calls the broker does not accept are deferred (enqueue_on_commit).
+TESTING = sys.argv[1:2] == ["test"]
+CELERY_TASK_ALWAYS_EAGER = env.bool(
+    "CELERY_TASK_ALWAYS_EAGER",
+    default=TESTING or (DEBUG and not CELERY_BROKER_URL),
+)
+if not CELERY_BROKER_URL and CELERY_TASK_ALWAYS_EAGER:
+    CELERY_BROKER_URL = "memory://"
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_TIMEZONE = "Europe/Kyiv"
+CELERY_BEAT_SCHEDULE = {
+    "purge-expired-export-jobs": {
+        "task": "apps.orders.tasks.purge_expired_export_jobs",
+        "schedule": 60 * 60,
+    },
+    "requeue-deferred-tasks": {
+        "task": "apps.orders.tasks.requeue_deferred_tasks",
+        "schedule": 5 * 60,
+    },
+    "snapshot-balances": {
+        "task": "apps.orders.tasks.snapshot_balances_task",
+        "schedule": crontab(hour=0, minute=15),
+    },
+}
+
 STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 STATICFILES_DIRS = [BASE_DIR / "static"]
@@ -140,8 +170,9 @@ MEDIA_ROOT = BASE_DIR / "media"
 # Uploads: allow larger file uploads than Django default 2.5 MB
 FILE_UPLOAD_MAX_MEMORY_SIZE = env.int("FILE_UPLOAD_MAX_MEMORY_SIZE", default=10 * 1024 * 1024)
 DATA_UPLOAD_MAX_MEMORY_SIZE = env.int("DATA_UPLOAD_MAX_MEMORY_SIZE", default=10 * 1024 * 1024)
-# The order builder posts many repeated per-item fields, so the default Django
-# limit (1000) is too low for medium and large orders.
+# The roller builder now posts its rows as one JSON field (items_json, see
+# apps/orders/services_builder_items.py), but the fabric/mosquito builders and pages
+# rendered before that still post repeated per-item fields, so keep the raised limit.
 DATA_UPLOAD_MAX_NUMBER_FIELDS = env.int("DATA_UPLOAD_MAX_NUMBER_FIELDS", default=10000)
 
 REST_FRAMEWORK = {
@@ -61,6 +61,45 @@ $(document).ajaxStop(function () {
     el.addEventListener('hidden.bs.toast', () => el.remove());
   };
 
+  // UA: Фонове вивантаження Excel з прогресом; EN: background Excel export with progress polling
+  $(document).on("click", "a[data-export-job]", function (e) {
+    e.preventDefault();
+    const link = $(this);
+    if (link.data("exportBusy")) return;
+    link.data("exportBusy", true);
+    const label = link.html();
+    const done = function () {
+      link.data("exportBusy", false);
+      link.html(label);
+    };
+    const poll = function (statusUrl) {
+      $.ajax({ url: statusUrl, global: false, dataType: "json" })
+        .done(function (data) {
+          if (data.download_url) {
+            done();
+            window.location = data.download_url;
+          } else if (data.ok === false) {
+            done();
+            window.showToast(data.error || "Помилка вивантаження", "danger");
+          } else {
+            link.text(`Формується… ${data.progress || 0}%`);
+            setTimeout(function () { poll(statusUrl); }, 1500);
+          }
+        })
+        .fail(function () {
+          done();
+          window.showToast("Помилка вивантаження", "danger");
+        });
+    };
+    $.ajax({ url: link.data("exportJob"), type: "POST", global: false, dataType: "json" })
+      .done(function (data) { poll(data.status_url); })
+      .fail(function () {
+        // Fallback: synchronous download.
+        done();
+        window.location = link.attr("href");
+      });
+  });
+
 
 
 })();